@@ -0,0 +1,495 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import signal
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import streamlit as st
+from streamlit import config as st_config
+from streamlit import logger as st_logger
+
+#outside `streamlit run` every st call logs a warning (the option is read when the config is first parsed)
+st_config.set_option('logger.level', 'error')
+st_logger.set_log_level('error')
+
+#the benchmarks are run from the repository root or from this folder, so the app's modules are imported from the parent folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stats_test_functions import (anova_test, batch_normality, chi_square_goodness_of_fit, chi_square_test_of_independence, contingency_tables,
+                                  factorial_anova, fishers_exact_test, friedman_test, goodness_of_fit, independent_samples_z_test,
+                                  independent_t_test, kendalls_tau_test, kruskal_wallis_test, log_linear_analysis, mann_whitney_u_test,
+                                  mcnemars_test, one_sample_t_test, one_sample_z_test, one_way_ancova, paired_t_test, paired_z_test,
+                                  partial_correlation, pearson_correlation, posthoc_tests, repeated_measures_anova_v1, stats_tests,
+                                  synthetic_data_generator, wilcoxon_signed_rank_test)
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+#------------------------------------
+# <<< Benchmark cases >>>
+#------------------------------------
+#each case runs the headless parts of a test's flow (the assumption checks and the test itself, called with the column
+#names the select boxes would return) on a synthetic dataset from synthetic_data_generator. Outside `streamlit run`
+#the st calls do all their work (building dataframes and chart specs) but draw nothing, so they are timed as well.
+
+def _one_sample_t_test(df):
+    one_sample_t_test.check_normality_one_sample_t_test(df, 'Values')
+    stats_tests.one_sample_t_test(df['Values'].dropna(), 50)
+
+
+def _one_sample_z_test(df):
+    one_sample_z_test.check_normality_one_sample_z_test(df, 'Values')
+
+
+def _single_sample_wilcoxon(df):
+    wilcoxon_signed_rank_test.check_symmetry_of_differences(df, 'sample1', None, 50)
+    stats_tests.wilcoxon_signed_rank_statistic(df, 'sample1', None, 50)
+
+
+def _independent_t_test(df):
+    independent_t_test.check_normality(df, 'sample1', 'sample2')
+    independent_t_test.check_homoscedasticity(df, 'sample1', 'sample2')
+    stats_tests.independent_t_test(df['sample1'].dropna(), df['sample2'].dropna())
+
+
+def _independent_z_test(df):
+    independent_samples_z_test.check_normality_z_test(df, 'sample_1', 'sample_2')
+
+
+def _paired_t_test(df):
+    paired_t_test.check_normality_qqplot_altair(df, 'sample1_time_point_A', 'sample1_time_point_B')
+    paired_t_test.check_for_outliers_altair(df, 'sample1_time_point_A', 'sample1_time_point_B')
+    paired_t_test.perform_shapiro_wilk_test_paired_t_test_check_with_explainers(df, 'sample1_time_point_A', 'sample1_time_point_B')
+    df_complete = df.dropna()
+    stats_tests.paired_t_test(df_complete['sample1_time_point_A'], df_complete['sample1_time_point_B'])
+
+
+def _paired_z_test(df):
+    paired_z_test.check_normality_qqplot_altair(df, 'before', 'after')
+    paired_z_test.perform_shapiro_wilk_test_paired_z_test(df, 'before', 'after')
+    paired_z_test.check_for_outliers_paired_z_test(df, 'before', 'after')
+
+
+def _wilcoxon_signed_rank_test(df):
+    wilcoxon_signed_rank_test.check_symmetry_of_differences(df, 'sample1_time_point_A', 'sample1_time_point_B')
+    stats_tests.wilcoxon_signed_rank(df, 'sample1_time_point_A', 'sample1_time_point_B')
+
+
+def _one_way_anova(df):
+    anova_test.check_normality(df, 'Group', 'Value')
+    anova_test.check_homogeneity(df, 'Group', 'Value')
+    posthoc_tests.display_posthoc_comparisons(df, 'Group', 'Value', ['Tukey HSD'])
+
+
+def _kruskal_wallis(df):
+    kruskal_wallis_test.check_distribution_shape(df, 'Group', 'Score')
+    kruskal_wallis_test.check_group_size(df, 'Group', 'Score')
+    stats_tests.kruskal_wallis(df, 'Group', 'Score')
+
+
+def _mann_whitney_u_test(df):
+    mann_whitney_u_test.check_two_groups(df, 'Therapy', 'Pain_Relief_Score')
+    mann_whitney_u_test.check_distribution_shape(df, 'Therapy', 'Pain_Relief_Score')
+    stats_tests.mann_whitney_u(df, 'Therapy', 'Pain_Relief_Score')
+
+
+def _factorial_anova(df):
+    factor_columns = ('Fertilizer', 'Irrigation')
+    factorial_anova.check_cell_sizes(df, 'Yield', factor_columns)
+    factorial_anova.check_homogeneity(df, 'Yield', factor_columns)
+    factorial_anova.check_normality_of_residuals(df, 'Yield', factor_columns)
+    factorial_anova.display_factorial_anova_table(df, 'Yield', factor_columns)
+
+
+def _one_way_ancova(df):
+    dict_ancova = one_way_ancova.one_way_ancova(df, 'Teaching_Method', 'Post_Test', ('Pre_Test',))
+    one_way_ancova.check_homogeneity_of_regression_slopes(dict_ancova)
+    one_way_ancova.check_linearity(df, 'Teaching_Method', 'Post_Test', 'Pre_Test')
+    one_way_ancova.check_residuals(df, 'Teaching_Method', 'Post_Test', ('Pre_Test',), dict_ancova)
+
+
+def _repeated_measures_anova(df):
+    condition_columns = ('Baseline', 'Time1', 'Time2')
+    dict_moments = repeated_measures_anova_v1.get_condition_moments(df, condition_columns)
+    dict_rm_anova = repeated_measures_anova_v1.repeated_measures_anova(dict_moments, condition_columns)
+    repeated_measures_anova_v1.check_sphericity(dict_rm_anova)
+    repeated_measures_anova_v1.check_normality_of_residuals(dict_moments)
+
+
+def _friedman_test(df):
+    condition_columns = tuple(column for column in df.columns if column != 'SubjectID')
+    dict_rank_statistics = friedman_test.get_friedman_rank_statistics(df, condition_columns)
+    friedman_test.check_number_of_subjects(dict_rank_statistics, condition_columns)
+    friedman_test.friedman_test(dict_rank_statistics)
+
+
+def _pearson_correlation(df):
+    pearson_correlation.check_normality_qqplot_altair(df, 'Variable1', 'Variable2')
+    pearson_correlation.check_normality_pearson_correlation_shapiro(df, 'Variable1', 'Variable2')
+    pearson_correlation.check_linearity_scatter_plot(df, 'Variable1', 'Variable2')
+    pearson_correlation.check_homoscedasticity(df, 'Variable1', 'Variable2')
+
+
+def _spearmans_rho(df):
+    stats_tests.spearman_rank_correlation(df, 'Variable1', 'Variable2')
+
+
+def _kendalls_tau(df):
+    kendalls_tau_test.check_monotonic_relationship(df, 'Satisfaction', 'Likelihood_To_Recommend')
+    stats_tests.kendall_tau(df, 'Satisfaction', 'Likelihood_To_Recommend')
+
+
+def _partial_correlation(df):
+    partial_correlation.check_multicollinearity_and_partial_correlations(df, 'Exercise_Hours', 'Blood_Pressure', ['Age', 'BMI'])
+
+
+def _chi_square_goodness_of_fit(df):
+    df = df.assign(Expected=df['Observed'].sum() / len(df))
+    chi_square_goodness_of_fit.check_expected_frequencies(df, 'Observed', 'Category')
+    goodness_of_fit.display_goodness_of_fit_results(df, 'Observed')
+
+
+def _exact_goodness_of_fit(df, multinomial=False):
+    df = df.assign(Expected=df['Observed'].sum() / len(df))
+    goodness_of_fit.check_number_of_categories(df, 'Observed', multinomial=multinomial)
+    goodness_of_fit.display_goodness_of_fit_results(df, 'Observed', exact=True)
+
+
+def _chi_square_test_of_independence(df):
+    chi_square_test_of_independence.check_expected_frequencies(df, 'Gender', 'Preference')
+    stats_tests.chi_square_homogeneity(contingency_tables.get_contingency_table(df, 'Gender', 'Preference')['observed'])
+
+
+def _cramers_v(df):
+    contingency_tables.cramers_v(df, 'Variable_1', 'Variable_2')
+
+
+def _phi_coefficient(df):
+    contingency_tables.phi_coefficient(df, 'Variable_1', 'Variable_2')
+
+
+def _fishers_exact_test(df):
+    fishers_exact_test.check_binary_data(df, 'Group', 'Outcome')
+    fishers_exact_test.check_sample_size_for_fishers_exact_test(df, 'Group', 'Outcome')
+
+
+def _mcnemars_test(df):
+    mcnemars_test.check_binary_data_mcnemars_test(df, 'Before', 'After')
+
+
+def _log_linear_analysis(df):
+    log_linear_analysis.check_expected_frequencies(df, ('Smoker', 'Exercise', 'Heart_Disease'))
+
+
+#test name (as in the app, and as in synthetic_data_generator) -> (function, group or category counts to run at)
+#None runs the test's own number of groups
+dict_benchmark_cases = {
+    'Single sample T-test': (_one_sample_t_test, (None,)),
+    'Single sample Z-test': (_one_sample_z_test, (None,)),
+    'Single sample wilcoxon signed-rank test': (_single_sample_wilcoxon, (None,)),
+    'Independent samples T-test': (_independent_t_test, (None,)),
+    'Independent samples Z-test': (_independent_z_test, (None,)),
+    'Paired samples T-test': (_paired_t_test, (None,)),
+    'Paired samples Z-test': (_paired_z_test, (None,)),
+    'Wilcoxon signed-rank test': (_wilcoxon_signed_rank_test, (None,)),
+    'One-way ANOVA': (_one_way_anova, (3, 30, 300)),
+    'Kruskal-Wallis': (_kruskal_wallis, (3, 30, 300)),
+    'Mann-Whitney U Test': (_mann_whitney_u_test, (None,)),
+    'Factorial ANOVA': (_factorial_anova, (3, 30, 300)),
+    'One-way ANCOVA': (_one_way_ancova, (3, 30, 300)),
+    'One-way Repeated Measures ANOVA': (_repeated_measures_anova, (None,)),
+    'Friedman test': (_friedman_test, (4, 20)),
+    'Pearson correlation': (_pearson_correlation, (None,)),
+    "Spearman's Rho": (_spearmans_rho, (None,)),
+    "Kendall's Tau": (_kendalls_tau, (None,)),
+    'Partial correlation': (_partial_correlation, (None,)),
+    'Chi-square goodness of fit': (_chi_square_goodness_of_fit, (5, 50, 500)),
+    'G-test of Goodness of Fit': (_chi_square_goodness_of_fit, (5, 50, 500)),
+    'Exact test of Goodness of Fit': (_exact_goodness_of_fit, (None,)),
+    'Exact test of Goodness of Fit (multinomial model)': (lambda df: _exact_goodness_of_fit(df, multinomial=True), (4, 8, 16)),
+    'Chi-square test of independence': (_chi_square_test_of_independence, (2, 10, 50)),
+    "Cramer's V": (_cramers_v, (3, 30, 300)),
+    'Phi co-efficient': (_phi_coefficient, (None,)),
+    'Fischers Exact test': (_fishers_exact_test, (None,)),
+    'McNemars test': (_mcnemars_test, (None,)),
+    'Log-linear analysis': (_log_linear_analysis, (None,)),
+}
+
+list_metrics = ['wall_seconds', 'cpu_seconds', 'peak_rss_mb', 'peak_allocated_mb']
+
+#------------------------------------
+# <<< Measuring a case >>>
+#------------------------------------
+
+def _rss_mb():
+    """
+    Current resident set size in MB (Linux), or the peak so far where /proc is not available.
+    """
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+
+def _reset_peak_rss():
+    """
+    Resets the process's peak RSS (Linux 4.0+), so the peak measured afterwards belongs to the case rather than to
+    generating its data. Returns False where this is not possible.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 2**10
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+
+def clear_caches():
+    """
+    Clears the app's cached results, so the next call is a cold rerun, but keeps the shared process pool, which
+    the app starts once and keeps across reruns and sessions.
+    """
+    for module in list(sys.modules.values()):
+        if getattr(module, '__name__', '').startswith('stats_test_functions.'):
+            for value in list(vars(module).values()):
+                #the cached functions are the callables with a clear() (Streamlit caches, wrapped by performance_tracking.tracked_cache
+                #or not) or a cache_clear() (functools.lru_cache, e.g. the studentized range tables)
+                if callable(value) and callable(getattr(value, 'clear', None)) and value is not batch_normality.get_process_pool:
+                    value.clear()
+                elif callable(value) and callable(getattr(value, 'cache_clear', None)):
+                    value.cache_clear()
+    st.cache_data.clear()
+
+
+def _run_case(test_name, number_of_rows, number_of_groups, repeats, trace_allocations, connection):
+    """
+    Runs one case in its own process and sends its measurements back: the best wall and CPU time of the repeats
+    (the app's caches are cleared before each, so every repeat is a cold rerun), the peak RSS above the RSS with the
+    data loaded, and the peak memory allocated through Python (tracemalloc, which numpy and pandas report to).
+    """
+    #own process group, so a case that times out is stopped together with any worker processes it started
+    os.setpgrp()
+    function = dict_benchmark_cases[test_name][0]
+    dict_result = {}
+    try:
+        df = synthetic_data_generator.create_synthetic_data(test_name, number_of_rows, number_of_groups=number_of_groups)
+        dict_result['dataset_mb'] = float(df.memory_usage(deep=True).sum()) / 2**20
+        #one untimed run on about 1,000 evenly spaced rows of the same data, so the libraries' lazy imports are not
+        #timed; a failure there is recorded apart from the case, which is still measured
+        try:
+            function(df.iloc[::max(len(df) // 1000, 1)])
+        except Exception as error:
+            dict_result['warm_up_error'] = f'{type(error).__name__}: {error}'
+
+        list_wall_seconds, list_cpu_seconds = [], []
+        rss_before = _rss_mb()
+        peak_was_reset = _reset_peak_rss()
+        for _ in range(repeats):
+            clear_caches()
+            start_wall, start_cpu = time.perf_counter(), time.process_time()
+            function(df)
+            list_wall_seconds.append(time.perf_counter() - start_wall)
+            list_cpu_seconds.append(time.process_time() - start_cpu)
+        dict_result['wall_seconds'] = min(list_wall_seconds)
+        dict_result['cpu_seconds'] = min(list_cpu_seconds)
+        dict_result['peak_rss_mb'] = max(_peak_rss_mb() - rss_before, 0.0) if peak_was_reset else None
+
+        if trace_allocations:
+            clear_caches()
+            tracemalloc.start()
+            function(df)
+            dict_result['peak_allocated_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+    except Exception as error:
+        dict_result['error'] = f'{type(error).__name__}: {error}'
+    #the pool's workers would otherwise outlive the case and keep its process from being joined
+    batch_normality.get_process_pool().shutdown()
+    connection.send(dict_result)
+    connection.close()
+
+
+def run_case(test_name, number_of_rows, number_of_groups=None, repeats=3, trace_allocations=True, timeout=600):
+    """
+    Runs one case in a fresh process (so its peak RSS is its own, and a case that runs out of memory or time is
+    recorded rather than stopping the suite).
+
+    Args:
+    test_name (str): A key of dict_benchmark_cases.
+    number_of_rows (int): Rows of the synthetic dataset (the total count for goodness of fit tests).
+    number_of_groups (int, optional): Groups, conditions or categories; the test's default if None. Defaults to None.
+    repeats (int, optional): Timed repeats; the fastest is kept. Defaults to 3.
+    trace_allocations (bool, optional): Also run once under tracemalloc (slower). Defaults to True.
+    timeout (float, optional): Seconds before the case is stopped. Defaults to 600.
+
+    Returns:
+    dict: The metrics in list_metrics, 'dataset_mb', 'error' if the case failed and 'warm_up_error' if only the
+    untimed warm-up run failed.
+    """
+    context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_case, args=(test_name, number_of_rows, number_of_groups, repeats, trace_allocations, sender))
+    process.start()
+    sender.close()
+
+    dict_result = None
+    if receiver.poll(timeout):
+        try:
+            dict_result = receiver.recv()
+        except EOFError:
+            pass
+    process.join(5)
+    if process.is_alive():
+        os.killpg(process.pid, signal.SIGKILL)
+        process.join()
+        dict_result = {'error': f'Timed out after {timeout}s'}
+    elif dict_result is None:
+        dict_result = {'error': f'Process exited with code {process.exitcode} (e.g. killed for running out of memory)'}
+    return dict_result
+
+#------------------------------------
+# <<< Baselines and regressions >>>
+#------------------------------------
+
+def case_key(test_name, number_of_rows, number_of_groups):
+    return f'{test_name} | rows={number_of_rows} | groups={number_of_groups if number_of_groups is not None else "default"}'
+
+
+def load_baselines(path=BASELINES_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file).get('results', {})
+
+
+def save_baselines(dict_results, path=BASELINES_PATH):
+    """
+    Writes the results as the new baselines, with the machine they were measured on.
+    """
+    dict_baselines = {
+        'machine': {'platform': platform.platform(), 'processor': platform.machine(), 'cpus': os.cpu_count(),
+                    'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__},
+        'results': dict(sorted(dict_results.items())),
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(dict_baselines, file, indent=2)
+        file.write('\n')
+
+
+def find_regressions(dict_results, dict_baselines, threshold=0.25, min_seconds=0.05, min_mb=5.0):
+    """
+    Compares results with the baselines. A metric regresses when it is more than threshold above its baseline and
+    also more than min_seconds or min_mb above it (so timer and allocator noise on small cases is ignored); a case
+    that now fails but did not before is also a regression.
+
+    Args:
+    dict_results (dict): case_key -> metrics, from this run.
+    dict_baselines (dict): case_key -> metrics, from load_baselines.
+    threshold (float, optional): Allowed relative increase. Defaults to 0.25.
+    min_seconds (float, optional): Smallest time increase counted. Defaults to 0.05.
+    min_mb (float, optional): Smallest memory increase counted. Defaults to 5.
+
+    Returns:
+    list: A description of each regression.
+    """
+    list_regressions = []
+    for key, dict_result in dict_results.items():
+        dict_baseline = dict_baselines.get(key)
+        if dict_baseline is None:
+            continue
+        if 'error' in dict_result:
+            if 'error' not in dict_baseline:
+                list_regressions.append(f"{key}: now fails ({dict_result['error']})")
+            continue
+        for metric in list_metrics:
+            new, old = dict_result.get(metric), dict_baseline.get(metric)
+            if new is None or old is None:
+                continue
+            min_increase = min_seconds if metric.endswith('seconds') else min_mb
+            if new > old * (1 + threshold) and new - old > min_increase:
+                list_regressions.append(f"{key}: {metric} {old:.3f} -> {new:.3f} (+{(new / old - 1) * 100 if old else np.inf:.0f}%)")
+    return list_regressions
+
+#------------------------------------
+# <<< Command line >>>
+#------------------------------------
+#python benchmarks/run_benchmarks.py                                  run every case, fail on regressions
+#python benchmarks/run_benchmarks.py --sizes 1000 100000 --tests "One-way ANOVA"
+#python benchmarks/run_benchmarks.py --update-baselines               record the results as the new baselines
+
+def main(list_args=None):
+    parser = argparse.ArgumentParser(description='Benchmark the assumption checks and tests at several data sizes.')
+    parser.add_argument('--tests', nargs='+', default=list(dict_benchmark_cases), help='Tests to run (default: all).')
+    parser.add_argument('--sizes', nargs='+', type=float, default=[1e3, 1e5, 1e7], help='Numbers of rows.')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--no-allocations', action='store_true', help='Skip the tracemalloc run.')
+    parser.add_argument('--timeout', type=float, default=600, help='Seconds before a case is stopped.')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative increase over the baselines.')
+    parser.add_argument('--baselines', default=BASELINES_PATH)
+    parser.add_argument('--update-baselines', action='store_true', help='Save the results as the baselines (merged with the existing ones).')
+    parser.add_argument('--output', help='Also write the results to this JSON file.')
+    args = parser.parse_args(list_args)
+
+    unknown_tests = set(args.tests) - set(dict_benchmark_cases)
+    if unknown_tests:
+        parser.error(f'Unknown tests: {", ".join(sorted(unknown_tests))}')
+
+    dict_baselines = load_baselines(args.baselines)
+    dict_results = {}
+    for test_name in args.tests:
+        for number_of_groups in dict_benchmark_cases[test_name][1]:
+            for number_of_rows in (int(size) for size in args.sizes):
+                key = case_key(test_name, number_of_rows, number_of_groups)
+                dict_result = run_case(test_name, number_of_rows, number_of_groups, repeats=args.repeats,
+                                       trace_allocations=not args.no_allocations, timeout=args.timeout)
+                dict_results[key] = dict_result
+                if 'warm_up_error' in dict_result:
+                    print(f"{key}: warm-up failed ({dict_result['warm_up_error']})", flush=True)
+                if 'error' in dict_result:
+                    print(f"{key}: {dict_result['error']}", flush=True)
+                else:
+                    print(f"{key}: {dict_result['wall_seconds']:.3f}s wall, {dict_result['cpu_seconds']:.3f}s CPU, "
+                          f"{dict_result['peak_rss_mb'] or 0:.1f} MB peak RSS, {dict_result.get('peak_allocated_mb', 0):.1f} MB allocated", flush=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(dict_results, file, indent=2)
+
+    if args.update_baselines:
+        save_baselines({**dict_baselines, **dict_results}, args.baselines)
+        print(f'Saved {len(dict_results)} baselines to {args.baselines}')
+        return 0
+
+    list_regressions = find_regressions(dict_results, dict_baselines, threshold=args.threshold)
+    list_new = [key for key in dict_results if key not in dict_baselines]
+    if list_new:
+        print(f'{len(list_new)} cases have no baseline yet (run with --update-baselines to add them).')
+    if list_regressions:
+        print(f'{len(list_regressions)} regressions beyond {args.threshold:.0%}:')
+        for regression in list_regressions:
+            print(f'  {regression}')
+        return 1
+    print('No regressions.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
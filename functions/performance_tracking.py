@@ -0,0 +1,730 @@
+import argparse
+import atexit
+import functools
+import itertools
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import ContextDecorator
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+#------------------------------------
+# <<< Timing spans >>>
+#------------------------------------
+#each rerun of the script runs on its own thread, so the spans of a rerun are kept in a thread-local record. When no
+#record has been started (debug mode off, the process pool's workers, the benchmarks) the spans do nothing but check
+#for it, so the modules can wrap their work in them unconditionally.
+
+_local = threading.local()
+_rerun_numbers = itertools.count(1)
+
+
+def start_rerun(on_update=None, track_memory=False):
+    """
+    Starts recording the spans of the current rerun.
+
+    Args:
+    on_update (callable, optional): Called after each top-level span ends (e.g. to redraw the performance panel). Defaults to None.
+    track_memory (bool, optional): Whether to also record the memory of each span (see start_memory_tracking). Defaults to False.
+
+    Returns:
+    dict: The rerun's record: 'start', 'start_cpu', a list of 'spans' in the order they started, the 'stack' of open
+    spans, and the 'context' (test, data size) written with each span to the trace file.
+    """
+    context = get_script_run_ctx()
+    _local.dict_rerun = {
+        'number': next(_rerun_numbers),
+        'session_id': context.session_id if context is not None else None,
+        'start': time.perf_counter(),
+        'start_time': time.time(),
+        'start_cpu': time.thread_time(),
+        'spans': [],
+        'stack': [],
+        'context': {},
+        'on_update': on_update,
+        'track_memory': track_memory and tracemalloc.is_tracing(),
+    }
+    return _local.dict_rerun
+
+
+def stop_rerun():
+    """
+    Stops recording spans on the current thread and returns the rerun's record (None if none was started).
+    """
+    dict_rerun = getattr(_local, 'dict_rerun', None)
+    _local.dict_rerun = None
+    return dict_rerun
+
+
+def get_current_rerun():
+    return getattr(_local, 'dict_rerun', None)
+
+
+def set_rerun_context(**context):
+    """
+    Records what the rerun is working on (e.g. test=..., rows=len(df)), which is written with every later span of the
+    rerun to the trace file so the spans can be grouped by test and data size offline.
+    """
+    dict_rerun = get_current_rerun()
+    if dict_rerun is not None:
+        dict_rerun['context'].update(context)
+
+
+class timed_span(ContextDecorator):
+    """
+    Times a stage of the rerun (wall time, and CPU time of the script's thread, so work done by the process pool
+    is not counted). Spans nest: a span started inside another is recorded as its child.
+
+    When the rerun tracks memory, the span also records the peak of traced memory above its start and the net
+    memory it kept. Spans with memory_snapshot=True record the lines that allocated the memory they kept, and the
+    lines that allocated the memory held at their (sampled) peak, which is where a temporary that is freed before
+    the stage ends shows up.
+
+    Args:
+    name (str): The stage, as shown in the performance panel.
+    memory_snapshot (bool, optional): Whether to compare tracemalloc snapshots around the stage. Defaults to False.
+    category (str, optional): The kind of stage in the trace file: 'stage', 'check', 'cache' or 'render'. Defaults to 'stage'.
+    **attributes: Anything else worth recording about the stage (e.g. rows=len(df)).
+
+    Example:
+    >>> with timed_span('Ingestion', source='upload'):
+    ...     df = pd.read_csv(file)
+    """
+    def __init__(self, name, memory_snapshot=False, category='stage', **attributes):
+        self.name = name
+        self.memory_snapshot = memory_snapshot
+        self.category = category
+        self.attributes = attributes
+        self.dict_span = None
+        self.snapshot = None
+        self.peak_sampler = None
+
+    def __enter__(self):
+        dict_rerun = get_current_rerun()
+        if dict_rerun is None:
+            return self
+        stack = dict_rerun['stack']
+        #the snapshot is taken before the span's start so that its cost and memory are not counted in the span
+        #(another session can stop tracemalloc mid-rerun, so it is checked each time)
+        track_memory = dict_rerun['track_memory'] and tracemalloc.is_tracing()
+        if track_memory and self.memory_snapshot:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.peak_sampler = _PeakSampler()
+        memory_start = _update_memory_peaks(stack) if track_memory else None
+        self.dict_span = {
+            'name': self.name,
+            'depth': len(stack),
+            'parent': stack[-1]['index'] if stack else None,
+            'index': len(dict_rerun['spans']),
+            'start': time.perf_counter() - dict_rerun['start'],
+            'start_cpu': time.thread_time(),
+            'wall_seconds': None,
+            'cpu_seconds': None,
+            'cache': None,
+            'attributes': dict(self.attributes),
+        }
+        if memory_start is not None:
+            self.dict_span.update({'memory_start': memory_start, 'memory_peak': memory_start})
+        dict_rerun['spans'].append(self.dict_span)
+        stack.append(self.dict_span)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        dict_span = self.dict_span
+        if dict_span is None:
+            return False
+        dict_rerun = get_current_rerun()
+        dict_span['wall_seconds'] = time.perf_counter() - dict_rerun['start'] - dict_span['start']
+        dict_span['cpu_seconds'] = time.thread_time() - dict_span.pop('start_cpu')
+        if 'memory_start' in dict_span and tracemalloc.is_tracing():
+            memory_end = _update_memory_peaks(dict_rerun['stack'])
+            memory_start = dict_span.pop('memory_start')
+            dict_span['peak_mb'] = (dict_span.pop('memory_peak') - memory_start) / 1024**2
+            dict_span['net_mb'] = (memory_end - memory_start) / 1024**2
+        if self.snapshot is not None:
+            peak_snapshot = self.peak_sampler.stop()
+            #a cache hit keeps nothing new, so only misses and uncached stages are worth comparing
+            if dict_span['cache'] != 'hit' and tracemalloc.is_tracing():
+                dict_span['retained_allocations'] = get_largest_allocations(self.snapshot, tracemalloc.take_snapshot())
+                if peak_snapshot is not None:
+                    dict_span['peak_allocations'] = get_largest_allocations(self.snapshot, peak_snapshot)
+            self.snapshot = self.peak_sampler = None
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+        if exc_type is not None:
+            #st.stop() and st.rerun() end the rerun with an exception, which is not an error of the stage
+            dict_span['attributes']['ended_by'] = exc_type.__name__
+        if dict_rerun['stack'] and dict_rerun['stack'][-1] is dict_span:
+            dict_rerun['stack'].pop()
+        if trace_writer is not None:
+            trace_writer.write(span_to_trace_event(dict_rerun, dict_span, self.category))
+        if dict_span['depth'] == 0 and dict_rerun['on_update'] is not None:
+            dict_rerun['on_update']()
+        self.dict_span = None
+        return False
+
+    def set(self, **attributes):
+        """
+        Adds attributes to the span once they are known (e.g. the size of the data it loaded).
+        """
+        if self.dict_span is not None:
+            self.dict_span['attributes'].update(attributes)
+
+
+def timed(function):
+    """
+    Decorator that wraps every call of a function in a span named after its module and function,
+    e.g. anova_test.check_normality.
+    """
+    name = f"{function.__module__.rsplit('.', 1)[-1]}.{function.__name__}"
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with timed_span(name, category='check'):
+            return function(*args, **kwargs)
+    return wrapper
+
+#------------------------------------
+# <<< Cache hits and misses >>>
+#------------------------------------
+
+def tracked_cache(cache_decorator):
+    """
+    Applies a Streamlit cache decorator and records each call in a span whose 'cache' is 'hit', or 'miss' when the
+    function had to run. The cache is keyed on the original function (its source and arguments), and its clear()
+    is passed through.
+
+    Args:
+    cache_decorator: e.g. st.cache_resource(show_spinner=False, max_entries=64).
+
+    Example:
+    >>> @tracked_cache(st.cache_resource(show_spinner=False, max_entries=64))
+    ... def get_contingency_table(df, row_column, column_column): ...
+    """
+    def decorate(function):
+        name = f"{function.__module__.rsplit('.', 1)[-1]}.{function.__name__}"
+
+        @functools.wraps(function)
+        def compute(*args, **kwargs):
+            dict_rerun = get_current_rerun()
+            if dict_rerun is not None and dict_rerun['stack']:
+                dict_rerun['stack'][-1]['cache'] = 'miss'
+            return function(*args, **kwargs)
+
+        cached_function = cache_decorator(compute)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            #the cached helpers are where the crosstabs and groupbys are built, so their memory is worth attributing
+            with timed_span(name, memory_snapshot=True, category='cache') as span:
+                if span.dict_span is not None:
+                    span.dict_span['cache'] = 'hit'
+                result = cached_function(*args, **kwargs)
+            record_session_footprint(name, result, derived=True)
+            return result
+
+        wrapper.clear = cached_function.clear
+        return wrapper
+    return decorate
+
+#------------------------------------
+# <<< Memory >>>
+#------------------------------------
+#tracemalloc traces the whole process: while it runs, the allocations of every session (and of Streamlit itself) are
+#counted, and Python allocations get noticeably slower. So it is only started from the debug mode panel, and the
+#figures are most accurate when one session is rerunning at a time.
+
+#a stage's peak is attributed from a snapshot taken by a background thread when the traced memory reaches a new high
+PEAK_SNAPSHOT_MIN_MB = 10
+PEAK_SAMPLING_SECONDS = 0.005
+
+MODULES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'stats_test_functions') + os.sep
+
+_dict_session_footprints = {}
+_footprints_lock = threading.Lock()
+
+
+def start_memory_tracking(number_of_frames=10):
+    """
+    Starts tracemalloc, keeping enough frames per allocation to reach back from pandas and numpy internals to the
+    calling line in the stats_test_functions modules (each extra frame makes every allocation slower to trace).
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(number_of_frames)
+
+
+def stop_memory_tracking():
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def _update_memory_peaks(list_open_spans):
+    """
+    Credits the peak of traced memory since the last reset to every open span and resets it, so that nested spans
+    each get their own peak. Returns the memory traced now.
+    """
+    current, peak = tracemalloc.get_traced_memory()
+    for dict_span in list_open_spans:
+        if 'memory_peak' in dict_span:
+            dict_span['memory_peak'] = max(dict_span['memory_peak'], peak)
+    tracemalloc.reset_peak()
+    return current
+
+
+class _PeakSampler:
+    """
+    Samples the traced memory from a background thread while a stage runs, and takes a tracemalloc snapshot each
+    time it reaches a new high (by at least PEAK_SNAPSHOT_MIN_MB), so the allocations behind the stage's peak can be
+    attributed even when the stage frees them before it ends. It is a sample: a temporary that lives for less than
+    PEAK_SAMPLING_SECONDS can be missed, and the snapshot can be up to PEAK_SNAPSHOT_MIN_MB below the peak.
+    """
+    def __init__(self):
+        self.snapshot = None
+        self.threshold = tracemalloc.get_traced_memory()[0] + PEAK_SNAPSHOT_MIN_MB * 1024**2
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._sample, name='memory-peak-sampler', daemon=True)
+        self.thread.start()
+
+    def _sample(self):
+        while not self.stop_event.wait(PEAK_SAMPLING_SECONDS) and tracemalloc.is_tracing():
+            current = tracemalloc.get_traced_memory()[0]
+            if current >= self.threshold:
+                self.snapshot = tracemalloc.take_snapshot()
+                self.threshold = current + PEAK_SNAPSHOT_MIN_MB * 1024**2
+
+    def stop(self):
+        """
+        Stops sampling and returns the snapshot taken at the highest sampled memory (None if it never rose by PEAK_SNAPSHOT_MIN_MB).
+        """
+        self.stop_event.set()
+        self.thread.join()
+        return self.snapshot
+
+
+def get_largest_allocations(snapshot_before, snapshot_after, number_of_lines=3):
+    """
+    Compares two tracemalloc snapshots and attributes the memory allocated between them, and still held, to the
+    innermost line of the stats_test_functions modules that led to each allocation (so a groupby is charged to the
+    line calling it, not to pandas).
+
+    Args:
+    snapshot_before (Snapshot): Taken at the start of the stage.
+    snapshot_after (Snapshot): Taken at the end of the stage (for the memory it kept) or at its peak (for the memory behind the peak).
+    number_of_lines (int, optional): Number of lines returned. Defaults to 3.
+
+    Returns:
+    list: (file:line, MB) pairs, largest first.
+    """
+    #tracemalloc is still tracing while this runs, which makes every allocation here slow, so rather than filtering
+    #the snapshots (fnmatch on every frame of every trace), only the tracebacks that grew are searched for a module frame
+    dict_lines = {}
+    for stat in snapshot_after.compare_to(snapshot_before, 'traceback'):
+        if stat.size_diff <= 0:
+            continue
+        #the frames run from the oldest call to the most recent
+        frame = next((frame for frame in reversed(stat.traceback) if frame.filename.startswith(MODULES_DIRECTORY)), None)
+        if frame is None:
+            continue
+        line = f'{os.path.basename(frame.filename)}:{frame.lineno}'
+        dict_lines[line] = dict_lines.get(line, 0) + stat.size_diff
+    return [(line, size / 1024**2) for line, size in sorted(dict_lines.items(), key=lambda item: -item[1])[:number_of_lines]]
+
+
+def get_size_in_bytes(value, depth=0):
+    """
+    Returns the memory held by a frame, array or a (shallow) container of them, counting the strings of object
+    columns too.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict) and depth < 3:
+        return sys.getsizeof(value) + sum(get_size_in_bytes(item, depth + 1) for item in value.values())
+    if isinstance(value, (list, tuple)) and len(value) <= 1000 and depth < 3:
+        return sys.getsizeof(value) + sum(get_size_in_bytes(item, depth + 1) for item in value)
+    return sys.getsizeof(value)
+
+
+def record_session_footprint(name, value, derived=False):
+    """
+    Records the memory held by one of the current session's frames for the session footprint view. Only done while
+    the rerun tracks memory, as measuring object columns means visiting every value.
+
+    Args:
+    name (str): What the frame is, e.g. 'df' or the cached function that derived it.
+    value: The frame (or array, or container of them).
+    derived (bool, optional): Whether the frame was derived from the data (the cached helpers' results, which are
+        shared by the sessions with the same data) rather than the data itself. Defaults to False.
+    """
+    dict_rerun = get_current_rerun()
+    if dict_rerun is None or not dict_rerun['track_memory']:
+        return
+    context = get_script_run_ctx()
+    session_id = context.session_id if context is not None else 'no session'
+    size_in_bytes = get_size_in_bytes(value)
+    with _footprints_lock:
+        dict_footprint = _dict_session_footprints.setdefault(session_id, {'data': {}, 'derived': {}, 'last_rerun': None})
+        if derived:
+            #keyed on the object, so a cached frame returned to several checks is only counted once
+            dict_footprint['derived'][id(value)] = (name, size_in_bytes)
+        else:
+            dict_footprint['data'][name] = size_in_bytes
+        dict_footprint['last_rerun'] = time.strftime('%H:%M:%S')
+
+
+def reset_session_footprint():
+    """
+    Forgets the frames recorded for the current session, at the start of a rerun, so the view shows what the
+    latest rerun holds rather than everything since the session started.
+    """
+    context = get_script_run_ctx()
+    with _footprints_lock:
+        _dict_session_footprints.pop(context.session_id if context is not None else 'no session', None)
+
+
+def session_footprints_to_dataframe():
+    """
+    Returns the memory held by each session's data and derived frames, largest first, dropping the sessions that
+    have ended.
+
+    Returns:
+    DataFrame: One row per session.
+    """
+    context = get_script_run_ctx()
+    with _footprints_lock:
+        if st.runtime.exists():
+            runtime = st.runtime.get_instance()
+            for session_id in [session_id for session_id in _dict_session_footprints if not runtime.is_active_session(session_id)]:
+                del _dict_session_footprints[session_id]
+        list_rows = []
+        for session_id, dict_footprint in _dict_session_footprints.items():
+            list_derived = sorted(dict_footprint['derived'].values(), key=lambda item: -item[1])
+            list_rows.append({
+                'Session': session_id[:8] + (' (this one)' if context is not None and session_id == context.session_id else ''),
+                'Data (MB)': sum(dict_footprint['data'].values()) / 1024**2,
+                'Derived (MB)': sum(size for _, size in list_derived) / 1024**2,
+                'Largest derived': list_derived[0][0] if list_derived else '',
+                'Last rerun': dict_footprint['last_rerun'],
+            })
+    df_footprints = pd.DataFrame(list_rows, columns=['Session', 'Data (MB)', 'Derived (MB)', 'Largest derived', 'Last rerun'])
+    df_footprints['Total (MB)'] = df_footprints['Data (MB)'] + df_footprints['Derived (MB)']
+    return df_footprints.sort_values('Total (MB)', ascending=False)
+
+#------------------------------------
+# <<< Performance panel >>>
+#------------------------------------
+
+def spans_to_dataframe(dict_rerun):
+    """
+    Returns the rerun's spans as a table in the order they started, with the stage names indented by depth, each
+    span's own time (excluding its children) and its share of the rerun, and its memory if the rerun tracks it.
+
+    Args:
+    dict_rerun (dict): The record from start_rerun.
+
+    Returns:
+    DataFrame: One row per span.
+    """
+    list_spans = dict_rerun['spans']
+    child_seconds = [0.0] * len(list_spans)
+    for dict_span in list_spans:
+        if dict_span['parent'] is not None and dict_span['wall_seconds'] is not None:
+            child_seconds[dict_span['parent']] += dict_span['wall_seconds']
+
+    elapsed = time.perf_counter() - dict_rerun['start']
+    list_rows = []
+    for dict_span, children in zip(list_spans, child_seconds):
+        wall_seconds = dict_span['wall_seconds']
+        list_rows.append({
+            'Stage': ' ' * dict_span['depth'] + dict_span['name'],
+            'Start (ms)': dict_span['start'] * 1000,
+            'Wall (ms)': wall_seconds * 1000 if wall_seconds is not None else None,
+            'Self (ms)': (wall_seconds - children) * 1000 if wall_seconds is not None else None,
+            'CPU (ms)': dict_span['cpu_seconds'] * 1000 if dict_span['cpu_seconds'] is not None else None,
+            '% of rerun': wall_seconds / elapsed * 100 if wall_seconds is not None and elapsed > 0 else None,
+            'Cache': dict_span['cache'] or '',
+            'Peak (MB)': dict_span.get('peak_mb'),
+            'Net (MB)': dict_span.get('net_mb'),
+            'Largest at peak': ', '.join(f'{line} ({size:,.1f} MB)' for line, size in dict_span.get('peak_allocations', [])),
+            'Largest retained': ', '.join(f'{line} ({size:,.1f} MB)' for line, size in dict_span.get('retained_allocations', [])),
+            'Details': ', '.join(f'{key}={value}' for key, value in dict_span['attributes'].items()),
+        })
+    list_columns = ['Stage', 'Start (ms)', 'Wall (ms)', 'Self (ms)', 'CPU (ms)', '% of rerun', 'Cache', 'Details']
+    if dict_rerun['track_memory']:
+        list_columns[-1:-1] = ['Peak (MB)', 'Net (MB)', 'Largest at peak', 'Largest retained']
+    return pd.DataFrame(list_rows, columns=list_columns)
+
+
+def render_performance_panel(max_history=20):
+    """
+    Starts recording the spans of this rerun and shows them in the sidebar. The script can stop at any point
+    (st.stop()), so rather than drawing the panel at the end, the panel is redrawn whenever a top-level span ends.
+    A history of recent reruns (number, time, slowest stage) is kept in the session state, which shows which
+    widget interactions trigger the expensive reruns.
+
+    With memory tracking turned on, the spans also show their memory and the panel shows how much each session's
+    data and derived frames hold.
+
+    Args:
+    max_history (int, optional): Number of earlier reruns kept in the history. Defaults to 20.
+    """
+    list_history = st.session_state.setdefault('performance_history', [])
+    rerun_number = (list_history[-1]['Rerun'] + 1) if list_history else 1
+    list_history.append({'Rerun': rerun_number, 'Wall (ms)': 0.0, 'CPU (ms)': 0.0, 'Slowest stage': '', 'Cache misses': 0})
+    del list_history[:-max_history]
+
+    with st.sidebar:
+        st.subheader(':blue[Performance of this rerun]')
+        track_memory = st.checkbox('Track memory', key='performance_track_memory',
+                                   help='Traces allocations with tracemalloc. This slows every session on the server down, and stays on for all of them until unticked.')
+        placeholder = st.empty()
+    if track_memory:
+        start_memory_tracking()
+        #comparing snapshots costs seconds per hundred thousand traces, so only the allocations made since this rerun
+        #started are kept (the spans measure differences, so they are unaffected unless another session's rerun overlaps)
+        tracemalloc.clear_traces()
+        reset_session_footprint()
+    else:
+        stop_memory_tracking()
+
+    def update():
+        dict_rerun = get_current_rerun()
+        df_spans = spans_to_dataframe(dict_rerun)
+        df_top_level = df_spans[[dict_span['depth'] == 0 for dict_span in dict_rerun['spans']]]
+        list_history[-1].update({
+            'Wall (ms)': (time.perf_counter() - dict_rerun['start']) * 1000,
+            'CPU (ms)': (time.thread_time() - dict_rerun['start_cpu']) * 1000,
+            'Slowest stage': df_top_level.loc[df_top_level['Wall (ms)'].idxmax(), 'Stage'] if df_top_level['Wall (ms)'].notna().any() else '',
+            'Cache misses': int((df_spans['Cache'] == 'miss').sum()),
+        })
+
+        with placeholder.container():
+            st.caption(f"Rerun {rerun_number}: {list_history[-1]['Wall (ms)']:,.0f} ms so far "
+                       f"({list_history[-1]['CPU (ms)']:,.0f} ms CPU on the script thread)")
+            if trace_writer is not None:
+                st.caption(f'Writing spans to {trace_writer.path} ({trace_writer.number_dropped:,} dropped so far)')
+            st.dataframe(df_spans, hide_index=True, use_container_width=True,
+                         column_config={column: st.column_config.NumberColumn(format='%.1f') for column in ['Start (ms)', 'Wall (ms)', 'Self (ms)', 'CPU (ms)', '% of rerun', 'Peak (MB)', 'Net (MB)']})
+            if dict_rerun['track_memory']:
+                st.caption('Largest at peak: the lines holding the most memory when the stage was sampled at its highest '
+                           f'(every {PEAK_SAMPLING_SECONDS * 1000:g} ms, so a shorter-lived temporary can be missed). '
+                           'Largest retained: the lines whose memory the stage still held when it ended.')
+            st.caption('Recent reruns')
+            st.dataframe(pd.DataFrame(list_history[::-1]), hide_index=True, use_container_width=True,
+                         column_config={column: st.column_config.NumberColumn(format='%.0f') for column in ['Wall (ms)', 'CPU (ms)']})
+            if dict_rerun['track_memory']:
+                st.caption(f'Memory held per session ({tracemalloc.get_traced_memory()[0] / 1024**2:,.0f} MB allocated since this rerun started and still held). '
+                           'Derived frames are cached, so sessions with the same data share them.')
+                st.dataframe(session_footprints_to_dataframe(), hide_index=True, use_container_width=True,
+                             column_config={column: st.column_config.NumberColumn(format='%.1f') for column in ['Data (MB)', 'Derived (MB)', 'Total (MB)']})
+
+    start_rerun(on_update=update, track_memory=track_memory)
+
+
+def altair_chart(chart, **kwargs):
+    """
+    st.altair_chart in a span: Altair builds the chart's Vega-Lite spec (embedding its data) and Streamlit serializes
+    it only when the chart is drawn, so this is where the cost of a chart shows up.
+    """
+    with timed_span('Chart spec and Vega serialization', memory_snapshot=True, category='render', chart=type(chart).__name__):
+        return st.altair_chart(chart, **kwargs)
+
+
+def dataframe(data, **kwargs):
+    """
+    st.dataframe in a span: Streamlit converts the frame to Arrow to send it to the browser, which copies it.
+    """
+    with timed_span('Table Arrow serialization', memory_snapshot=True, category='render', rows=len(data.index) if hasattr(data, 'index') else None):
+        return st.dataframe(data, **kwargs)
+
+#------------------------------------
+# <<< Trace file >>>
+#------------------------------------
+#with STATS_TRACE_FILE set, every span of every rerun (debug mode or not) is written to that file as a line of JSON.
+#Each line is a complete event of the Chrome trace event format, so the file can be analysed line by line (e.g. with
+#pd.read_json(path, lines=True)) or gathered with convert_trace_to_chrome and opened in Perfetto or chrome://tracing.
+
+TRACE_FILE = os.environ.get('STATS_TRACE_FILE')
+TRACE_FILE_MAX_MB = float(os.environ.get('STATS_TRACE_FILE_MAX_MB', 50))
+TRACE_FILE_BACKUPS = int(os.environ.get('STATS_TRACE_FILE_BACKUPS', 5))
+
+
+def span_to_trace_event(dict_rerun, dict_span, category='stage'):
+    """
+    Returns a finished span as a Chrome trace 'complete' event (times in microseconds). The args carry the rerun's
+    context, the span's place in the call tree (its index and its parent's, within the rerun) and what it recorded.
+
+    Args:
+    dict_rerun (dict): The record from start_rerun.
+    dict_span (dict): The span, after it ended.
+    category (str, optional): The kind of stage. Defaults to 'stage'.
+
+    Returns:
+    dict: The event.
+    """
+    dict_args = {
+        'session': dict_rerun['session_id'],
+        'rerun': dict_rerun['number'],
+        **dict_rerun['context'],
+        'index': dict_span['index'],
+        'parent': dict_span['parent'],
+        'depth': dict_span['depth'],
+        'cpu_ms': dict_span['cpu_seconds'] * 1000,
+        **dict_span['attributes'],
+    }
+    for key in ['cache', 'peak_mb', 'net_mb', 'peak_allocations', 'retained_allocations']:
+        if dict_span.get(key) is not None:
+            dict_args[key] = dict_span[key]
+    return {
+        'name': dict_span['name'],
+        'cat': category,
+        'ph': 'X',
+        'ts': (dict_rerun['start_time'] + dict_span['start']) * 1e6,
+        'dur': dict_span['wall_seconds'] * 1e6,
+        'pid': os.getpid(),
+        'tid': threading.get_ident(),
+        'args': dict_args,
+    }
+
+
+class TraceWriter:
+    """
+    Appends events to a JSON-lines file from a background thread. The script thread only puts the event on a queue:
+    it never waits for the disk, and if the queue is full (the disk cannot keep up) the event is dropped and counted
+    instead. The file is rotated like a logging RotatingFileHandler: when the next event would grow it past max_mb
+    it is renamed to path.1 (path.1 to path.2, and so on), keeping backup_count old files. A batch of events is
+    split at the rotation, so no file overshoots by more than one event.
+
+    Args:
+    path (str or Path): The trace file.
+    max_mb (float, optional): Size at which the file is rotated. Defaults to 50.
+    backup_count (int, optional): Number of rotated files kept. Defaults to 5.
+    max_queued (int, optional): Number of events waiting to be written beyond which events are dropped. Defaults to 100000.
+
+    Example:
+    >>> writer = TraceWriter('trace.jsonl')
+    >>> writer.write({'name': 'Ingestion', 'ph': 'X', 'ts': 0, 'dur': 1000, 'pid': 1, 'tid': 1})
+    """
+    def __init__(self, path, max_mb=50, backup_count=5, max_queued=100_000):
+        self.path = Path(path)
+        self.max_bytes = int(max_mb * 1024**2)
+        self.backup_count = backup_count
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.number_dropped = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.thread = threading.Thread(target=self._flush_forever, name='trace-writer', daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def write(self, dict_event):
+        try:
+            self.queue.put_nowait(dict_event)
+        except queue.Full:
+            self.number_dropped += 1
+
+    def close(self, timeout=5):
+        """
+        Writes out the events still queued and stops the background thread.
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout)
+
+    def _flush_forever(self):
+        while True:
+            #wait for an event, then take whatever else has queued up meanwhile, and write them in one go
+            list_events = [self.queue.get()]
+            while len(list_events) < 10_000:
+                try:
+                    list_events.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            list_lines = [json.dumps(dict_event, default=str) + '\n' for dict_event in list_events if dict_event is not None]
+            try:
+                self._write_lines(list_lines)
+            except OSError:
+                #a full or read-only disk loses these events rather than stopping the writer
+                self.number_dropped += len(list_events)
+            if None in list_events:
+                return
+
+    def _write_lines(self, list_lines):
+        """
+        Appends the lines, rotating the file whenever the next line would take it past max_bytes.
+        """
+        file_size = self.path.stat().st_size if self.path.exists() else 0
+        list_chunk = []
+        for line in list_lines:
+            number_of_bytes = len(line.encode('utf-8'))
+            #a line larger than max_bytes still goes into a file of its own
+            if file_size + number_of_bytes > self.max_bytes and file_size > 0:
+                self._append(list_chunk)
+                self._rotate()
+                list_chunk, file_size = [], 0
+            list_chunk.append(line)
+            file_size += number_of_bytes
+        self._append(list_chunk)
+
+    def _append(self, list_lines):
+        if list_lines:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(''.join(list_lines))
+
+    def _rotate(self):
+        for number in range(self.backup_count - 1, 0, -1):
+            backup = self.path.with_name(f'{self.path.name}.{number}')
+            if backup.exists():
+                os.replace(backup, self.path.with_name(f'{self.path.name}.{number + 1}'))
+        if self.backup_count > 0:
+            os.replace(self.path, self.path.with_name(f'{self.path.name}.1'))
+        else:
+            self.path.unlink()
+
+
+def convert_trace_to_chrome(trace_file, output_file):
+    """
+    Gathers a trace file and its rotated backups (oldest first) into one file in the JSON object format of the
+    Chrome trace viewer, which Perfetto (ui.perfetto.dev) and chrome://tracing open.
+
+    Args:
+    trace_file (str or Path): The trace file (STATS_TRACE_FILE).
+    output_file (str or Path): The file to write.
+
+    Returns:
+    int: Number of events written.
+    """
+    trace_file = Path(trace_file)
+    list_backups = [path for path in trace_file.parent.glob(f'{trace_file.name}.*') if path.suffix[1:].isdigit()]
+    #the highest numbered backup is the oldest
+    list_files = sorted(list_backups, key=lambda path: int(path.suffix[1:]), reverse=True) + [trace_file]
+    list_events = []
+    for path in list_files:
+        if path.exists():
+            with open(path, encoding='utf-8') as file:
+                list_events.extend(json.loads(line) for line in file if line.strip())
+    with open(output_file, 'w', encoding='utf-8') as file:
+        json.dump({'traceEvents': list_events, 'displayTimeUnit': 'ms'}, file)
+    return len(list_events)
+
+
+trace_writer = TraceWriter(TRACE_FILE, TRACE_FILE_MAX_MB, TRACE_FILE_BACKUPS) if TRACE_FILE else None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert a STATS_TRACE_FILE trace (and its rotated backups) for the Chrome trace viewer or Perfetto.')
+    parser.add_argument('trace_file')
+    parser.add_argument('output_file')
+    args = parser.parse_args()
+    print(f'Wrote {convert_trace_to_chrome(args.trace_file, args.output_file)} events to {args.output_file}')
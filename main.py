@@ -10,10 +10,16 @@ from functions import stat_test_decision_tree
 #import module to render assumptions for the selected test
 from stats_test_functions import render_assumptions
 
+#import power analysis module for planning sample sizes
+from stats_test_functions import power_analysis
+from stats_test_functions import simulation_harness
+
+#import timing spans for the debug mode performance panel
+from functions import performance_tracking
+
 #parametric test modules
 #from stats_test_functions import paired_t_test
 #from stats_test_functions import independent_t_test
-#from stats_test_functions import repeated_measures_anova_v1
 #from stats_test_functions import anova_test
 #from stats_test_functions import one_sample_t_test
 #from stats_test_functions import pearson_correlation
@@ -30,39 +36,41 @@ import seaborn as sns
 #start code
 st.set_page_config(page_icon='🔍', layout='wide')
 
-#list of tests in scope - status: 12 / 31 complete ! 
+#list of tests in scope - status: 26 / 33 complete ! 
 stats_test_options = { 
     'Chi-square goodness of fit': 'done', #done
     'Chi-square test of independence': 'done', #done
     "Cramer's V": 'To do',
-    'Exact test of Goodness of Fit (multinomial model)': 'To do',
-    'Exact test of Goodness of Fit': 'To do',
-    'Factorial ANOVA': 'To do',
+    'Exact test of Goodness of Fit (multinomial model)': 'done', #done
+    'Exact test of Goodness of Fit': 'done', #done
+    'Factorial ANOVA': 'done', #done
     'Fischers Exact test': 'done', #done
-    'G-test of Goodness of Fit': 'To do',
+    'Friedman test': 'done', #done
+    'G-test of Goodness of Fit': 'done', #done
     'G-test': 'To do',
     'Independent samples T-test': 'done', #done
     'Independent samples Z-test': 'done', #done
-    "Kendall's Tau": 'To do',
+    "Kendall's Tau": 'done', #done
     'Kruskal-Wallis': 'done', #done (but needs alternative test logic adding - as is, if assumptions not met, logic stops and nothing else to try)
-    'Log-linear analysis': 'To do',
-    'Mann-Whitney U Test': 'To do', 
+    'Log-linear analysis': 'done', #done
+    'Mann-Whitney U Test': 'done', #done
     'McNemars test': 'done', #done
     'One-proportion z-test': 'To do',
-    'One-way ANCOVA': 'To do',
+    'One-way ANCOVA': 'done', #done
     'One-way ANOVA': 'done', #done
+    'One-way Repeated Measures ANOVA': 'done', #done
     'Paired samples T-test': 'done', #done
     'Paired samples Z-test': 'done', #done
-    'Partial correlation': 'To do',
+    'Partial correlation': 'done', #done
     'Pearson correlation': 'done', #done 
     'Phi co-efficient': 'To do',
     "Point biserial correlation": 'To do',
     'Single sample T-test': 'done', #done
-    'Single sample wilcoxon signed-rank test': 'To do',
+    'Single sample wilcoxon signed-rank test': 'done', #done
     'Single sample Z-test': 'done', #done
     "Spearman's Rho": 'To do',
     'Two proportion z-test': 'To do',
-    'Wilcoxon signed-rank test': 'To do',
+    'Wilcoxon signed-rank test': 'done', #done
 }
 
 #subset from the dictionary above to a list of those tests that are recorded as having been built
@@ -77,6 +85,15 @@ with col2:
 with col3:
     filter_to_just_completed_tests = st.radio(label=f'Only inc. the {len(stats_test_options_subset)} built tests?', options=['Yes', 'No'], horizontal=True, index=1)
 
+#in debug mode, time each stage of this rerun and show the timeline in the sidebar (with STATS_TRACE_FILE set, the
+#stages of every rerun are also written to the trace file)
+if debug_mode == 'Yes':
+    performance_tracking.render_performance_panel()
+elif performance_tracking.trace_writer is not None:
+    performance_tracking.start_rerun()
+else:
+    performance_tracking.stop_rerun()
+
 #determine whether to subset the pick-list to just the tests that are built
 if filter_to_just_completed_tests =='Yes':
     stats_test_options = stats_test_options_subset
@@ -88,17 +105,25 @@ how_to_use_tool = st.selectbox(
     label='How do you want to use this tool?',
     options=[
         'Select a test from the list',
-        'Have the tool suggest the test to use'
+        'Have the tool suggest the test to use',
+        'Plan the sample size for a test (power analysis)'
     ]
 )
 
+if how_to_use_tool == 'Plan the sample size for a test (power analysis)':
+    st.header(':blue[Plan the sample size:]')
+    with performance_tracking.timed_span('Power analysis'):
+        power_analysis.render_power_analysis(stats_test_options_subset)
+    st.stop()
+
 if how_to_use_tool != 'Select a test from the list':
 
-    #Render user inputs
-    dict_inputs = stat_test_decision_tree.render_inputs()
+    with performance_tracking.timed_span('Decision tree'):
+        #Render user inputs
+        dict_inputs = stat_test_decision_tree.render_inputs()
 
-    #Use inputs to determine recommended stats test(s)
-    list_recommendations = stat_test_decision_tree.recommend_test(dict_inputs)
+        #Use inputs to determine recommended stats test(s)
+        list_recommendations = stat_test_decision_tree.recommend_test(dict_inputs)
 
     if debug_mode == 'Yes':
         col1, col2 = st.columns(2)
@@ -116,6 +141,13 @@ else:
 if how_to_use_tool != 'Select a test from the list':
     selected_recommended_test = st.selectbox(label='Select the recommended test to use', options=list_recommendations, index=0)
 
+    with st.expander('Click to check the sample size needed for the recommended test'), performance_tracking.timed_span('Power analysis'):
+        power_analysis.render_power_analysis(list_recommendations, key='recommended_test_power')
+
+    if debug_mode == 'Yes':
+        with st.expander('Click to check the recommended tests by simulation'), performance_tracking.timed_span('Simulation check'):
+            simulation_harness.render_simulation_check(list_recommendations)
+
 #Select test to use from the list
 else:
     selected_recommended_test = st.selectbox(label='Select the recommended test to use', options=stats_test_options, index=0)
@@ -124,8 +156,11 @@ else:
 #list_selected_recommended_test = []
 #list_selected_recommended_test.append(selected_recommended_test)
 
+performance_tracking.set_rerun_context(test=selected_recommended_test)
+
 try:
-    dict_test_explanations = st_exp.get_dict_test_explanation(selected_recommended_test)
+    with performance_tracking.timed_span('Explanation lookup', test=selected_recommended_test):
+        dict_test_explanations = st_exp.get_dict_test_explanation(selected_recommended_test)
 except:
     st.write('The assumption checks for this test have not been built yet 😞, please select a different test from the list above 🙄. To filter the selection list to just tests that do have assumption checks built (and no longer see this message 😉), use the radio buttons to the top right 👆🏻👉🏻')
     st.stop()
@@ -160,18 +195,28 @@ st.header(':blue[Select your data]')
 df_location = st.file_uploader("Select the file containing your data you wish to run through the appropriate stats test", type=['csv', 'xlsx'])
 dummy_data.expected_data_structure_examples(selected_recommended_test)
 
+#the cached contingency tables, ranks and cell statistics are not cleared when a different file is uploaded: they are
+#keyed on the data itself (so a new file cannot hit a stale entry) and bounded by max_entries, and the caches are shared
+#by every session, so clearing them on one upload would throw away the other sessions' entries too
+
 if df_location is None and load_dummy_data != 'Yes':
     st.stop()
 
-if load_dummy_data == 'Yes':
-    #produce dummy data
-    df = dummy_data.get_dummy_data_for_tests(selected_recommended_test)
+with performance_tracking.timed_span('Ingestion', memory_snapshot=True) as ingestion_span:
+    if load_dummy_data == 'Yes':
+        #produce dummy data
+        df = dummy_data.get_dummy_data_for_tests(selected_recommended_test)
 
-    #advise user dummy data in use
-    st.write(':red[**Debug mode on and dummy data in use**]')
+        #advise user dummy data in use
+        st.write(':red[**Debug mode on and dummy data in use**]')
 
-else:
-    df = pd.DataFrame(df_location)
+    else:
+        df = pd.DataFrame(df_location)
+    ingestion_span.set(source='dummy data' if load_dummy_data == 'Yes' else 'upload', rows=len(df), columns=df.shape[1])
+
+#with memory tracking on in debug mode, record how much this session's data holds
+performance_tracking.record_session_footprint('df', df)
+performance_tracking.set_rerun_context(rows=len(df), columns=df.shape[1])
 
 
 
@@ -192,7 +237,8 @@ st.header(':blue[Checking assumptions...]')
 #--------------------------------
 
 try:
-    test_bool_result = render_assumptions.render_assumptions_for_selected_test(selected_recommended_test, df)
+    with performance_tracking.timed_span('Assumption checks', test=selected_recommended_test):
+        test_bool_result = render_assumptions.render_assumptions_for_selected_test(selected_recommended_test, df)
     if test_bool_result == None:
         st.write('Make the required selections using the drop down boxes above')
         st.stop()
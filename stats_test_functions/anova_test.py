@@ -1,7 +1,12 @@
 
+import numpy as np
 import streamlit as st
 import scipy.stats as stats
 
+from functions import performance_tracking
+from stats_test_functions import batch_normality
+from stats_test_functions import posthoc_tests
+
 
 #------------------------------------
 # <<< Function to render assumptions >>>
@@ -68,9 +73,13 @@ def select_columns_for_anova_test(df):
 # <<< Function to check normality assumption >>>
 #------------------------------------
 
+@performance_tracking.timed
 def check_normality(df, group_column, value_column):
     """
     Checks the normality of each group's data using the Shapiro-Wilk test.
+    \nThe groups are tested in batch (in a process pool when there are many groups), the
+    p-values are Holm-adjusted for the number of groups tested, and the results are shown
+    as a single summary table. Per-group text is only rendered if the user asks for it.
 
     Args:
     df (DataFrame): The dataframe containing the data.
@@ -78,10 +87,9 @@ def check_normality(df, group_column, value_column):
     value_column (str): The column in df that contains the values to be tested for normality.
 
     Returns:
-    dict: A dictionary of the groups and their Shapiro-Wilk test results (statistic and p-value).
+    dict: A dictionary of the groups and their Shapiro-Wilk test results (statistic and Holm-adjusted p-value).
     """
-    unique_groups = df[group_column].unique()
-    normality_results = {}
+    list_group_labels, list_group_values = batch_normality.split_values_by_group(df, group_column, value_column)
 
     # Explanation of what Normality Test is
     with st.expander("What is a Normality Test?"):
@@ -95,16 +103,39 @@ def check_normality(df, group_column, value_column):
         **Interpreting the Shapiro-Wilk Test:**
         - **P-value > 0.05**: This suggests that the data can be considered normally distributed under the assumption of normality. There is no indication of significant deviation from normality.
         - **P-value ≤ 0.05**: This indicates that the data do not follow a normal distribution. Depending on the context and the severity of the deviation, transformations or non-parametric methods may be recommended.
+        \nAs one test is run per group, the p-values are adjusted (Holm method) for the number of groups tested. Groups with fewer than 3 observations cannot be tested.
         """)
 
     # Displaying the normality check results
     with st.expander("Normality Check Results"):
-        for group in unique_groups:
-            group_data = df[df[group_column] == group][value_column]
-            stat, p_value = stats.shapiro(group_data)
-            normality_results[group] = (stat, p_value)
-            st.write(f"**{group}**: Shapiro-Wilk Test Statistic={stat:.4f}, p-value={p_value:.4f}")
-    
+        progress_bar = st.progress(0.0)
+        progress_text = st.empty()
+
+        def _show_progress(groups_done, groups_total, groups_passed, groups_tested):
+            progress_bar.progress(groups_done / groups_total)
+            if groups_tested:
+                progress_text.write(f"Tested {groups_done} of {groups_total} groups. Unadjusted pass rate so far: {groups_passed / groups_tested:.1%}")
+
+        df_results = batch_normality.run_batch_normality(list_group_labels, list_group_values, progress_callback=_show_progress)
+        dict_summary = batch_normality.summarise_batch_normality(df_results)
+        progress_text.empty()
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Groups tested", f"{dict_summary['groups_tested']} of {dict_summary['groups']}")
+        with col2:
+            st.metric("Pass rate (unadjusted)", f"{dict_summary['pass_rate']:.1%}")
+        with col3:
+            st.metric("Pass rate (Holm-adjusted)", f"{dict_summary['adjusted_pass_rate']:.1%}")
+
+        performance_tracking.dataframe(df_results, hide_index=True)
+
+        if st.checkbox("Show the results for each group individually"):
+            for row in df_results.itertuples(index=False):
+                st.write(f"**{row[0]}**: Shapiro-Wilk Test Statistic={row[2]:.4f}, p-value={row[3]:.4f}, adjusted p-value={row[4]:.4f}")
+
+    normality_results = dict(zip(df_results['Group'], zip(df_results['W statistic'], df_results['Adjusted p-value'])))
+
     return normality_results
 
 
@@ -112,6 +143,7 @@ def check_normality(df, group_column, value_column):
 # <<< Function to check Homogeneity of Variances assumption >>>
 #------------------------------------
 
+@performance_tracking.timed
 def check_homogeneity(df, group_column, value_column):
     """
     Checks the homogeneity of variances across different groups using Levene's test.
@@ -124,7 +156,7 @@ def check_homogeneity(df, group_column, value_column):
     Returns:
     tuple: A tuple containing the Levene's test statistic and the p-value.
     """
-    group_data = [df[df[group_column] == group][value_column] for group in df[group_column].unique()]
+    _, group_data = batch_normality.split_values_by_group(df, group_column, value_column)
 
     # Explanation of what Homogeneity of Variances is
     with st.expander("What is Homogeneity of Variances?"):
@@ -162,8 +194,21 @@ def render_anova_checks(df, group_column, value_column):
 
     with tab2:
         normality_results = check_normality(df, group_column, value_column)
-   
-    if all(p > 0.05 for _, p in normality_results.values()) and p_value > 0.05:
+
+    #pairwise comparisons, Games-Howell for when the variances are unequal
+    posthoc_tests.display_posthoc_comparisons(df, group_column, value_column, ['Tukey HSD', 'Games-Howell'])
+
+    #groups with fewer than 3 observations have no Shapiro-Wilk p-value (NaN), so they are left out of the decision
+    #rather than failing it, and the user is told which they are
+    list_untested_groups = [group for group, (_, p) in normality_results.items() if np.isnan(p)]
+    list_tested_p_values = [p for _, p in normality_results.values() if not np.isnan(p)]
+    if list_untested_groups:
+        st.warning(f"{len(list_untested_groups)} group(s) have fewer than 3 observations, so their normality could not be tested and they are left out of the normality check: "
+                   + ', '.join(str(group) for group in list_untested_groups[:20]) + (' ...' if len(list_untested_groups) > 20 else ''))
+    if not list_tested_p_values:
+        st.warning("No group has the 3 or more observations needed to test normality.")
+
+    if list_tested_p_values and all(p > 0.05 for p in list_tested_p_values) and p_value > 0.05:
         st.success("All assumptions for one-way ANOVA are met. You can proceed with the ANOVA test.")
         return True
     else:
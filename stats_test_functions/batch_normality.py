@@ -0,0 +1,173 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+import streamlit as st
+
+from stats_test_functions import multiple_testing
+
+#------------------------------------
+# <<< Function to split a value column into one array per group >>>
+#------------------------------------
+
+def split_values_by_group(df, group_column, value_column):
+    """
+    Splits the value column into one array per group using a single sort, rather than
+    filtering the whole dataframe once per group. Rows with a missing group label or
+    missing value are dropped.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    group_column (str): The column in df that denotes the group.
+    value_column (str): The column in df that contains the values.
+
+    Returns:
+    tuple: A list of group labels (in order of first appearance) and a list of numpy arrays of values, one per group.
+    """
+    codes, labels = pd.factorize(df[group_column], sort=False)
+    values = df[value_column].to_numpy(dtype=float)
+
+    keep = (codes >= 0) & ~np.isnan(values)
+    codes = codes[keep]
+    values = values[keep]
+
+    order = np.argsort(codes, kind='stable')
+    group_sizes = np.bincount(codes, minlength=len(labels))
+    list_group_values = np.split(values[order], np.cumsum(group_sizes)[:-1])
+
+    return list(labels), list_group_values
+
+#------------------------------------
+# <<< Worker function (runs in a separate process) >>>
+#------------------------------------
+
+def _shapiro_wilk_for_chunk(list_group_values):
+    """
+    Runs the Shapiro-Wilk test for each array in a chunk of groups. Groups with fewer than
+    3 observations cannot be tested and return NaN.
+
+    Args:
+    list_group_values (list): List of numpy arrays, one per group.
+
+    Returns:
+    ndarray: Array of shape (number of groups, 2) holding the W statistic and p-value for each group.
+    """
+    results = np.full((len(list_group_values), 2), np.nan)
+    for i, group_values in enumerate(list_group_values):
+        if group_values.size >= 3:
+            stat, p_value = stats.shapiro(group_values)
+            results[i] = (stat, p_value)
+    return results
+
+#------------------------------------
+# <<< Shared process pool >>>
+#------------------------------------
+
+@st.cache_resource(show_spinner=False)
+def get_process_pool(max_workers=None):
+    """
+    Returns a process pool that is shared across reruns and sessions, so the cost of
+    starting worker processes is only paid once.
+
+    Args:
+    max_workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+    ProcessPoolExecutor: The shared process pool.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers or os.cpu_count())
+
+#------------------------------------
+# <<< Function to run the normality test for many groups >>>
+#------------------------------------
+
+def run_batch_normality(list_group_labels, list_group_values, alpha=0.05, correction='holm',
+                        chunk_size=200, min_groups_for_pool=100, progress_callback=None):
+    """
+    Runs the Shapiro-Wilk test for every group and returns a single summary table. Groups are
+    sent to a process pool in chunks when there are enough of them for this to pay off, and
+    the p-values are adjusted for the number of groups tested.
+
+    Args:
+    list_group_labels (list): Group labels, in the same order as list_group_values.
+    list_group_values (list): List of numpy arrays, one per group.
+    alpha (float, optional): Significance level for the normality decision. Defaults to 0.05.
+    correction (str, optional): Multiple testing correction passed to multiple_testing.adjust_p_values. Defaults to 'holm'.
+    chunk_size (int, optional): Number of groups sent to a worker process at a time. Defaults to 200.
+    min_groups_for_pool (int, optional): Below this number of groups the tests run in-process. Defaults to 100.
+    progress_callback (callable, optional): Called as progress_callback(groups_done, groups_total, groups_passed, groups_tested)
+                                            each time a chunk finishes, so the app can show results as they stream in.
+
+    Returns:
+    DataFrame: One row per group with the sample size, W statistic, p-value, adjusted p-value and normality decision.
+    """
+    number_of_groups = len(list_group_values)
+    results = np.full((number_of_groups, 2), np.nan)
+
+    chunk_starts = list(range(0, number_of_groups, chunk_size))
+    groups_done = 0
+    groups_passed = 0
+    groups_tested = 0
+
+    def _record_chunk(start, chunk_results):
+        nonlocal groups_done, groups_passed, groups_tested
+        results[start:start + len(chunk_results)] = chunk_results
+        groups_done += len(chunk_results)
+        groups_tested += int(np.sum(~np.isnan(chunk_results[:, 1])))
+        groups_passed += int(np.sum(chunk_results[:, 1] > alpha))
+        if progress_callback is not None:
+            progress_callback(groups_done, number_of_groups, groups_passed, groups_tested)
+
+    if number_of_groups < min_groups_for_pool:
+        for start in chunk_starts:
+            _record_chunk(start, _shapiro_wilk_for_chunk(list_group_values[start:start + chunk_size]))
+    else:
+        pool = get_process_pool()
+        futures = {
+            pool.submit(_shapiro_wilk_for_chunk, list_group_values[start:start + chunk_size]): start
+            for start in chunk_starts
+        }
+        for future in as_completed(futures):
+            _record_chunk(futures[future], future.result())
+
+    p_values = results[:, 1]
+    adjusted_p_values = multiple_testing.adjust_p_values(p_values, method=correction)
+
+    df_results = pd.DataFrame({
+        'Group': list_group_labels,
+        'n': [group_values.size for group_values in list_group_values],
+        'W statistic': results[:, 0],
+        'p-value': p_values,
+        'Adjusted p-value': adjusted_p_values,
+        'Normal': adjusted_p_values > alpha,
+    })
+
+    return df_results
+
+#------------------------------------
+# <<< Function to summarise the batch results >>>
+#------------------------------------
+
+def summarise_batch_normality(df_results, alpha=0.05):
+    """
+    Summarises the batch normality results into aggregate pass rates.
+
+    Args:
+    df_results (DataFrame): Output of run_batch_normality.
+    alpha (float, optional): Significance level used for the unadjusted pass rate. Defaults to 0.05.
+
+    Returns:
+    dict: Number of groups, number of groups that could be tested, and the unadjusted and adjusted pass rates.
+    """
+    tested = df_results['p-value'].notna()
+    groups_tested = int(tested.sum())
+
+    dict_summary = {
+        'groups': len(df_results),
+        'groups_tested': groups_tested,
+        'pass_rate': float((df_results.loc[tested, 'p-value'] > alpha).mean()) if groups_tested else np.nan,
+        'adjusted_pass_rate': float(df_results.loc[tested, 'Normal'].mean()) if groups_tested else np.nan,
+    }
+    return dict_summary
@@ -3,6 +3,8 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 
+from functions import performance_tracking
+
 #functions
 
 #--------------------------
@@ -29,12 +31,63 @@ def chi_square_goodness_of_fit_assumptions():
 
 #--------------------------------
 
-def derive_expected_frequencies(df):
+def enter_expected_values(df, category_column, value_name):
     """
-    Allows the user to specify how to derive expected frequencies for a Chi-square goodness of fit test.
+    Renders one editable table (or a file upload) for the user to enter a value for every category at once.
+    A single table keeps reruns fast when there are hundreds of categories, where one input widget per category would not.
 
     Args:
     df (DataFrame): The dataframe containing observed counts.
+    category_column (str): The column containing the category labels.
+    value_name (str): The name of the value being entered, e.g. 'Expected frequency' or 'Percentage'.
+
+    Returns:
+    Series: The entered values indexed by category label, with 0 for any category without a value.
+    """
+    categories = pd.Index(df[category_column].unique(), name=category_column)
+
+    source = st.radio(
+        f"How would you like to enter the {value_name.lower()} values?",
+        options=["Edit table", "Upload file"],
+        horizontal=True,
+        help="Upload a csv or xlsx file with the category labels in the first column and the values in the second column."
+    )
+
+    if source == "Edit table":
+        df_entered = st.data_editor(
+            pd.DataFrame({category_column: categories, value_name: 0.0}),
+            disabled=[category_column],
+            hide_index=True,
+            use_container_width=True,
+            key=f"expected_values_{category_column}_{value_name}"
+        )
+        values = df_entered.set_index(category_column)[value_name]
+
+    else:
+        file_location = st.file_uploader(f"Select the file containing the {value_name.lower()} for each category", type=['csv', 'xlsx'])
+        if file_location is None:
+            st.stop()
+        df_uploaded = pd.read_csv(file_location) if file_location.name.endswith('.csv') else pd.read_excel(file_location)
+        values = df_uploaded.set_index(df_uploaded.columns[0])[df_uploaded.columns[1]]
+
+        # match the uploaded labels to the categories in the data, in one vectorized lookup
+        values = values[~values.index.duplicated()].reindex(categories)
+        number_missing = values.isna().sum()
+        if number_missing:
+            st.write(f":red[{number_missing} of {len(categories)} categories are not in the uploaded file - these have been set to 0.]")
+
+    return pd.to_numeric(values, errors='coerce').fillna(0)
+
+
+@performance_tracking.timed
+def derive_expected_frequencies(df, min_expected_frequency=5, test_name='Chi-square goodness of fit test'):
+    """
+    Allows the user to specify how to derive expected frequencies for a goodness of fit test.
+
+    Args:
+    df (DataFrame): The dataframe containing observed counts.
+    min_expected_frequency (int, optional): Smallest expected frequency allowed for any category. Defaults to 5 (exact tests use 0).
+    test_name (str, optional): The selected test, named in the message when an expected frequency is too small. Defaults to 'Chi-square goodness of fit test'.
 
     Returns:
     dict: Dictionary of expected frequencies if derivable, otherwise None.
@@ -89,37 +142,21 @@ def derive_expected_frequencies(df):
     
     elif method == "Theoretical distribution":
         st.write("Enter the expected frequency for each category:")
-        
-        #total_sum = df[observed_column].sum()
-        #total_count = df[category_column].count()
-
-        expected_frequencies = {}
-        for category in df[category_column].unique():
-            freq = st.number_input(f"Expected frequency for {category}", min_value=0, value=0, step=1)
-            expected_frequencies[category] = freq
-            current_total += freq
 
+        expected_frequencies = enter_expected_values(df, category_column, 'Expected frequency')
+        current_total = expected_frequencies.sum()
 
     elif method == "Proportional allocation":
         st.write("Enter the proportion (as a percentage) for each category:")
-        
-        #total_sum = df[observed_column].sum()
-        #total_count = df[category_column].count()
-        
-        expected_frequencies = {}
-        
-        if current_total > total_sum:
-            st.write(f":red[Total expected count ({current_total}) is greater than total observed count ({current_total}) - adjust so these match]")
-        elif current_total < total_sum:
-            st.write(f":red[Total expected count ({current_total}) is less than total observed count ({current_total}) - adjust so these match]")
-
-        for category in df[category_column].unique():
-            percent = st.slider(f"Percentage for {category}", min_value=0.0, max_value=100.0, value=0.0, step=0.1)
-            expected_frequency = round((percent / 100) * total_sum, 0)
-            expected_frequencies[category] = expected_frequency
-            current_total += expected_frequency
-            st.write(f"Equating to expected frequency: {expected_frequency}")
-    
+
+        percentages = enter_expected_values(df, category_column, 'Percentage')
+        total_percentage = percentages.sum()
+        if not np.isclose(total_percentage, 100):
+            st.write(f":red[Percentages add up to {total_percentage:g}% - adjust so these add up to 100%]")
+
+        expected_frequencies = ((percentages / 100) * total_sum).round(0)
+        current_total = expected_frequencies.sum()
+
     #st.write(current_total)
     if method != 'Uniform distribution':
         if current_total > total_sum:
@@ -128,9 +165,9 @@ def derive_expected_frequencies(df):
             st.write(f":red[Total expected count ({current_total}) is less than total observed count ({total_sum}) - adjust so these match. You have {total_sum - current_total} remaining.]")
 
     #st.write(expected_frequencies)
-    # Validate that all expected frequencies are at least 5
-    if any(freq < 5 for freq in expected_frequencies.values()):
-        st.error("All expected frequencies must be 5 or more to meet Chi-square test requirements.")
+    # Validate that all expected frequencies are at least the selected test's minimum (5 for the Chi-square approximation)
+    if (pd.Series(expected_frequencies) < min_expected_frequency).any():
+        st.error(f"All expected frequencies must be {min_expected_frequency} or more to meet the {test_name} requirements.")
         return None
 
     df['Expected'] = df[category_column].map(expected_frequencies)
@@ -139,6 +176,7 @@ def derive_expected_frequencies(df):
 
 #--------------------------------
 
+@performance_tracking.timed
 def check_expected_frequencies(df, observed_column, category_column):
     """
     Checks if the expected frequencies for each category in a Chi-square goodness of fit test are at least 5.
@@ -177,15 +215,18 @@ def check_expected_frequencies(df, observed_column, category_column):
     # Display frequencies and their check results
     with st.expander("Expected Frequencies Check"):
         st.write("### Frequency Check for Each Category:")
-        expected_all_above_five_count = True
-
-        for i in range(len(actual_frequencies)):
-            
-            if expected_frequencies[i] < 5:
-                st.write(f"Category '{category_labels[i]}': Expected Frequency = {expected_frequencies[i]}, **Not sufficient** (less than 5)")
-                expected_all_above_five_count = False
-            else:
-                st.write(f"Category '{category_labels[i]}': Expected Frequency = {expected_frequencies[i]}, Sufficient")
+        sufficient = expected_frequencies >= 5
+        expected_all_above_five_count = bool(sufficient.all())
+
+        # one table for every category, rather than a line of text per category
+        df_check = pd.DataFrame({
+            'Category': category_labels,
+            'Observed': actual_frequencies,
+            'Expected Frequency': expected_frequencies,
+            'Check': np.where(sufficient, 'Sufficient', 'Not sufficient (less than 5)')
+        })
+        st.write(f"{(~sufficient).sum()} of {len(df_check)} categories have an expected frequency less than 5.")
+        performance_tracking.dataframe(df_check, hide_index=True, use_container_width=True)
 
 
         # Conclusion based on the checks
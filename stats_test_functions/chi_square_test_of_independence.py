@@ -1,7 +1,9 @@
 import pandas as pd
 import numpy as np
 import streamlit as st
-from scipy.stats import chi2_contingency
+
+from functions import performance_tracking
+from stats_test_functions import contingency_tables
 
 #--------------------------------------------
 
@@ -70,6 +72,7 @@ def convert_long_form_df_to_aggregate_format(df_long_format, group_variable_col,
 
 
 #--------------------------------------------
+@performance_tracking.timed
 def check_expected_frequencies(df, groupby_col, target_col):
     """
     Checks if all expected frequencies in a contingency table are at least 5.
@@ -82,11 +85,10 @@ def check_expected_frequencies(df, groupby_col, target_col):
     Returns:
     bool: True if all expected frequencies are at least 5, False otherwise.
     """
-    # Creating a contingency table
-    contingency_table = pd.crosstab(df[groupby_col], df[target_col])
-    
-    # Calculate expected frequencies
-    chi2, p, dof, expected = chi2_contingency(contingency_table, correction=False)
+    # Contingency table and expected frequencies, shared with the other categorical tests
+    dict_table = contingency_tables.get_contingency_table(df, groupby_col, target_col)
+    expected_df = dict_table['expected']
+    expected = expected_df.to_numpy()
     
     # Explanation of Expected Frequencies
     with st.expander("What are Expected Frequencies?"):
@@ -103,10 +105,8 @@ def check_expected_frequencies(df, groupby_col, target_col):
         """)
 
     # Display expected frequencies
-    expected_df = pd.DataFrame(expected, columns=contingency_table.columns, index=contingency_table.index)
-
     with st.expander("Expected Frequencies for Chi-square Test"):
-        st.dataframe(expected_df.style.format("{:.2f}"))
+        performance_tracking.dataframe(expected_df.style.format("{:.2f}"))
     
         # Check if all expected frequencies are at least 5
         if (expected >= 5).all():
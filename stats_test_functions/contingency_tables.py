@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from functions import performance_tracking
+
+#------------------------------------
+# <<< Cached contingency table for a pair of categorical columns >>>
+#------------------------------------
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=64))
+def get_contingency_table(df, row_column, column_column):
+    """
+    Builds the contingency table for a pair of categorical columns once per (dataset, column pair),
+    so that the chi-square, Fisher's exact, McNemar's, Cramer's V and Phi coefficient checks all
+    share the same observed counts, margins and expected counts. Rows with a missing value in
+    either column are excluded. The returned tables are shared across reruns and should not be modified.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    row_column (str): The column in df whose categories form the rows of the table.
+    column_column (str): The column in df whose categories form the columns of the table.
+
+    Returns:
+    dict: 'observed' and 'expected' (DataFrames of counts, expected under independence), 'row_totals',
+          'column_totals' (Series) and 'total' (int).
+    """
+    row_codes, row_labels = pd.factorize(df[row_column], sort=True)
+    column_codes, column_labels = pd.factorize(df[column_column], sort=True)
+
+    complete = (row_codes >= 0) & (column_codes >= 0)
+    number_of_rows = len(row_labels)
+    number_of_columns = len(column_labels)
+
+    # a single pass over the data: each (row, column) pair maps to one flat cell index
+    cell_codes = row_codes[complete] * number_of_columns + column_codes[complete]
+    observed = np.bincount(cell_codes, minlength=number_of_rows * number_of_columns).reshape(number_of_rows, number_of_columns)
+
+    row_totals = observed.sum(axis=1)
+    column_totals = observed.sum(axis=0)
+    total = int(row_totals.sum())
+    expected = np.outer(row_totals, column_totals) / total if total else np.zeros(observed.shape)
+
+    index = pd.Index(row_labels, name=row_column)
+    columns = pd.Index(column_labels, name=column_column)
+
+    dict_table = {
+        'observed': pd.DataFrame(observed, index=index, columns=columns),
+        'expected': pd.DataFrame(expected, index=index, columns=columns),
+        'row_totals': pd.Series(row_totals, index=index),
+        'column_totals': pd.Series(column_totals, index=columns),
+        'total': total,
+    }
+    return dict_table
+
+#------------------------------------
+# <<< Cached sparse multi-way table and its marginal tables >>>
+#------------------------------------
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=16))
+def get_sparse_table(df, columns):
+    """
+    Builds the multi-way table for any number of categorical columns once per (dataset, columns), keeping
+    only the cells that contain observations. Each column is integer-coded and each row maps to one flat
+    cell index, so the table comes from a single pass over the data however many cells it could have.
+    Rows with a missing value in any of the columns are excluded. The returned arrays should not be modified.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    columns (tuple): The categorical columns that form the dimensions of the table.
+
+    Returns:
+    dict: 'cells' (flat indexes of the non-empty cells), 'counts' (their counts), 'shape' (number of
+          categories for each column), 'labels' (list of the category labels for each column) and 'total' (int).
+    """
+    list_codes = []
+    list_labels = []
+    for column in columns:
+        codes, labels = pd.factorize(df[column], sort=True)
+        list_codes.append(codes)
+        list_labels.append(labels)
+
+    complete = np.logical_and.reduce([codes >= 0 for codes in list_codes])
+    shape = tuple(len(labels) for labels in list_labels)
+
+    cell_codes = np.ravel_multi_index([codes[complete] for codes in list_codes], shape)
+    cells, counts = np.unique(cell_codes, return_counts=True)
+    cells.flags.writeable = False
+    counts.flags.writeable = False
+
+    dict_table = {
+        'cells': cells,
+        'counts': counts,
+        'shape': shape,
+        'labels': list_labels,
+        'total': int(counts.sum()),
+    }
+    return dict_table
+
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=256))
+def get_marginal_table(df, columns, term):
+    """
+    Sums the cached multi-way table over every column not in term. Marginal tables are cached per
+    (dataset, columns, term), so comparing many models during model selection never rescans the data.
+    The returned array is shared across reruns and should not be modified.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    columns (tuple): The categorical columns of the full table.
+    term (tuple): The columns (in the same order as columns) to keep in the marginal table.
+
+    Returns:
+    ndarray: The marginal counts, with one axis for each column in term.
+    """
+    dict_table = get_sparse_table(df, columns)
+    axes = [columns.index(column) for column in term]
+    marginal_shape = tuple(dict_table['shape'][axis] for axis in axes)
+
+    cell_index = np.unravel_index(dict_table['cells'], dict_table['shape'])
+    marginal_cells = np.ravel_multi_index([cell_index[axis] for axis in axes], marginal_shape)
+    marginal = np.bincount(marginal_cells, weights=dict_table['counts'], minlength=int(np.prod(marginal_shape))).reshape(marginal_shape)
+    marginal.flags.writeable = False
+    return marginal
+
+#------------------------------------
+# <<< Effect sizes from the cached table >>>
+#------------------------------------
+
+def chi_square_statistic(dict_table):
+    """
+    Calculates the Pearson chi-square statistic (without continuity correction) from a cached contingency table.
+
+    Args:
+    dict_table (dict): Output of get_contingency_table.
+
+    Returns:
+    float: The chi-square statistic.
+    """
+    observed = dict_table['observed'].to_numpy(dtype=float)
+    expected = dict_table['expected'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cell_contributions = np.where(expected > 0, (observed - expected) ** 2 / expected, 0.0)
+    return float(cell_contributions.sum())
+
+
+def cramers_v(df, row_column, column_column):
+    """
+    Calculates Cramer's V, a measure of association between two categorical variables ranging from 0 (no association) to 1.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    row_column (str): The first categorical column.
+    column_column (str): The second categorical column.
+
+    Returns:
+    float: Cramer's V.
+
+    Example:
+    >>> cramers_v(pd.DataFrame({'a': ['x', 'x', 'y', 'y'], 'b': ['p', 'q', 'q', 'q']}), 'a', 'b')
+    """
+    dict_table = get_contingency_table(df, row_column, column_column)
+    min_dimension = min(dict_table['observed'].shape) - 1
+    if dict_table['total'] == 0 or min_dimension == 0:
+        return np.nan
+    return float(np.sqrt(chi_square_statistic(dict_table) / (dict_table['total'] * min_dimension)))
+
+
+def phi_coefficient(df, row_column, column_column):
+    """
+    Calculates the Phi coefficient, a signed measure of association between two binary variables ranging from -1 to 1.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    row_column (str): The first binary column.
+    column_column (str): The second binary column.
+
+    Returns:
+    float: The Phi coefficient, or NaN if the table is not 2x2.
+
+    Example:
+    >>> phi_coefficient(pd.DataFrame({'a': [0, 0, 1, 1], 'b': [0, 1, 1, 1]}), 'a', 'b')
+    """
+    dict_table = get_contingency_table(df, row_column, column_column)
+    if dict_table['observed'].shape != (2, 2):
+        return np.nan
+    (a, b), (c, d) = dict_table['observed'].to_numpy(dtype=float)
+    denominator = np.sqrt(np.prod(dict_table['row_totals'].to_numpy(dtype=float)) * np.prod(dict_table['column_totals'].to_numpy(dtype=float)))
+    if denominator == 0:
+        return np.nan
+    return float((a * d - b * c) / denominator)
@@ -256,6 +256,208 @@ def create_dummy_data_kruskal_wallis():
 
     return df
 
+#--------------------------
+#mann whitney u dummy data creation function
+
+def create_dummy_data_mann_whitney_u():
+    """
+    Generates a dummy dataset for testing the Mann-Whitney U test.
+
+    Returns:
+    DataFrame: A pandas DataFrame in long format with columns 'Therapy' and 'Pain_Relief_Score', representing two independent, skewed groups.
+    """
+    np.random.seed(42)  # For reproducible results
+
+    # Generate skewed (non-normal) data for the two groups
+    therapy_a = np.round(np.random.exponential(scale=3, size=40), 1)
+    therapy_b = np.round(np.random.exponential(scale=5, size=40), 1)
+
+    df = pd.DataFrame({
+        'Therapy': ['A']*40 + ['B']*40,
+        'Pain_Relief_Score': np.concatenate([therapy_a, therapy_b])
+    })
+
+    return df
+
+#--------------------------
+#kendall's tau dummy data creation function
+
+def create_dummy_data_kendalls_tau(num_samples=200, random_seed=42):
+    """
+    Generates a dummy ordinal survey dataset for testing Kendall's Tau.
+
+    Returns:
+    DataFrame: A pandas DataFrame with two 1-5 Likert scale columns, 'Satisfaction' and 'Likelihood_To_Recommend', with many tied values and a positive association.
+    """
+    np.random.seed(random_seed)
+
+    satisfaction = np.random.randint(1, 6, size=num_samples)
+    likelihood_to_recommend = np.clip(satisfaction + np.random.randint(-2, 3, size=num_samples), 1, 5)
+
+    df = pd.DataFrame({
+        'Satisfaction': satisfaction,
+        'Likelihood_To_Recommend': likelihood_to_recommend
+    })
+
+    return df
+
+#--------------------------
+#partial correlation dummy data creation function
+
+def create_dummy_data_partial_correlation(num_samples=200, random_seed=42):
+    """
+    Generates a dummy dataset for testing partial correlation, where age drives both exercise and blood pressure.
+
+    Returns:
+    DataFrame: A pandas DataFrame with columns 'Age', 'Exercise_Hours', 'BMI' and 'Blood_Pressure'.
+    """
+    np.random.seed(random_seed)
+
+    age = np.random.normal(50, 12, num_samples)
+    exercise_hours = np.clip(10 - 0.1 * age + np.random.normal(0, 1.5, num_samples), 0, None)
+    bmi = np.random.normal(27, 4, num_samples)
+    blood_pressure = 90 + 0.6 * age + 0.8 * bmi - 0.5 * exercise_hours + np.random.normal(0, 8, num_samples)
+
+    df = pd.DataFrame({
+        'Age': np.round(age, 0),
+        'Exercise_Hours': np.round(exercise_hours, 1),
+        'BMI': np.round(bmi, 1),
+        'Blood_Pressure': np.round(blood_pressure, 0)
+    })
+
+    return df
+
+#--------------------------
+#exact test of goodness of fit dummy data creation function
+
+def create_dummy_data_exact_goodness_of_fit(multinomial=False):
+    """
+    Generates a small dummy dataset of category counts for testing the exact test of goodness of fit.
+
+    Args:
+    multinomial (bool, optional): True for more than two categories (multinomial model). Defaults to False.
+
+    Returns:
+    DataFrame: A pandas DataFrame with columns for category and observed counts.
+    """
+    if multinomial:
+        data = {
+            'Category': ['Red', 'Blue', 'Green', 'Yellow'],
+            'Observed': [9, 4, 6, 1]
+        }
+    else:
+        data = {
+            'Category': ['Heads', 'Tails'],
+            'Observed': [7, 13]
+        }
+
+    df = pd.DataFrame(data)
+
+    return df
+
+#--------------------------
+#log-linear analysis dummy data creation function
+
+def create_dummy_data_log_linear_analysis(num_samples=600, random_seed=42):
+    """
+    Generates a dummy dataset of three categorical variables for testing a log-linear analysis,
+    where smoking and exercise are both associated with heart disease.
+
+    Returns:
+    DataFrame: A pandas DataFrame with columns 'Smoker', 'Exercise' and 'Heart_Disease', one row per subject.
+    """
+    np.random.seed(random_seed)
+
+    smoker = np.random.choice(['Yes', 'No'], size=num_samples, p=[0.3, 0.7])
+    exercise = np.random.choice(['Low', 'Medium', 'High'], size=num_samples, p=[0.4, 0.35, 0.25])
+    risk = 0.1 + 0.2 * (smoker == 'Yes') + 0.15 * (exercise == 'Low')
+    heart_disease = np.where(np.random.rand(num_samples) < risk, 'Yes', 'No')
+
+    df = pd.DataFrame({
+        'Smoker': smoker,
+        'Exercise': exercise,
+        'Heart_Disease': heart_disease
+    })
+
+    return df
+
+#--------------------------
+#factorial anova dummy data creation function
+
+def create_dummy_data_factorial_anova(num_samples=360, random_seed=42):
+    """
+    Generates a dummy dataset for testing a factorial ANOVA, with two factors and an interaction between them.
+
+    Returns:
+    DataFrame: A pandas DataFrame with columns 'Fertilizer', 'Irrigation' and 'Yield', one row per plot.
+    """
+    np.random.seed(random_seed)
+
+    fertilizer = np.random.choice(['None', 'Organic', 'Synthetic'], size=num_samples)
+    irrigation = np.random.choice(['Low', 'High'], size=num_samples)
+    crop_yield = (
+        50
+        + 5 * (fertilizer == 'Organic')
+        + 8 * (fertilizer == 'Synthetic')
+        + 6 * (irrigation == 'High')
+        + 4 * ((fertilizer == 'Synthetic') & (irrigation == 'High'))
+        + np.random.normal(0, 5, num_samples)
+    )
+
+    df = pd.DataFrame({
+        'Fertilizer': fertilizer,
+        'Irrigation': irrigation,
+        'Yield': np.round(crop_yield, 1)
+    })
+
+    return df
+
+#--------------------------
+#one-way ancova dummy data creation function
+
+def create_dummy_data_one_way_ancova(num_samples=150, random_seed=42):
+    """
+    Generates a dummy dataset for testing a one-way ANCOVA, comparing post-test scores between teaching methods
+    after adjusting for the pre-test score.
+
+    Returns:
+    DataFrame: A pandas DataFrame with columns 'Teaching_Method', 'Pre_Test' and 'Post_Test', one row per student.
+    """
+    np.random.seed(random_seed)
+
+    teaching_method = np.random.choice(['Lecture', 'Online', 'Workshop'], size=num_samples)
+    pre_test = np.random.normal(60, 10, num_samples)
+    post_test = 20 + 0.7 * pre_test + 4 * (teaching_method == 'Workshop') + 2 * (teaching_method == 'Online') + np.random.normal(0, 5, num_samples)
+
+    df = pd.DataFrame({
+        'Teaching_Method': teaching_method,
+        'Pre_Test': np.round(pre_test, 0),
+        'Post_Test': np.round(post_test, 0)
+    })
+
+    return df
+
+#--------------------------
+#friedman test dummy data creation function
+
+def create_dummy_data_friedman_test(num_subjects=30, random_seed=42):
+    """
+    Generates a dummy dataset for testing the Friedman test: each subject rates four products on a 1-7 scale.
+
+    Returns:
+    DataFrame: A pandas DataFrame in wide format, with a 'SubjectID' column and one rating column per product.
+    """
+    np.random.seed(random_seed)
+
+    subject_effect = np.random.normal(0, 1, (num_subjects, 1))
+    product_effect = np.array([0, 0.3, 1.0, 1.2])
+    ratings = np.clip(np.round(4 + subject_effect + product_effect + np.random.normal(0, 1, (num_subjects, 4))), 1, 7).astype(int)
+
+    df = pd.DataFrame(ratings, columns=['Product_A', 'Product_B', 'Product_C', 'Product_D'])
+    df.insert(0, 'SubjectID', np.arange(1, num_subjects + 1))
+
+    return df
+
 #--------------------------
 #independent z test dummy data
 def create_dummy_data_independent_z_test(num_samples=1000, mean1=50, std1=5, mean2=55, std2=5):
@@ -407,34 +609,36 @@ def get_dummy_data_for_tests(selected_recommended_test):
     'Chi-square goodness of fit': create_dummy_data_chi_square(),
     'Chi-square test of independence': create_long_format_data_for_chi_square_test_independence(),
     "Cramer's V": placeholder_text,
-    'Exact test of Goodness of Fit (multinomial model)': placeholder_text,
-    'Exact test of Goodness of Fit': placeholder_text,
-    'Factorial ANOVA': placeholder_text,
+    'Exact test of Goodness of Fit (multinomial model)': create_dummy_data_exact_goodness_of_fit(multinomial=True),
+    'Exact test of Goodness of Fit': create_dummy_data_exact_goodness_of_fit(),
+    'Factorial ANOVA': create_dummy_data_factorial_anova(),
     'Fischers Exact test': create_dummy_data_for_fishers_test(),
-    'G-test of Goodness of Fit': placeholder_text,
+    'Friedman test': create_dummy_data_friedman_test(),
+    'G-test of Goodness of Fit': create_dummy_data_chi_square(),
     'G-test': placeholder_text,
     'Independent samples T-test': pd.DataFrame((base_data, shifted_data)).T.rename(columns={0:'sample1', 1:'sample2'}),
     'Independent samples Z-test': create_dummy_data_independent_z_test(),
-    "Kendall's Tau": (ordinal_data, np.sort(ordinal_data) * -1),
+    "Kendall's Tau": create_dummy_data_kendalls_tau(),
     'Kruskal-Wallis': create_dummy_data_kruskal_wallis(),
-    'Log-linear analysis': placeholder_text,
-    'Mann-Whitney U Test': (base_data, shifted_data),
+    'Log-linear analysis': create_dummy_data_log_linear_analysis(),
+    'Mann-Whitney U Test': create_dummy_data_mann_whitney_u(),
     'McNemars test': create_dummy_data_mcnemars(),
     'One-proportion z-test': placeholder_text,
-    'One-way ANCOVA': placeholder_text,
+    'One-way ANCOVA': create_dummy_data_one_way_ancova(),
     'One-way ANOVA': create_dummy_data_anova(),
+    'One-way Repeated Measures ANOVA': create_dummy_data_repeated_measures_anova(),
     'Paired samples T-test': pd.DataFrame((base_data, base_data * 1.1)).T.rename(columns={0:'sample1_time_point_A', 1:'sample1_time_point_B'}),
     'Paired samples Z-test': create_dummy_data_paired_z_test(),
-    'Partial correlation': placeholder_text,
+    'Partial correlation': create_dummy_data_partial_correlation(),
     'Pearson correlation': create_dummy_data_pearson_correlation(),
     'Phi co-efficient': placeholder_text,
     "Point biserial correlation": placeholder_text,
     'Single sample T-test': create_dummy_data_one_sample_t_test(),
-    'Single sample wilcoxon signed-rank test': (shifted_data, 12),
+    'Single sample wilcoxon signed-rank test': pd.DataFrame({'sample1': shifted_data}),
     'Single sample Z-test': create_dummy_data_one_sample_z_test(),
     "Spearman's Rho": placeholder_text,
     'Two proportion z-test': placeholder_text,
-    'Wilcoxon signed-rank test': (base_data, shifted_data),
+    'Wilcoxon signed-rank test': pd.DataFrame({'sample1_time_point_A': base_data, 'sample1_time_point_B': shifted_data}),
     }
 
     #retrieve test data from above dict
@@ -481,19 +685,24 @@ def expected_data_structure_examples(test_name):
             st.write(placeholder_text)
 
         elif test_name == 'Exact test of Goodness of Fit (multinomial model)':
-            st.write(placeholder_text)
+            example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
 
         elif test_name == 'Exact test of Goodness of Fit':
-            st.write(placeholder_text)
+            example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
 
         elif test_name == 'Factorial ANOVA':
-            st.write(placeholder_text)
+            st.write("Your data should be in a **long** format, one row per subject, for the Factorial ANOVA:")
+            example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
 
         elif test_name == 'Fischers Exact test':
             example_df = pd.DataFrame(get_dummy_data_for_tests(test_name)).iloc[:20,:]
 
+        elif test_name == 'Friedman test':
+            st.write("Your data should be in a **wide** format, one row per subject and one column per condition, for the Friedman test (or a **long** format, with subject, condition and value columns):")
+            example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
+
         elif test_name == 'G-test of Goodness of Fit':
-            st.write(placeholder_text)
+            example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
 
         elif test_name == 'G-test':
             st.write(placeholder_text)
@@ -505,16 +714,18 @@ def expected_data_structure_examples(test_name):
             example_df = pd.DataFrame(get_dummy_data_for_tests(test_name))#.iloc[:20,:]
 
         elif test_name == "Kendall's Tau":
-            st.write(placeholder_text)
+            example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
 
         elif test_name == 'Kruskal-Wallis':
             example_df = pd.DataFrame(get_dummy_data_for_tests(test_name)).iloc[:20,:]
 
         elif test_name == 'Log-linear analysis':
-            st.write(placeholder_text)
+            st.write("Your data should be in a **long** format, one row per subject, for the Log-linear analysis:")
+            example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
 
         elif test_name == 'Mann-Whitney U Test':
-            st.write(placeholder_text)
+            st.write("Your data should be in a **long** format for the Mann-Whitney U test:")
+            example_df = get_dummy_data_for_tests(test_name).iloc[35:45,:]
 
         elif test_name == 'McNemars test':
             example_df = pd.DataFrame(get_dummy_data_for_tests(test_name)).iloc[:20,:]
@@ -523,13 +734,18 @@ def expected_data_structure_examples(test_name):
             st.write(placeholder_text)
 
         elif test_name == 'One-way ANCOVA':
-            st.write(placeholder_text)
+            st.write("Your data should be in a **long** format, one row per subject, for the One-way ANCOVA:")
+            example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
 
         elif test_name == 'One-way ANOVA':  #done
             # Show data format example
             st.write("Your data should be in a **long** format for ANOVA:")
             #example_df = pd.DataFrame(create_dummy_data_anova()).iloc[:20,:]
             example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
+
+        elif test_name == 'One-way Repeated Measures ANOVA':
+            st.write("Your data should be in a **wide** format, one row per subject and one column per condition, for the Repeated Measures ANOVA (or a **long** format, with subject, condition and value columns):")
+            example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
         
         elif test_name == 'Paired samples T-test': #done
             example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
@@ -538,7 +754,7 @@ def expected_data_structure_examples(test_name):
             example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
 
         elif test_name == 'Partial correlation':
-            st.write(placeholder_text)
+            example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
             
         elif test_name == 'Pearson correlation': #done
             example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
@@ -553,7 +769,7 @@ def expected_data_structure_examples(test_name):
             example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
 
         elif test_name == 'Single sample wilcoxon signed-rank test':
-            st.write(placeholder_text)
+            example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
 
         elif test_name == 'Single sample Z-test':
             example_df = pd.DataFrame(get_dummy_data_for_tests(test_name)).iloc[:20,:]
@@ -565,7 +781,7 @@ def expected_data_structure_examples(test_name):
             st.write(placeholder_text)
 
         elif test_name == 'Wilcoxon signed-rank test':
-            st.write(placeholder_text)
+            example_df = get_dummy_data_for_tests(test_name).iloc[:20,:]
 
         try:
             #render df preview for selected test
@@ -0,0 +1,209 @@
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+import streamlit as st
+
+from functions import performance_tracking
+
+#------------------------------------
+# <<< On-disk cache for exact null distributions >>>
+#------------------------------------
+
+#exact null distributions only depend on the sample sizes, so they are computed once and
+#kept on disk (one .npy file per distribution) to survive app restarts
+CACHE_DIRECTORY = Path(os.environ.get('STATS_EXACT_CACHE_DIR', Path(__file__).resolve().parent.parent / '.stats_cache'))
+
+
+def _load_or_compute(file_name, compute_function, *args):
+    """
+    Loads an array from the on-disk cache, or computes and saves it if it is not there yet.
+    Files are written to a temporary name first and then renamed, so a partly written file
+    is never read by another session.
+
+    Args:
+    file_name (str): Name of the .npy file in the cache directory.
+    compute_function (callable): Function that computes the array if it is not cached.
+    *args: Arguments passed to compute_function.
+
+    Returns:
+    ndarray: The cached or newly computed array.
+    """
+    file_path = CACHE_DIRECTORY / file_name
+    try:
+        return np.load(file_path, allow_pickle=False)
+    except (OSError, ValueError):
+        pass
+
+    array = compute_function(*args)
+    try:
+        CACHE_DIRECTORY.mkdir(parents=True, exist_ok=True)
+        temporary_path = file_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temporary_path, 'wb') as file:
+            np.save(file, array, allow_pickle=False)
+        os.replace(temporary_path, file_path)
+    except OSError:
+        #a read-only file system just means the distribution is recomputed next time
+        pass
+    return array
+
+#------------------------------------
+# <<< Mann-Whitney U exact null distribution >>>
+#------------------------------------
+
+def mann_whitney_u_exact_is_feasible(n1, n2, max_cells=10000):
+    """
+    Checks whether the exact null distribution of U can be computed for the given sample sizes.
+    The number of arrangements must fit in a 64-bit integer and the distribution (n1 * n2 + 1 values)
+    must stay a reasonable size.
+
+    Args:
+    n1 (int): Size of the first sample.
+    n2 (int): Size of the second sample.
+    max_cells (int, optional): Largest n1 * n2 for which the exact distribution is used. Defaults to 10000.
+
+    Returns:
+    bool: True if the exact distribution can be used.
+    """
+    return n1 * n2 <= max_cells and math.comb(n1 + n2, n1) < 2 ** 62
+
+
+def _compute_mann_whitney_u_counts(n_small, n_large):
+    """
+    Counts the number of arrangements of the two samples that give each value of U, under the
+    null hypothesis and with no ties. These are the coefficients of the Gaussian binomial
+    coefficient [n_small + n_large choose n_small]_q, built with the recurrence
+    P_i = P_(i-1) * (1 - q^(n_large + i)) / (1 - q^i), which keeps every intermediate value an exact integer.
+
+    Args:
+    n_small (int): Size of the smaller sample.
+    n_large (int): Size of the larger sample.
+
+    Returns:
+    ndarray: int64 array of length n_small * n_large + 1, where element u is the number of arrangements giving U = u.
+    """
+    size = n_small * n_large + 1
+    counts = np.zeros(size, dtype=np.int64)
+    counts[0] = 1
+
+    for i in range(1, n_small + 1):
+        # multiply by (1 - q^(n_large + i))
+        shift = n_large + i
+        if shift < size:
+            counts[shift:] -= counts[:size - shift].copy()
+
+        # divide by (1 - q^i): c[j] = a[j] + c[j - i], i.e. a cumulative sum along each residue class mod i
+        padded_size = -(-size // i) * i
+        padded = np.zeros(padded_size, dtype=np.int64)
+        padded[:size] = counts
+        counts = np.cumsum(padded.reshape(-1, i), axis=0).ravel()[:size]
+
+    return counts
+
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=256))
+def get_mann_whitney_u_distribution(n1, n2):
+    """
+    Returns the exact cumulative null distribution of U for two samples of size n1 and n2 (no ties),
+    memoized in memory and on disk per pair of sample sizes.
+
+    Args:
+    n1 (int): Size of the first sample.
+    n2 (int): Size of the second sample.
+
+    Returns:
+    ndarray: Read-only array where element u is P(U <= u).
+    """
+    n_small, n_large = sorted((int(n1), int(n2)))
+    counts = _load_or_compute(f'mann_whitney_u_{n_small}_{n_large}.npy', _compute_mann_whitney_u_counts, n_small, n_large)
+
+    cdf = np.cumsum(counts) / float(math.comb(n_small + n_large, n_small))
+    cdf.flags.writeable = False
+    return cdf
+
+
+def mann_whitney_u_exact_p_value(u_stat, n1, n2):
+    """
+    Calculates the exact two-sided p-value for a Mann-Whitney U statistic.
+
+    Args:
+    u_stat (float): The U statistic of either sample.
+    n1 (int): Size of the first sample.
+    n2 (int): Size of the second sample.
+
+    Returns:
+    float: The two-sided p-value.
+    """
+    cdf = get_mann_whitney_u_distribution(n1, n2)
+    # the distribution is symmetric, so P(U >= u) = P(U <= n1 * n2 - u); reading the lower tail keeps small p-values precise
+    u_small = int(round(min(u_stat, n1 * n2 - u_stat)))
+    return float(min(1.0, 2 * cdf[u_small]))
+
+#------------------------------------
+# <<< Wilcoxon signed-rank exact null distribution >>>
+#------------------------------------
+
+#largest number of non-zero differences for which the exact distribution is precomputed
+WILCOXON_EXACT_MAX_N = 50
+
+
+def _compute_wilcoxon_signed_rank_table(max_n):
+    """
+    Builds the exact null cumulative distribution of the signed-rank statistic T+ for every n up to max_n
+    (no ties or zero differences). Each extra observation either adds its rank to T+ or not with equal
+    probability, so pmf_n(t) = (pmf_(n-1)(t) + pmf_(n-1)(t - n)) / 2, built incrementally from n = 1.
+
+    Args:
+    max_n (int): Largest number of observations in the table.
+
+    Returns:
+    ndarray: Array of shape (max_n + 1, max_n * (max_n + 1) / 2 + 1) where element [n, t] is P(T+ <= t) for n observations.
+    """
+    max_t = max_n * (max_n + 1) // 2
+    table = np.ones((max_n + 1, max_t + 1))
+
+    pmf = np.zeros(max_t + 1)
+    pmf[0] = 1.0
+    for n in range(1, max_n + 1):
+        shifted = np.zeros(max_t + 1)
+        shifted[n:] = pmf[:max_t + 1 - n]
+        pmf = (pmf + shifted) / 2
+        table[n] = np.minimum(np.cumsum(pmf), 1.0)
+
+    return table
+
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False))
+def get_wilcoxon_signed_rank_table(max_n=WILCOXON_EXACT_MAX_N):
+    """
+    Returns the precomputed exact null distributions of T+ for every n up to max_n, memoized in
+    memory and on disk.
+
+    Args:
+    max_n (int, optional): Largest number of observations in the table. Defaults to WILCOXON_EXACT_MAX_N.
+
+    Returns:
+    ndarray: Read-only table where element [n, t] is P(T+ <= t) for n observations.
+    """
+    table = _load_or_compute(f'wilcoxon_signed_rank_{max_n}.npy', _compute_wilcoxon_signed_rank_table, max_n)
+    table.flags.writeable = False
+    return table
+
+
+def wilcoxon_signed_rank_exact_p_value(t_stat, n, max_n=WILCOXON_EXACT_MAX_N):
+    """
+    Calculates the exact two-sided p-value for a Wilcoxon signed-rank statistic.
+
+    Args:
+    t_stat (float): The sum of the ranks of either the positive or the negative differences.
+    n (int): Number of non-zero differences. Must not exceed max_n.
+    max_n (int, optional): Largest n in the precomputed table. Defaults to WILCOXON_EXACT_MAX_N.
+
+    Returns:
+    float: The two-sided p-value.
+    """
+    cdf = get_wilcoxon_signed_rank_table(max_n)[n]
+    # the distribution is symmetric, so P(T+ >= t) = P(T+ <= n(n+1)/2 - t); reading the lower tail keeps small p-values precise
+    t_small = int(round(min(t_stat, n * (n + 1) / 2 - t_stat)))
+    return float(min(1.0, 2 * cdf[t_small]))
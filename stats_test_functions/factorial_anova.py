@@ -0,0 +1,385 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+import streamlit as st
+
+from functions import performance_tracking
+from stats_test_functions import linear_model_helpers
+
+
+#------------------------------------
+# <<< Function to render assumptions >>>
+#------------------------------------
+#extension of the one-way ANOVA to two or more grouping variables (factors) and their interactions
+
+def display_factorial_anova_assumptions():
+    """
+    Displays the assumptions required for conducting a factorial ANOVA.
+    """
+    dict_assumptions = {
+        "Independence": "The observations must be independent of each other, and each subject should appear in only one cell (combination of factor levels).",
+        "Scale of Measurement": "The dependent variable should be continuous (interval or ratio). The factors should be categorical.",
+        "Normality": "The residuals (each value minus the mean of its cell) should be approximately normally distributed.",
+        "Homogeneity of Variances": "The variance of the dependent variable should be roughly equal in every cell.",
+        "No Empty Cells": "Every combination of factor levels should contain observations, ideally at least two, so that every interaction can be estimated."
+    }
+
+    with st.expander("Click for Factorial ANOVA Assumptions"):
+        for key, value in dict_assumptions.items():
+            st.write(f":red[**{key}**:]\n{value}")
+
+#------------------------------------
+# <<< Factorial ANOVA from the cached cell statistics >>>
+#------------------------------------
+
+def factorial_anova(df, value_column, factor_columns, sum_of_squares_type=2, max_order=None):
+    """
+    Calculates the factorial ANOVA table from the cached cell statistics. As every row in a cell has the same
+    predicted value, the model is fitted to the cell means weighted by the cell counts (one design matrix row per
+    non-empty cell rather than per data row), and the within-cell sum of squares is added to the residual.
+    The design uses sum-to-zero contrasts. Each model's orthonormal basis extends the basis of the model with one
+    term fewer, so adding a term (e.g. an interaction) never refits the terms already in the model.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    value_column (str): The column containing the dependent variable.
+    factor_columns (tuple): The columns containing the factors.
+    sum_of_squares_type (int, optional): Type of sums of squares: 1 (sequential), 2 or 3. Defaults to 2.
+    max_order (int, optional): Highest order of interaction to include. Defaults to None (all interactions).
+
+    Returns:
+    DataFrame: One row per term and one for the residual, with columns 'Source', 'SS', 'DF', 'MS', 'F', 'p-unc' and 'np2' (partial eta squared).
+
+    Example:
+    >>> factorial_anova(df, 'Yield', ('Fertilizer', 'Irrigation', 'Soil'), sum_of_squares_type=3)
+    """
+    factor_columns = tuple(factor_columns)
+    dict_cells = linear_model_helpers.get_cell_statistics(df, value_column, factor_columns)
+    number_of_factors = len(factor_columns)
+    max_order = number_of_factors if max_order is None else max_order
+
+    list_terms = [term for order in range(1, max_order + 1) for term in itertools.combinations(range(number_of_factors), order)]
+
+    # weighted least squares on the cell means is the same fit as ordinary least squares on the rows
+    weights = np.sqrt(dict_cells['counts'])
+    y = weights * (dict_cells['means'] - dict_cells['grand_mean'])
+    dict_term_columns = {
+        term: weights[:, np.newaxis] * linear_model_helpers.term_columns(dict_cells['cell_levels'], dict_cells['shape'], term)
+        for term in list_terms
+    }
+
+    # bases of the models fitted so far, keyed by their terms (in list_terms order): each extends the one with its last term removed
+    dict_bases = {(): ((weights / np.linalg.norm(weights))[:, np.newaxis], 0)}
+
+    def _fit(model_terms):
+        model_terms = tuple(model_terms)
+        if model_terms not in dict_bases:
+            basis, _ = _fit(model_terms[:-1])
+            dict_bases[model_terms] = linear_model_helpers.extend_orthonormal_basis(basis, dict_term_columns[model_terms[-1]])
+        return dict_bases[model_terms]
+
+    full_basis, _ = _fit(list_terms)
+    full_rss = linear_model_helpers.residual_sum_of_squares(full_basis, y)
+
+    list_rows = []
+    for position, term in enumerate(list_terms):
+        if sum_of_squares_type == 1:
+            reduced_terms = list_terms[:position]
+        elif sum_of_squares_type == 2:
+            # every term except this one and the higher-order terms that contain it
+            reduced_terms = [other for other in list_terms if other != term and not set(term) <= set(other)]
+        else:
+            reduced_terms = [other for other in list_terms if other != term]
+
+        reduced_basis, _ = _fit(reduced_terms)
+        if sum_of_squares_type == 3:
+            sum_of_squares = linear_model_helpers.residual_sum_of_squares(reduced_basis, y) - full_rss
+            _, degrees_of_freedom = linear_model_helpers.extend_orthonormal_basis(reduced_basis, dict_term_columns[term])
+        else:
+            extended_basis, degrees_of_freedom = _fit(reduced_terms + [term])
+            sum_of_squares = linear_model_helpers.residual_sum_of_squares(reduced_basis, y) - linear_model_helpers.residual_sum_of_squares(extended_basis, y)
+
+        list_rows.append({'Source': ' * '.join(factor_columns[axis] for axis in term), 'SS': max(sum_of_squares, 0.0), 'DF': degrees_of_freedom})
+
+    residual_ss = full_rss + dict_cells['within_ss']
+    residual_df = dict_cells['n'] - full_basis.shape[1]
+
+    df_anova = pd.DataFrame(list_rows)
+    df_anova['MS'] = df_anova['SS'] / df_anova['DF'].where(df_anova['DF'] > 0)
+    df_anova['F'] = df_anova['MS'] / (residual_ss / residual_df) if residual_df > 0 else np.nan
+    df_anova['p-unc'] = stats.f.sf(df_anova['F'], df_anova['DF'], residual_df)
+    df_anova['np2'] = df_anova['SS'] / (df_anova['SS'] + residual_ss)
+    df_residual = pd.DataFrame([{'Source': 'Residual', 'SS': residual_ss, 'DF': residual_df, 'MS': residual_ss / residual_df if residual_df > 0 else np.nan}])
+
+    return pd.concat([df_anova, df_residual], ignore_index=True)
+
+#------------------------------------
+# <<< Function to select columns >>>
+#------------------------------------
+
+def select_columns_for_factorial_anova(df):
+    """
+    Renders a select box for the dependent variable and a multiselect for the factors.
+
+    Args:
+    df (DataFrame): The dataframe from which columns will be selected.
+
+    Returns:
+    tuple: The selected value column and a tuple of factor columns, or (None, None) if the selection is incomplete.
+    """
+    st.write("Please select the column names for your analysis:")
+
+    default_option = "---"
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        value_column = st.selectbox(
+            "Select the Value Column",
+            options=[default_option] + list(df.columns),
+            help="Select the column that contains the numerical data (the dependent variable)."
+        )
+
+    with col2:
+        list_factor_columns = st.multiselect(
+            "Select the Factor Columns",
+            options=list(df.columns),
+            help="Select two or more columns that contain the grouping variables (factors)."
+        )
+
+    if value_column == default_option or len(list_factor_columns) < 2:
+        return None, None
+    return value_column, tuple(list_factor_columns)
+
+#----------------------------
+#Check cell sizes
+#----------------------------
+
+@performance_tracking.timed
+def check_cell_sizes(df, value_column, factor_columns):
+    """
+    Checks that every combination of factor levels (cell) contains at least two observations, using the cached cell statistics.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    value_column (str): The column containing the dependent variable.
+    factor_columns (tuple): The columns containing the factors.
+
+    Returns:
+    bool: True if there are no empty cells and every cell has at least two observations, False otherwise.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Cell Sizes:**
+        \nA factorial ANOVA estimates a mean for every combination of factor levels (cell). Empty cells mean some interactions cannot be estimated, and cells with a single observation give no information about the variance within the cell.
+        """)
+
+    dict_cells = linear_model_helpers.get_cell_statistics(df, value_column, factor_columns)
+    number_of_possible_cells = int(np.prod(dict_cells['shape']))
+    number_of_cells = len(dict_cells['counts'])
+    smallest_cell = int(dict_cells['counts'].min())
+
+    with st.expander("Cell Sizes Check Results"):
+        st.write(f"""Non-empty cells: {number_of_cells} of {number_of_possible_cells}. Observations: {dict_cells['n']}.
+        \nSmallest cell: {smallest_cell} observations. Largest cell: {int(dict_cells['counts'].max())} observations.""")
+        if number_of_cells == number_of_possible_cells and smallest_cell >= 2:
+            st.write(":green[Every cell contains at least two observations. Assumption satisfied.]")
+            return True
+        else:
+            st.error("There are empty cells, or cells with a single observation. Consider combining factor levels, or leaving out the highest-order interactions.")
+            return False
+
+#----------------------------
+#Check homogeneity of variances and normality of the residuals
+#----------------------------
+
+@performance_tracking.timed
+def check_homogeneity(df, value_column, factor_columns):
+    """
+    Checks the homogeneity of variances across the cells using Levene's test (centred on the cell means).
+    The absolute deviations come from one vectorized pass over the rows, and their one-way ANOVA across
+    cells from np.bincount, so the check scales to hundreds of cells and millions of rows.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    value_column (str): The column containing the dependent variable.
+    factor_columns (tuple): The columns containing the factors.
+
+    Returns:
+    tuple: Levene's test statistic and the p-value.
+    """
+    with st.expander("What is Homogeneity of Variances?"):
+        st.write("""
+        **Homogeneity of variances** requires the variance of the dependent variable to be roughly equal in every cell. **Levene's test** compares the average distance of the values from their cell mean across the cells.
+        """)
+
+    with st.expander("How to Interpret Homogeneity Test Results"):
+        st.write("""
+        **Interpreting Levene's Test:**
+        - **P-value > 0.05**: The variances can be considered equal across the cells.
+        - **P-value ≤ 0.05**: At least one cell's variance differs. With roughly equal cell sizes the ANOVA is fairly robust to this; otherwise consider transforming the data.
+        """)
+
+    dict_cells = linear_model_helpers.get_cell_statistics(df, value_column, factor_columns)
+    row_cells = dict_cells['row_cells']
+    counts = dict_cells['counts']
+    deviations = np.abs(dict_cells['values'] - dict_cells['means'][row_cells])
+
+    # one-way ANOVA of the absolute deviations across cells
+    cell_means = np.bincount(row_cells, weights=deviations) / counts
+    between_ss = float(np.sum(counts * (cell_means - deviations.mean()) ** 2))
+    within_ss = float(np.sum((deviations - cell_means[row_cells]) ** 2))
+    between_df = len(counts) - 1
+    within_df = dict_cells['n'] - len(counts)
+    stat = (between_ss / between_df) / (within_ss / within_df) if between_df > 0 and within_df > 0 and within_ss > 0 else np.nan
+    p_value = float(stats.f.sf(stat, between_df, within_df)) if np.isfinite(stat) else np.nan
+
+    with st.expander("Homogeneity of Variances Check Results"):
+        st.write(f"Levene's Test Statistic: {stat:.4f}, P-value: {p_value:.4f}")
+
+    return stat, p_value
+
+
+@performance_tracking.timed
+def check_normality_of_residuals(df, value_column, factor_columns, max_sample_size=5000, random_seed=42):
+    """
+    Checks the normality of the residuals (each value minus the mean of its cell) using the Shapiro-Wilk test.
+    The test is designed for up to 5000 values, so larger datasets are tested on a seeded random sample of residuals.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    value_column (str): The column containing the dependent variable.
+    factor_columns (tuple): The columns containing the factors.
+    max_sample_size (int, optional): Largest number of residuals tested. Defaults to 5000.
+    random_seed (int, optional): Seed for the random sample. Defaults to 42.
+
+    Returns:
+    tuple: The Shapiro-Wilk test statistic and the p-value.
+    """
+    with st.expander("What is a Normality Test?"):
+        st.write("""
+        **Normality tests** assess whether data are well-modeled by a normal distribution. For a factorial ANOVA it is the residuals (each value minus the mean of its cell) that should be normally distributed, and the **Shapiro-Wilk Test** is used to check this.
+        """)
+
+    with st.expander("How to Interpret Normality Test Results"):
+        st.write("""
+        **Interpreting the Shapiro-Wilk Test:**
+        - **P-value > 0.05**: The residuals can be considered normally distributed.
+        - **P-value ≤ 0.05**: The residuals deviate from a normal distribution. With large cells the ANOVA is fairly robust to this; otherwise consider transforming the data.
+        """)
+
+    dict_cells = linear_model_helpers.get_cell_statistics(df, value_column, factor_columns)
+    residuals = dict_cells['values'] - dict_cells['means'][dict_cells['row_cells']]
+    if residuals.size > max_sample_size:
+        residuals = np.random.default_rng(random_seed).choice(residuals, size=max_sample_size, replace=False)
+
+    stat, p_value = stats.shapiro(residuals)
+
+    with st.expander("Normality Check Results"):
+        st.write(f"Shapiro-Wilk Test Statistic: {stat:.4f}, P-value: {p_value:.4f}" + (f" (random sample of {max_sample_size} residuals)" if dict_cells['n'] > max_sample_size else ""))
+
+    return stat, p_value
+
+#----------------------------
+#Display the ANOVA table
+#----------------------------
+
+def display_factorial_anova_table(df, value_column, factor_columns):
+    """
+    Displays the factorial ANOVA table, with the type of sums of squares and highest interaction order chosen by the user.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    value_column (str): The column containing the dependent variable.
+    factor_columns (tuple): The columns containing the factors.
+    """
+    with st.expander("Factorial ANOVA Table"):
+        col1, col2 = st.columns(2)
+        with col1:
+            sum_of_squares_type = st.selectbox(
+                "Type of sums of squares",
+                options=[2, 3, 1],
+                help="Type II tests each term after the terms that do not contain it. Type III tests each term after all other terms. Type I tests the terms in order."
+            )
+        with col2:
+            max_order = st.selectbox(
+                "Highest order of interaction",
+                options=list(range(len(factor_columns), 0, -1)),
+                help="Leaving out the highest-order interactions can help when some cells are empty."
+            )
+
+        performance_tracking.dataframe(factorial_anova(df, value_column, factor_columns, sum_of_squares_type, max_order), hide_index=True)
+
+#----------------------------
+#User inputs to confirm the assumptions that cannot be checked are true
+#----------------------------
+
+def confirm_factorial_anova_assumptions():
+    """
+    Renders select boxes for the user to manually confirm the assumptions required for the factorial ANOVA.
+
+    Returns:
+    bool: True if all manually checked assumptions are confirmed, False otherwise, None if no selection has been made.
+    """
+    st.subheader("Confirming remaining assumptions for the Factorial ANOVA")
+
+    default_option = "---"
+    options = [default_option, "Yes", "No"]
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        independence_confirmation = st.selectbox(
+            "Confirm if the observations are independent:",
+            options=options,
+            help="Each subject should appear in only one cell."
+        )
+
+    with col2:
+        scale_of_measurement_confirmation = st.selectbox(
+            "Confirm if the dependent variable is continuous:",
+            options=options,
+            help="The dependent variable should be measured on an interval or ratio scale."
+        )
+
+    if independence_confirmation == default_option or scale_of_measurement_confirmation == default_option:
+        return None
+    elif independence_confirmation == "Yes" and scale_of_measurement_confirmation == "Yes":
+        st.success("All necessary assumptions for the Factorial ANOVA are confirmed.")
+        return True
+    else:
+        return False
+
+#----------------------------
+#Main function to render the checks
+#----------------------------
+
+def render_assumption_checks_for_factorial_anova(df):
+    #display assumptions for this test
+    display_factorial_anova_assumptions()
+
+    #user selection for the dependent variable and factors
+    value_column, factor_columns = select_columns_for_factorial_anova(df)
+
+    tab1, tab2, tab3 = st.tabs(['Cell Sizes', 'Homogeneity (equal) variance check', 'Normality check'])
+
+    with tab1:
+        bool_cell_sizes = check_cell_sizes(df, value_column, factor_columns)
+
+    with tab2:
+        stat, homogeneity_p_value = check_homogeneity(df, value_column, factor_columns)
+
+    with tab3:
+        stat, normality_p_value = check_normality_of_residuals(df, value_column, factor_columns)
+
+    display_factorial_anova_table(df, value_column, factor_columns)
+
+    bool_manual_check_assumptions = confirm_factorial_anova_assumptions()
+
+    if bool_cell_sizes and homogeneity_p_value > 0.05 and normality_p_value > 0.05:
+        return bool_manual_check_assumptions
+    else:
+        st.error("One or more assumptions are not met. Consider transforming the data, combining factor levels, or using a non-parametric alternative.")
+        return False
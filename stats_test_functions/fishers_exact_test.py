@@ -2,7 +2,9 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from scipy.stats import chi2_contingency
+
+from functions import performance_tracking
+from stats_test_functions import contingency_tables
 
 #------------------------------------
 # <<< Function to render assumptions >>>
@@ -31,7 +33,7 @@ def display_fishers_exact_test_assumptions():
                 }
                 example_df = pd.DataFrame(example_data, index=['Group 1', 'Group 2'])
                 st.write("Example of the required 2x2 contingency table for this test:")
-                st.dataframe(example_df)
+                performance_tracking.dataframe(example_df)
 
 
 #------------------------------------
@@ -84,6 +86,7 @@ def select_two_columns_for_fishers_exact_test(df):
 # <<< Remind user to be assured that each observation is independent >>>
 #------------------------------------
 
+@performance_tracking.timed
 def check_independence():
     """
     Informs the user about the independence assumption required for Fisher's Exact Test.
@@ -108,6 +111,7 @@ def check_independence():
 # <<< Remind user to ensure fixed margins assumption holds true >>>
 #------------------------------------
 
+@performance_tracking.timed
 def check_fixed_margins():
     """
     Informs the user about the fixed margins assumption required for Fisher's Exact Test and suggests methods to ensure this condition is met.
@@ -138,6 +142,7 @@ def check_fixed_margins():
 # <<< function to check binary data assumption holds true >>>
 #------------------------------------
 
+@performance_tracking.timed
 def check_binary_data(df, column1, column2):
     """
     Checks if the selected columns for Fisher's Exact Test contain exactly two unique values.
@@ -168,8 +173,7 @@ def check_binary_data(df, column1, column2):
     
     # Perform the binary data check and display results
     with st.expander("Binary Data Check Results"):
-        unique_values_column1 = df[column1].nunique()
-        unique_values_column2 = df[column2].nunique()
+        unique_values_column1, unique_values_column2 = contingency_tables.get_contingency_table(df, column1, column2)['observed'].shape
         
         if unique_values_column1 == 2 and unique_values_column2 == 2:
             st.write(f"Both {column1} and {column2} are binary. Assumption satisfied.")
@@ -182,6 +186,7 @@ def check_binary_data(df, column1, column2):
 # <<< function to check sample size and expected cell count assumption holds true >>>
 #------------------------------------
 
+@performance_tracking.timed
 def check_sample_size_for_fishers_exact_test(df, column1, column2):
     """
     Checks if the sample size and expected counts are adequate for conducting Fisher's Exact Test.
@@ -194,17 +199,12 @@ def check_sample_size_for_fishers_exact_test(df, column1, column2):
     Returns:
     bool: True if the conditions for Fisher's Exact Test are met, False otherwise.
     """
-    # Create a contingency table
-    contingency_table = pd.crosstab(df[column1], df[column2])
-
-    # Total entries in the contingency table
-    total_entries = contingency_table.sum().sum()
-    
-    # Calculate expected frequencies
-    chi2, p, dof, expected = chi2_contingency(contingency_table, correction=False)
-    
-    # Create a DataFrame from the expected frequencies
-    expected_df = pd.DataFrame(expected, index=contingency_table.index, columns=contingency_table.columns)
+    # Contingency table, total and expected frequencies, shared with the other categorical tests
+    dict_table = contingency_tables.get_contingency_table(df, column1, column2)
+    contingency_table = dict_table['observed']
+    total_entries = dict_table['total']
+    expected_df = dict_table['expected']
+    expected = expected_df.to_numpy()
 
 
     # Check the conditions on expected frequencies
@@ -255,6 +255,7 @@ def check_sample_size_for_fishers_exact_test(df, column1, column2):
 
 #-----------------------------------------------
 
+@performance_tracking.timed
 def check_assumptions_and_recommend_fishers_exact(binary_data_check, sample_size_check):
     """
     Asks the user to confirm assumptions based on the previous checks and context knowledge
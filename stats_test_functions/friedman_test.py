@@ -0,0 +1,412 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import stats
+
+from functions import performance_tracking
+from stats_test_functions import multiple_testing
+from stats_test_functions import repeated_measures_anova_v1
+from stats_test_functions import subject_condition_matrix as scm
+
+#------------------------------------
+# <<< Function to render assumptions >>>
+#------------------------------------
+#non-parametric alternative to the one-way repeated measures ANOVA when the data
+# do not meet its assumptions, or when dealing with ordinal data
+
+def display_friedman_test_assumptions():
+    """
+    Displays the assumptions required for conducting the Friedman test.
+    """
+    dict_assumptions = {
+        "Related Samples": "Each subject (block) is measured under every condition, e.g. the same participants rating each product or measured at each time point.",
+        "Independence of Subjects": "The subjects must be independent of each other, even though the measurements within a subject are related.",
+        "Scale of Measurement": "The data should be at least ordinal, so the measurements within each subject can be ranked.",
+        "Number of Subjects": "The p-value uses a chi-square approximation, which is reliable with around 10 or more complete subjects (fewer are needed with more conditions)."
+    }
+
+    with st.expander("Click for Friedman test Assumptions"):
+        for key, value in dict_assumptions.items():
+            st.write(f":red[**{key}**:]\n{value}")
+
+#------------------------------------
+# <<< Vectorized ranking within subjects >>>
+#------------------------------------
+
+def rank_within_rows(matrix):
+    """
+    Ranks the values within each row (1 = smallest), giving tied values the average of the ranks they span,
+    using one argsort along axis 1 for all the rows at once, and computes the tie-correction term of each row.
+
+    Args:
+    matrix (ndarray): The values to rank, one row per subject. Should not contain NaN.
+
+    Returns:
+    tuple: Array of average ranks (same shape as the input) and the tie term sum(t^3 - t) of each row, over its groups of tied values.
+
+    Example:
+    >>> rank_within_rows(np.array([[3, 1, 3], [2, 5, 4]]))
+    """
+    number_of_rows, k = matrix.shape
+    order = np.argsort(matrix, axis=1, kind='stable')
+    sorted_values = np.take_along_axis(matrix, order, axis=1)
+    positions = np.broadcast_to(np.arange(k), matrix.shape)
+
+    # each value's run of ties spans [run start, run end] in its sorted row
+    is_run_start = np.ones(matrix.shape, dtype=bool)
+    is_run_start[:, 1:] = sorted_values[:, 1:] != sorted_values[:, :-1]
+    is_run_end = np.ones(matrix.shape, dtype=bool)
+    is_run_end[:, :-1] = is_run_start[:, 1:]
+    run_start = np.maximum.accumulate(np.where(is_run_start, positions, 0), axis=1)
+    run_end = np.minimum.accumulate(np.where(is_run_end, positions, k)[:, ::-1], axis=1)[:, ::-1]
+
+    ranks = np.empty(matrix.shape)
+    np.put_along_axis(ranks, order, (run_start + run_end) / 2 + 1, axis=1)
+
+    # a run of t ties contributes t^3 - t, i.e. t^2 - 1 for each of its t values
+    run_lengths = (run_end - run_start + 1).astype(float)
+    tie_terms = np.sum(run_lengths ** 2 - 1, axis=1)
+
+    return ranks, tie_terms
+
+
+def friedman_rank_statistics(list_blocks):
+    """
+    Accumulates the rank sums of each condition, the sum of the squared ranks and the tie term over blocks of
+    subjects, ranking within subjects with rank_within_rows. Subjects with a missing value in any condition are
+    excluded (complete blocks), as the Friedman test needs every subject measured under every condition.
+
+    Args:
+    list_blocks (iterable): Blocks of the subject x condition matrix, each an ndarray with one column per condition.
+
+    Returns:
+    dict: 'n' (number of complete subjects), 'k' (number of conditions), 'rank_sums' (per condition),
+          'sum_of_squared_ranks' and 'tie_term' (summed over the subjects).
+    """
+    n = 0
+    rank_sums = None
+    sum_of_squared_ranks = tie_term = 0.0
+
+    for block in list_blocks:
+        block = block[~np.isnan(block).any(axis=1)]
+        if rank_sums is None:
+            rank_sums = np.zeros(block.shape[1])
+        if block.shape[0] == 0:
+            continue
+        ranks, tie_terms = rank_within_rows(block)
+        n += block.shape[0]
+        rank_sums += ranks.sum(axis=0)
+        sum_of_squared_ranks += float(np.sum(ranks ** 2))
+        tie_term += float(tie_terms.sum())
+
+    if n < 2:
+        raise ValueError("At least two subjects with a value in every selected condition are required.")
+
+    dict_rank_statistics = {
+        'n': n,
+        'k': rank_sums.size,
+        'rank_sums': rank_sums,
+        'sum_of_squared_ranks': sum_of_squared_ranks,
+        'tie_term': tie_term,
+    }
+    rank_sums.flags.writeable = False
+    return dict_rank_statistics
+
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=16))
+def get_friedman_rank_statistics(df, condition_columns):
+    """
+    Cached friedman_rank_statistics for wide-format data, one column per condition.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    condition_columns (tuple): The columns holding the conditions.
+
+    Returns:
+    dict: See friedman_rank_statistics.
+    """
+    return friedman_rank_statistics(scm.wide_format_blocks(df, condition_columns))
+
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=16))
+def get_friedman_rank_statistics_from_long_format(df, subject_column, condition_column, value_column):
+    """
+    Cached friedman_rank_statistics for long-format data, read from the cached subject x condition matrix.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    subject_column (str): The column identifying the subject.
+    condition_column (str): The column identifying the condition.
+    value_column (str): The column containing the values.
+
+    Returns:
+    dict: See friedman_rank_statistics.
+    """
+    dict_matrix = scm.get_subject_condition_matrix(df, subject_column, condition_column, value_column)
+    return friedman_rank_statistics(scm.matrix_blocks(dict_matrix['matrix']))
+
+#------------------------------------
+# <<< Friedman test and post-hoc comparisons from the rank sums >>>
+#------------------------------------
+
+def friedman_test(dict_rank_statistics):
+    """
+    Friedman test, corrected for ties, and Kendall's coefficient of concordance W.
+
+    Args:
+    dict_rank_statistics (dict): Output of friedman_rank_statistics.
+
+    Returns:
+    dict: 'statistic' (chi-square), 'df', 'p-value' and 'kendalls_w'.
+    """
+    n = dict_rank_statistics['n']
+    k = dict_rank_statistics['k']
+    rank_sums = dict_rank_statistics['rank_sums']
+
+    statistic = 12 / (n * k * (k + 1)) * np.sum(rank_sums ** 2) - 3 * n * (k + 1)
+    tie_correction = 1 - dict_rank_statistics['tie_term'] / (n * k * (k ** 2 - 1))
+    statistic = statistic / tie_correction if tie_correction > 0 else 0.0
+
+    dict_friedman = {
+        'statistic': float(statistic),
+        'df': k - 1,
+        'p-value': float(stats.chi2.sf(statistic, k - 1)),
+        'kendalls_w': float(statistic / (n * (k - 1))),
+    }
+    return dict_friedman
+
+
+def friedman_posthoc(dict_rank_statistics, condition_labels, method='nemenyi'):
+    """
+    Pairwise comparisons of the conditions after a Friedman test, computed from the rank sums alone.
+    - 'nemenyi': the difference in mean ranks over sqrt(k (k + 1) / (6 n)), compared with the studentized range
+      distribution, which controls the family-wise error rate across all pairs.
+    - 'conover': a t-test on the rank sums using the residual variance of the ranks (more powerful than Nemenyi),
+      with Holm-adjusted p-values.
+
+    Args:
+    dict_rank_statistics (dict): Output of friedman_rank_statistics.
+    condition_labels (list): The condition labels, in the order of the rank sums.
+    method (str, optional): 'nemenyi' or 'conover'. Defaults to 'nemenyi'.
+
+    Returns:
+    DataFrame: One row per pair of conditions, with the mean ranks, the test statistic and the p-value.
+    """
+    n = dict_rank_statistics['n']
+    k = dict_rank_statistics['k']
+    rank_sums = dict_rank_statistics['rank_sums']
+    first, second = np.triu_indices(k, 1)
+    differences = np.abs(rank_sums[first] - rank_sums[second])
+
+    if method == 'nemenyi':
+        statistics = differences / n / np.sqrt(k * (k + 1) / (6 * n))
+        p_values = stats.studentized_range.sf(statistics * np.sqrt(2), k, np.inf)
+        p_value_column = 'p-value'
+    elif method == 'conover':
+        s2 = (dict_rank_statistics['sum_of_squared_ranks'] - n * k * (k + 1) ** 2 / 4) / (k - 1)
+        t2 = np.sum((rank_sums - n * (k + 1) / 2) ** 2) / s2 if s2 > 0 else 0.0
+        df_residual = (n - 1) * (k - 1)
+        standard_error = np.sqrt(s2 * 2 * n * (k - 1) / df_residual * max(1 - t2 / (n * (k - 1)), 0.0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            statistics = differences / standard_error
+        p_values = multiple_testing.adjust_p_values(2 * stats.t.sf(statistics, df_residual), method='holm')
+        p_value_column = 'p-value (Holm)'
+    else:
+        raise ValueError(f"Unknown post-hoc method: {method}")
+
+    condition_labels = np.asarray(condition_labels, dtype=object)
+    df_posthoc = pd.DataFrame({
+        'A': condition_labels[first],
+        'B': condition_labels[second],
+        'mean rank A': rank_sums[first] / n,
+        'mean rank B': rank_sums[second] / n,
+        'statistic': statistics,
+        p_value_column: p_values,
+    })
+    return df_posthoc
+
+#------------------------------------
+# <<< Function to select columns >>>
+#------------------------------------
+
+def select_data_for_friedman_test(df):
+    """
+    Renders the choice of data format (wide, or long with one row per subject and condition) and the column
+    selections for it, and returns the cached rank statistics of the selected data.
+
+    Args:
+    df (DataFrame): The dataframe from which columns will be selected.
+
+    Returns:
+    tuple: The rank statistics (see friedman_rank_statistics) and the list of condition labels, or (None, None) if the selection is incomplete.
+
+    Raises:
+    ValueError: If fewer than two subjects have a value in every condition.
+    """
+    data_format = st.radio(
+        "What format is your data in?",
+        options=['Wide (one column per condition)', 'Long (subject, condition and value columns)'],
+        horizontal=True
+    )
+
+    if data_format.startswith('Wide'):
+        condition_columns = repeated_measures_anova_v1.select_columns_for_wide_format_anova(df)
+        if len(condition_columns) < 2:
+            return None, None
+        return get_friedman_rank_statistics(df, tuple(condition_columns)), condition_columns
+
+    subject_column, condition_column, value_column, _ = scm.select_long_format_columns(df, allow_imputation=False)
+    if subject_column is None:
+        return None, None
+
+    dict_matrix = scm.get_subject_condition_matrix(df, subject_column, condition_column, value_column)
+    if len(dict_matrix['conditions']) < 2:
+        return None, None
+    if dict_matrix['number_of_missing_cells'] > 0:
+        st.write(f"{dict_matrix['number_of_missing_cells']} subject/condition cells are missing; subjects without a value in every condition are excluded.")
+
+    dict_rank_statistics = get_friedman_rank_statistics_from_long_format(df, subject_column, condition_column, value_column)
+    return dict_rank_statistics, [str(condition) for condition in dict_matrix['conditions']]
+
+#----------------------------
+#Check number of subjects
+#----------------------------
+
+@performance_tracking.timed
+def check_number_of_subjects(dict_rank_statistics, condition_labels):
+    """
+    Checks there are enough complete subjects for the chi-square approximation of the Friedman test, and shows the mean rank of each condition.
+
+    Args:
+    dict_rank_statistics (dict): Output of friedman_rank_statistics.
+    condition_labels (list): The condition labels, in the order of the rank sums.
+
+    Returns:
+    bool: True if there are at least 10 complete subjects (or at least 5 with more than 4 conditions), False otherwise.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Number of Subjects:**
+        \nThe Friedman test ranks the measurements within each subject and compares the mean rank of each condition. Its p-value comes from a chi-square approximation, which needs enough subjects to be accurate.
+        """)
+
+    with st.expander("Click for interpretation"):
+        st.write("""
+        **Interpreting the Number of Subjects:**
+        - **10 or more complete subjects (or 5 or more with more than 4 conditions):** The chi-square approximation is reliable.
+        - **Fewer subjects:** The p-value may be inaccurate. Consider collecting more data.
+        """)
+
+    n = dict_rank_statistics['n']
+    k = dict_rank_statistics['k']
+    df_mean_ranks = pd.DataFrame({'mean rank': dict_rank_statistics['rank_sums'] / n}, index=pd.Index(condition_labels, name='Condition'))
+
+    with st.expander("Number of Subjects Check Results"):
+        st.write(f"{n} complete subjects and {k} conditions.")
+        performance_tracking.dataframe(df_mean_ranks)
+        if n >= 10 or (k > 4 and n >= 5):
+            st.write(":green[There are enough subjects for the chi-square approximation. Assumption satisfied.]")
+            return True
+        else:
+            st.error(":red[There are too few subjects for the chi-square approximation to be reliable. Consider collecting more data.]")
+            return False
+
+#----------------------------
+#Display the test results
+#----------------------------
+
+def display_friedman_test_results(dict_rank_statistics, condition_labels):
+    """
+    Displays the Friedman test result and the chosen post-hoc comparisons.
+
+    Args:
+    dict_rank_statistics (dict): Output of friedman_rank_statistics.
+    condition_labels (list): The condition labels, in the order of the rank sums.
+    """
+    dict_friedman = friedman_test(dict_rank_statistics)
+
+    with st.expander("Friedman Test Results and Post-hoc Comparisons"):
+        st.write(f"Friedman chi-square = {dict_friedman['statistic']:.4f}, df = {dict_friedman['df']}, p-value = {dict_friedman['p-value']:.4f}, Kendall's W = {dict_friedman['kendalls_w']:.4f}")
+
+        posthoc_method = st.selectbox(
+            "Select the post-hoc comparison",
+            options=['Nemenyi', 'Conover'],
+            help="Nemenyi controls the family-wise error rate through the studentized range; Conover is more powerful, and its p-values are Holm-adjusted."
+        )
+        performance_tracking.dataframe(friedman_posthoc(dict_rank_statistics, condition_labels, method=posthoc_method.lower()), hide_index=True)
+
+#----------------------------
+#User inputs to confirm the assumptions that cannot be checked are true
+#----------------------------
+
+def confirm_friedman_test_assumptions():
+    """
+    Renders select boxes for the user to manually confirm the assumptions required for the Friedman test.
+
+    Returns:
+    bool: True if all manually checked assumptions are confirmed, False otherwise, None if no selection has been made.
+    """
+    st.subheader("Confirming remaining assumptions for the Friedman test")
+
+    default_option = "---"
+    options = [default_option, "Yes", "No"]
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        related_samples_confirmation = st.selectbox(
+            "Confirm if every subject was measured under each condition:",
+            options=options,
+            help="Each row (subject) should hold one measurement per condition."
+        )
+
+    with col2:
+        independence_confirmation = st.selectbox(
+            "Confirm if the subjects are independent:",
+            options=options,
+            help="The measurements of one subject should not influence those of another."
+        )
+
+    with col3:
+        scale_of_measurement_confirmation = st.selectbox(
+            "Confirm if the data are at least ordinal:",
+            options=options,
+            help="Data should be ordinal or continuous, allowing for ranking within each subject."
+        )
+
+    if default_option in (related_samples_confirmation, independence_confirmation, scale_of_measurement_confirmation):
+        return None
+    elif related_samples_confirmation == "Yes" and independence_confirmation == "Yes" and scale_of_measurement_confirmation == "Yes":
+        st.success("All necessary assumptions for the Friedman test are confirmed.")
+        return True
+    else:
+        return False
+
+#----------------------------
+#Main function to render the checks
+#----------------------------
+
+def render_assumption_checks_for_friedman_test(df):
+    #display assumptions for this test
+    display_friedman_test_assumptions()
+
+    #user selection of the conditions (wide format) or subject, condition and value columns (long format),
+    #ranked within subjects in one cached pass
+    try:
+        dict_rank_statistics, condition_labels = select_data_for_friedman_test(df)
+    except ValueError as error:
+        st.error(str(error))
+        return False
+    if dict_rank_statistics is None:
+        return None
+
+    bool_number_of_subjects = check_number_of_subjects(dict_rank_statistics, condition_labels)
+
+    display_friedman_test_results(dict_rank_statistics, condition_labels)
+
+    bool_manual_check_assumptions = confirm_friedman_test_assumptions()
+
+    if bool_number_of_subjects:
+        return bool_manual_check_assumptions
+    else:
+        return False
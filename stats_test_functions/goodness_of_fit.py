@@ -0,0 +1,354 @@
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+from scipy.special import gammaln
+import streamlit as st
+
+from functions import performance_tracking
+from stats_test_functions import chi_square_goodness_of_fit as chi_gof
+
+#------------------------------------
+# <<< Vectorized chi-square and G statistics >>>
+#------------------------------------
+
+def goodness_of_fit_statistics(observed, expected):
+    """
+    Calculates the Pearson chi-square and G (log-likelihood ratio) goodness of fit statistics in one vectorized pass,
+    so thousands of categories cost a few array operations. Expected counts are rescaled to the observed total.
+
+    Args:
+    observed (array_like): Observed count for each category.
+    expected (array_like): Expected count (or proportion) for each category.
+
+    Returns:
+    dict: 'chi_square', 'chi_square_p_value', 'g', 'g_p_value' and 'degrees_of_freedom'.
+
+    Example:
+    >>> goodness_of_fit_statistics([18, 22, 30, 30], [25, 25, 25, 25])
+    """
+    observed = np.asarray(observed, dtype=float)
+    expected = np.asarray(expected, dtype=float)
+    expected = expected * observed.sum() / expected.sum()
+    degrees_of_freedom = observed.size - 1
+
+    chi_square = float(np.sum((observed - expected) ** 2 / expected))
+    # categories with no observations contribute nothing to G (the limit of x log x as x tends to 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        g = float(2 * np.sum(np.where(observed > 0, observed * np.log(observed / expected), 0.0)))
+
+    dict_statistics = {
+        'chi_square': chi_square,
+        'chi_square_p_value': float(stats.chi2.sf(chi_square, degrees_of_freedom)),
+        'g': g,
+        'g_p_value': float(stats.chi2.sf(g, degrees_of_freedom)),
+        'degrees_of_freedom': degrees_of_freedom,
+    }
+    return dict_statistics
+
+#------------------------------------
+# <<< Exact binomial goodness of fit (two categories) >>>
+#------------------------------------
+
+def exact_binomial_p_value(observed, expected):
+    """
+    Calculates the exact two-sided p-value for two categories: the total probability of every split of the total
+    that is no more likely than the observed split, under the expected proportions.
+
+    Args:
+    observed (array_like): Observed counts for the two categories.
+    expected (array_like): Expected counts (or proportions) for the two categories.
+
+    Returns:
+    float: The exact two-sided p-value.
+    """
+    observed = np.asarray(observed, dtype=np.int64)
+    expected = np.asarray(expected, dtype=float)
+    total = int(observed.sum())
+    probability = expected[0] / expected.sum()
+
+    pmf = stats.binom.pmf(np.arange(total + 1), total, probability)
+    # small relative tolerance so that outcomes exactly as likely as the observed one are counted despite rounding
+    return float(min(1.0, pmf[pmf <= pmf[observed[0]] * (1 + 1e-7)].sum()))
+
+#------------------------------------
+# <<< Exact multinomial goodness of fit >>>
+#------------------------------------
+
+def _log_probability_terms(counts, probabilities):
+    """
+    Log of p^x / x! for each count x and category probability p (the category's part of the multinomial log-probability).
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(counts > 0, counts * np.log(probabilities), 0.0) - gammaln(counts + 1)
+
+
+def exact_multinomial_p_value(observed, expected, max_states=5 * 10**5):
+    """
+    Calculates the exact multinomial p-value: the total probability of every outcome (with the same total) that is
+    no more likely than the observed one. A dynamic programme adds one category at a time, keeping each distinct
+    (count so far, log-probability so far rounded to 1e-9) state once with the number of partial outcomes that reach it, so outcomes
+    that only differ by swapping equally likely categories are never enumerated separately. The last category is fixed
+    by the total, so it needs no expansion.
+
+    Args:
+    observed (array_like): Observed count for each category.
+    expected (array_like): Expected count (or proportion) for each category.
+    max_states (int, optional): Limits the work, as the calculation stops once the categories together would expand to more than 10 * max_states states. Defaults to 5 * 10^5.
+
+    Returns:
+    float: The exact p-value, or None if the calculation needs more than 10 * max_states expanded states in total (use the Monte Carlo estimate instead).
+    """
+    observed = np.asarray(observed, dtype=np.int64)
+    probabilities = np.asarray(expected, dtype=float) / np.sum(expected)
+    total = int(observed.sum())
+
+    counts = np.arange(total + 1)
+
+    state_counts = np.zeros(1, dtype=np.int64)
+    state_log_probabilities = np.zeros(1)
+    state_multiplicities = np.ones(1)
+    expanded_states = 0
+    for category in range(probabilities.size - 1):
+        # expand every state by each count the category can still take
+        lengths = total - state_counts + 1
+        # the budget is for all the categories together, as many small expansions cost as much as one large one
+        expanded_states += int(lengths.sum())
+        if expanded_states > 10 * max_states:
+            return None
+        parents = np.repeat(np.arange(state_counts.size), lengths)
+        category_counts = np.arange(parents.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        new_counts = state_counts[parents] + category_counts
+        # log(p^x / x!) for each possible count x of this category
+        log_terms = _log_probability_terms(counts, probabilities[category])
+        new_log_probabilities = state_log_probabilities[parents] + log_terms[category_counts]
+
+        # merge states with the same count and (to rounding) the same log-probability
+        keys = np.rint(new_log_probabilities * 1e9)
+        order = np.lexsort((keys, new_counts))
+        is_new_state = np.ones(order.size, dtype=bool)
+        is_new_state[1:] = (np.diff(new_counts[order]) != 0) | (np.diff(keys[order]) != 0)
+        state_starts = np.flatnonzero(is_new_state)
+        state_counts = new_counts[order][state_starts]
+        state_log_probabilities = new_log_probabilities[order][state_starts]
+        state_multiplicities = np.add.reduceat(state_multiplicities[parents][order], state_starts)
+
+
+    # the last category takes whatever is left of the total; N! turns the p^x / x! products into probabilities
+    log_probabilities = state_log_probabilities + _log_probability_terms(total - state_counts, probabilities[-1]) + gammaln(total + 1)
+    observed_log_probability = _log_probability_terms(observed, probabilities).sum() + gammaln(total + 1)
+    # small relative tolerance so that outcomes exactly as likely as the observed one are counted despite rounding
+    as_or_less_likely = log_probabilities <= observed_log_probability + 1e-7 * max(1.0, abs(observed_log_probability))
+    return float(min(1.0, np.sum(state_multiplicities[as_or_less_likely] * np.exp(log_probabilities[as_or_less_likely]))))
+
+
+def monte_carlo_multinomial_p_value(observed, expected, number_of_simulations=10000, random_seed=42, max_chunk_cells=10**7):
+    """
+    Estimates the exact multinomial p-value by simulation, for totals too large for the exact calculation.
+    Outcomes are drawn in chunks (so thousands of categories fit in memory) from a seeded generator, so the result is reproducible.
+
+    Args:
+    observed (array_like): Observed count for each category.
+    expected (array_like): Expected count (or proportion) for each category.
+    number_of_simulations (int, optional): Number of simulated outcomes. Defaults to 10000.
+    random_seed (int, optional): Seed for the random number generator. Defaults to 42.
+    max_chunk_cells (int, optional): Largest number of simulated counts held in memory at once. Defaults to 10^7.
+
+    Returns:
+    float: The estimated p-value, (1 + simulated outcomes no more likely than observed) / (1 + simulations).
+    """
+    observed = np.asarray(observed, dtype=np.int64)
+    probabilities = np.asarray(expected, dtype=float) / np.sum(expected)
+    total = int(observed.sum())
+
+    # log-probability up to the constant N!: counts @ log(p) - sum(log(x!)), with log(x!) looked up from a table
+    log_probabilities = np.log(probabilities)
+    log_factorials = gammaln(np.arange(total + 1) + 1)
+    observed_log_probability = observed @ log_probabilities - log_factorials[observed].sum()
+    tolerance = 1e-7 * max(1.0, abs(observed_log_probability))
+
+    rng = np.random.default_rng(random_seed)
+    chunk_size = max(1, max_chunk_cells // probabilities.size)
+    as_or_less_likely = 0
+    for start in range(0, number_of_simulations, chunk_size):
+        simulated = rng.multinomial(total, probabilities, size=min(chunk_size, number_of_simulations - start))
+        simulated_log_probability = simulated @ log_probabilities - log_factorials[simulated].sum(axis=1)
+        as_or_less_likely += int(np.count_nonzero(simulated_log_probability <= observed_log_probability + tolerance))
+
+    return (1 + as_or_less_likely) / (1 + number_of_simulations)
+
+
+def exact_goodness_of_fit(observed, expected, max_states=5 * 10**5, number_of_simulations=10000, random_seed=42):
+    """
+    Runs the exact goodness of fit test, choosing the method: the exact binomial test for two categories, the exact
+    multinomial dynamic programme when the total is small enough, and a seeded Monte Carlo estimate otherwise.
+
+    Args:
+    observed (array_like): Observed count for each category.
+    expected (array_like): Expected count (or proportion) for each category.
+    max_states (int, optional): Largest number of states for the exact multinomial calculation. Defaults to 5 * 10^5.
+    number_of_simulations (int, optional): Number of simulated outcomes for the Monte Carlo estimate. Defaults to 10000.
+    random_seed (int, optional): Seed for the Monte Carlo estimate. Defaults to 42.
+
+    Returns:
+    tuple: The p-value and the name of the method used.
+    """
+    observed = np.asarray(observed)
+    expected = np.asarray(expected, dtype=float)
+    if np.any(observed[expected == 0] > 0):
+        # an observation in a category that cannot occur under the expected proportions
+        return 0.0, 'Impossible under the expected proportions'
+    observed, expected = observed[expected > 0], expected[expected > 0]
+    total = int(observed.sum())
+
+    if observed.size == 2:
+        return exact_binomial_p_value(observed, expected), 'Exact binomial'
+
+    p_value = exact_multinomial_p_value(observed, expected, max_states)
+    if p_value is not None:
+        return p_value, 'Exact multinomial'
+    return monte_carlo_multinomial_p_value(observed, expected, number_of_simulations, random_seed), f'Monte Carlo ({number_of_simulations} simulations, seed {random_seed})'
+
+#------------------------------------
+# <<< Functions to render assumptions >>>
+#------------------------------------
+
+def display_g_test_of_goodness_of_fit_assumptions():
+    """
+    Displays the assumptions required for conducting a G-test of goodness of fit.
+    """
+    dict_assumptions = {
+        "Sufficient Sample Size": "Each category should have an expected frequency of at least 5, as the p-value comes from the chi-square approximation. For smaller expected frequencies use the exact test of goodness of fit.",
+        "Independent Observations": "Each observation must be independent of others.",
+        "One-Dimensional Categories": "Data must be categorized into mutually exclusive classes, so each observation belongs to one and only one category.",
+        "Fixed Categories": "The categories and their expected proportions should be fixed before looking at the data."
+    }
+
+    with st.expander("Click for this test's assumptions"):
+        for key, value in dict_assumptions.items():
+            st.write(f":red[**{key}**:]\n{value}")
+
+
+def display_exact_test_of_goodness_of_fit_assumptions(multinomial=False):
+    """
+    Displays the assumptions required for conducting an exact test of goodness of fit.
+
+    Args:
+    multinomial (bool, optional): True for the multinomial (more than two categories) version. Defaults to False.
+    """
+    dict_assumptions = {
+        "Number of Categories": "The data must have more than two categories (multinomial model)." if multinomial else "The data must have exactly two categories (binomial model).",
+        "Independent Observations": "Each observation must be independent of others.",
+        "One-Dimensional Categories": "Data must be categorized into mutually exclusive classes, so each observation belongs to one and only one category.",
+        "Fixed Categories": "The categories and their expected proportions should be fixed before looking at the data.",
+        "Small Sample Size": "There is no minimum expected frequency, as the p-value is calculated exactly. For large totals the exact multinomial p-value is estimated by simulation instead."
+    }
+
+    with st.expander("Click for this test's assumptions"):
+        for key, value in dict_assumptions.items():
+            st.write(f":red[**{key}**:]\n{value}")
+
+#----------------------------
+#Check the number of categories and show the statistics
+#----------------------------
+
+@performance_tracking.timed
+def check_number_of_categories(df, observed_column, multinomial=False):
+    """
+    Checks the number of categories is right for the binomial (exactly two) or multinomial (more than two) exact test.
+
+    Args:
+    df (DataFrame): The dataframe of observed counts, one row per category.
+    observed_column (str): The column containing the observed counts.
+    multinomial (bool, optional): True for the multinomial version. Defaults to False.
+
+    Returns:
+    bool: True if the number of categories is suitable, False otherwise.
+    """
+    number_of_categories = df[observed_column].size
+
+    with st.expander("Number of Categories Check"):
+        if multinomial and number_of_categories > 2:
+            st.write(f"There are {number_of_categories} categories. Assumption satisfied.")
+            return True
+        elif not multinomial and number_of_categories == 2:
+            st.write("There are exactly two categories. Assumption satisfied.")
+            return True
+        else:
+            alternative = "Exact test of Goodness of Fit" if multinomial else "Exact test of Goodness of Fit (multinomial model)"
+            st.error(f"There are {number_of_categories} categories, which is not suitable for this test. Consider the **{alternative}**.")
+            return False
+
+
+def display_goodness_of_fit_results(df, observed_column, exact=False):
+    """
+    Displays the chi-square and G statistics (and the exact p-value when requested) for the observed and expected counts.
+
+    Args:
+    df (DataFrame): The dataframe of observed counts, with the 'Expected' column added by derive_expected_frequencies.
+    observed_column (str): The column containing the observed counts.
+    exact (bool, optional): True to also calculate the exact p-value. Defaults to False.
+    """
+    observed = df[observed_column].to_numpy()
+    expected = df['Expected'].to_numpy()
+    dict_statistics = goodness_of_fit_statistics(observed, expected)
+
+    with st.expander("Goodness of Fit Statistics"):
+        df_results = pd.DataFrame({
+            'Statistic': [dict_statistics['g'], dict_statistics['chi_square']],
+            'Degrees of freedom': dict_statistics['degrees_of_freedom'],
+            'p-value': [dict_statistics['g_p_value'], dict_statistics['chi_square_p_value']],
+        }, index=['G-test', 'Chi-square'])
+        performance_tracking.dataframe(df_results)
+
+        if exact:
+            p_value, method = exact_goodness_of_fit(observed, expected)
+            st.write(f"Exact p-value: {p_value:.4f} ({method})")
+
+#------------------------------------
+# <<< Main Functions to Render Checks >>>
+#------------------------------------
+
+def render_g_test_of_goodness_of_fit_checks(df):
+    #render assumptions
+    display_g_test_of_goodness_of_fit_assumptions()
+
+    df_location, observed_column, category_column = chi_gof.derive_expected_frequencies(df, test_name='G-test of Goodness of Fit')
+
+    tab1, tab2 = st.tabs(['Expected frequencies check', 'Other assumptions'])
+
+    with tab1:
+        #same rule of thumb as the chi-square test, as both use the chi-square approximation
+        expected_all_above_five_count = chi_gof.check_expected_frequencies(df, observed_column, category_column)
+        display_goodness_of_fit_results(df, observed_column)
+
+    with tab2:
+        st.write("You must assure yourself the other assumptions are true for your data set as these are dependent on your awareness of local context / data set.")
+
+    if expected_all_above_five_count:
+        st.success("Expected frequencies assumption met. If you are assured of the other assumptions (see drop down above), you can proceed with the G-test of Goodness of Fit.")
+        return True
+    else:
+        st.error("The assumption is not met. Consider using the **Exact test of Goodness of Fit** instead.")
+        return False
+
+
+def render_exact_test_of_goodness_of_fit_checks(df, multinomial=False):
+    #render assumptions
+    display_exact_test_of_goodness_of_fit_assumptions(multinomial)
+
+    #exact tests have no minimum expected frequency
+    df_location, observed_column, category_column = chi_gof.derive_expected_frequencies(df, min_expected_frequency=0, test_name='Exact test of Goodness of Fit')
+
+    tab1, tab2 = st.tabs(['Number of categories check', 'Other assumptions'])
+
+    with tab1:
+        number_of_categories_check = check_number_of_categories(df, observed_column, multinomial)
+        if number_of_categories_check:
+            display_goodness_of_fit_results(df, observed_column, exact=True)
+
+    with tab2:
+        st.write("You must assure yourself the other assumptions are true for your data set as these are dependent on your awareness of local context / data set.")
+
+    if number_of_categories_check:
+        st.success("If you are assured of the other assumptions (see drop down above), you can proceed with the exact test of Goodness of Fit.")
+    return number_of_categories_check
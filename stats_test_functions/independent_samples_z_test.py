@@ -8,6 +8,7 @@ import scipy.stats as stats
 
 #import other functions from files
 #from stats_test_functions import stats_tests as stat_tests
+from functions import performance_tracking
 from functions import user_inputs
 
 
@@ -82,6 +83,7 @@ def explain_known_population_variances():
 
 # -------------------------------
 # Function to check for normality 
+@performance_tracking.timed
 def check_normality_z_test(df, sample_1, sample_2):
     """
     Checks for normality in each of two independent samples for the independent z-test.
@@ -122,7 +124,7 @@ def check_normality_z_test(df, sample_1, sample_2):
                 x='Theoretical Quantiles',
                 y='Ordered Values'
             )
-            st.altair_chart(qq_plot + line, use_container_width=True)
+            performance_tracking.altair_chart(qq_plot + line, use_container_width=True)
     return normality_check_p_values
 
 
@@ -8,6 +8,7 @@ import scipy.stats as stats
 
 #import other functions from files
 #from stats_test_functions import stats_tests as stat_tests
+from functions import performance_tracking
 from functions import user_inputs
 
 
@@ -28,6 +29,7 @@ def independent_t_test_assumptions():
 
 
 # Function to perform Levene's Test for equality of variances
+@performance_tracking.timed
 def check_homoscedasticity(df, sample_1, sample_2):
     """
     Performs Levene's test for equality of variances between two samples.
@@ -59,6 +61,7 @@ def check_homoscedasticity(df, sample_1, sample_2):
 
 
 # Function to check for normality using Q-Q plots and Shapiro-Wilk Test
+@performance_tracking.timed
 def check_normality(df, sample_1, sample_2):
     """
     Checks for normality in each of two independent samples.
@@ -99,7 +102,7 @@ def check_normality(df, sample_1, sample_2):
                 x='Theoretical Quantiles',
                 y='Ordered Values'
             )
-            st.altair_chart(qq_plot + line, use_container_width=True)
+            performance_tracking.altair_chart(qq_plot + line, use_container_width=True)
     return normality_check_p_values
 
 
@@ -0,0 +1,220 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+import altair as alt
+
+from functions import performance_tracking
+from stats_test_functions import contingency_tables
+
+
+#------------------------------------
+# <<< Function to render assumptions >>>
+#------------------------------------
+#non-parametric measure of association between two ordinal (or ranked continuous) variables
+
+def display_kendalls_tau_assumptions():
+    """
+    Displays the assumptions required for calculating Kendall's Tau.
+    """
+    dict_assumptions = {
+        "Paired Observations": "Each row should hold both measurements for the same subject, and subjects should be independent of each other.",
+        "Scale of Measurement": "Both variables should be at least ordinal, so that the values can be ranked. Continuous data can also be used, as it is converted to ranks.",
+        "Monotonic Relationship": "Kendall's Tau measures how consistently one variable increases (or decreases) as the other increases. It does not require a linear relationship, but it will not detect relationships that go up and then down.",
+    }
+
+    with st.expander("Click for Kendall's Tau Assumptions"):
+        for key, value in dict_assumptions.items():
+            st.write(f":red[**{key}**:]\n{value}")
+
+#------------------------------------
+# <<< Function to select columns >>>
+#------------------------------------
+
+def select_two_columns_for_kendalls_tau(df):
+    """
+    Renders 2x select boxes for the user to choose the columns from a dataframe for Kendall's Tau.
+
+    Args:
+    df (DataFrame): The dataframe from which the columns will be selected.
+
+    Returns:
+    tuple: The two selected column names, or (None, None) if "---" is selected for either.
+    """
+    st.write("Please select the column names for the variables you want to include in your analysis:")
+
+    default_option = "---"
+    options = [default_option] + list(df.columns)
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        selected_column_1 = st.selectbox(
+            "Select the First Data Column",
+            options=options,
+            help="Select the column that contains the ordinal (or continuous) data for the first variable"
+        )
+
+    with col2:
+        selected_column_2 = st.selectbox(
+            "Select the Second Data Column",
+            options=options,
+            help="Select the column that contains the ordinal (or continuous) data for the second variable"
+        )
+
+    if selected_column_1 == default_option or selected_column_2 == default_option:
+        return None, None
+    return selected_column_1, selected_column_2
+
+#----------------------------
+#Confirm scale of measurement assumption
+#----------------------------
+
+def explain_scale_of_measurement():
+    """
+    Provides information about the scale of measurement assumption for Kendall's Tau.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Scale of Measurement Assumption:**
+        Kendall's Tau compares the ordering of every pair of observations on both variables, so both variables must be capable of logical ranking or ordering (e.g. Likert scale survey responses).
+        """)
+
+    with st.expander("Click for interpretation"):
+        st.write("""
+        **Interpreting Scale of Measurement:**
+        - **Data Are Ordinal or Higher (Interval, Ratio):** Suitable for Kendall's Tau. Tied values (common in ordinal data) are accounted for by the Tau-b version used here.
+        - **Data Are Nominal:** Not suitable. Consider Cramer's V for the association between nominal variables.
+        """)
+
+#----------------------------
+#Visualise the monotonic relationship
+#----------------------------
+
+@performance_tracking.timed
+def check_monotonic_relationship(df, variable_1, variable_2, max_levels=20):
+    """
+    Displays a heatmap of the number of observations for each combination of the two variables, so the user can judge
+    whether the relationship is monotonic. Ordinal variables with up to max_levels values use the shared contingency
+    table directly. Otherwise the values are binned, which keeps the chart small for very large datasets.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    variable_1 (str): The first column.
+    variable_2 (str): The second column.
+    max_levels (int, optional): Largest number of distinct values plotted without binning. Defaults to 20.
+
+    Returns:
+    None: Displays the heatmap in Streamlit.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Monotonic Relationship:**
+        \nA monotonic relationship is one where, as one variable increases, the other tends to consistently increase (or consistently decrease), though not necessarily at a constant rate.
+        """)
+
+    with st.expander("Click for interpretation"):
+        st.write("""
+        **Interpreting the Heatmap:**
+        - **Counts Concentrated Along a Rising (or Falling) Diagonal:** Indicates a monotonic relationship, suitable for Kendall's Tau.
+        - **Counts Rise and Then Fall (a U or inverted U shape):** The relationship is not monotonic, and Kendall's Tau may suggest no association even though one exists.
+        """)
+
+    # count the levels first, so a table with one cell per pair of continuous values is never built
+    if df[variable_1].nunique() <= max_levels and df[variable_2].nunique() <= max_levels:
+        dict_table = contingency_tables.get_contingency_table(df, variable_1, variable_2)
+        df_counts = dict_table['observed'].stack().reset_index(name='Count')
+        x_encoding = alt.X(f'{variable_1}:O', title=variable_1)
+        y_encoding = alt.Y(f'{variable_2}:O', title=variable_2, sort='descending')
+    else:
+        df_complete = df[[variable_1, variable_2]].dropna()
+        counts, x_edges, y_edges = np.histogram2d(df_complete[variable_1], df_complete[variable_2], bins=max_levels)
+        x_centres = np.round((x_edges[:-1] + x_edges[1:]) / 2, 3)
+        y_centres = np.round((y_edges[:-1] + y_edges[1:]) / 2, 3)
+        df_counts = pd.DataFrame({
+            variable_1: np.repeat(x_centres, max_levels),
+            variable_2: np.tile(y_centres, max_levels),
+            'Count': counts.ravel(),
+        })
+        x_encoding = alt.X(f'{variable_1}:O', title=f'{variable_1} (binned)')
+        y_encoding = alt.Y(f'{variable_2}:O', title=f'{variable_2} (binned)', sort='descending')
+
+    with st.expander("Monotonic Relationship Check Results"):
+        heatmap = alt.Chart(df_counts).mark_rect().encode(
+            x=x_encoding,
+            y=y_encoding,
+            color='Count:Q',
+            tooltip=[variable_1, variable_2, 'Count']
+        ).properties(
+            title=f'Number of observations for each combination of {variable_1} and {variable_2}'
+        )
+        performance_tracking.altair_chart(heatmap, use_container_width=True)
+
+#----------------------------
+#User inputs to confirm the assumptions that cannot be checked are true
+#----------------------------
+
+def confirm_kendalls_tau_assumptions():
+    """
+    Renders select boxes for the user to manually confirm the assumptions required for Kendall's Tau.
+
+    Returns:
+    bool: True if all manually checked assumptions are confirmed, False otherwise, None if no selection has been made.
+    """
+    st.subheader("Confirming the assumptions for Kendall's Tau")
+
+    default_option = "---"
+    options = [default_option, "Yes", "No"]
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        paired_confirmation = st.selectbox(
+            "Confirm if each row holds both measurements for one subject:",
+            options=options,
+            help="Subjects should be independent of each other."
+        )
+
+    with col2:
+        scale_of_measurement_confirmation = st.selectbox(
+            "Confirm if both variables are at least ordinal:",
+            options=options,
+            help="Both variables should be capable of logical ranking or ordering."
+        )
+
+    with col3:
+        monotonic_confirmation = st.selectbox(
+            "Confirm if the relationship looks monotonic in the heatmap:",
+            options=options,
+            help="As one variable increases, the other should tend to consistently increase or consistently decrease."
+        )
+
+    if default_option in (paired_confirmation, scale_of_measurement_confirmation, monotonic_confirmation):
+        return None
+    elif paired_confirmation == "Yes" and scale_of_measurement_confirmation == "Yes" and monotonic_confirmation == "Yes":
+        st.success("All necessary assumptions for Kendall's Tau are confirmed.")
+        return True
+    else:
+        return False
+
+#----------------------------
+#Main function to render the checks
+#----------------------------
+
+def render_assumption_checks_for_kendalls_tau(df):
+    #display assumptions for this test
+    display_kendalls_tau_assumptions()
+
+    #user selection for the two variables
+    variable_1, variable_2 = select_two_columns_for_kendalls_tau(df)
+
+    tab1, tab2 = st.tabs(['Scale of Measurement', 'Monotonic Relationship'])
+
+    with tab1:
+        explain_scale_of_measurement()
+
+    with tab2:
+        check_monotonic_relationship(df, variable_1, variable_2)
+
+    bool_manual_check_assumptions = confirm_kendalls_tau_assumptions()
+
+    return bool_manual_check_assumptions
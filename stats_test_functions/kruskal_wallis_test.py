@@ -3,6 +3,10 @@ import pandas as pd
 import streamlit as st
 import altair as alt
 
+from functions import performance_tracking
+from stats_test_functions import rank_cache
+from stats_test_functions import posthoc_tests
+
 
 #------------------------------------
 # <<< Function to render assumptions >>>
@@ -76,6 +80,7 @@ def select_columns_for_kruskal_wallis_test(df):
 
 
 #------------------------------------
+@performance_tracking.timed
 def check_distribution_shape(df, group_column, value_column):
     """
     Displays Q-Q plots to check if the distribution shapes of different groups are similar.
@@ -103,12 +108,18 @@ def check_distribution_shape(df, group_column, value_column):
         - **Data Points Deviate from the Line:** Shows differences in the distribution shape, such as skewness or kurtosis, compared to the theoretical distribution. Significant deviations across groups might suggest that the shapes are not similar.
         """)
 
-    # Generate and display Q-Q plots for each group
-    groups = df[group_column].unique()
+    # Generate and display Q-Q plots for each group, splitting the values by group in one pass
+    #a Q-Q plot needs at least 2 values, so smaller groups are listed rather than plotted
+    dict_group_values = {group: values.to_numpy() for group, values in df[value_column].dropna().groupby(df[group_column], sort=False)}
+    list_small_groups = [group for group in df[group_column].dropna().unique() if len(dict_group_values.get(group, ())) < 2]
 
     with st.expander("Distribution Shape Check Results"):
-        for group in groups:
-            group_data = df[df[group_column] == group][value_column]
+        if list_small_groups:
+            st.warning(f"{len(list_small_groups)} group(s) have fewer than 2 values, so their distribution shape cannot be plotted: "
+                       + ', '.join(str(group) for group in list_small_groups[:20]) + (' ...' if len(list_small_groups) > 20 else ''))
+        for group, group_data in dict_group_values.items():
+            if group_data.size < 2:
+                continue
             qq = stats.probplot(group_data, dist="norm")
             qq_data = pd.DataFrame({
                 'Theoretical Quantiles': [pt[0] for pt in qq[0]],
@@ -128,7 +139,7 @@ def check_distribution_shape(df, group_column, value_column):
                 x='Theoretical Quantiles',
                 y='Ordered Values'
             )
-            st.altair_chart(qq_plot + line, use_container_width=True)
+            performance_tracking.altair_chart(qq_plot + line, use_container_width=True)
 
 #----------------------------
 #Confirm scale of measurement assumption
@@ -197,13 +208,16 @@ def explain_independence_assumption():
 #----------------------------
 #check group size assumption
 #----------------------------
-def check_group_size(df, group_column):
+@performance_tracking.timed
+def check_group_size(df, group_column, value_column):
     """
     Checks if all groups in the dataset have a sufficient number of observations for the Kruskal-Wallis test.
+    Group sizes and mean ranks are read from the shared rank cache, which the test itself also uses.
 
     Args:
     df (DataFrame): The dataframe containing the data.
     group_column (str): The column in df that denotes the group.
+    value_column (str): The column in df that contains the values to be ranked.
 
     Returns:
     bool: True if all groups have sufficient size, False otherwise.
@@ -224,11 +238,13 @@ def check_group_size(df, group_column):
         """)
 
     # Check the size of each group and display results
-    group_sizes = df[group_column].value_counts()
+    dict_rank_data = rank_cache.get_rank_data(df, value_column, group_column)
+    group_sizes = pd.Series(dict_rank_data['group_sizes'], index=dict_rank_data['group_labels'], name='count')
+    mean_ranks = pd.Series(dict_rank_data['rank_sums'], index=dict_rank_data['group_labels']) / group_sizes
 
     with st.expander("Group Size Check Results"):
         st.write("Group Sizes:")
-        st.dataframe(group_sizes)
+        performance_tracking.dataframe(pd.DataFrame({'count': group_sizes, 'mean rank': mean_ranks}))
         if (group_sizes >= 5).all():
             st.write(":green[All groups have sufficient size. Assumption satisfied.]")
             return True
@@ -324,7 +340,10 @@ def render_assumption_checks_for_kruskal_wallis_test(df):
         
     with tab4:
         #check sample size assumption, return a bool
-        bool_sample_size = check_group_size(df, group_column)
+        bool_sample_size = check_group_size(df, group_column, value_column)
+
+    #pairwise comparisons of the mean ranks
+    posthoc_tests.display_posthoc_comparisons(df, group_column, value_column, ["Dunn's test"])
 
     #render select boxes for use to confirm the assumptions are true that 
     # cannot be definitively checked - return a bool
@@ -0,0 +1,243 @@
+import numpy as np
+import pandas as pd
+import scipy.linalg
+import streamlit as st
+
+from functions import performance_tracking
+
+#------------------------------------
+# <<< Cached cell statistics for integer-coded factors >>>
+#------------------------------------
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=16))
+def get_cell_statistics(df, value_column, factor_columns):
+    """
+    Calculates the count, mean and within-cell sum of squares of value_column for every combination
+    (cell) of the factor columns, in a single pass over the data. Each factor is integer-coded, each row
+    maps to one flat cell index, and np.bincount accumulates the counts, sums and sums of squares.
+    Only the non-empty cells are kept, so models fitted to the cells never go back to the raw rows.
+    Rows with a missing value in any of the columns are excluded. The returned arrays should not be modified.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    value_column (str): The column containing the numerical values.
+    factor_columns (tuple): The columns containing the factors (grouping variables).
+
+    Returns:
+    dict: 'shape' (number of levels of each factor), 'labels' (list of the level labels of each factor),
+          'cell_levels' (level code of each factor for each non-empty cell, one row per cell), 'counts',
+          'means' and 'variances' (for each non-empty cell), 'within_ss' (pooled within-cell sum of squares),
+          'n' (number of complete rows), 'grand_mean', 'values' and 'row_cells' (the cell of each complete row).
+    """
+    list_codes = []
+    list_labels = []
+    for column in factor_columns:
+        codes, labels = pd.factorize(df[column], sort=True)
+        list_codes.append(codes)
+        list_labels.append(labels)
+
+    values = df[value_column].to_numpy(dtype=float)
+    complete = np.logical_and.reduce([codes >= 0 for codes in list_codes] + [~np.isnan(values)])
+    values = values[complete]
+    shape = tuple(len(labels) for labels in list_labels)
+    cell_codes = np.ravel_multi_index([codes[complete] for codes in list_codes], shape)
+
+    # centre on the grand mean first, so the sums of squares do not lose precision for large values
+    grand_mean = values.mean()
+    centred = values - grand_mean
+    number_of_cells = int(np.prod(shape))
+    counts = np.bincount(cell_codes, minlength=number_of_cells)
+    sums = np.bincount(cell_codes, weights=centred, minlength=number_of_cells)
+    sums_of_squares = np.bincount(cell_codes, weights=centred ** 2, minlength=number_of_cells)
+
+    cells = np.flatnonzero(counts)
+    counts, sums, sums_of_squares = counts[cells], sums[cells], sums_of_squares[cells]
+    cell_within_ss = np.maximum(sums_of_squares - sums ** 2 / counts, 0.0)
+
+    dict_cells = {
+        'shape': shape,
+        'labels': list_labels,
+        'cell_levels': np.column_stack(np.unravel_index(cells, shape)),
+        'counts': counts,
+        'means': sums / counts + grand_mean,
+        'variances': np.where(counts > 1, cell_within_ss / np.maximum(counts - 1, 1), np.nan),
+        'within_ss': float(cell_within_ss.sum()),
+        'n': int(counts.sum()),
+        'grand_mean': float(grand_mean),
+        'values': values,
+        'row_cells': np.searchsorted(cells, cell_codes),
+    }
+    for value in dict_cells.values():
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+    return dict_cells
+
+#------------------------------------
+# <<< Design matrix columns for factor terms >>>
+#------------------------------------
+
+def sum_to_zero_contrasts(number_of_levels):
+    """
+    Sum-to-zero (deviation) contrast matrix for a factor: one row per level and one column per level but the
+    last, with the last level coded -1 in every column. Main effects coded this way are orthogonal to the
+    interactions in a balanced design, which Type III sums of squares rely on.
+
+    Args:
+    number_of_levels (int): Number of levels of the factor.
+
+    Returns:
+    ndarray: The (number_of_levels, number_of_levels - 1) contrast matrix.
+    """
+    contrasts = np.zeros((number_of_levels, number_of_levels - 1))
+    contrasts[:-1] = np.eye(number_of_levels - 1)
+    contrasts[-1] = -1
+    return contrasts
+
+
+def term_columns(level_codes, shape, term_axes):
+    """
+    Builds the design matrix columns of a main effect or interaction term, for the rows given by level_codes
+    (e.g. one row per cell). An interaction's columns are the row-wise products of the contrast columns of its factors.
+
+    Args:
+    level_codes (ndarray): Level code of each factor for each row, one column per factor.
+    shape (tuple): Number of levels of each factor.
+    term_axes (tuple): The factors (positions in shape) in the term.
+
+    Returns:
+    ndarray: One column for each combination of the factors' contrast columns.
+    """
+    columns = np.ones((level_codes.shape[0], 1))
+    for axis in term_axes:
+        contrasts = sum_to_zero_contrasts(shape[axis])[level_codes[:, axis]]
+        columns = (columns[:, :, np.newaxis] * contrasts[:, np.newaxis, :]).reshape(level_codes.shape[0], -1)
+    return columns
+
+#------------------------------------
+# <<< Incremental QR (orthonormal basis) of a design matrix >>>
+#------------------------------------
+
+def extend_orthonormal_basis(basis, new_columns, tolerance=1e-10):
+    """
+    Extends an orthonormal basis of the design matrix columns fitted so far with new columns, without
+    refactorizing the columns already fitted. The new columns are projected off the current basis (twice, for
+    numerical stability) and the remainder is factorized by a pivoted QR, so columns that are aliased with the
+    existing ones (e.g. from empty cells) add nothing.
+
+    Args:
+    basis (ndarray): The current orthonormal basis, one column per fitted degree of freedom.
+    new_columns (ndarray): The design matrix columns to add.
+    tolerance (float, optional): Relative size below which a remaining column counts as aliased. Defaults to 1e-10.
+
+    Returns:
+    tuple: The extended basis and the number of degrees of freedom added.
+    """
+    if new_columns.shape[1] == 0:
+        return basis, 0
+    column_scale = np.linalg.norm(new_columns, axis=0).max()
+    remainder = new_columns
+    for _ in range(2):
+        remainder = remainder - basis @ (basis.T @ remainder)
+
+    q, r, _ = scipy.linalg.qr(remainder, mode='economic', pivoting=True)
+    rank = int(np.sum(np.abs(np.diag(r)) > tolerance * max(column_scale, 1.0)))
+    return np.hstack([basis, q[:, :rank]]), rank
+
+
+def residual_sum_of_squares(basis, y):
+    """
+    Residual sum of squares of the least squares fit of y on the columns spanned by an orthonormal basis.
+
+    Args:
+    basis (ndarray): Orthonormal basis of the design matrix.
+    y (ndarray): The response.
+
+    Returns:
+    float: The residual sum of squares.
+    """
+    projection = basis.T @ y
+    return max(float(y @ y - projection @ projection), 0.0)
+
+#------------------------------------
+# <<< Cached covariate projection and per-group moments >>>
+#------------------------------------
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=16))
+def get_covariate_projection(df, value_column, covariate_columns):
+    """
+    Factorizes [1, covariates] by QR once per (dataset, covariate set). The orthonormal basis Q replaces the
+    covariates in every later calculation, so changing the group column only needs new per-group sums of Q and
+    the values (see get_group_moments), never a new factorization of the raw rows.
+    Rows with a missing value or covariate are excluded. The returned arrays should not be modified.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    value_column (str): The column containing the dependent variable.
+    covariate_columns (tuple): The columns containing the covariates.
+
+    Returns:
+    dict: 'basis' (Q, one row per complete row), 'r' (the triangular factor, so [1, covariates] = Q @ r),
+          'values' (the dependent variable) and 'row_mask' (which rows of df are complete).
+
+    Raises:
+    ValueError: If a covariate is constant or a linear combination of the other covariates.
+    """
+    df_values = df[[value_column] + list(covariate_columns)].apply(pd.to_numeric, errors='coerce')
+    row_mask = df_values.notna().all(axis=1).to_numpy()
+    values = df_values[value_column].to_numpy(dtype=float)[row_mask]
+    design = np.column_stack([np.ones(values.size), df_values[list(covariate_columns)].to_numpy(dtype=float)[row_mask]])
+
+    basis, r = np.linalg.qr(design)
+    if np.any(np.abs(np.diag(r)) <= 1e-10 * np.abs(r).max()):
+        raise ValueError("A covariate is constant, or a linear combination of the other covariates.")
+
+    dict_projection = {
+        'basis': basis,
+        'r': r,
+        'values': values,
+        'row_mask': row_mask,
+    }
+    for value in dict_projection.values():
+        value.flags.writeable = False
+    return dict_projection
+
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=32))
+def get_group_moments(df, value_column, covariate_columns, group_column):
+    """
+    Sums the cross-products of [Q, value] within each group, where Q is the cached covariate basis. Every
+    one-way ANCOVA quantity (common and separate slopes, adjusted means, sums of squares) follows from these
+    small matrices, and they take one np.bincount pass per pair of columns.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    value_column (str): The column containing the dependent variable.
+    covariate_columns (tuple): The columns containing the covariates.
+    group_column (str): The column containing the groups.
+
+    Returns:
+    dict: 'labels' (group labels), 'counts' (rows per group), 'moments' (array of shape (groups, k + 2, k + 2)
+          holding the within-group sums of w w^T for w = [Q, value], where k is the number of covariates)
+          and 'group_codes' (the group of each complete row, -1 where the group is missing).
+    """
+    dict_projection = get_covariate_projection(df, value_column, covariate_columns)
+    group_codes, labels = pd.factorize(df[group_column].to_numpy()[dict_projection['row_mask']], sort=True)
+    included = group_codes >= 0
+
+    columns = np.column_stack([dict_projection['basis'], dict_projection['values']])[included]
+    codes = group_codes[included]
+    number_of_groups = len(labels)
+    number_of_columns = columns.shape[1]
+
+    moments = np.empty((number_of_groups, number_of_columns, number_of_columns))
+    for i in range(number_of_columns):
+        for j in range(i, number_of_columns):
+            moments[:, i, j] = moments[:, j, i] = np.bincount(codes, weights=columns[:, i] * columns[:, j], minlength=number_of_groups)
+
+    dict_moments = {
+        'labels': labels,
+        'counts': np.bincount(codes, minlength=number_of_groups),
+        'moments': moments,
+        'group_codes': group_codes,
+    }
+    return dict_moments
@@ -0,0 +1,403 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+import streamlit as st
+
+from functions import performance_tracking
+from stats_test_functions import contingency_tables
+
+
+#------------------------------------
+# <<< Function to render assumptions >>>
+#------------------------------------
+#extension of the chi-square test of independence to three or more categorical variables
+
+def display_log_linear_analysis_assumptions():
+    """
+    Displays the assumptions required for a log-linear analysis.
+    """
+    dict_assumptions = {
+        "Independence": "Each observation should fall into one and only one cell of the table, and the observations must be independent of each other.",
+        "Categorical Variables": "All variables should be categorical (nominal or ordinal). Continuous variables must be grouped into categories first.",
+        "Expected Frequencies": "All expected frequencies should be greater than 1, and no more than 20% of them should be less than 5. Otherwise the likelihood ratio tests lose power; consider combining categories or dropping a variable."
+    }
+
+    with st.expander("Click for Log-linear analysis Assumptions"):
+        for key, value in dict_assumptions.items():
+            st.write(f":red[**{key}**:]\n{value}")
+
+#------------------------------------
+# <<< Hierarchical model terms >>>
+#------------------------------------
+
+def format_model(generators):
+    """
+    Formats the generators of a hierarchical model in the usual notation, e.g. 'A*B + C'.
+
+    Args:
+    generators (list): The highest-order terms of the model, each a tuple of column names.
+
+    Returns:
+    str: The model formula.
+    """
+    return ' + '.join('*'.join(term) for term in generators)
+
+
+def _hierarchical_terms(generators):
+    """
+    Every term a hierarchical model contains: each generator and all of its lower-order terms, including the constant ().
+    """
+    set_terms = set()
+    for generator in generators:
+        for order in range(len(generator) + 1):
+            set_terms.update(itertools.combinations(generator, order))
+    return set_terms
+
+
+def model_degrees_of_freedom(shape, columns, generators):
+    """
+    Calculates the residual degrees of freedom of a hierarchical log-linear model: the number of cells
+    minus the number of free parameters, where each term has the product of (categories - 1) over its columns.
+
+    Args:
+    shape (tuple): Number of categories for each column.
+    columns (tuple): The columns of the table.
+    generators (list): The highest-order terms of the model.
+
+    Returns:
+    int: The residual degrees of freedom.
+    """
+    dict_levels = dict(zip(columns, shape))
+    number_of_parameters = sum(int(np.prod([dict_levels[column] - 1 for column in term])) for term in _hierarchical_terms(generators))
+    return int(np.prod(shape)) - number_of_parameters
+
+#------------------------------------
+# <<< Iterative proportional fitting >>>
+#------------------------------------
+
+def fit_log_linear_model(df, columns, generators, max_iterations=100, tolerance=1e-6, max_cells=10**7):
+    """
+    Fits a hierarchical log-linear model by iterative proportional fitting (IPF). The fitted table is scaled
+    to match the observed marginal table of each generator in turn, until no fitted margin differs from the
+    observed margin by more than tolerance. The observed margins come from the cached marginal tables, and
+    the likelihood ratio statistic only visits the non-empty cells of the sparse observed table.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    columns (tuple): The categorical columns of the table.
+    generators (list): The highest-order terms of the model, each a tuple of column names in the same order as columns.
+    max_iterations (int, optional): Largest number of IPF cycles. Defaults to 100.
+    tolerance (float, optional): Largest allowed difference between fitted and observed margins. Defaults to 1e-6.
+    max_cells (int, optional): Largest table (number of cells, including empty ones) that will be fitted. Defaults to 10^7.
+
+    Returns:
+    dict: 'fitted' (ndarray of expected frequencies), 'g_squared', 'chi_square', 'degrees_of_freedom',
+          'p_value' (of the likelihood ratio test against the saturated model), 'iterations' and 'converged'.
+
+    Example:
+    >>> fit_log_linear_model(df, ('Smoker', 'Exercise', 'Heart_Disease'), [('Smoker', 'Exercise'), ('Heart_Disease',)])
+    """
+    columns = tuple(columns)
+    dict_table = contingency_tables.get_sparse_table(df, columns)
+    shape = dict_table['shape']
+    if np.prod(shape) > max_cells:
+        raise ValueError(f"The table has {int(np.prod(shape))} cells, more than the {max_cells} that can be fitted. Consider combining categories or dropping a variable.")
+
+    # the observed margin of each generator, shaped to broadcast against the full table
+    list_margins = []
+    for generator in generators:
+        axes = tuple(columns.index(column) for column in generator)
+        other_axes = tuple(axis for axis in range(len(columns)) if axis not in axes)
+        broadcast_shape = tuple(shape[axis] if axis in axes else 1 for axis in range(len(columns)))
+        observed_margin = contingency_tables.get_marginal_table(df, columns, generator).reshape(broadcast_shape)
+        list_margins.append((other_axes, observed_margin))
+
+    fitted = np.full(shape, dict_table['total'] / np.prod(shape))
+    converged = False
+    for iteration in range(1, max_iterations + 1):
+        largest_difference = 0.0
+        for other_axes, observed_margin in list_margins:
+            fitted_margin = fitted.sum(axis=other_axes, keepdims=True)
+            largest_difference = max(largest_difference, float(np.abs(fitted_margin - observed_margin).max()))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                fitted *= np.where(fitted_margin > 0, observed_margin / fitted_margin, 0.0)
+        if largest_difference <= tolerance:
+            converged = True
+            break
+
+    # both statistics only need the non-empty cells: empty cells add nothing to G, and the fitted total equals the observed total
+    observed = dict_table['counts']
+    fitted_at_observed = fitted.ravel()[dict_table['cells']]
+    g_squared = float(2 * np.sum(observed * np.log(observed / fitted_at_observed)))
+    chi_square = float(np.sum(observed ** 2 / fitted_at_observed) - dict_table['total'])
+    degrees_of_freedom = model_degrees_of_freedom(shape, columns, generators)
+
+    dict_model = {
+        'fitted': fitted,
+        'g_squared': max(g_squared, 0.0),
+        'chi_square': max(chi_square, 0.0),
+        'degrees_of_freedom': degrees_of_freedom,
+        'p_value': float(stats.chi2.sf(g_squared, degrees_of_freedom)) if degrees_of_freedom > 0 else 1.0,
+        'iterations': iteration,
+        'converged': converged,
+    }
+    return dict_model
+
+
+def compare_nested_models(dict_reduced_model, dict_full_model):
+    """
+    Likelihood ratio test of a reduced model against a full model it is nested in: the change in G-squared
+    follows a chi-square distribution with the change in degrees of freedom.
+
+    Args:
+    dict_reduced_model (dict): Output of fit_log_linear_model for the reduced model.
+    dict_full_model (dict): Output of fit_log_linear_model for the full model.
+
+    Returns:
+    tuple: The change in G-squared, the change in degrees of freedom and the p-value.
+    """
+    change_in_g_squared = max(dict_reduced_model['g_squared'] - dict_full_model['g_squared'], 0.0)
+    change_in_degrees_of_freedom = dict_reduced_model['degrees_of_freedom'] - dict_full_model['degrees_of_freedom']
+    p_value = float(stats.chi2.sf(change_in_g_squared, change_in_degrees_of_freedom)) if change_in_degrees_of_freedom > 0 else 1.0
+    return change_in_g_squared, change_in_degrees_of_freedom, p_value
+
+
+def remove_term(generators, term):
+    """
+    Removes a highest-order term from a hierarchical model, keeping its lower-order terms that are not
+    already part of another generator, so that the model stays hierarchical.
+
+    Args:
+    generators (list): The highest-order terms of the model.
+    term (tuple): The generator to remove.
+
+    Returns:
+    list: The generators of the reduced model.
+    """
+    list_generators = [generator for generator in generators if generator != term]
+    for sub_term in itertools.combinations(term, len(term) - 1):
+        if sub_term and not any(set(sub_term) <= set(generator) for generator in list_generators):
+            list_generators.append(sub_term)
+    return list_generators
+
+
+def backward_elimination(df, columns, p_value_threshold=0.05, max_iterations=100, tolerance=1e-6):
+    """
+    Selects a log-linear model by backward elimination, starting from the saturated model. At each step
+    every highest-order interaction is tested for removal with a likelihood ratio test, and the least
+    significant one is removed if its p-value is above the threshold. Main effects are always kept.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    columns (tuple): The categorical columns of the table.
+    p_value_threshold (float, optional): Terms with a p-value above this are removed. Defaults to 0.05.
+    max_iterations (int, optional): Largest number of IPF cycles for each model. Defaults to 100.
+    tolerance (float, optional): IPF convergence tolerance. Defaults to 1e-6.
+
+    Returns:
+    tuple: The generators of the selected model, its fit (dict from fit_log_linear_model) and a DataFrame of the steps.
+    """
+    columns = tuple(columns)
+    generators = [columns]
+    dict_current_model = fit_log_linear_model(df, columns, generators, max_iterations, tolerance)
+
+    list_steps = []
+    while True:
+        list_candidates = []
+        for term in generators:
+            if len(term) < 2:
+                continue
+            reduced_generators = remove_term(generators, term)
+            dict_reduced_model = fit_log_linear_model(df, columns, reduced_generators, max_iterations, tolerance)
+            change_in_g_squared, change_in_degrees_of_freedom, p_value = compare_nested_models(dict_reduced_model, dict_current_model)
+            list_candidates.append((p_value, term, reduced_generators, dict_reduced_model, change_in_g_squared, change_in_degrees_of_freedom))
+
+        if not list_candidates:
+            break
+        p_value, term, reduced_generators, dict_reduced_model, change_in_g_squared, change_in_degrees_of_freedom = max(list_candidates, key=lambda candidate: candidate[0])
+        removed = p_value > p_value_threshold
+        list_steps.append({
+            'Term': '*'.join(term),
+            'Change in G-squared': change_in_g_squared,
+            'Change in df': change_in_degrees_of_freedom,
+            'p-value': p_value,
+            'Removed': removed,
+        })
+        if not removed:
+            break
+        generators, dict_current_model = reduced_generators, dict_reduced_model
+
+    return generators, dict_current_model, pd.DataFrame(list_steps)
+
+#------------------------------------
+# <<< Function to select columns >>>
+#------------------------------------
+
+def select_columns_for_log_linear_analysis(df):
+    """
+    Renders a multiselect for the user to choose the categorical columns for the log-linear analysis.
+
+    Args:
+    df (DataFrame): The dataframe from which columns will be selected.
+
+    Returns:
+    tuple: The selected column names, or None if fewer than two are selected.
+    """
+    list_selected_columns = st.multiselect(
+        "Select the categorical columns to include in the analysis",
+        options=list(df.columns),
+        help="Select two or more columns. Each row of the data should be one observation (long format)."
+    )
+
+    if len(list_selected_columns) < 2:
+        st.write("Please select at least two categorical columns.")
+        return None
+    return tuple(list_selected_columns)
+
+#----------------------------
+#Confirm independence assumption
+#----------------------------
+
+def explain_independence_assumption():
+    """
+    Provides information about the independence assumption for the log-linear analysis.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Independence of Observations:**
+        \nEach row of the data should be a different subject, falling into exactly one cell of the multi-way table. If the same subject is counted more than once (e.g. repeated measurements), the counts are not independent.
+        """)
+
+    with st.expander("Click for interpretation"):
+        st.write("""
+        **Interpreting Independence:**
+        - **Each Subject Is Counted Once:** Suitable for log-linear analysis.
+        - **Subjects Are Counted More Than Once:** Not suitable. The likelihood ratio tests will overstate the evidence for associations.
+        """)
+
+#----------------------------
+#Check expected frequencies and select the model
+#----------------------------
+
+@performance_tracking.timed
+def check_expected_frequencies(df, columns):
+    """
+    Selects a model by backward elimination and checks the expected frequencies of the selected model:
+    all should be greater than 1 and no more than 20% should be less than 5.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    columns (tuple): The categorical columns of the table.
+
+    Returns:
+    bool: True if the expected frequencies are sufficient, False otherwise.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Expected Frequencies:**
+        \nThe model is chosen by backward elimination: starting from the model with every interaction (which reproduces the observed counts exactly), the highest-order interactions are removed one at a time while removing them does not make the fit significantly worse. The expected frequencies of the chosen model are then checked.
+        """)
+
+    with st.expander("Click for interpretation"):
+        st.write("""
+        **Interpreting the Check:**
+        - **All Expected Frequencies > 1 and No More Than 20% < 5:** The likelihood ratio tests are reliable.
+        - **Otherwise:** Consider combining categories of a variable, or dropping a variable from the analysis.
+        """)
+
+    try:
+        generators, dict_model, df_steps = backward_elimination(df, columns)
+    except ValueError as error:
+        st.error(str(error))
+        return False
+
+    fitted = dict_model['fitted']
+    proportion_below_five = float(np.mean(fitted < 5))
+    all_above_one = bool(np.all(fitted > 1))
+
+    with st.expander("Model Selection and Expected Frequencies Check Results"):
+        st.write("Backward elimination steps:")
+        performance_tracking.dataframe(df_steps, hide_index=True)
+        st.write(f"""Selected model: **{format_model(generators)}**
+        \nG-squared = {dict_model['g_squared']:.3f}, df = {dict_model['degrees_of_freedom']}, p-value = {dict_model['p_value']:.4f} ({dict_model['iterations']} IPF iterations{'' if dict_model['converged'] else ', did not converge'})
+        \nSmallest expected frequency: {fitted.min():.2f}. Cells with an expected frequency less than 5: {proportion_below_five:.0%}.""")
+
+        if all_above_one and proportion_below_five <= 0.2:
+            st.write(":green[All expected frequencies are greater than 1 and no more than 20% are less than 5. Assumption satisfied.]")
+            return True
+        else:
+            st.error("The expected frequencies are too small. Consider combining categories or dropping a variable.")
+            return False
+
+#----------------------------
+#User inputs to confirm the assumptions that cannot be checked are true
+#----------------------------
+
+def confirm_log_linear_analysis_assumptions(expected_frequencies_check):
+    """
+    Renders select boxes for the user to manually confirm the assumptions required for the log-linear analysis,
+    considering the expected frequencies check.
+
+    Args:
+    expected_frequencies_check (bool): Result from the check_expected_frequencies function.
+
+    Returns:
+    bool: True if all manually checked assumptions are confirmed, False otherwise, None if no selection has been made.
+    """
+    st.subheader("Confirming remaining assumptions for the Log-linear analysis")
+
+    if not expected_frequencies_check:
+        st.error("The expected frequencies assumption is not met for the Log-linear analysis.")
+        return False
+
+    default_option = "---"
+    options = [default_option, "Yes", "No"]
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        independence_confirmation = st.selectbox(
+            "Confirm if each subject is counted only once:",
+            options=options,
+            help="Each row should be a different subject, falling into exactly one cell of the table."
+        )
+
+    with col2:
+        categorical_confirmation = st.selectbox(
+            "Confirm if all selected variables are categorical:",
+            options=options,
+            help="Continuous variables must be grouped into categories first."
+        )
+
+    if independence_confirmation == default_option or categorical_confirmation == default_option:
+        return None
+    elif independence_confirmation == "Yes" and categorical_confirmation == "Yes":
+        st.success("All necessary assumptions for the Log-linear analysis are confirmed.")
+        return True
+    else:
+        return False
+
+#----------------------------
+#Main function to render the checks
+#----------------------------
+
+def render_assumption_checks_for_log_linear_analysis(df):
+    #display assumptions for this test
+    display_log_linear_analysis_assumptions()
+
+    #user selection for the categorical columns
+    columns = select_columns_for_log_linear_analysis(df)
+
+    tab1, tab2 = st.tabs(['Independence', 'Expected Frequencies'])
+
+    with tab1:
+        explain_independence_assumption()
+
+    with tab2:
+        bool_expected_frequencies = check_expected_frequencies(df, columns)
+
+    bool_manual_check_assumptions = confirm_log_linear_analysis_assumptions(bool_expected_frequencies)
+
+    return bool_manual_check_assumptions
@@ -0,0 +1,269 @@
+import pandas as pd
+import streamlit as st
+import altair as alt
+
+from functions import performance_tracking
+from stats_test_functions import rank_cache
+
+
+#------------------------------------
+# <<< Function to render assumptions >>>
+#------------------------------------
+#non-parametric alternative to the independent t-test when data does not meet the
+# assumption of normality or when dealing with ordinal data
+
+def display_mann_whitney_u_test_assumptions():
+    """
+    Displays the assumptions required for conducting the Mann-Whitney U test.
+    \nThis test is a non-parametric alternative to the independent t-test when
+    data does not meet the assumption of normality or when dealing with ordinal data.
+    """
+    dict_assumptions = {
+        "Independence": "The observations in each group must be independent, and the two groups must be independent of each other (no paired or repeated measurements).",
+        "Scale of Measurement": "The data should be at least ordinal, meaning the values can be ranked or ordered logically.",
+        "Two Groups": "The group column should contain exactly two groups.",
+        "Similar Distribution Shape": "To interpret the result as a difference in medians, both groups should have a similar shape of distribution. If the shapes differ, the test still compares whether values in one group tend to be larger than in the other."
+    }
+
+    with st.expander("Click for Mann-Whitney U test Assumptions"):
+        for key, value in dict_assumptions.items():
+            st.write(f":red[**{key}**:]\n{value}")
+
+#------------------------------------
+# <<< Function to select columns >>>
+#------------------------------------
+
+def select_columns_for_mann_whitney_u_test(df):
+    """
+    Renders select boxes for the user to choose the group and value columns from a dataframe for the Mann-Whitney U test.
+
+    Args:
+    df (DataFrame): The dataframe from which columns will be selected.
+
+    Returns:
+    tuple: A tuple containing the selected group column and value column names, or None if "---" is selected for either.
+    """
+    st.write("Please select the column names for your analysis:")
+
+    # Initialize placeholder option
+    default_option = "---"
+
+    # Get column names and include the placeholder as the first option
+    options = [default_option] + list(df.columns)
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        group_column = st.selectbox(
+            "Select the Group Column",
+            options=options,
+            help="Select the column that splits the data into the two groups being compared."
+        )
+
+    with col2:
+        value_column = st.selectbox(
+            "Select the Value Column",
+            options=options,
+            help="Select the column that contains the numerical or ordinal data to be compared between the groups."
+        )
+
+    # Return the selected columns if both are valid selections
+    if group_column != "---" and value_column != "---":
+        return group_column, value_column
+    else:
+        return None, None
+
+#----------------------------
+#Confirm independence and scale of measurement assumptions
+#----------------------------
+
+def explain_independence_assumption():
+    """
+    Provides information about the independence assumption for the Mann-Whitney U test.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Independence of Observations:**
+        \nThe Mann-Whitney U test assumes the two groups are independent samples. Each subject should appear in only one group, and knowing one observation should not give any information about another.
+        """)
+
+    with st.expander("Click for interpretation"):
+        st.write("""
+        **Interpreting Independence:**
+        - **Data Are Independent:** Suitable for the Mann-Whitney U test.
+        - **Data Are Paired (e.g. before and after measurements on the same subjects):** Use the Wilcoxon signed-rank test instead.
+        """)
+
+
+def explain_scale_of_measurement():
+    """
+    Provides information about the scale of measurement assumption for the Mann-Whitney U test.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Scale of Measurement Assumption:**
+        The Mann-Whitney U test compares the ranks of the values in the two groups, so the values must be capable of logical ranking or ordering.
+        """)
+
+    with st.expander("Click for interpretation"):
+        st.write("""
+        **Interpreting Scale of Measurement:**
+        - **Data Are Ordinal or Higher (Interval, Ratio):** Suitable for the Mann-Whitney U test.
+        - **Data Are Nominal:** Not suitable, as categories without an order cannot be ranked. Consider the Chi-square test of independence instead.
+        """)
+
+#----------------------------
+#Check two groups assumption
+#----------------------------
+
+@performance_tracking.timed
+def check_two_groups(df, group_column, value_column):
+    """
+    Checks that the group column splits the data into exactly two groups, using the group sizes from the shared rank cache.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    group_column (str): The column in df that denotes the group.
+    value_column (str): The column in df that contains the values to be ranked.
+
+    Returns:
+    bool: True if there are exactly two groups, False otherwise.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Two Groups Assumption:**
+        The Mann-Whitney U test compares exactly two independent groups. For three or more groups, the Kruskal-Wallis test is the equivalent non-parametric test.
+        """)
+
+    dict_rank_data = rank_cache.get_rank_data(df, value_column, group_column)
+    group_sizes = pd.Series(dict_rank_data['group_sizes'], index=dict_rank_data['group_labels'], name='count')
+    mean_ranks = pd.Series(dict_rank_data['rank_sums'], index=dict_rank_data['group_labels']) / group_sizes
+
+    with st.expander("Two Groups Check Results"):
+        st.write("Group Sizes:")
+        performance_tracking.dataframe(pd.DataFrame({'count': group_sizes, 'mean rank': mean_ranks}))
+        if len(group_sizes) == 2:
+            st.write(":green[The data contains exactly two groups. Assumption satisfied.]")
+            return True
+        else:
+            st.error(f"The group column contains {len(group_sizes)} groups. The Mann-Whitney U test needs exactly two. Consider the Kruskal-Wallis test for more than two groups.")
+            return False
+
+#----------------------------
+#Visualise distribution shape
+#----------------------------
+
+@performance_tracking.timed
+def check_distribution_shape(df, group_column, value_column):
+    """
+    Displays box plots of the value column for each group so the user can compare the distribution shapes.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    group_column (str): The column in df that denotes the group.
+    value_column (str): The column in df that contains the values.
+
+    Returns:
+    None: Displays the box plots in Streamlit.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Checking Distribution Shapes:**
+        \nComparing the box plots of the two groups shows whether their spread and skewness are similar. If they are, the Mann-Whitney U test can be interpreted as a comparison of medians.
+        """)
+
+    with st.expander("Click for interpretation"):
+        st.write("""
+        **Interpreting the Box Plots:**
+        - **Similar Box Widths and Whisker Lengths:** The distributions have a similar shape. A significant result suggests a difference in medians.
+        - **Clearly Different Shapes:** A significant result suggests values in one group tend to be larger than in the other, rather than a difference in medians specifically.
+        """)
+
+    with st.expander("Distribution Shape Check Results"):
+        box_plot = alt.Chart(df[[group_column, value_column]].dropna()).mark_boxplot().encode(
+            x=alt.X(f'{group_column}:N', title=group_column),
+            y=alt.Y(f'{value_column}:Q', title=value_column),
+        ).properties(
+            title=f'Distribution of {value_column} by {group_column}'
+        )
+        performance_tracking.altair_chart(box_plot, use_container_width=True)
+
+#----------------------------
+#User inputs to confirm the assumptions that cannot be checked are true
+#----------------------------
+
+def confirm_mann_whitney_u_assumptions(two_groups_check):
+    """
+    Renders select boxes for the user to manually confirm the assumptions required for the Mann-Whitney U test,
+    considering the check for the number of groups.
+
+    Args:
+    two_groups_check (bool): Result from the check_two_groups function.
+
+    Returns:
+    bool: True if all manually checked assumptions are confirmed, False otherwise, None if no selection has been made.
+    """
+    st.subheader("Confirming remaining assumptions for the Mann-Whitney U test")
+
+    if not two_groups_check:
+        st.error("The group column must contain exactly two groups for the Mann-Whitney U test.")
+        return False
+
+    # Initialize placeholders
+    default_option = "---"
+    options = [default_option, "Yes", "No"]
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        independence_confirmation = st.selectbox(
+            "Confirm if the two groups are independent:",
+            options=options,
+            help="Each subject should appear in only one group, with no pairing between the groups."
+        )
+
+    with col2:
+        scale_of_measurement_confirmation = st.selectbox(
+            "Confirm if the data are at least ordinal:",
+            options=options,
+            help="Data should be ordinal or continuous, allowing for ranking or logical ordering."
+        )
+
+    if independence_confirmation == default_option or scale_of_measurement_confirmation == default_option:
+        return None
+    elif independence_confirmation == "Yes" and scale_of_measurement_confirmation == "Yes":
+        st.success("All necessary assumptions for the Mann-Whitney U test are confirmed.")
+        return True
+    else:
+        return False
+
+#----------------------------
+#Main function to render the checks
+#----------------------------
+
+def render_assumption_checks_for_mann_whitney_u_test(df):
+    #display assumptions for this test
+    display_mann_whitney_u_test_assumptions()
+
+    #user selection for group and value columns
+    group_column, value_column = select_columns_for_mann_whitney_u_test(df)
+
+    tab1, tab2, tab3, tab4 = st.tabs(['Independence', 'Scale of Measurement', 'Two Groups', 'Distribution Shape'])
+
+    with tab1:
+        explain_independence_assumption()
+
+    with tab2:
+        explain_scale_of_measurement()
+
+    with tab3:
+        #check the group column contains exactly two groups, return a bool
+        bool_two_groups = check_two_groups(df, group_column, value_column)
+
+    with tab4:
+        check_distribution_shape(df, group_column, value_column)
+
+    #render select boxes for the user to confirm the assumptions that cannot be checked from the data
+    bool_manual_check_assumptions = confirm_mann_whitney_u_assumptions(bool_two_groups)
+
+    return bool_manual_check_assumptions
@@ -1,6 +1,9 @@
 #import libraries
 import streamlit as st
 import pandas as pd
+
+from functions import performance_tracking
+from stats_test_functions import contingency_tables
 #--------------------------
 #McNemars Test
 #--------------------------
@@ -30,7 +33,7 @@ def display_mcnemars_test_assumptions():
                 }
                 example_df = pd.DataFrame(example_data, index=['Pass to Fail', 'Fail to Pass'])
                 st.write("Example of the required 2x2 contingency table for this test:")
-                st.dataframe(example_df)
+                performance_tracking.dataframe(example_df)
 
 #--------------------------
 #user selects the columns in their df containing the data labels to use with this test
@@ -89,6 +92,7 @@ def select_two_columns_for_mcnemars_test(df):
 # <<< function to check binary data assumption holds true >>>
 #------------------------------------
 
+@performance_tracking.timed
 def check_binary_data_mcnemars_test(df, column1, column2):
     """
     Checks if the selected columns for McNemar's Test contain exactly two unique values.
@@ -119,8 +123,7 @@ def check_binary_data_mcnemars_test(df, column1, column2):
     
     # Perform the binary data check and display results
     with st.expander("Binary Data Check Results"):
-        unique_values_column1 = df[column1].nunique()
-        unique_values_column2 = df[column2].nunique()
+        unique_values_column1, unique_values_column2 = contingency_tables.get_contingency_table(df, column1, column2)['observed'].shape
         
         if unique_values_column1 == 2 and unique_values_column2 == 2:
             st.write(f"Both {column1} and {column2} are binary. Assumption satisfied.")
@@ -204,6 +207,7 @@ def explain_marginal_homogeneity():
 
 #--------------------------
 #user confirms their study design has accounted for the assumptions that can't be definitively checked
+@performance_tracking.timed
 def check_assumptions_and_recommend_mcnemars(binary_data_check):
     """
     Asks the user to confirm assumptions based on the binary data check and context knowledge
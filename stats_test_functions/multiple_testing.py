@@ -0,0 +1,223 @@
+import numpy as np
+from scipy import signal
+
+#------------------------------------
+# <<< Functions to adjust p-values for multiple testing >>>
+#------------------------------------
+
+list_correction_methods = ['bonferroni', 'holm', 'fdr_bh', 'fdr_by']
+
+
+def adjust_p_values(p_values, method='holm'):
+    """
+    Adjusts a set of p-values for multiple testing. NaN p-values (e.g. groups too small to test)
+    are ignored when counting the number of tests and are returned as NaN. The step-wise methods
+    need one O(n log n) sort, so millions of p-values are adjusted in a few seconds.
+
+    Args:
+    p_values (array_like): The unadjusted p-values.
+    method (str): 'bonferroni' (controls the family-wise error rate),
+                  'holm' (Holm-Bonferroni, controls the family-wise error rate and is never less powerful than Bonferroni),
+                  'fdr_bh' (Benjamini-Hochberg, controls the false discovery rate for independent or positively dependent tests) or
+                  'fdr_by' (Benjamini-Yekutieli, controls the false discovery rate under any dependence). Defaults to 'holm'.
+
+    Returns:
+    ndarray: The adjusted p-values, in the same order as the input.
+
+    Example:
+    >>> adjust_p_values([0.01, 0.04, 0.03], method='fdr_bh')
+    """
+    p_values = np.asarray(p_values, dtype=float)
+    adjusted = np.full(p_values.shape, np.nan)
+
+    valid = ~np.isnan(p_values)
+    p_valid = p_values[valid]
+    m = p_valid.size
+    if m == 0:
+        return adjusted
+
+    if method == 'bonferroni':
+        adjusted[valid] = np.minimum(p_valid * m, 1.0)
+        return adjusted
+
+    order = np.argsort(p_valid, kind='stable')
+    p_sorted = p_valid[order]
+
+    if method == 'holm':
+        # step-down: multiply the i-th smallest p-value by (m - i), then enforce monotonicity
+        p_sorted_adjusted = np.maximum.accumulate(p_sorted * (m - np.arange(m)))
+    elif method in ('fdr_bh', 'fdr_by'):
+        # step-up: multiply the i-th smallest p-value by m / i, then enforce monotonicity from the top
+        # (Benjamini-Yekutieli also multiplies by sum(1 / i), the price of allowing any dependence)
+        scale = m / np.arange(1, m + 1)
+        if method == 'fdr_by':
+            scale = scale * np.sum(1.0 / np.arange(1, m + 1))
+        p_sorted_adjusted = np.minimum.accumulate((p_sorted * scale)[::-1])[::-1]
+    else:
+        raise ValueError(f"Unknown multiple testing correction method: {method}")
+
+    p_valid_adjusted = np.empty(m)
+    p_valid_adjusted[order] = np.minimum(p_sorted_adjusted, 1.0)
+    adjusted[valid] = p_valid_adjusted
+
+    return adjusted
+
+
+def add_adjusted_p_values(df_results, p_value_column='p-value', method='holm', alpha=0.05):
+    """
+    Adds the adjusted p-values and the significance decision to a table of batch test results
+    (one row per test), replacing the single unadjusted p-value threshold.
+
+    Args:
+    df_results (DataFrame): The test results.
+    p_value_column (str, optional): The column holding the unadjusted p-values. Defaults to 'p-value'.
+    method (str, optional): Multiple testing correction passed to adjust_p_values. Defaults to 'holm'.
+    alpha (float, optional): The family-wise error rate or false discovery rate to control. Defaults to 0.05.
+
+    Returns:
+    DataFrame: A copy of df_results with 'Adjusted p-value' and 'Significant' columns.
+    """
+    df_results = df_results.copy()
+    df_results['Adjusted p-value'] = adjust_p_values(df_results[p_value_column].to_numpy(), method=method)
+    df_results['Significant'] = df_results['Adjusted p-value'] <= alpha
+    return df_results
+
+#------------------------------------
+# <<< Online testing for results that arrive over time >>>
+#------------------------------------
+#online procedures decide on each p-value as it arrives, without knowing how many tests will follow,
+#so they keep a small state between calls rather than the p-values seen so far
+
+def _lord_gamma(lags):
+    """
+    The default LORD++ spending sequence gamma_j = 0.0772 log(max(j, 2)) / (j exp(sqrt(log j))), which sums to 1 over an infinite stream.
+    """
+    lags = np.asarray(lags, dtype=float)
+    return 0.07720838 * np.log(np.maximum(lags, 2)) / (lags * np.exp(np.sqrt(np.log(lags))))
+
+
+def start_online_testing(alpha=0.05, initial_wealth=None, horizon=100000):
+    """
+    Creates the state for online testing with lord_plus_plus or alpha_investing.
+
+    Args:
+    alpha (float, optional): The false discovery rate to control. Defaults to 0.05.
+    initial_wealth (float, optional): The starting alpha-wealth, at most alpha. Defaults to alpha / 2.
+    horizon (int, optional): LORD++ only: number of future tests that each rejection earns alpha-wealth for.
+                             Beyond it the earnings are dropped, which only makes the test more conservative. Defaults to 100000.
+
+    Returns:
+    dict: The online testing state, updated in place by each call.
+    """
+    initial_wealth = alpha / 2 if initial_wealth is None else initial_wealth
+    if not 0 < initial_wealth <= alpha:
+        raise ValueError("The initial wealth should be between 0 and alpha.")
+
+    dict_state = {
+        'alpha': alpha,
+        'initial_wealth': initial_wealth,
+        'wealth': initial_wealth,
+        'tests': 0,
+        'rejections': 0,
+        'last_rejection': 0,
+        'earned': np.zeros(horizon),
+    }
+    return dict_state
+
+
+def lord_plus_plus(p_values, dict_state, block_size=4096):
+    """
+    LORD++ (Ramdas et al., 2017): tests the next p-values in a stream, controlling the false discovery rate.
+    Test t has the level gamma_t W0 + (alpha - W0) gamma_(t - tau_1) + alpha sum_(j > 1) gamma_(t - tau_j), where
+    tau_j are the earlier rejections. The earnings of the earlier rejections for the next horizon tests are kept in
+    dict_state['earned']. The p-values are tested block by block with array operations, restarting only after a
+    rejection, and each block's rejections are added to the earnings with one FFT convolution.
+
+    Args:
+    p_values (array_like): The next p-values in the stream, in the order they arrived.
+    dict_state (dict): The state from start_online_testing, updated in place.
+    block_size (int, optional): Number of p-values tested per block. Defaults to 4096.
+
+    Returns:
+    tuple: Boolean array of the rejections and array of the levels the p-values were tested at.
+    """
+    p_values = np.asarray(p_values, dtype=float)
+    alpha = dict_state['alpha']
+    initial_wealth = dict_state['initial_wealth']
+    horizon = dict_state['earned'].size
+    block_size = min(block_size, horizon)
+    m = p_values.size
+
+    gamma_lags = _lord_gamma(np.arange(1, horizon + 1))
+    earned = np.zeros(m + horizon)
+    earned[:horizon] = dict_state['earned']
+    levels = initial_wealth * _lord_gamma(dict_state['tests'] + np.arange(1, m + 1))
+    rejected = np.zeros(m, dtype=bool)
+
+    for block_start in range(0, m, block_size):
+        block_end = min(block_start + block_size, m)
+        block_levels = levels[block_start:block_end]
+        block_levels += earned[block_start:block_end]
+        block_p_values = p_values[block_start:block_end]
+        weights = np.zeros(block_end - block_start)
+
+        start = 0
+        while True:
+            hits = np.flatnonzero(block_p_values[start:] <= block_levels[start:])
+            if hits.size == 0:
+                break
+            i = start + hits[0]
+            weights[i] = alpha - initial_wealth if dict_state['rejections'] == 0 else alpha
+            block_levels[i + 1:] += weights[i] * gamma_lags[:block_levels.size - i - 1]
+            dict_state['rejections'] += 1
+            dict_state['last_rejection'] = dict_state['tests'] + block_start + i + 1
+            start = i + 1
+
+        if weights.any():
+            rejected[block_start:block_end] = weights > 0
+            earned[block_start + 1:block_end + horizon] += signal.fftconvolve(weights, gamma_lags)
+
+    dict_state['earned'] = earned[m:]
+    dict_state['tests'] += m
+    return rejected, levels
+
+
+def alpha_investing(p_values, dict_state):
+    """
+    Alpha-investing (Foster and Stine, 2008): tests the next p-values in a stream, controlling the marginal false
+    discovery rate. Each test spends alpha_j = W / (1 + j - k) of the current wealth W, where j is the test number and
+    k the last rejection, capped at W / (1 + W) so the wealth cannot go negative; a non-rejection costs
+    alpha_j / (1 - alpha_j), and a rejection earns alpha. The state is
+    just the wealth and the last rejection, so any number of p-values can be streamed through.
+
+    Args:
+    p_values (array_like): The next p-values in the stream, in the order they arrived.
+    dict_state (dict): The state from start_online_testing, updated in place.
+
+    Returns:
+    tuple: Boolean array of the rejections and array of the levels the p-values were tested at.
+    """
+    p_values = np.asarray(p_values, dtype=float)
+    alpha = dict_state['alpha']
+    wealth = dict_state['wealth']
+    test = dict_state['tests']
+    last_rejection = dict_state['last_rejection']
+
+    rejected = np.zeros(p_values.size, dtype=bool)
+    levels = np.zeros(p_values.size)
+    for i, p_value in enumerate(p_values.tolist()):
+        test += 1
+        level = min(wealth / (1 + test - last_rejection), wealth / (1 + wealth))
+        levels[i] = level
+        if p_value <= level:
+            rejected[i] = True
+            wealth += alpha
+            last_rejection = test
+        else:
+            wealth -= level / (1 - level)
+
+    dict_state['wealth'] = wealth
+    dict_state['tests'] = test
+    dict_state['last_rejection'] = last_rejection
+    dict_state['rejections'] += int(rejected.sum())
+    return rejected, levels
@@ -1,6 +1,8 @@
 import scipy.stats as stats
 import streamlit as st
 
+from functions import performance_tracking
+
 
 #------------------------------------
 # <<< Function to render assumptions >>>
@@ -57,6 +59,7 @@ def select_column_for_one_sample_t_test(df):
 # <<< Function to check normality assumption >>>
 #------------------------------------
 
+@performance_tracking.timed
 def check_normality_one_sample_t_test(df, value_column):
     """
     Checks the normality of the data using the Shapiro-Wilk test for a one-sample t-test.
@@ -4,6 +4,8 @@ from scipy.stats import shapiro
 import scipy.stats as stats
 import pandas as pd 
 import altair as alt
+
+from functions import performance_tracking
 #--------------------------------------------------
 #<<< Render assumptions for the one sample z test >>>
 #--------------------------------------------------
@@ -77,6 +79,7 @@ def explain_known_population_variance():
 #--------------------------------------------------
 #<<< check normality assumption for the one sample z test >>>
 #--------------------------------------------------
+@performance_tracking.timed
 def check_normality_one_sample_z_test(df, sample_column):
     """
     Checks for normality in a single sample for the one-sample z-test.
@@ -126,7 +129,7 @@ def check_normality_one_sample_z_test(df, sample_column):
             x='Theoretical Quantiles',
             y='Ordered Values'
         )
-        st.altair_chart(qq_plot + line, use_container_width=True)
+        performance_tracking.altair_chart(qq_plot + line, use_container_width=True)
     
     return p_value
 
@@ -0,0 +1,423 @@
+import numpy as np
+import pandas as pd
+import scipy.linalg
+import scipy.stats as stats
+import streamlit as st
+import altair as alt
+
+from functions import performance_tracking
+from stats_test_functions import linear_model_helpers
+
+
+#------------------------------------
+# <<< Function to render assumptions >>>
+#------------------------------------
+#one-way ANOVA on the dependent variable after adjusting for one or more continuous covariates
+
+def display_one_way_ancova_assumptions():
+    """
+    Displays the assumptions required for conducting a one-way ANCOVA.
+    """
+    dict_assumptions = {
+        "Independence": "The observations must be independent, and each subject should appear in only one group.",
+        "Linearity": "Within each group, the dependent variable should be linearly related to each covariate.",
+        "Homogeneity of Regression Slopes": "The relationship between the covariates and the dependent variable should be the same in every group (no group x covariate interaction).",
+        "Normality": "The residuals of the model should be approximately normally distributed.",
+        "Homogeneity of Variances": "The variance of the residuals should be roughly equal in every group.",
+        "Independence of Covariate and Treatment": "The covariates should be measured before the groups are formed (or be unaffected by them), otherwise adjusting for them can remove part of the group effect."
+    }
+
+    with st.expander("Click for One-way ANCOVA Assumptions"):
+        for key, value in dict_assumptions.items():
+            st.write(f":red[**{key}**:]\n{value}")
+
+#------------------------------------
+# <<< One-way ANCOVA from the cached covariate projection >>>
+#------------------------------------
+
+def one_way_ancova(df, group_column, value_column, covariate_columns):
+    """
+    Fits the one-way ANCOVA from the cached QR factorization of [1, covariates] and the per-group sums of
+    cross-products of its basis and the dependent variable. The common-slope model (the ANCOVA), the separate-slopes
+    model (for the homogeneity of regression slopes check), the covariate-only and group-only models, and the
+    adjusted means all come from these small per-group matrices, so no step goes back to the raw rows.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    group_column (str): The column containing the groups.
+    value_column (str): The column containing the dependent variable.
+    covariate_columns (tuple): The columns containing the covariates.
+
+    Returns:
+    dict: 'df_anova' (DataFrame with 'Source', 'SS', 'DF', 'MS', 'F', 'p-unc' and 'np2' for the group, the covariates
+          and the residual), 'adjusted_means' (Series by group), 'slopes' (Series of the pooled within-group slope of each
+          covariate), 'slopes_f' and 'slopes_p_value' (test of homogeneity of regression slopes) and 'residuals'.
+
+    Example:
+    >>> one_way_ancova(df, 'Teaching_Method', 'Post_Test', ('Pre_Test',))
+    """
+    covariate_columns = tuple(covariate_columns)
+    dict_projection = linear_model_helpers.get_covariate_projection(df, value_column, covariate_columns)
+    dict_moments = linear_model_helpers.get_group_moments(df, value_column, covariate_columns, group_column)
+
+    number_of_covariates = len(covariate_columns)
+    counts = dict_moments['counts']
+    moments = dict_moments['moments']
+    number_of_groups = len(counts)
+    n = int(counts.sum())
+
+    # the first basis column is constant, so its cross-products give the group sums of the other columns
+    constant = dict_projection['basis'][0, 0]
+    covariates = slice(1, number_of_covariates + 1)
+    group_sums_q = moments[:, 0, covariates] / constant
+    group_sums_y = moments[:, 0, -1] / constant
+
+    # within-group centred cross-products of the covariate basis (q) and the dependent variable (y)
+    within_qq = moments[:, covariates, covariates] - group_sums_q[:, :, np.newaxis] * group_sums_q[:, np.newaxis, :] / counts[:, np.newaxis, np.newaxis]
+    within_qy = moments[:, covariates, -1] - group_sums_q * (group_sums_y / counts)[:, np.newaxis]
+    within_yy = moments[:, -1, -1] - group_sums_y ** 2 / counts
+
+    # common slopes (the ANCOVA model) and group only
+    slopes = np.linalg.solve(within_qq.sum(axis=0), within_qy.sum(axis=0))
+    group_only_rss = float(within_yy.sum())
+    full_rss = group_only_rss - float(within_qy.sum(axis=0) @ slopes)
+    full_df = n - number_of_groups - number_of_covariates
+
+    # covariates only
+    total_q = group_sums_q.sum(axis=0)
+    total_y = group_sums_y.sum()
+    total_qq = moments[:, covariates, covariates].sum(axis=0) - np.outer(total_q, total_q) / n
+    total_qy = moments[:, covariates, -1].sum(axis=0) - total_q * total_y / n
+    total_yy = moments[:, -1, -1].sum() - total_y ** 2 / n
+    covariate_only_rss = float(total_yy - total_qy @ np.linalg.solve(total_qq, total_qy))
+
+    # separate slopes in each group, for the homogeneity of regression slopes check
+    separate_rss = 0.0
+    separate_parameters = 0
+    for group in range(number_of_groups):
+        group_slopes = np.linalg.pinv(within_qq[group]) @ within_qy[group]
+        separate_rss += float(within_yy[group] - within_qy[group] @ group_slopes)
+        separate_parameters += 1 + np.linalg.matrix_rank(within_qq[group])
+    separate_df = n - separate_parameters
+    interaction_df = full_df - separate_df
+    if interaction_df > 0 and separate_df > 0 and separate_rss > 0:
+        slopes_f = ((full_rss - separate_rss) / interaction_df) / (separate_rss / separate_df)
+        slopes_p_value = float(stats.f.sf(slopes_f, interaction_df, separate_df))
+    else:
+        slopes_f, slopes_p_value = np.nan, np.nan
+
+    # adjusted means: each group's intercept, evaluated at the overall mean of the covariates
+    intercepts = group_sums_y / counts - (group_sums_q / counts[:, np.newaxis]) @ slopes
+    adjusted_means = intercepts + (total_q / n) @ slopes
+
+    # the basis columns are [1, covariates] @ inverse(r), which maps the slopes back to the covariates' own units
+    r_inverse = scipy.linalg.solve_triangular(dict_projection['r'], np.eye(number_of_covariates + 1))
+    covariate_slopes = r_inverse[1:, 1:] @ slopes
+
+    group_codes = dict_moments['group_codes']
+    included = group_codes >= 0
+    residuals = (
+        dict_projection['values'][included]
+        - intercepts[group_codes[included]]
+        - dict_projection['basis'][included][:, covariates] @ slopes
+    )
+
+    list_rows = [
+        {'Source': group_column, 'SS': covariate_only_rss - full_rss, 'DF': number_of_groups - 1},
+        {'Source': ' + '.join(covariate_columns), 'SS': group_only_rss - full_rss, 'DF': number_of_covariates},
+    ]
+    df_anova = pd.DataFrame(list_rows)
+    df_anova['SS'] = df_anova['SS'].clip(lower=0)
+    df_anova['MS'] = df_anova['SS'] / df_anova['DF']
+    df_anova['F'] = df_anova['MS'] / (full_rss / full_df)
+    df_anova['p-unc'] = stats.f.sf(df_anova['F'], df_anova['DF'], full_df)
+    df_anova['np2'] = df_anova['SS'] / (df_anova['SS'] + full_rss)
+    df_residual = pd.DataFrame([{'Source': 'Residual', 'SS': full_rss, 'DF': full_df, 'MS': full_rss / full_df}])
+
+    dict_ancova = {
+        'df_anova': pd.concat([df_anova, df_residual], ignore_index=True),
+        'adjusted_means': pd.Series(adjusted_means, index=pd.Index(dict_moments['labels'], name=group_column), name='Adjusted mean'),
+        'slopes': pd.Series(covariate_slopes, index=list(covariate_columns), name='Pooled within-group slope'),
+        'slopes_f': slopes_f,
+        'slopes_p_value': slopes_p_value,
+        'residuals': residuals,
+    }
+    return dict_ancova
+
+#------------------------------------
+# <<< Function to select columns >>>
+#------------------------------------
+
+def select_columns_for_one_way_ancova(df):
+    """
+    Renders select boxes for the group and value columns and a multiselect for the covariates.
+
+    Args:
+    df (DataFrame): The dataframe from which columns will be selected.
+
+    Returns:
+    tuple: The group column, the value column and a tuple of covariate columns, or (None, None, None) if the selection is incomplete.
+    """
+    st.write("Please select the column names for your analysis:")
+
+    default_option = "---"
+    options = [default_option] + list(df.columns)
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        group_column = st.selectbox(
+            "Select the Group Column",
+            options=options,
+            help="Select the column that splits the data into the groups being compared."
+        )
+
+    with col2:
+        value_column = st.selectbox(
+            "Select the Value Column",
+            options=options,
+            help="Select the column that contains the numerical data (the dependent variable)."
+        )
+
+    with col3:
+        list_covariate_columns = st.multiselect(
+            "Select the Covariate Columns",
+            options=list(df.columns),
+            help="Select one or more continuous columns to adjust for, e.g. a pre-test score."
+        )
+
+    if default_option in (group_column, value_column) or not list_covariate_columns:
+        return None, None, None
+    return group_column, value_column, tuple(list_covariate_columns)
+
+#----------------------------
+#Check homogeneity of regression slopes and visualise linearity
+#----------------------------
+
+@performance_tracking.timed
+def check_homogeneity_of_regression_slopes(dict_ancova):
+    """
+    Displays the test of homogeneity of regression slopes: whether a model with a separate slope for each group
+    fits significantly better than the ANCOVA model with one common slope.
+
+    Args:
+    dict_ancova (dict): Output of one_way_ancova.
+
+    Returns:
+    bool: True if the slopes can be considered equal (p-value > 0.05), False otherwise.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Homogeneity of Regression Slopes:**
+        \nANCOVA adjusts every group with the same slope for each covariate. If the relationship between a covariate and the dependent variable differs between groups (a group x covariate interaction), the adjusted means depend on the covariate value chosen and a single adjusted comparison is misleading.
+        """)
+
+    with st.expander("Click for interpretation"):
+        st.write("""
+        **Interpreting the Test:**
+        - **P-value > 0.05**: No evidence that the slopes differ. The assumption is met.
+        - **P-value ≤ 0.05**: The slopes differ between groups. Consider reporting the group differences at specific covariate values instead.
+        """)
+
+    with st.expander("Homogeneity of Regression Slopes Check Results"):
+        st.write(f"Group x covariate interaction: F = {dict_ancova['slopes_f']:.4f}, P-value: {dict_ancova['slopes_p_value']:.4f}")
+        st.write("Pooled within-group slopes:")
+        performance_tracking.dataframe(dict_ancova['slopes'])
+
+    return dict_ancova['slopes_p_value'] > 0.05
+
+
+@performance_tracking.timed
+def check_linearity(df, group_column, value_column, covariate_column, max_points=5000, random_seed=42):
+    """
+    Displays a scatter plot of the dependent variable against a covariate with a regression line for each group,
+    on a seeded random sample of up to max_points rows so the chart stays small for large datasets.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    group_column (str): The column containing the groups.
+    value_column (str): The column containing the dependent variable.
+    covariate_column (str): The covariate to plot.
+    max_points (int, optional): Largest number of points plotted. Defaults to 5000.
+    random_seed (int, optional): Seed for the random sample. Defaults to 42.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Linearity:**
+        \nWithin each group, the dependent variable should increase or decrease at a steady rate as the covariate increases. The lines on the chart should also be roughly parallel (homogeneity of regression slopes).
+        """)
+
+    df_plot = df[[group_column, value_column, covariate_column]].dropna()
+    if len(df_plot) > max_points:
+        df_plot = df_plot.sample(max_points, random_state=random_seed)
+
+    with st.expander("Linearity Check Results"):
+        points = alt.Chart(df_plot).mark_circle(size=40, opacity=0.4).encode(
+            x=alt.X(f'{covariate_column}:Q', scale=alt.Scale(zero=False)),
+            y=alt.Y(f'{value_column}:Q', scale=alt.Scale(zero=False)),
+            color=f'{group_column}:N'
+        )
+        lines = points.transform_regression(covariate_column, value_column, groupby=[group_column]).mark_line()
+        performance_tracking.altair_chart((points + lines).properties(title=f'{value_column} against {covariate_column} by {group_column}'), use_container_width=True)
+
+#----------------------------
+#Check homogeneity of variances and normality of the residuals
+#----------------------------
+
+@performance_tracking.timed
+def check_residuals(df, group_column, value_column, covariate_columns, dict_ancova, max_sample_size=5000, random_seed=42):
+    """
+    Checks the normality of the ANCOVA residuals (Shapiro-Wilk, on a seeded random sample of up to 5000 residuals)
+    and the homogeneity of their variance across groups (Levene's test, centred on the group means of the residuals).
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    group_column (str): The column containing the groups.
+    value_column (str): The column containing the dependent variable.
+    covariate_columns (tuple): The columns containing the covariates.
+    dict_ancova (dict): Output of one_way_ancova.
+    max_sample_size (int, optional): Largest number of residuals tested for normality. Defaults to 5000.
+    random_seed (int, optional): Seed for the random sample. Defaults to 42.
+
+    Returns:
+    tuple: The Shapiro-Wilk p-value and the Levene's test p-value.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Residual Checks:**
+        \nThe residuals (each value minus its value predicted by the ANCOVA model) should be approximately normally distributed (**Shapiro-Wilk Test**), with roughly equal variance in every group (**Levene's test**).
+        """)
+
+    with st.expander("Click for interpretation"):
+        st.write("""
+        **Interpreting the Tests:**
+        - **P-value > 0.05**: The assumption is met.
+        - **P-value ≤ 0.05**: The assumption is not met. With large, similar sized groups ANCOVA is fairly robust to this; otherwise consider transforming the data.
+        """)
+
+    dict_moments = linear_model_helpers.get_group_moments(df, value_column, covariate_columns, group_column)
+    group_codes = dict_moments['group_codes'][dict_moments['group_codes'] >= 0]
+    residuals = dict_ancova['residuals']
+
+    sample = residuals
+    if residuals.size > max_sample_size:
+        sample = np.random.default_rng(random_seed).choice(residuals, size=max_sample_size, replace=False)
+    shapiro_stat, shapiro_p_value = stats.shapiro(sample)
+
+    # Levene's test is a one-way ANOVA of the absolute deviations from each group's mean
+    counts = dict_moments['counts']
+    deviations = np.abs(residuals - (np.bincount(group_codes, weights=residuals) / counts)[group_codes])
+    group_means = np.bincount(group_codes, weights=deviations) / counts
+    between_ms = np.sum(counts * (group_means - deviations.mean()) ** 2) / (len(counts) - 1)
+    within_ms = np.sum((deviations - group_means[group_codes]) ** 2) / (residuals.size - len(counts))
+    levene_stat = between_ms / within_ms
+    levene_p_value = float(stats.f.sf(levene_stat, len(counts) - 1, residuals.size - len(counts)))
+
+    with st.expander("Residual Checks Results"):
+        st.write(f"Shapiro-Wilk Test Statistic: {shapiro_stat:.4f}, P-value: {shapiro_p_value:.4f}" + (f" (random sample of {max_sample_size} residuals)" if residuals.size > max_sample_size else ""))
+        st.write(f"Levene's Test Statistic: {levene_stat:.4f}, P-value: {levene_p_value:.4f}")
+
+    return shapiro_p_value, levene_p_value
+
+#----------------------------
+#Display the ANCOVA table and adjusted means
+#----------------------------
+
+def display_one_way_ancova_results(dict_ancova):
+    """
+    Displays the ANCOVA table and the adjusted group means.
+
+    Args:
+    dict_ancova (dict): Output of one_way_ancova.
+    """
+    with st.expander("One-way ANCOVA Table and Adjusted Means"):
+        performance_tracking.dataframe(dict_ancova['df_anova'], hide_index=True)
+        st.write("Group means adjusted to the overall mean of the covariates:")
+        performance_tracking.dataframe(dict_ancova['adjusted_means'])
+
+#----------------------------
+#User inputs to confirm the assumptions that cannot be checked are true
+#----------------------------
+
+def confirm_one_way_ancova_assumptions():
+    """
+    Renders select boxes for the user to manually confirm the assumptions required for the one-way ANCOVA.
+
+    Returns:
+    bool: True if all manually checked assumptions are confirmed, False otherwise, None if no selection has been made.
+    """
+    st.subheader("Confirming remaining assumptions for the One-way ANCOVA")
+
+    default_option = "---"
+    options = [default_option, "Yes", "No"]
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        independence_confirmation = st.selectbox(
+            "Confirm if the observations are independent:",
+            options=options,
+            help="Each subject should appear in only one group."
+        )
+
+    with col2:
+        linearity_confirmation = st.selectbox(
+            "Confirm if the relationships look linear:",
+            options=options,
+            help="Based on the scatter plot of the dependent variable against each covariate."
+        )
+
+    with col3:
+        covariate_confirmation = st.selectbox(
+            "Confirm if the covariates are unaffected by the groups:",
+            options=options,
+            help="e.g. the covariates were measured before the groups were formed."
+        )
+
+    if default_option in (independence_confirmation, linearity_confirmation, covariate_confirmation):
+        return None
+    elif independence_confirmation == "Yes" and linearity_confirmation == "Yes" and covariate_confirmation == "Yes":
+        st.success("All necessary assumptions for the One-way ANCOVA are confirmed.")
+        return True
+    else:
+        return False
+
+#----------------------------
+#Main function to render the checks
+#----------------------------
+
+def render_assumption_checks_for_one_way_ancova(df):
+    #display assumptions for this test
+    display_one_way_ancova_assumptions()
+
+    #user selection for the group, value and covariate columns
+    group_column, value_column, covariate_columns = select_columns_for_one_way_ancova(df)
+
+    #fit once from the cached covariate projection, and share the fit between the checks
+    try:
+        dict_ancova = one_way_ancova(df, group_column, value_column, covariate_columns)
+    except ValueError as error:
+        st.error(str(error))
+        return False
+
+    tab1, tab2, tab3 = st.tabs(['Homogeneity of Regression Slopes', 'Linearity', 'Residuals'])
+
+    with tab1:
+        bool_equal_slopes = check_homogeneity_of_regression_slopes(dict_ancova)
+
+    with tab2:
+        covariate_column = st.selectbox("Select the covariate to plot", options=covariate_columns)
+        check_linearity(df, group_column, value_column, covariate_column)
+
+    with tab3:
+        normality_p_value, homogeneity_p_value = check_residuals(df, group_column, value_column, covariate_columns, dict_ancova)
+
+    display_one_way_ancova_results(dict_ancova)
+
+    bool_manual_check_assumptions = confirm_one_way_ancova_assumptions()
+
+    if bool_equal_slopes and normality_p_value > 0.05 and homogeneity_p_value > 0.05:
+        return bool_manual_check_assumptions
+    else:
+        st.error("One or more assumptions are not met. Consider transforming the data, or comparing the groups at specific covariate values.")
+        return False
@@ -8,6 +8,7 @@ import streamlit as st
 import pandas as pd
 
 #import other functions from files
+from functions import performance_tracking
 from stats_test_functions import stats_tests as stat_tests
 from functions import user_inputs
 
@@ -35,6 +36,7 @@ def paired_t_test_assumptions():
 
 
 #Function to Check Normality using Q-Q Plot using Altair
+@performance_tracking.timed
 def check_normality_qqplot_altair(df, sample_1, sample_2):
     """
     Displays a Q-Q plot using Altair to check if the differences between two samples are normally distributed.
@@ -90,9 +92,10 @@ def check_normality_qqplot_altair(df, sample_1, sample_2):
         )
 
         # Combine the points and the line
-        st.altair_chart(qq_plot + line, use_container_width=True)
+        performance_tracking.altair_chart(qq_plot + line, use_container_width=True)
 
 
+@performance_tracking.timed
 def check_for_outliers_altair(df, sample_1, sample_2):
     """
     Displays a boxplot using Altair to check for outliers in the differences between two samples.
@@ -129,7 +132,7 @@ def check_for_outliers_altair(df, sample_1, sample_2):
         )
 
         # Display the boxplot
-        st.altair_chart(box_plot, use_container_width=True)
+        performance_tracking.altair_chart(box_plot, use_container_width=True)
 
     
 
@@ -160,6 +163,7 @@ def perform_shapiro_wilk_test_paired_t_test_check(df, sample_1, sample_2):
 
 '''
 
+@performance_tracking.timed
 def perform_shapiro_wilk_test_paired_t_test_check_with_explainers(df, sample_1, sample_2):
     """
     Performs the Shapiro-Wilk test for normality on the differences between two samples and displays the results with explanations.
@@ -211,6 +215,7 @@ def perform_shapiro_wilk_test_paired_t_test_check_with_explainers(df, sample_1,
 
 
 #function to render inputs for user to confirm whether assumptions are met, and based on these inputs and bool param, recommend appropriate test
+@performance_tracking.timed
 def check_assumptions_and_recommend_test(normal_dist_can_use_paired_t):
     """
     Asks the user to confirm assumptions based on the Q-Q plot and box-plot results and uses the Shapiro-Wilk test result
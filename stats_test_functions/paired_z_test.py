@@ -4,6 +4,7 @@ import pandas as pd
 import altair as alt
 
 #import other functions from files
+from functions import performance_tracking
 from stats_test_functions import stats_tests as stat_tests
 from functions import user_inputs
 
@@ -85,6 +86,7 @@ def remind_known_population_variances():
 #--------------------------
 #functions to check Normal Distribution of Differences
 
+@performance_tracking.timed
 def check_normality_qqplot_altair(df, sample_1, sample_2):
     """
     Displays a Q-Q plot using Altair to check if the differences between two paired samples are normally distributed.
@@ -137,12 +139,13 @@ def check_normality_qqplot_altair(df, sample_1, sample_2):
             y='Ordered Values'
         )
 
-        st.altair_chart(qq_plot + line, use_container_width=True)
+        performance_tracking.altair_chart(qq_plot + line, use_container_width=True)
 
 
 
 #--------------------------
 
+@performance_tracking.timed
 def perform_shapiro_wilk_test_paired_z_test(df, sample_1, sample_2):
     """
     Performs the Shapiro-Wilk test for normality on the differences between two paired samples and displays the results with explanations.
@@ -188,6 +191,7 @@ def perform_shapiro_wilk_test_paired_z_test(df, sample_1, sample_2):
 #--------------------------
 #Function to test assumption of no outliers
 
+@performance_tracking.timed
 def check_for_outliers_paired_z_test(df, sample_1, sample_2):
     """
     Displays a boxplot using Altair to check for outliers in the differences between two paired samples.
@@ -235,12 +239,13 @@ def check_for_outliers_paired_z_test(df, sample_1, sample_2):
         )
 
         # Display the boxplot
-        st.altair_chart(box_plot, use_container_width=True)
+        performance_tracking.altair_chart(box_plot, use_container_width=True)
 
 
 #--------------------------
 #Function to check / confirm random sampling assumption
 
+@performance_tracking.timed
 def check_random_sampling_paired_z_test():
     """
     Informs the user about the random sampling assumption required for the paired samples z-test.
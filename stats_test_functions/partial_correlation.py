@@ -0,0 +1,403 @@
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+import streamlit as st
+
+from functions import performance_tracking
+
+
+#------------------------------------
+# <<< Function to render assumptions >>>
+#------------------------------------
+
+def display_partial_correlation_assumptions():
+    """
+    Displays the assumptions required for a partial correlation analysis.
+    """
+    dict_assumptions = {
+        "Linearity": "The relationships between each pair of variables (including the control variables) should be linear.",
+        "Normality": "The variables should be approximately normally distributed, so that the p-values from the t-distribution are valid.",
+        "Independence": "The observations must be independent of each other.",
+        "Scale of Measurement": "All variables should be measured at least at the interval level.",
+        "No Perfect Multicollinearity": "No variable should be an exact (or near exact) linear combination of the others, otherwise the partial correlations cannot be estimated reliably."
+    }
+
+    with st.expander("Click for Partial Correlation Assumptions"):
+        for key, value in dict_assumptions.items():
+            st.write(f":red[**{key}**:]\n{value}")
+
+#------------------------------------
+# <<< Cached covariance matrix per dataset >>>
+#------------------------------------
+
+def _covariance_of_rows(df_numeric):
+    """
+    Covariance matrix of the columns of df_numeric over all its rows, as a read-only DataFrame, and the number of rows.
+    """
+    values = df_numeric.to_numpy(dtype=float)
+    centered = values - values.mean(axis=0) if values.shape[0] else values
+    covariance = centered.T @ centered / max(values.shape[0] - 1, 1)
+    covariance.flags.writeable = False
+
+    dict_covariance = {
+        'covariance': pd.DataFrame(covariance, index=df_numeric.columns, columns=df_numeric.columns),
+        'n': values.shape[0],
+    }
+    return dict_covariance
+
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=8))
+def get_covariance_matrix(df):
+    """
+    Calculates the covariance matrix of every numeric column with no missing values, once per dataset, so adding or
+    removing variables only reads another part of it.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+
+    Returns:
+    dict: 'covariance' (read-only DataFrame indexed by column name) and 'n' (number of rows).
+    """
+    df_numeric = df.select_dtypes(include='number')
+    return _covariance_of_rows(df_numeric.loc[:, df_numeric.notna().all()])
+
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=8))
+def get_complete_case_covariance_matrix(df, columns):
+    """
+    Calculates the covariance matrix of the selected variables once per (dataset, set of variables), using the rows
+    with no missing value in any of them (so a gap in a column that is not selected does not drop the row).
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    columns (tuple): The selected variables, sorted so that reordering them reuses the cached matrix.
+
+    Returns:
+    dict: 'covariance' (read-only DataFrame indexed by column name) and 'n' (number of complete rows).
+    """
+    return _covariance_of_rows(df[list(columns)].dropna())
+
+
+def get_selection_covariance(df, list_columns):
+    """
+    The covariance matrix of the selected variables over the rows with a value in every one of them. When none of
+    them has a missing value these are all the rows, and the matrix is read from the dataset's cached one; only
+    selections with missing values go back to the rows.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    list_columns (list): The selected variables.
+
+    Returns:
+    dict: 'covariance' (read-only DataFrame indexed by column name, covering at least list_columns) and 'n' (number of complete rows).
+    """
+    dict_covariance = get_covariance_matrix(df)
+    if set(list_columns) <= set(dict_covariance['covariance'].columns):
+        return dict_covariance
+    return get_complete_case_covariance_matrix(df, tuple(sorted(set(list_columns))))
+
+#------------------------------------
+# <<< Precision matrix and rank-one updates >>>
+#------------------------------------
+
+def add_variable_to_precision(covariance, list_columns, precision, new_column):
+    """
+    Extends the precision matrix (inverse covariance) of list_columns by one variable using the block
+    inverse formula, rather than inverting the larger covariance matrix again.
+
+    Args:
+    covariance (DataFrame): The covariance matrix from get_selection_covariance.
+    list_columns (list): The variables the current precision matrix covers.
+    precision (ndarray): The current precision matrix.
+    new_column (str): The variable to add.
+
+    Returns:
+    ndarray: The precision matrix of list_columns + [new_column].
+    """
+    cross_covariance = covariance.loc[list_columns, new_column].to_numpy()
+    u = precision @ cross_covariance
+    # Schur complement: the variance of new_column left unexplained by the current variables
+    schur_complement = covariance.loc[new_column, new_column] - cross_covariance @ u
+    if schur_complement <= 1e-12 * covariance.loc[new_column, new_column]:
+        raise np.linalg.LinAlgError(f"'{new_column}' is a linear combination of the other selected variables.")
+
+    size = len(list_columns)
+    new_precision = np.empty((size + 1, size + 1))
+    new_precision[:size, :size] = precision + np.outer(u, u) / schur_complement
+    new_precision[:size, size] = -u / schur_complement
+    new_precision[size, :size] = -u / schur_complement
+    new_precision[size, size] = 1.0 / schur_complement
+    return new_precision
+
+
+def remove_variable_from_precision(precision, index):
+    """
+    Removes one variable from a precision matrix with a rank-one downdate.
+
+    Args:
+    precision (ndarray): The current precision matrix.
+    index (int): Position of the variable to remove.
+
+    Returns:
+    ndarray: The precision matrix of the remaining variables.
+    """
+    keep = np.arange(precision.shape[0]) != index
+    column = precision[keep, index]
+    return precision[np.ix_(keep, keep)] - np.outer(column, column) / precision[index, index]
+
+
+def update_precision_matrix(covariance, dict_current, list_new_columns):
+    """
+    Moves from the precision matrix of one set of variables to another with a rank-one update per variable
+    removed or added, instead of refitting.
+
+    Args:
+    covariance (DataFrame): The covariance matrix from get_selection_covariance.
+    dict_current (dict): 'columns' and 'precision' of the current set of variables (empty dict to start from scratch).
+    list_new_columns (list): The variables wanted.
+
+    Returns:
+    dict: 'columns' (in list_new_columns order) and 'precision' for the new set of variables.
+    """
+    list_columns = list(dict_current.get('columns', []))
+    precision = dict_current.get('precision', np.empty((0, 0)))
+
+    for column in [column for column in list_columns if column not in list_new_columns]:
+        precision = remove_variable_from_precision(precision, list_columns.index(column))
+        list_columns.remove(column)
+
+    for column in [column for column in list_new_columns if column not in list_columns]:
+        precision = add_variable_to_precision(covariance, list_columns, precision, column)
+        list_columns.append(column)
+
+    order = [list_columns.index(column) for column in list_new_columns]
+    return {'columns': list(list_new_columns), 'precision': precision[np.ix_(order, order)]}
+
+#------------------------------------
+# <<< Partial correlations from the precision matrix >>>
+#------------------------------------
+
+def partial_correlations_from_precision(precision, n):
+    """
+    Reads every partial correlation (each pair controlling for all the other variables) from a precision matrix,
+    with p-values from the t-distribution.
+
+    Args:
+    precision (ndarray): The precision matrix of the variables.
+    n (int): Number of observations.
+
+    Returns:
+    tuple: The matrix of partial correlations and the matrix of two-sided p-values.
+    """
+    scale = np.sqrt(np.diag(precision))
+    partial_r = np.clip(-precision / np.outer(scale, scale), -1.0, 1.0)
+    np.fill_diagonal(partial_r, 1.0)
+
+    # degrees of freedom: n - 2 - number of control variables
+    degrees_of_freedom = n - precision.shape[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_stat = partial_r * np.sqrt(degrees_of_freedom / (1.0 - partial_r ** 2))
+        p_values = 2 * stats.t.sf(np.abs(t_stat), degrees_of_freedom)
+    np.fill_diagonal(p_values, 0.0)
+    return partial_r, p_values
+
+
+def partial_correlation(df, column_1, column_2, list_control_columns, p_value_threshold=0.05, dict_current=None):
+    """
+    Calculate the partial correlation between two variables, controlling for the given control variables.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    column_1 (str): The first variable.
+    column_2 (str): The second variable.
+    list_control_columns (list): The variables to control for.
+    p_value_threshold (float, optional): The threshold for determining statistical significance. Defaults to 0.05.
+    dict_current (dict, optional): A previous result of update_precision_matrix to update from. Defaults to None.
+
+    Returns:
+    tuple: The partial correlation, the p-value of the test, a plain English interpretation of the result,
+           and the dict from update_precision_matrix (to pass back in when the control variables change).
+
+    Example:
+    >>> partial_correlation(df, 'Exercise_Hours', 'Blood_Pressure', ['Age'])
+    """
+    dict_covariance = get_selection_covariance(df, [column_1, column_2] + list(list_control_columns))
+    dict_precision = update_precision_matrix(dict_covariance['covariance'], dict_current or {}, [column_1, column_2] + list(list_control_columns))
+    partial_r, p_values = partial_correlations_from_precision(dict_precision['precision'], dict_covariance['n'])
+
+    r, p_value = partial_r[0, 1], p_values[0, 1]
+    # Interpret the result
+    if p_value < p_value_threshold:
+        result = "There is significant evidence to reject the null hypothesis. This suggests a statistically significant relationship between the two variables after controlling for the control variables."
+    else:
+        result = "There is not enough evidence to reject the null hypothesis. This suggests no statistically significant relationship between the two variables after controlling for the control variables."
+    return r, p_value, result, dict_precision
+
+#------------------------------------
+# <<< Function to select columns >>>
+#------------------------------------
+
+def select_columns_for_partial_correlation(df):
+    """
+    Renders select boxes for the two variables of interest and a multiselect for the control variables.
+
+    Args:
+    df (DataFrame): The dataframe from which the columns will be selected.
+
+    Returns:
+    tuple: The two selected variables (or None if "---" is selected) and the list of control variables.
+    """
+    st.write("Please select the two variables of interest and the variables to control for:")
+
+    default_option = "---"
+    list_numeric_columns = list(df.select_dtypes(include='number').columns)
+    options = [default_option] + list_numeric_columns
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        column_1 = st.selectbox("Select the First Variable", options=options)
+    with col2:
+        column_2 = st.selectbox("Select the Second Variable", options=options)
+    with col3:
+        list_control_columns = st.multiselect(
+            "Select the Control Variables",
+            options=[column for column in list_numeric_columns if column not in (column_1, column_2)],
+            help="The relationship between the two variables is measured after removing the linear effect of these variables."
+        )
+
+    if default_option in (column_1, column_2):
+        return None, None, list_control_columns
+    return column_1, column_2, list_control_columns
+
+#----------------------------
+#Check multicollinearity and show the partial correlations
+#----------------------------
+
+@performance_tracking.timed
+def check_multicollinearity_and_partial_correlations(df, column_1, column_2, list_control_columns):
+    """
+    Calculates the precision matrix for the selected variables (updated from the previous selection in this session
+    with rank-one updates), shows every partial correlation and checks for multicollinearity using the variance
+    inflation factors, which are the diagonal of the precision matrix of the correlation matrix.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    column_1 (str): The first variable.
+    column_2 (str): The second variable.
+    list_control_columns (list): The variables to control for.
+
+    Returns:
+    bool: True if no variable has a variance inflation factor of 10 or more, False otherwise.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Multicollinearity:**
+        \nThe variance inflation factor (VIF) shows how much of a variable is explained by the other selected variables. A VIF of 1 means it is unrelated to them, and very large values mean it is close to a linear combination of them.
+        """)
+
+    with st.expander("Click for interpretation"):
+        st.write("""
+        **Interpreting the VIF:**
+        - **VIF below 10:** No serious multicollinearity. The partial correlations can be estimated reliably.
+        - **VIF of 10 or more:** Strong multicollinearity. Consider removing one of the closely related control variables.
+        """)
+
+    list_columns = [column_1, column_2] + list(list_control_columns)
+    dict_covariance = get_selection_covariance(df, list_columns)
+    covariance = dict_covariance['covariance']
+
+    with st.expander("Multicollinearity Check Results"):
+        if dict_covariance['n'] <= len(list_columns):
+            st.error(f"Only {dict_covariance['n']} rows have a value for every selected variable, and at least {len(list_columns) + 1} are needed. Remove the variables with many missing values.")
+            return False
+
+        # the precision matrix kept in the session is only updated from if its variables' covariance is unchanged (the
+        # same data and the same complete rows), otherwise it is built from scratch
+        dict_previous = st.session_state.get('partial_correlation_precision', {})
+        list_previous_columns = dict_previous.get('columns', [])
+        if (dict_previous.get('n') != dict_covariance['n']
+                or not set(list_previous_columns) <= set(covariance.columns)
+                or not np.array_equal(dict_previous.get('covariance'), covariance.loc[list_previous_columns, list_previous_columns].to_numpy())):
+            dict_previous = {}
+
+        try:
+            dict_precision = update_precision_matrix(covariance, dict_previous, list_columns)
+            dict_precision.update({'n': dict_covariance['n'], 'covariance': covariance.loc[list_columns, list_columns].to_numpy()})
+            st.session_state['partial_correlation_precision'] = dict_precision
+        except np.linalg.LinAlgError as error:
+            st.session_state.pop('partial_correlation_precision', None)
+            st.error(f"Perfect multicollinearity: {error} Remove it from the control variables.")
+            return False
+
+        precision = st.session_state['partial_correlation_precision']['precision']
+        variances = np.diag(dict_covariance['covariance'].loc[list_columns, list_columns].to_numpy())
+        series_vif = pd.Series(np.diag(precision) * variances, index=list_columns, name='VIF')
+
+        partial_r, p_values = partial_correlations_from_precision(precision, dict_covariance['n'])
+        st.write(f"Partial correlations (each pair controlling for all the other selected variables), from {dict_covariance['n']} complete rows:")
+        performance_tracking.dataframe(pd.DataFrame(partial_r, index=list_columns, columns=list_columns).style.format("{:.3f}"))
+        st.write(f"Partial correlation between {column_1} and {column_2}: {partial_r[0, 1]:.3f} (p-value {p_values[0, 1]:.4f})")
+        performance_tracking.dataframe(series_vif)
+
+        if (series_vif < 10).all():
+            st.write(":green[No variable has a VIF of 10 or more. Assumption satisfied.]")
+            return True
+        else:
+            st.error("One or more variables have a VIF of 10 or more, suggesting strong multicollinearity.")
+            return False
+
+#----------------------------
+#User inputs to confirm the assumptions that cannot be checked are true
+#----------------------------
+
+def confirm_partial_correlation_assumptions(multicollinearity_check):
+    """
+    Renders select boxes for the user to manually confirm the assumptions required for partial correlation.
+
+    Args:
+    multicollinearity_check (bool): Result from check_multicollinearity_and_partial_correlations.
+
+    Returns:
+    bool: True if all manually checked assumptions are confirmed, False otherwise, None if no selection has been made.
+    """
+    st.subheader("Confirming remaining assumptions for partial correlation")
+
+    if not multicollinearity_check:
+        st.error("The multicollinearity check failed. Remove the closely related control variables and try again.")
+        return False
+
+    default_option = "---"
+    options = [default_option, "Yes", "No"]
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        linearity_confirmation = st.selectbox("Confirm if the relationships are linear:", options=options)
+    with col2:
+        normality_confirmation = st.selectbox("Confirm if the variables are approximately normal:", options=options)
+    with col3:
+        independence_confirmation = st.selectbox("Confirm if the observations are independent:", options=options)
+
+    if default_option in (linearity_confirmation, normality_confirmation, independence_confirmation):
+        return None
+    elif linearity_confirmation == "Yes" and normality_confirmation == "Yes" and independence_confirmation == "Yes":
+        st.success("All necessary assumptions for partial correlation are confirmed.")
+        return True
+    else:
+        return False
+
+#----------------------------
+#Main function to render the checks
+#----------------------------
+
+def render_assumption_checks_for_partial_correlation(df):
+    #display assumptions for this test
+    display_partial_correlation_assumptions()
+
+    #user selection for the variables of interest and control variables
+    column_1, column_2, list_control_columns = select_columns_for_partial_correlation(df)
+
+    bool_multicollinearity = check_multicollinearity_and_partial_correlations(df, column_1, column_2, list_control_columns)
+
+    bool_manual_check_assumptions = confirm_partial_correlation_assumptions(bool_multicollinearity)
+
+    return bool_manual_check_assumptions
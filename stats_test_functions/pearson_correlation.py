@@ -1,7 +1,12 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import altair as alt
 
+from functions import performance_tracking
+from stats_test_functions import rank_cache
+from stats_test_functions import multiple_testing
+
 #------------------------------------
 # <<< Function to render assumptions >>>
 #------------------------------------
@@ -79,6 +84,7 @@ import pandas as pd
 import scipy.stats as stats
 import altair as alt
 
+@performance_tracking.timed
 def check_normality_qqplot_altair(df, variable_1, variable_2):
     """
     Displays a Q-Q plot using Altair to check if a variable is normally distributed.
@@ -134,7 +140,7 @@ def check_normality_qqplot_altair(df, variable_1, variable_2):
             )
 
             # Combine the points and the line
-            st.altair_chart(qq_plot + line, use_container_width=True)
+            performance_tracking.altair_chart(qq_plot + line, use_container_width=True)
 
 # Example usage
 # df = pd.DataFrame({'Variable1': np.random.normal(0, 1, 100)})
@@ -144,6 +150,7 @@ def check_normality_qqplot_altair(df, variable_1, variable_2):
 # <<< Function to check normality - Shapiro Wilk Test>>>
 #------------------------------------
 
+@performance_tracking.timed
 def check_normality_pearson_correlation_shapiro(df, variable_1, variable_2):
     """
     Checks the normality of the data using the Shapiro-Wilk test for a one-sample t-test.
@@ -200,6 +207,7 @@ def check_normality_pearson_correlation_shapiro(df, variable_1, variable_2):
 # <<< Function to check linearity assumption >>>
 #------------------------------------
 
+@performance_tracking.timed
 def check_linearity_scatter_plot(df, variable1, variable2):
     """
     Displays a scatter plot with a fitted line to check the linearity between two variables.
@@ -238,13 +246,14 @@ def check_linearity_scatter_plot(df, variable1, variable2):
         final_plot = scatter_plot + scatter_plot.transform_regression(variable1, variable2).mark_line()
         
         # Combine the scatter plot and the trend line
-        st.altair_chart(final_plot, use_container_width=True)
+        performance_tracking.altair_chart(final_plot, use_container_width=True)
 
 
 #------------------------------------
 # <<< Function to check Homoscedasticity assumption >>>
 #------------------------------------
 
+@performance_tracking.timed
 def check_homoscedasticity(df, variable1, variable2):
     """
     Displays a scatter plot and performs Levene's test to check the homoscedasticity between two variables.
@@ -304,6 +313,7 @@ def check_homoscedasticity(df, variable1, variable2):
 #-----------------------------------------------
 
 #function to render inputs for user to confirm whether assumptions are met, and based on these inputs and bool param, recommend appropriate test
+@performance_tracking.timed
 def check_assumptions_and_recommend_test(dict_shapiro_wilk_check_for_each_variable):
     """
     Asks the user to confirm assumptions based on the Q-Q plot and box-plot results and uses the Shapiro-Wilk test result
@@ -355,12 +365,238 @@ def check_assumptions_and_recommend_test(dict_shapiro_wilk_check_for_each_variab
     return proceed_with_pearson_correlation
 
 
+#------------------------------------
+# <<< Matrix mode: all pairwise correlations between numeric columns >>>
+#------------------------------------
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=8))
+def get_standardized_columns(df, columns, method='pearson'):
+    """
+    Standardizes the selected numeric columns once per (dataset, columns, method), so that every pairwise
+    correlation is a dot product of two standardized columns. Rows with a missing value in any selected column
+    are excluded (complete-case analysis). For Spearman's Rho the columns are replaced by their cached ranks first.
+    Constant columns have no correlation and are dropped.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    columns (tuple): The numeric columns to include.
+    method (str, optional): 'pearson' or 'spearman'. Defaults to 'pearson'.
+
+    Returns:
+    dict: 'z' (read-only array of shape (rows, columns) with unit-length, zero-mean columns), 'columns' (kept columns),
+          'dropped_columns' (constant columns) and 'n' (number of complete rows).
+    """
+    if method == 'spearman':
+        values = np.array(rank_cache.get_rank_matrix(df, columns))
+    else:
+        values = df[list(columns)].to_numpy(dtype=float)
+        values = values[~np.isnan(values).any(axis=1)]
+
+    values -= values.mean(axis=0)
+    norms = np.sqrt(np.einsum('ij,ij->j', values, values))
+    is_constant = norms == 0
+
+    z = values[:, ~is_constant] / norms[~is_constant]
+    z.flags.writeable = False
+
+    dict_standardized = {
+        'z': z,
+        'columns': [column for column, constant in zip(columns, is_constant) if not constant],
+        'dropped_columns': [column for column, constant in zip(columns, is_constant) if constant],
+        'n': values.shape[0],
+    }
+    return dict_standardized
+
+
+def _correlation_p_values(r, n):
+    """
+    Calculates two-sided p-values for correlation coefficients using the t-distribution with n - 2 degrees of freedom.
+    """
+    with np.errstate(divide='ignore'):
+        t_stat = np.abs(r) * np.sqrt((n - 2) / np.maximum(1.0 - r ** 2, 0.0))
+    return 2 * stats.t.sf(t_stat, n - 2)
+
+
+#log-spaced bin edges for the histogram of p-values used by the streaming Benjamini-Hochberg adjustment, each bin
+#spanning under 4% of its lower edge (p-values below 1e-300 share the first bin)
+P_VALUE_HISTOGRAM_EDGES = np.r_[0.0, np.logspace(-300, 0, 20001)]
+
+
+def _streaming_fdr_bh(kept_p, m, histogram_counts):
+    """
+    Benjamini-Hochberg q-values for the kept pairs, which hold the smallest p-values of all m pairs, without the other
+    p-values. The q-value of the i-th smallest p-value is the minimum of m * p_(j) / j over j >= i: over the kept pairs
+    the ranks are known exactly, and the minimum over the pairs not kept is bounded from above with the histogram
+    (in each bin the pair of highest rank has p below the bin's upper edge), so the q-values are exact or slightly
+    conservative, by at most the width of one bin.
+    """
+    order = np.argsort(kept_p, kind='stable')
+    p_sorted = kept_p[order]
+    ratios = m * p_sorted / np.arange(1, p_sorted.size + 1)
+
+    #the bins holding pairs that were not kept: their counts (the kept pairs are the smallest, so they are removed
+    #from the lowest bins first)
+    kept_counts = np.bincount(np.clip(np.searchsorted(P_VALUE_HISTOGRAM_EDGES, p_sorted, side='right') - 1, 0, histogram_counts.size - 1), minlength=histogram_counts.size)
+    cumulative_counts = np.cumsum(histogram_counts)
+    has_rest = histogram_counts > kept_counts
+    if has_rest.any():
+        tail_minimum = np.min(m * P_VALUE_HISTOGRAM_EDGES[1:][has_rest] / cumulative_counts[has_rest])
+    else:
+        tail_minimum = np.inf
+
+    q_sorted = np.minimum(np.minimum.accumulate(ratios[::-1])[::-1], tail_minimum)
+    q_values = np.empty(kept_p.size)
+    q_values[order] = np.minimum(q_sorted, 1.0)
+    return q_values
+
+
+def correlation_matrix_pairs(df, columns, method='pearson', top_k=50, max_q_value=None, block_size=256):
+    """
+    Calculates the correlation between every pair of the selected columns and returns the strongest pairs with
+    their p-values and Benjamini-Hochberg FDR-adjusted q-values. The correlations are computed one block of columns
+    at a time with a matrix multiply, so the full correlation matrix is never held in memory: only the current top_k
+    pairs and a fixed-size histogram of the p-values (for the q-values, see _streaming_fdr_bh) are kept.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    columns (list): The numeric columns to screen.
+    method (str, optional): 'pearson' or 'spearman'. Defaults to 'pearson'.
+    top_k (int, optional): Number of pairs with the smallest p-values to return. None returns every pair (which needs
+        memory for every pair). Defaults to 50.
+    max_q_value (float, optional): If given, only pairs with a q-value at or below this are returned. Defaults to None.
+    block_size (int, optional): Number of columns multiplied at a time. Defaults to 256.
+
+    Returns:
+    tuple: DataFrame of pairs (Variable 1, Variable 2, Correlation, p-value, q-value) sorted by p-value,
+           and the dict returned by get_standardized_columns.
+    """
+    dict_standardized = get_standardized_columns(df, tuple(columns), method)
+    z = dict_standardized['z']
+    n = dict_standardized['n']
+    number_of_columns = z.shape[1]
+    number_of_pairs = number_of_columns * (number_of_columns - 1) // 2
+
+    #every pair is returned without top_k, so the arrays are allocated once at full size and filled block by block
+    kept_size = number_of_pairs if top_k is None else 0
+    kept_r = np.empty(kept_size)
+    kept_p = np.empty(kept_size)
+    kept_i = np.empty(kept_size, dtype=np.int64)
+    kept_j = np.empty(kept_size, dtype=np.int64)
+    histogram_counts = np.zeros(P_VALUE_HISTOGRAM_EDGES.size - 1, dtype=np.int64)
+    position = 0
+
+    for start_1 in range(0, number_of_columns, block_size):
+        z_block_1 = z[:, start_1:start_1 + block_size]
+        for start_2 in range(start_1, number_of_columns, block_size):
+            r_block = np.clip(z_block_1.T @ z[:, start_2:start_2 + block_size], -1.0, 1.0)
+
+            # only the pairs above the diagonal, so each pair is counted once
+            if start_1 == start_2:
+                i_block, j_block = np.triu_indices(r_block.shape[0], k=1)
+            else:
+                i_block, j_block = np.indices(r_block.shape).reshape(2, -1)
+            r_values = r_block[i_block, j_block]
+            p_values = _correlation_p_values(r_values, n)
+
+            if top_k is None:
+                block = slice(position, position + r_values.size)
+                kept_r[block], kept_p[block], kept_i[block], kept_j[block] = r_values, p_values, i_block + start_1, j_block + start_2
+                position += r_values.size
+                continue
+
+            p_valid = p_values[~np.isnan(p_values)]
+            histogram_counts += np.bincount(np.clip(np.searchsorted(P_VALUE_HISTOGRAM_EDGES, p_valid, side='right') - 1, 0, histogram_counts.size - 1), minlength=histogram_counts.size)
+
+            kept_r = np.concatenate([kept_r, r_values])
+            kept_p = np.concatenate([kept_p, p_values])
+            kept_i = np.concatenate([kept_i, i_block + start_1])
+            kept_j = np.concatenate([kept_j, j_block + start_2])
+
+            if kept_p.size > top_k:
+                # p-values are a decreasing function of |r|, so the strongest correlations are kept
+                best = np.argpartition(-np.abs(kept_r), top_k - 1)[:top_k]
+                kept_r, kept_p, kept_i, kept_j = kept_r[best], kept_p[best], kept_i[best], kept_j[best]
+
+    if top_k is None:
+        q_values = multiple_testing.adjust_p_values(kept_p, method='fdr_bh')
+    else:
+        q_values = np.full(kept_p.size, np.nan)
+        valid = ~np.isnan(kept_p)
+        q_values[valid] = _streaming_fdr_bh(kept_p[valid], int(histogram_counts.sum()), histogram_counts)
+
+    list_columns = dict_standardized['columns']
+    df_pairs = pd.DataFrame({
+        'Variable 1': [list_columns[i] for i in kept_i],
+        'Variable 2': [list_columns[j] for j in kept_j],
+        'Correlation': kept_r,
+        'p-value': kept_p,
+        'q-value': q_values,
+    })
+    if max_q_value is not None:
+        df_pairs = df_pairs[df_pairs['q-value'] <= max_q_value]
+    df_pairs = df_pairs.sort_values('p-value', kind='stable').reset_index(drop=True)
+
+    return df_pairs, dict_standardized
+
+
+def render_correlation_matrix_mode(df):
+    """
+    Renders the matrix mode, where all pairs of numeric columns are screened at once and the strongest
+    correlations are listed with their p-values and FDR-adjusted q-values.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+
+    Returns:
+    DataFrame: The table of pairs, or None if matrix mode is not switched on.
+    """
+    with st.expander("Click to screen all numeric columns at once (matrix mode)"):
+        list_numeric_columns = list(df.select_dtypes(include='number').columns)
+
+        if not st.checkbox("Switch on matrix mode", help="Calculates the correlation between every pair of the selected numeric columns."):
+            return None
+
+        list_selected_columns = st.multiselect("Columns to include", options=list_numeric_columns, default=list_numeric_columns)
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            method = st.radio("Correlation", options=['Pearson', "Spearman's Rho"], horizontal=True)
+        with col2:
+            top_k = st.number_input("Number of pairs to show", min_value=1, value=50, step=10)
+        with col3:
+            max_q_value = st.number_input("Maximum q-value (FDR)", min_value=0.0, max_value=1.0, value=1.0, step=0.01)
+
+        if len(list_selected_columns) < 2:
+            st.write("Select at least two numeric columns.")
+            return None
+
+        df_pairs, dict_standardized = correlation_matrix_pairs(
+            df,
+            list_selected_columns,
+            method='spearman' if method == "Spearman's Rho" else 'pearson',
+            top_k=int(top_k),
+            max_q_value=max_q_value if max_q_value < 1.0 else None
+        )
+
+        st.write(f"""Correlations were calculated on the {dict_standardized['n']} rows with no missing values in the selected columns.
+        
+The q-values are adjusted for all {len(dict_standardized['columns']) * (len(dict_standardized['columns']) - 1) // 2} pairs using the Benjamini-Hochberg false discovery rate procedure.""")
+        if dict_standardized['dropped_columns']:
+            st.write(f"Constant columns were excluded: {', '.join(map(str, dict_standardized['dropped_columns']))}")
+        performance_tracking.dataframe(df_pairs)
+
+    return df_pairs
+
+
 #-----------------------------------------------
 #Function to render all the above functions in the app:
 def render_assumption_checks_for_pearson_correlation(df):
     
     #render pearson correlation assumptions
     display_pearson_correlation_assumptions()
+
+    #optional screening of all numeric columns at once
+    render_correlation_matrix_mode(df)
     
     #user selects columns 1 and 2
     selected_column_1, selected_column_2 = select_two_columns_for_pearson_correlation_test(df)
@@ -0,0 +1,329 @@
+import functools
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import stats
+from scipy.integrate import trapezoid
+from scipy.interpolate import CubicSpline, RectBivariateSpline
+from scipy.special import log_ndtr
+
+from functions import performance_tracking
+from stats_test_functions import linear_model_helpers
+from stats_test_functions import multiple_testing
+from stats_test_functions import rank_cache
+from stats_test_functions import stats_tests
+
+#------------------------------------
+# <<< Cached studentized range distribution >>>
+#------------------------------------
+
+# scipy's studentized range survival function integrates numerically (around 10ms per value with finite degrees of
+# freedom), so beyond a few values it is tabulated once per number of groups, over q and the degrees of freedom,
+# and interpolated on log(p). The table evaluates the same double integral on fixed grids, all at once.
+STUDENTIZED_RANGE_DIRECT_MAX = 10
+_Q_GRID = np.concatenate([np.linspace(0.0, 8.0, 41), np.linspace(8.5, 20.0, 24), np.linspace(22.0, 40.0, 10)])
+_DF_GRID = (1.0, 1.25, 1.5, 1.75, 2.0, 2.5, 3.0, 3.5, 4.0, 5.0, 6.0, 7.0, 8.5, 10.0, 12.5, 15.0, 20.0, 25.0, 32.0,
+            40.0, 55.0, 70.0, 100.0, 150.0, 250.0, 400.0, 1000.0, np.inf)
+# quadrature grids: z for the range of k standard normals, w for the range, log(s) for s = sqrt(chi2(df) / df)
+_Z_GRID = np.linspace(-9.0, 9.0, 1801)
+_W_GRID = np.concatenate([np.linspace(0.0, 12.0, 241), np.linspace(12.5, 60.0, 96)])
+_LOG_S_GRID = np.linspace(-12.0, 3.0, 3001)
+
+
+def _studentized_range_union_bound(q, k, df):
+    """
+    Upper bound on the studentized range survival function from the k (k - 1) / 2 pairwise t-tests it contains,
+    which is tight in the far tail, where the numerical integration loses its accuracy.
+    """
+    return np.minimum(k * (k - 1) * stats.t.sf(q / np.sqrt(2), df), 1.0)
+
+
+def _studentized_range_sf_exact(q, k, df):
+    """
+    Studentized range survival function from scipy, with the union bound taking over below 1e-8.
+    """
+    p_values = stats.studentized_range.sf(q, k, df)
+    union_bound = _studentized_range_union_bound(q, k, df)
+    return np.where(union_bound < 1e-8, union_bound, np.maximum(p_values, 0.0))
+
+
+def _range_log_sf(w, k):
+    """
+    log(p) of the range of k standard normal values (the studentized range with infinite degrees of freedom):
+    p = k * integral of phi(z) Phi(z)^(k-1) [1 - (1 - Phi(z-w) / Phi(z))^(k-1)] dz, written so that small p keep their precision.
+    """
+    log_cdf = log_ndtr(_Z_GRID)
+    ratio = np.exp(log_ndtr(_Z_GRID[:, None] - w[None, :]) - log_cdf[:, None])
+    with np.errstate(divide='ignore'):
+        at_least_w = -np.expm1((k - 1) * np.log1p(-ratio))
+    weights = k * stats.norm.pdf(_Z_GRID) * np.exp((k - 1) * log_cdf)
+    return np.log(np.clip(trapezoid(weights[:, None] * at_least_w, _Z_GRID, axis=0), 1e-300, 1.0))
+
+
+@functools.lru_cache(maxsize=32)
+def _studentized_range_log_sf_table(k):
+    """
+    Tabulates log(p) of the studentized range distribution for k groups on _Q_GRID and _DF_GRID. With finite
+    degrees of freedom, p is the range's survival function at q * s averaged over the distribution of
+    s = sqrt(chi2(df) / df), which is integrated over log(s). The union bound takes over below 1e-8.
+
+    Args:
+    k (int): Number of groups.
+
+    Returns:
+    ndarray: log(p), one row per degrees of freedom value in _DF_GRID and one column per q in _Q_GRID.
+    """
+    range_log_sf = CubicSpline(_W_GRID, _range_log_sf(_W_GRID, k))
+    s = np.exp(_LOG_S_GRID)
+    table = np.empty((len(_DF_GRID), _Q_GRID.size))
+    for i, df in enumerate(_DF_GRID):
+        if np.isinf(df):
+            p_values = np.exp(range_log_sf(_Q_GRID))
+        else:
+            # density of log(s)
+            density = np.exp(stats.chi2.logpdf(df * s ** 2, df) + np.log(2 * df * s ** 2))
+            w = np.minimum(_Q_GRID[:, None] * s[None, :], _W_GRID[-1])
+            p_values = trapezoid(density[None, :] * np.exp(range_log_sf(w)), _LOG_S_GRID, axis=1)
+        union_bound = _studentized_range_union_bound(_Q_GRID, k, df)
+        table[i] = np.where(union_bound < 1e-8, union_bound, p_values)
+    return np.log(np.clip(table, 1e-300, 1.0))
+
+
+def studentized_range_sf(q, k, df):
+    """
+    Survival function (p-value) of the studentized range distribution, vectorized over q and df. A few values are
+    computed directly; more are interpolated (cubic, on log(p) over q and 1/df) from a table cached per number of
+    groups, so that Tukey HSD and Games-Howell share it whatever their degrees of freedom. Beyond the table, the
+    union bound is used.
+
+    Args:
+    q (array_like): The studentized range statistics.
+    k (int): Number of groups.
+    df (array_like): Degrees of freedom of the variance estimate(s), broadcast against q.
+
+    Returns:
+    ndarray: The p-values.
+    """
+    q, df = np.broadcast_arrays(np.asarray(q, dtype=float), np.asarray(df, dtype=float))
+    p_values = np.full(q.shape, np.nan)
+    valid = ~np.isnan(q) & ~np.isnan(df)
+    q_valid, df_valid = q[valid], np.maximum(df[valid], _DF_GRID[0])
+
+    if q_valid.size <= STUDENTIZED_RANGE_DIRECT_MAX:
+        p_values[valid] = _studentized_range_sf_exact(q_valid, k, df_valid)
+        return p_values
+
+    # interpolate over 1/df, which is 0 for infinite degrees of freedom and smooth in between
+    table = _studentized_range_log_sf_table(k)
+    inverse_df_grid = 1 / np.array(_DF_GRID)
+    spline = RectBivariateSpline(inverse_df_grid[::-1], _Q_GRID, table[::-1])
+    log_p = spline.ev(1 / df_valid, np.minimum(q_valid, _Q_GRID[-1]))
+
+    p_valid = np.minimum(np.exp(log_p), 1.0)
+    beyond_table = q_valid > _Q_GRID[-1]
+    p_valid[beyond_table] = _studentized_range_union_bound(q_valid[beyond_table], k, df_valid[beyond_table])
+    p_values[valid] = p_valid
+    return p_values
+
+#------------------------------------
+# <<< Pairwise comparisons from the cached group summaries >>>
+#------------------------------------
+
+def _pair_indices(number_of_groups):
+    """
+    Indices of the first and second group of every pair of groups (the upper triangle of the pairwise grid).
+    """
+    return np.triu_indices(number_of_groups, 1)
+
+
+def tukey_hsd(df, group_column, value_column):
+    """
+    Tukey's HSD (Tukey-Kramer for unequal group sizes) for every pair of groups, from the cached group counts,
+    means and pooled within-group variance.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    group_column (str): The column in df that denotes the group.
+    value_column (str): The column in df that contains the values.
+
+    Returns:
+    DataFrame: One row per pair of groups, with the means, their difference, its standard error, the q statistic, the degrees of freedom and the p-value.
+    """
+    dict_cells = linear_model_helpers.get_cell_statistics(df, value_column, (group_column,))
+    counts, means = dict_cells['counts'], dict_cells['means']
+    labels = np.asarray(dict_cells['labels'][0][dict_cells['cell_levels'][:, 0]], dtype=object)
+    k = counts.size
+    df_error = dict_cells['n'] - k
+    mean_square_error = dict_cells['within_ss'] / df_error
+
+    first, second = _pair_indices(k)
+    differences = means[first] - means[second]
+    standard_errors = np.sqrt(mean_square_error * (1 / counts[first] + 1 / counts[second]))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        q_values = np.sqrt(2) * np.abs(differences) / standard_errors
+
+    df_pairs = pd.DataFrame({
+        'A': labels[first],
+        'B': labels[second],
+        'mean A': means[first],
+        'mean B': means[second],
+        'diff': differences,
+        'se': standard_errors,
+        'statistic': q_values,
+        'df': float(df_error),
+        'p-adj': studentized_range_sf(q_values, k, df_error),
+    })
+    return df_pairs
+
+
+def games_howell(df, group_column, value_column):
+    """
+    Games-Howell test for every pair of groups, which does not assume equal variances: each pair uses its own
+    (Welch) standard error and degrees of freedom, from the cached group counts, means and variances.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    group_column (str): The column in df that denotes the group.
+    value_column (str): The column in df that contains the values.
+
+    Returns:
+    DataFrame: One row per pair of groups, with the means, their difference, its standard error, the q statistic, the degrees of freedom and the p-value.
+    """
+    dict_cells = linear_model_helpers.get_cell_statistics(df, value_column, (group_column,))
+    counts, means, variances = dict_cells['counts'], dict_cells['means'], dict_cells['variances']
+    labels = np.asarray(dict_cells['labels'][0][dict_cells['cell_levels'][:, 0]], dtype=object)
+    k = counts.size
+
+    first, second = _pair_indices(k)
+    variance_of_mean = variances / counts
+    differences = means[first] - means[second]
+    pair_variances = variance_of_mean[first] + variance_of_mean[second]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df_pairs_welch = pair_variances ** 2 / (variance_of_mean[first] ** 2 / (counts[first] - 1) + variance_of_mean[second] ** 2 / (counts[second] - 1))
+        q_values = np.sqrt(2) * np.abs(differences) / np.sqrt(pair_variances)
+
+    df_pairs = pd.DataFrame({
+        'A': labels[first],
+        'B': labels[second],
+        'mean A': means[first],
+        'mean B': means[second],
+        'diff': differences,
+        'se': np.sqrt(pair_variances),
+        'statistic': q_values,
+        'df': df_pairs_welch,
+        'p-adj': studentized_range_sf(q_values, k, df_pairs_welch),
+    })
+    return df_pairs
+
+
+def dunn_test(df, group_column, value_column, correction='holm'):
+    """
+    Dunn's test for every pair of groups, comparing mean ranks with a tie-corrected z statistic, from the cached
+    rank sums (the same ranks as the Kruskal-Wallis test).
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    group_column (str): The column in df that denotes the group.
+    value_column (str): The column in df that contains the values.
+    correction (str, optional): Multiple testing correction passed to multiple_testing.adjust_p_values. Defaults to 'holm'.
+
+    Returns:
+    DataFrame: One row per pair of groups, with the mean ranks, their difference, its standard error, the z statistic and the adjusted p-value.
+    """
+    dict_rank_data = rank_cache.get_rank_data(df, value_column, group_column)
+    n = dict_rank_data['n']
+    present = dict_rank_data['group_sizes'] > 0
+    counts = dict_rank_data['group_sizes'][present]
+    mean_ranks = dict_rank_data['rank_sums'][present] / counts
+    labels = np.asarray(dict_rank_data['group_labels'], dtype=object)[present]
+
+    first, second = _pair_indices(counts.size)
+    rank_variance = n * (n + 1) / 12 - dict_rank_data['tie_term'] / (12 * (n - 1))
+    differences = mean_ranks[first] - mean_ranks[second]
+    standard_errors = np.sqrt(rank_variance * (1 / counts[first] + 1 / counts[second]))
+    z_values = np.abs(differences) / standard_errors
+
+    df_pairs = pd.DataFrame({
+        'A': labels[first],
+        'B': labels[second],
+        'mean rank A': mean_ranks[first],
+        'mean rank B': mean_ranks[second],
+        'diff': differences,
+        'se': standard_errors,
+        'statistic': z_values,
+        'p-adj': multiple_testing.adjust_p_values(2 * stats.norm.sf(z_values), method=correction),
+    })
+    return df_pairs
+
+
+dict_posthoc_tests = {
+    'Tukey HSD': tukey_hsd,
+    'Games-Howell': games_howell,
+    "Dunn's test": dunn_test,
+}
+
+
+def filter_pairwise_results(df_pairs, alpha=None, top_k=None):
+    """
+    Sorts the pairwise results by adjusted p-value (then by the size of the statistic), and keeps the pairs with an
+    adjusted p-value of at most alpha and/or the top_k pairs.
+
+    Args:
+    df_pairs (DataFrame): Output of one of the pairwise tests.
+    alpha (float, optional): Keep only pairs with p-adj <= alpha. Defaults to None (keep all).
+    top_k (int, optional): Keep only the first top_k pairs. Defaults to None (keep all).
+
+    Returns:
+    DataFrame: The filtered, sorted pairs.
+    """
+    if alpha is not None:
+        df_pairs = df_pairs[df_pairs['p-adj'] <= alpha]
+    order = np.lexsort((-df_pairs['statistic'].to_numpy(), df_pairs['p-adj'].to_numpy()))
+    if top_k is not None:
+        order = order[:top_k]
+    return df_pairs.iloc[order]
+
+#------------------------------------
+# <<< Function to display the post-hoc comparisons >>>
+#------------------------------------
+
+def display_posthoc_comparisons(df, group_column, value_column, list_methods):
+    """
+    Renders the omnibus test result and the pairwise post-hoc comparisons, with the method, the significance filter
+    and the number of pairs shown chosen by the user.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    group_column (str): The column in df that denotes the group.
+    value_column (str): The column in df that contains the values.
+    list_methods (list): The post-hoc methods to offer (keys of dict_posthoc_tests).
+    """
+    with st.expander("Post-hoc Pairwise Comparisons"):
+        if "Dunn's test" in list_methods:
+            h_stat, p_value, _ = stats_tests.kruskal_wallis(df, group_column, value_column)
+            st.write(f"Kruskal-Wallis H = {h_stat:.4f}, p-value = {p_value:.4f}")
+        else:
+            dict_cells = linear_model_helpers.get_cell_statistics(df, value_column, (group_column,))
+            k = dict_cells['counts'].size
+            ss_between = np.sum(dict_cells['counts'] * (dict_cells['means'] - dict_cells['grand_mean']) ** 2)
+            f_stat = (ss_between / (k - 1)) / (dict_cells['within_ss'] / (dict_cells['n'] - k))
+            p_value = stats.f.sf(f_stat, k - 1, dict_cells['n'] - k)
+            st.write(f"One-way ANOVA F = {f_stat:.4f}, p-value = {p_value:.4f}")
+
+        if p_value > 0.05:
+            st.write("The overall test is not significant (p > 0.05), so the pairwise comparisons should be interpreted with caution.")
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            method = st.selectbox("Select the post-hoc test", options=list_methods)
+        with col2:
+            only_significant = st.checkbox("Only show pairs with adjusted p ≤ 0.05", value=False)
+        with col3:
+            top_k = st.number_input("Number of pairs to show", min_value=1, value=100, step=10)
+
+        df_pairs = dict_posthoc_tests[method](df, group_column, value_column)
+        df_shown = filter_pairwise_results(df_pairs, alpha=0.05 if only_significant else None, top_k=int(top_k))
+
+        st.write(f"{int(np.sum(df_pairs['p-adj'] <= 0.05))} of {len(df_pairs)} pairs differ significantly (adjusted p ≤ 0.05).")
+        performance_tracking.dataframe(df_shown, hide_index=True)
@@ -0,0 +1,646 @@
+import numpy as np
+import pandas as pd
+import altair as alt
+import streamlit as st
+from scipy import special, stats
+
+from functions import performance_tracking
+from stats_test_functions import batch_normality
+from stats_test_functions import friedman_test
+
+#------------------------------------
+# <<< Analytic power functions >>>
+#------------------------------------
+#every function takes the effect size, sample size and alpha as arrays that broadcast against each other,
+#so a whole grid of effect size x sample size x alpha is evaluated in one call. All tests are two-sided.
+
+def z_test_power(effect_size, sample_size, alpha, number_of_groups=1):
+    """
+    Power of the one sample, paired or independent samples z-test.
+
+    Args:
+    effect_size (array_like): Cohen's d (for paired samples, d of the differences).
+    sample_size (array_like): Number of observations (or pairs) per group.
+    alpha (array_like): Significance level.
+    number_of_groups (int, optional): 1 for one sample or paired samples, 2 for independent samples. Defaults to 1.
+
+    Returns:
+    ndarray: The power, broadcast over the inputs.
+    """
+    noncentrality = np.asarray(effect_size) * np.sqrt(np.asarray(sample_size) / number_of_groups)
+    critical_value = stats.norm.isf(np.asarray(alpha) / 2)
+    return stats.norm.sf(critical_value - noncentrality) + stats.norm.cdf(-critical_value - noncentrality)
+
+
+def t_test_power(effect_size, sample_size, alpha, number_of_groups=1):
+    """
+    Power of the one sample, paired or independent samples t-test, from the noncentral t distribution.
+
+    Args:
+    effect_size (array_like): Cohen's d (for paired samples, d of the differences).
+    sample_size (array_like): Number of observations (or pairs) per group.
+    alpha (array_like): Significance level.
+    number_of_groups (int, optional): 1 for one sample or paired samples, 2 for independent samples (equal sizes). Defaults to 1.
+
+    Returns:
+    ndarray: The power, broadcast over the inputs.
+    """
+    sample_size = np.asarray(sample_size, dtype=float)
+    degrees_of_freedom = number_of_groups * (sample_size - 1)
+    noncentrality = np.asarray(effect_size) * np.sqrt(sample_size / number_of_groups)
+    critical_value = stats.t.isf(np.asarray(alpha) / 2, degrees_of_freedom)
+    return stats.nct.sf(critical_value, degrees_of_freedom, noncentrality) + stats.nct.cdf(-critical_value, degrees_of_freedom, noncentrality)
+
+
+def _noncentral_f_sf(x, dfn, dfd, noncentrality):
+    """
+    Survival function of the noncentral F distribution, using the central F where the noncentrality is 0
+    (scipy's ncf.sf is wrong at exactly 0).
+    """
+    return np.where(np.asarray(noncentrality) > 0, stats.ncf.sf(x, dfn, dfd, noncentrality), stats.f.sf(x, dfn, dfd))
+
+
+def anova_power(effect_size, sample_size, alpha, number_of_groups=3, effect_df=None, number_of_covariates=0):
+    """
+    Power of the F-test of a one-way ANOVA, ANCOVA or one effect of a factorial ANOVA, from the noncentral F
+    distribution with noncentrality f^2 N, where N is the total sample size.
+
+    Args:
+    effect_size (array_like): Cohen's f.
+    sample_size (array_like): Number of observations per group (per cell for a factorial ANOVA).
+    alpha (array_like): Significance level.
+    number_of_groups (int, optional): Number of groups (cells). Defaults to 3.
+    effect_df (int, optional): Numerator degrees of freedom of the effect tested. Defaults to number_of_groups - 1.
+    number_of_covariates (int, optional): Number of covariates (ANCOVA). Defaults to 0.
+
+    Returns:
+    ndarray: The power, broadcast over the inputs.
+    """
+    effect_df = number_of_groups - 1 if effect_df is None else effect_df
+    total_sample_size = number_of_groups * np.asarray(sample_size, dtype=float)
+    error_df = total_sample_size - number_of_groups - number_of_covariates
+    noncentrality = np.asarray(effect_size) ** 2 * total_sample_size
+    with np.errstate(invalid='ignore'):
+        critical_value = stats.f.isf(alpha, effect_df, error_df)
+        return np.where(error_df > 0, _noncentral_f_sf(critical_value, effect_df, error_df, noncentrality), np.nan)
+
+
+def repeated_measures_anova_power(effect_size, sample_size, alpha, number_of_conditions=3, correlation=0.5, epsilon=1.0):
+    """
+    Power of the within-subjects F-test of a one-way repeated measures ANOVA. Correlated measurements
+    inflate the noncentrality to f^2 n k / (1 - rho), and a sphericity correction epsilon shrinks both the
+    noncentrality and the degrees of freedom.
+
+    Args:
+    effect_size (array_like): Cohen's f of the condition means.
+    sample_size (array_like): Number of subjects.
+    alpha (array_like): Significance level.
+    number_of_conditions (int, optional): Number of conditions (k). Defaults to 3.
+    correlation (float, optional): Average correlation between the repeated measurements (rho). Defaults to 0.5.
+    epsilon (float, optional): Sphericity correction, 1 when sphericity holds. Defaults to 1.
+
+    Returns:
+    ndarray: The power, broadcast over the inputs.
+    """
+    sample_size = np.asarray(sample_size, dtype=float)
+    effect_df = (number_of_conditions - 1) * epsilon
+    error_df = (sample_size - 1) * effect_df
+    noncentrality = np.asarray(effect_size) ** 2 * sample_size * number_of_conditions / (1 - correlation) * epsilon
+    critical_value = stats.f.isf(alpha, effect_df, error_df)
+    return _noncentral_f_sf(critical_value, effect_df, error_df, noncentrality)
+
+
+def chi_square_power(effect_size, sample_size, alpha, df=1):
+    """
+    Power of a chi-square (or G) test, from the noncentral chi-square distribution with noncentrality w^2 N.
+
+    Args:
+    effect_size (array_like): Cohen's w.
+    sample_size (array_like): Total number of observations.
+    alpha (array_like): Significance level.
+    df (int, optional): Degrees of freedom of the test. Defaults to 1.
+
+    Returns:
+    ndarray: The power, broadcast over the inputs.
+    """
+    noncentrality = np.asarray(effect_size) ** 2 * np.asarray(sample_size, dtype=float)
+    critical_value = stats.chi2.isf(alpha, df)
+    return stats.ncx2.sf(critical_value, df, noncentrality)
+
+
+#variance of the Fisher z-transformed coefficient is scale / (n - offset) (Fieller, Hartley and Pearson, 1957)
+dict_correlation_variances = {
+    'pearson': (1.0, 3),
+    'spearman': (1.06, 3),
+    'kendall': (0.437, 4),
+}
+
+
+def correlation_power(effect_size, sample_size, alpha, method='pearson', number_of_covariates=0):
+    """
+    Power of the test of a (partial) correlation coefficient, from the normal approximation to its
+    Fisher z-transform.
+
+    Args:
+    effect_size (array_like): The population correlation (Pearson's r, Spearman's rho or Kendall's tau).
+    sample_size (array_like): Number of observations.
+    alpha (array_like): Significance level.
+    method (str, optional): 'pearson', 'spearman' or 'kendall'. Defaults to 'pearson'.
+    number_of_covariates (int, optional): Number of variables controlled for (partial correlation). Defaults to 0.
+
+    Returns:
+    ndarray: The power, broadcast over the inputs, NaN where the sample is too small.
+    """
+    scale, offset = dict_correlation_variances[method]
+    residual_size = np.asarray(sample_size, dtype=float) - offset - number_of_covariates
+    with np.errstate(invalid='ignore', divide='ignore'):
+        noncentrality = np.arctanh(np.asarray(effect_size)) * np.sqrt(residual_size / scale)
+    power = z_test_power(noncentrality, 1, alpha)
+    return np.where(residual_size > 0, power, np.nan)
+
+#----------------------------
+#exact tests: power is summed over every possible outcome, one sample size at a time
+
+def _two_sided_exact_p_values(pmf):
+    """
+    Two-sided p-values of every outcome of a discrete distribution: the total probability of the outcomes
+    no more likely than it (the same rule as scipy's binomtest and fisher_exact). Uses one sort.
+    """
+    sorted_pmf = np.sort(pmf)
+    cumulative = np.cumsum(sorted_pmf)
+    index = np.searchsorted(sorted_pmf, pmf * (1 + 1e-7), side='right')
+    return np.minimum(cumulative[index - 1], 1.0)
+
+
+def _power_from_p_values(p_values, probabilities, alpha):
+    """
+    Probability of rejecting at each alpha, given the p-value and probability of every outcome.
+    """
+    order = np.argsort(p_values, kind='stable')
+    cumulative = np.concatenate([[0.0], np.cumsum(probabilities[order])])
+    return cumulative[np.searchsorted(p_values[order], alpha, side='right')]
+
+
+def _exact_power(effect_size, sample_size, alpha, outcome_p_values, power_for_effect):
+    """
+    Evaluates an exact power function over broadcast grids, computing the p-values of the outcomes once per
+    sample size and the power once per (sample size, effect size) for all the alphas at once.
+    """
+    effect_size, sample_size, alpha = np.broadcast_arrays(np.asarray(effect_size, dtype=float), np.asarray(sample_size), np.asarray(alpha, dtype=float))
+    power = np.full(effect_size.shape, np.nan)
+    for n in np.unique(sample_size):
+        n_mask = sample_size == n
+        p_values = outcome_p_values(int(n))
+        for effect in np.unique(effect_size[n_mask]):
+            mask = n_mask & (effect_size == effect)
+            power[mask] = power_for_effect(p_values, int(n), effect, alpha[mask])
+    return power
+
+
+def _shifted_proportion(proportion, effect_size):
+    """
+    The proportion that is Cohen's h away from the given proportion.
+    """
+    angle = np.clip(np.arcsin(np.sqrt(proportion)) + np.asarray(effect_size) / 2, 0, np.pi / 2)
+    return np.sin(angle) ** 2
+
+
+def binomial_test_power(effect_size, sample_size, alpha, null_proportion=0.5):
+    """
+    Exact power of the two-sided exact binomial test, summing the probability of every count whose p-value
+    is at most alpha.
+
+    Args:
+    effect_size (array_like): Cohen's h between the true and the null proportion.
+    sample_size (array_like): Number of observations.
+    alpha (array_like): Significance level.
+    null_proportion (float, optional): The proportion under the null hypothesis. Defaults to 0.5.
+
+    Returns:
+    ndarray: The power, broadcast over the inputs.
+    """
+    def outcome_p_values(n):
+        return _two_sided_exact_p_values(stats.binom.pmf(np.arange(n + 1), n, null_proportion))
+
+    def power_for_effect(p_values, n, effect, alpha):
+        probabilities = stats.binom.pmf(np.arange(n + 1), n, _shifted_proportion(null_proportion, effect))
+        return _power_from_p_values(p_values, probabilities, alpha)
+
+    return _exact_power(effect_size, sample_size, alpha, outcome_p_values, power_for_effect)
+
+
+def fishers_exact_p_value_table(n):
+    """
+    Two-sided Fisher's exact p-values of every 2x2 table with two groups of n observations. The tables sharing a
+    column total follow one hypergeometric distribution, so all (n + 1)^2 p-values come from one sort.
+
+    Args:
+    n (int): Number of observations per group.
+
+    Returns:
+    ndarray: Flat array of p-values, where index a * (n + 1) + c is the table with a successes in group 1 and c in group 2.
+    """
+    # hypergeometric probability of a successes in group 1 and c in group 2, given the a + c successes in total
+    successes = np.arange(n + 1)
+    log_choose = special.gammaln(n + 1) - special.gammaln(successes + 1) - special.gammaln(n - successes + 1)
+    totals = np.arange(2 * n + 1)
+    log_choose_total = special.gammaln(2 * n + 1) - special.gammaln(totals + 1) - special.gammaln(2 * n - totals + 1)
+    total = (successes[:, None] + successes[None, :]).ravel()
+    pmf = np.exp((log_choose[:, None] + log_choose[None, :]).ravel() - log_choose_total[total])
+
+    # sort by (total, pmf) with one key, so each table's p-value is a cumulative sum within its total
+    key = 2.0 * total + pmf
+    order = np.argsort(key, kind='stable')
+    cumulative = np.concatenate([[0.0], np.cumsum(pmf[order])])
+    group_start = np.searchsorted(key[order], 2.0 * totals, side='left')
+    index = np.searchsorted(key[order], 2.0 * total + pmf * (1 + 1e-7), side='right')
+    return np.minimum(cumulative[index] - cumulative[group_start[total]], 1.0)
+
+
+def fishers_exact_test_power(effect_size, sample_size, alpha, baseline_proportion=0.5, max_exact_sample_size=500):
+    """
+    Exact power of the two-sided Fisher's exact test with two groups of equal size, summing the probability of
+    every 2x2 table whose p-value is at most alpha (from fishers_exact_p_value_table). Beyond max_exact_sample_size per group (where there are too many
+    tables to enumerate) the normal approximation for Cohen's h is used, which is slightly optimistic.
+
+    Args:
+    effect_size (array_like): Cohen's h between the two groups' proportions.
+    sample_size (array_like): Number of observations per group.
+    alpha (array_like): Significance level.
+    baseline_proportion (float, optional): The proportion in the first group. Defaults to 0.5.
+    max_exact_sample_size (int, optional): Largest group size enumerated exactly. Defaults to 500.
+
+    Returns:
+    ndarray: The power, broadcast over the inputs.
+    """
+    def outcome_p_values(n):
+        return fishers_exact_p_value_table(n) if n <= max_exact_sample_size else None
+
+    def power_for_effect(p_values, n, effect, alpha):
+        if p_values is None:
+            return z_test_power(effect, n, alpha, number_of_groups=2)
+        successes = np.arange(n + 1)
+        probabilities = np.outer(stats.binom.pmf(successes, n, baseline_proportion),
+                                 stats.binom.pmf(successes, n, _shifted_proportion(baseline_proportion, effect)))
+        return _power_from_p_values(p_values, probabilities.ravel(), alpha)
+
+    return _exact_power(effect_size, sample_size, alpha, outcome_p_values, power_for_effect)
+
+#------------------------------------
+# <<< Simulated power for the rank-based tests >>>
+#------------------------------------
+#the rank tests have no closed-form power, so each kernel draws a batch of simulated datasets as one array
+#(simulations x observations), ranks every row at once and returns one p-value per simulated dataset.
+#The data are continuous (no ties), so the normal / chi-square approximations of the tests are used.
+
+def _rank_rows(values):
+    """
+    Ranks the values within each row (1 = smallest) of continuous data with no ties.
+    """
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, np.argsort(values, axis=-1), np.arange(1, values.shape[-1] + 1, dtype=float), axis=-1)
+    return ranks
+
+
+def _simulate_mann_whitney_u_test(rng, effect_size, sample_size, number_of_simulations):
+    values = rng.standard_normal((number_of_simulations, 2 * sample_size))
+    values[:, sample_size:] += effect_size
+    rank_sum = _rank_rows(values)[:, :sample_size].sum(axis=1)
+    u_statistic = rank_sum - sample_size * (sample_size + 1) / 2
+    z = (u_statistic - sample_size ** 2 / 2) / np.sqrt(sample_size ** 2 * (2 * sample_size + 1) / 12)
+    return 2 * stats.norm.sf(np.abs(z))
+
+
+def _simulate_wilcoxon_signed_rank_test(rng, effect_size, sample_size, number_of_simulations):
+    differences = rng.standard_normal((number_of_simulations, sample_size)) + effect_size
+    positive_rank_sum = np.sum(_rank_rows(np.abs(differences)) * (differences > 0), axis=1)
+    mean = sample_size * (sample_size + 1) / 4
+    standard_deviation = np.sqrt(sample_size * (sample_size + 1) * (2 * sample_size + 1) / 24)
+    return 2 * stats.norm.sf(np.abs(positive_rank_sum - mean) / standard_deviation)
+
+
+def _condition_means(effect_size, number_of_groups):
+    """
+    Equally spaced group means whose standard deviation is Cohen's f.
+    """
+    spacing = np.arange(number_of_groups) - (number_of_groups - 1) / 2
+    return effect_size * spacing / spacing.std() if number_of_groups > 1 else np.zeros(1)
+
+
+def _simulate_kruskal_wallis(rng, effect_size, sample_size, number_of_simulations, number_of_groups=3):
+    values = rng.standard_normal((number_of_simulations, number_of_groups, sample_size))
+    values += _condition_means(effect_size, number_of_groups)[:, None]
+    total = number_of_groups * sample_size
+    rank_sums = _rank_rows(values.reshape(number_of_simulations, total)).reshape(values.shape).sum(axis=2)
+    h_statistic = 12 / (total * (total + 1)) * np.sum(rank_sums ** 2, axis=1) / sample_size - 3 * (total + 1)
+    return stats.chi2.sf(h_statistic, number_of_groups - 1)
+
+
+def _simulate_friedman_test(rng, effect_size, sample_size, number_of_simulations, number_of_conditions=3, correlation=0.5):
+    # subject effects do not change the ranks within a subject, so only the within-subject part is drawn
+    values = np.sqrt(1 - correlation) * rng.standard_normal((number_of_simulations * sample_size, number_of_conditions))
+    values += _condition_means(effect_size, number_of_conditions)
+    ranks, _ = friedman_test.rank_within_rows(values)
+    rank_sums = ranks.reshape(number_of_simulations, sample_size, number_of_conditions).sum(axis=1)
+    k = number_of_conditions
+    q_statistic = 12 / (sample_size * k * (k + 1)) * np.sum(rank_sums ** 2, axis=1) - 3 * sample_size * (k + 1)
+    return stats.chi2.sf(q_statistic, k - 1)
+
+
+dict_simulation_kernels = {
+    'mann_whitney_u_test': _simulate_mann_whitney_u_test,
+    'wilcoxon_signed_rank_test': _simulate_wilcoxon_signed_rank_test,
+    'kruskal_wallis': _simulate_kruskal_wallis,
+    'friedman_test': _simulate_friedman_test,
+}
+
+
+def _simulate_p_values(kernel_name, effect_size, sample_size, number_of_simulations, seed_sequence, tuple_params=(), max_cells_per_batch=2_000_000):
+    """
+    Runs in a worker process: simulates the p-values of one (effect size, sample size) grid point, drawing the
+    simulated datasets in batches so no array holds more than max_cells_per_batch values.
+    """
+    kernel = dict_simulation_kernels[kernel_name]
+    dict_params = dict(tuple_params)
+    rng = np.random.default_rng(seed_sequence)
+    cells_per_simulation = sample_size * max(dict_params.get('number_of_groups', 2), dict_params.get('number_of_conditions', 1))
+    batch_size = max(1, max_cells_per_batch // cells_per_simulation)
+
+    list_p_values = []
+    for start in range(0, number_of_simulations, batch_size):
+        list_p_values.append(kernel(rng, effect_size, sample_size, min(batch_size, number_of_simulations - start), **dict_params))
+    return np.concatenate(list_p_values)
+
+
+def simulated_power(kernel_name, effect_sizes, sample_sizes, alphas, tuple_params=(), number_of_simulations=2000,
+                    random_seed=42, min_points_for_pool=4):
+    """
+    Estimates power by simulation for every (effect size, sample size) pair, sending the grid points to the
+    shared process pool when there are enough of them. Each grid point draws from its own stream spawned from
+    one SeedSequence, so the results are reproducible whatever the number of workers. The simulated p-values
+    are compared with every alpha at once.
+
+    Args:
+    kernel_name (str): Key of dict_simulation_kernels.
+    effect_sizes (array_like): The effect sizes.
+    sample_sizes (array_like): The sample sizes (integers).
+    alphas (array_like): The significance levels.
+    tuple_params (tuple, optional): (name, value) pairs passed to the kernel. Defaults to ().
+    number_of_simulations (int, optional): Simulated datasets per grid point. Defaults to 2000.
+    random_seed (int, optional): Seed of the SeedSequence. Defaults to 42.
+    min_points_for_pool (int, optional): Smallest grid that is sent to the process pool. Defaults to 4.
+
+    Returns:
+    ndarray: The estimated power, of shape (effect sizes, sample sizes, alphas).
+    """
+    effect_sizes = np.atleast_1d(np.asarray(effect_sizes, dtype=float))
+    sample_sizes = np.atleast_1d(np.asarray(sample_sizes, dtype=int))
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=float))
+
+    list_points = [(float(e), int(n)) for e in effect_sizes for n in sample_sizes]
+    list_seeds = np.random.SeedSequence(random_seed).spawn(len(list_points))
+    list_args = [(kernel_name, e, n, number_of_simulations, seed, tuple_params) for (e, n), seed in zip(list_points, list_seeds)]
+
+    if len(list_points) >= min_points_for_pool:
+        pool = batch_normality.get_process_pool()
+        list_futures = [pool.submit(_simulate_p_values, *args) for args in list_args]
+        list_p_values = [future.result() for future in list_futures]
+    else:
+        list_p_values = [_simulate_p_values(*args) for args in list_args]
+
+    power = np.array([np.mean(p_values[:, None] <= alphas, axis=0) for p_values in list_p_values])
+    return power.reshape(effect_sizes.size, sample_sizes.size, alphas.size)
+
+#------------------------------------
+# <<< Power models of the built tests >>>
+#------------------------------------
+#each test maps to a power function, the effect size it is expressed in (with Cohen's small / medium / large
+#benchmarks), what the sample size counts and any design parameters the user can set
+
+dict_effect_sizes = {
+    "Cohen's d": (0.2, 0.5, 0.8),
+    "Cohen's f": (0.1, 0.25, 0.4),
+    "Cohen's w": (0.1, 0.3, 0.5),
+    "Cohen's h": (0.2, 0.5, 0.8),
+    "Correlation": (0.1, 0.3, 0.5),
+}
+
+dict_power_models = {
+    'Chi-square goodness of fit': {'function': chi_square_power, 'effect_size': "Cohen's w", 'sample_size': 'observations in total', 'params': {'df': 2}},
+    'Chi-square test of independence': {'function': chi_square_power, 'effect_size': "Cohen's w", 'sample_size': 'observations in total', 'params': {'df': 1}},
+    'Exact test of Goodness of Fit (multinomial model)': {'function': chi_square_power, 'effect_size': "Cohen's w", 'sample_size': 'observations in total', 'params': {'df': 2}},
+    'Exact test of Goodness of Fit': {'function': binomial_test_power, 'effect_size': "Cohen's h", 'sample_size': 'observations', 'params': {'null_proportion': 0.5}},
+    'Factorial ANOVA': {'function': anova_power, 'effect_size': "Cohen's f", 'sample_size': 'observations per cell', 'params': {'number_of_groups': 4, 'effect_df': 1}},
+    'Fischers Exact test': {'function': fishers_exact_test_power, 'effect_size': "Cohen's h", 'sample_size': 'observations per group', 'params': {'baseline_proportion': 0.5}},
+    'Friedman test': {'kernel': 'friedman_test', 'effect_size': "Cohen's f", 'sample_size': 'subjects', 'params': {'number_of_conditions': 3, 'correlation': 0.5}},
+    'G-test of Goodness of Fit': {'function': chi_square_power, 'effect_size': "Cohen's w", 'sample_size': 'observations in total', 'params': {'df': 2}},
+    'Independent samples T-test': {'function': t_test_power, 'effect_size': "Cohen's d", 'sample_size': 'observations per group', 'params': {'number_of_groups': 2}},
+    'Independent samples Z-test': {'function': z_test_power, 'effect_size': "Cohen's d", 'sample_size': 'observations per group', 'params': {'number_of_groups': 2}},
+    "Kendall's Tau": {'function': correlation_power, 'effect_size': 'Correlation', 'sample_size': 'observations', 'params': {'method': 'kendall'}},
+    'Kruskal-Wallis': {'kernel': 'kruskal_wallis', 'effect_size': "Cohen's f", 'sample_size': 'observations per group', 'params': {'number_of_groups': 3}},
+    'Log-linear analysis': {'function': chi_square_power, 'effect_size': "Cohen's w", 'sample_size': 'observations in total', 'params': {'df': 4}},
+    'Mann-Whitney U Test': {'kernel': 'mann_whitney_u_test', 'effect_size': "Cohen's d", 'sample_size': 'observations per group', 'params': {}},
+    'McNemars test': {'function': chi_square_power, 'effect_size': "Cohen's w", 'sample_size': 'pairs', 'params': {'df': 1}},
+    'One-way ANCOVA': {'function': anova_power, 'effect_size': "Cohen's f", 'sample_size': 'observations per group', 'params': {'number_of_groups': 3, 'number_of_covariates': 1}},
+    'One-way ANOVA': {'function': anova_power, 'effect_size': "Cohen's f", 'sample_size': 'observations per group', 'params': {'number_of_groups': 3}},
+    'One-way Repeated Measures ANOVA': {'function': repeated_measures_anova_power, 'effect_size': "Cohen's f", 'sample_size': 'subjects', 'params': {'number_of_conditions': 3, 'correlation': 0.5, 'epsilon': 1.0}},
+    'Paired samples T-test': {'function': t_test_power, 'effect_size': "Cohen's d", 'sample_size': 'pairs', 'params': {}},
+    'Paired samples Z-test': {'function': z_test_power, 'effect_size': "Cohen's d", 'sample_size': 'pairs', 'params': {}},
+    'Partial correlation': {'function': correlation_power, 'effect_size': 'Correlation', 'sample_size': 'observations', 'params': {'method': 'pearson', 'number_of_covariates': 1}},
+    'Pearson correlation': {'function': correlation_power, 'effect_size': 'Correlation', 'sample_size': 'observations', 'params': {'method': 'pearson'}},
+    'Single sample T-test': {'function': t_test_power, 'effect_size': "Cohen's d", 'sample_size': 'observations', 'params': {}},
+    'Single sample wilcoxon signed-rank test': {'kernel': 'wilcoxon_signed_rank_test', 'effect_size': "Cohen's d", 'sample_size': 'observations', 'params': {}},
+    'Single sample Z-test': {'function': z_test_power, 'effect_size': "Cohen's d", 'sample_size': 'observations', 'params': {}},
+    'Wilcoxon signed-rank test': {'kernel': 'wilcoxon_signed_rank_test', 'effect_size': "Cohen's d", 'sample_size': 'pairs', 'params': {}},
+}
+
+dict_param_labels = {
+    'df': 'Degrees of freedom of the test',
+    'null_proportion': 'Proportion under the null hypothesis',
+    'baseline_proportion': 'Proportion in the first group',
+    'number_of_groups': 'Number of groups (cells)',
+    'effect_df': 'Degrees of freedom of the effect tested',
+    'number_of_covariates': 'Number of covariates',
+    'number_of_conditions': 'Number of conditions',
+    'correlation': 'Correlation between repeated measurements',
+    'epsilon': 'Sphericity correction (epsilon)',
+}
+
+#------------------------------------
+# <<< Cached power curves and sample size calculator >>>
+#------------------------------------
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=64))
+def get_power_curve(test_name, effect_sizes, sample_sizes, alphas, tuple_params=(), number_of_simulations=2000, random_seed=42):
+    """
+    Computes the power of a test over a grid of effect sizes x sample sizes x alphas, once per (test, grid,
+    parameters). Analytic tests are evaluated with one broadcast call; rank-based tests are simulated.
+    The returned array should not be modified.
+
+    Args:
+    test_name (str): A key of dict_power_models.
+    effect_sizes (tuple): The effect sizes.
+    sample_sizes (tuple): The sample sizes (integers).
+    alphas (tuple): The significance levels.
+    tuple_params (tuple, optional): (name, value) pairs overriding the test's default parameters. Defaults to ().
+    number_of_simulations (int, optional): Simulated datasets per grid point (simulated tests only). Defaults to 2000.
+    random_seed (int, optional): Seed of the simulation (simulated tests only). Defaults to 42.
+
+    Returns:
+    ndarray: The power, of shape (effect sizes, sample sizes, alphas).
+
+    Example:
+    >>> get_power_curve('Independent samples T-test', (0.2, 0.5), (20, 50, 100), (0.05,))
+    """
+    dict_model = dict_power_models[test_name]
+    dict_params = {**dict_model['params'], **dict(tuple_params)}
+
+    if 'kernel' in dict_model:
+        power = simulated_power(dict_model['kernel'], effect_sizes, sample_sizes, alphas, tuple(sorted(dict_params.items())),
+                                number_of_simulations=number_of_simulations, random_seed=random_seed)
+    else:
+        power = dict_model['function'](
+            np.asarray(effect_sizes, dtype=float)[:, None, None],
+            np.asarray(sample_sizes)[None, :, None],
+            np.asarray(alphas, dtype=float)[None, None, :],
+            **dict_params
+        )
+        power = np.broadcast_to(power, (len(effect_sizes), len(sample_sizes), len(alphas))).copy()
+
+    power.flags.writeable = False
+    return power
+
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=256))
+def required_sample_size(test_name, effect_size, alpha=0.05, power=0.8, tuple_params=(), max_sample_size=1_000_000, number_of_simulations=2000):
+    """
+    Finds the smallest sample size giving at least the target power, once per (test, effect size, alpha, power,
+    parameters). The sample size is doubled until the target is reached, and the last doubling is then searched
+    with vectorized calls. Simulated tests search at most 5000 and only 8 sizes of the last doubling, so their
+    answer is approximate.
+
+    Args:
+    test_name (str): A key of dict_power_models.
+    effect_size (float): The effect size.
+    alpha (float, optional): Significance level. Defaults to 0.05.
+    power (float, optional): Target power. Defaults to 0.8.
+    tuple_params (tuple, optional): (name, value) pairs overriding the test's default parameters. Defaults to ().
+    max_sample_size (int, optional): Largest sample size searched. Defaults to 1000000.
+    number_of_simulations (int, optional): Simulated datasets per sample size (simulated tests only). Defaults to 2000.
+
+    Returns:
+    int or None: The required sample size, or None if the target power is not reached by max_sample_size.
+    """
+    dict_model = dict_power_models[test_name]
+    dict_params = {**dict_model['params'], **dict(tuple_params)}
+
+    if 'kernel' in dict_model:
+        max_sample_size = min(max_sample_size, 5000)
+
+        def power_at(sample_sizes):
+            return simulated_power(dict_model['kernel'], (effect_size,), sample_sizes, (alpha,), tuple(sorted(dict_params.items())),
+                                   number_of_simulations=number_of_simulations)[0, :, 0]
+    else:
+        def power_at(sample_sizes):
+            return np.nan_to_num(dict_model['function'](effect_size, np.asarray(sample_sizes), alpha, **dict_params), nan=0.0)
+
+    lower, upper = 2, 4
+    while power_at([upper])[0] < power:
+        if upper >= max_sample_size:
+            return None
+        lower, upper = upper, min(2 * upper, max_sample_size)
+
+    if 'kernel' in dict_model:
+        candidates = np.unique(np.linspace(lower + 1, upper, 8).astype(int))
+        return int(candidates[np.flatnonzero(power_at(candidates) >= power)[0]])
+
+    # power is not monotonic in n for the exact tests, so the last doubling is scanned on a grid of at most
+    # 64 sizes, and the sizes just before the first one reaching the target are then checked one by one
+    candidates = np.arange(lower + 1, upper + 1)
+    stride = max(1, candidates.size // 64)
+    first = np.flatnonzero(power_at(candidates[stride - 1::stride]) >= power)[0] * stride + stride - 1
+    window = candidates[max(0, first - stride + 1):first + 1]
+    return int(window[np.flatnonzero(power_at(window) >= power)[0]])
+
+#------------------------------------
+# <<< Planning page >>>
+#------------------------------------
+
+def render_power_analysis(list_test_names, key='power_analysis'):
+    """
+    Renders the sample size planner: the user picks a test, effect size, alpha, target power and any design
+    parameters, and sees the required sample size and the power curves for small, medium and large effects.
+
+    Args:
+    list_test_names (list): The tests to offer; tests without a power model are left out.
+    key (str, optional): Prefix for the widget keys, so the planner can be rendered in more than one place. Defaults to 'power_analysis'.
+
+    Returns:
+    int or None: The required sample size, or None if it could not be found.
+    """
+    list_test_names = [test_name for test_name in list_test_names if test_name in dict_power_models]
+    if len(list_test_names) == 0:
+        st.write('A power analysis is not available for this test yet.')
+        return None
+
+    test_name = st.selectbox('Select the test to plan for', options=list_test_names, key=f'{key}_test')
+    dict_model = dict_power_models[test_name]
+    effect_size_label = dict_model['effect_size']
+    small, medium, large = dict_effect_sizes[effect_size_label]
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        effect_size = st.number_input(
+            f"Expected effect size ({effect_size_label})",
+            min_value=0.01, max_value=0.99 if effect_size_label == 'Correlation' else 5.0, value=medium, step=0.05, key=f'{key}_{test_name}_effect',
+            help=f"Conventional benchmarks: small = {small}, medium = {medium}, large = {large}. Base it on a pilot study or the smallest effect that would matter in practice."
+        )
+    with col2:
+        alpha = st.selectbox('Significance level (alpha)', options=[0.01, 0.05, 0.1], index=1, key=f'{key}_alpha')
+    with col3:
+        power = st.slider('Target power', min_value=0.5, max_value=0.99, value=0.8, step=0.01, key=f'{key}_power',
+                          help='The probability of detecting the effect if it is real. 0.8 is a common choice.')
+
+    dict_params = {}
+    if len(dict_model['params']) > 0:
+        list_columns = st.columns(len(dict_model['params']))
+        for column, (param, default) in zip(list_columns, dict_model['params'].items()):
+            with column:
+                if isinstance(default, str):
+                    dict_params[param] = default
+                elif isinstance(default, float):
+                    dict_params[param] = st.number_input(dict_param_labels[param], value=default, min_value=0.0, max_value=0.99 if param != 'epsilon' else 1.0, step=0.05, key=f'{key}_{test_name}_{param}')
+                else:
+                    dict_params[param] = int(st.number_input(dict_param_labels[param], value=default, min_value=1, step=1, key=f'{key}_{test_name}_{param}'))
+    tuple_params = tuple(sorted(dict_params.items()))
+
+    if 'kernel' in dict_model:
+        st.write(':grey[This test has no closed-form power, so it is estimated by simulation (2,000 simulated datasets per sample size).]')
+
+    with st.spinner('Calculating power...'):
+        sample_size = required_sample_size(test_name, effect_size, alpha, power, tuple_params)
+
+    if sample_size is None:
+        st.write(":red[The target power is not reached within the sample sizes searched. Consider a larger effect size, a higher alpha or a lower target power.]")
+        return None
+    st.write(f"To detect an effect of {effect_size_label} = **{effect_size}** with **{power:.0%}** power at alpha = **{alpha}**, you need at least :green[**{sample_size:,}**] {dict_model['sample_size']}.")
+
+    #power curves for the benchmark effect sizes and the expected one, up to twice the required sample size
+    sample_sizes = tuple(np.unique(np.linspace(2, max(2 * sample_size, 20), 40).astype(int)).tolist())
+    effect_sizes = tuple(sorted({small, medium, large, effect_size}))
+    curve = get_power_curve(test_name, effect_sizes, sample_sizes, (alpha,), tuple_params)[:, :, 0]
+
+    df_curves = pd.DataFrame({
+        'Sample size': np.tile(sample_sizes, len(effect_sizes)),
+        'Power': curve.ravel(),
+        'Effect size': np.repeat([f'{effect_size_label} = {e}' for e in effect_sizes], len(sample_sizes)),
+    })
+    lines = alt.Chart(df_curves).mark_line().encode(
+        x=alt.X('Sample size:Q', title=f"Sample size ({dict_model['sample_size']})"),
+        y=alt.Y('Power:Q', scale=alt.Scale(domain=[0, 1])),
+        color='Effect size:N'
+    )
+    target = alt.Chart(pd.DataFrame({'Power': [power]})).mark_rule(strokeDash=[4, 4], color='grey').encode(y='Power:Q')
+    performance_tracking.altair_chart(lines + target, use_container_width=True)
+
+    return sample_size
@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from functions import performance_tracking
+
+#------------------------------------
+# <<< Function to rank values with average ranks for ties >>>
+#------------------------------------
+
+def rank_with_ties(values):
+    """
+    Ranks the values (1 = smallest) using a single O(n log n) sort, giving tied values the
+    average of the ranks they span, and computes the tie-correction term used by the
+    rank-based tests.
+
+    Args:
+    values (array_like): The values to rank. Should not contain NaN.
+
+    Returns:
+    tuple: Array of average ranks (same order as the input) and the tie term sum(t^3 - t) over groups of tied values.
+
+    Example:
+    >>> rank_with_ties([3, 1, 3, 2])
+    """
+    values = np.asarray(values, dtype=float)
+    n = values.size
+
+    order = np.argsort(values, kind='stable')
+    sorted_values = values[order]
+
+    # runs of equal values in the sorted array are the groups of ties
+    is_run_start = np.r_[True, sorted_values[1:] != sorted_values[:-1]]
+    run_starts = np.flatnonzero(is_run_start)
+    run_lengths = np.diff(np.r_[run_starts, n])
+    run_average_ranks = run_starts + (run_lengths + 1) / 2
+
+    ranks = np.empty(n)
+    ranks[order] = np.repeat(run_average_ranks, run_lengths)
+
+    run_lengths = run_lengths.astype(float)
+    tie_term = float(np.sum(run_lengths ** 3 - run_lengths))
+
+    return ranks, tie_term
+
+#------------------------------------
+# <<< Cached ranks for a column (optionally split by group) >>>
+#------------------------------------
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=64))
+def get_rank_data(df, value_column, group_column=None):
+    """
+    Returns the ranks of a value column, computed once per (dataset, value column, group column)
+    and shared by every rank-based test and assumption check (Kruskal-Wallis, Mann-Whitney U,
+    Spearman's Rho, Kendall's Tau, ...). Rows with a missing value (or missing group label) are
+    excluded before ranking. The returned arrays are read-only as they are shared across reruns.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    value_column (str): The column in df that contains the values to rank.
+    group_column (str, optional): The column in df that denotes the group. Defaults to None.
+
+    Returns:
+    dict: 'ranks', 'tie_term', 'n' and 'row_mask' (rows of df that were ranked). When a group column is given,
+          also 'group_labels', 'group_codes', 'group_sizes' and 'rank_sums' (sum of ranks in each group).
+    """
+    values = df[value_column].to_numpy(dtype=float)
+    row_mask = ~np.isnan(values)
+
+    if group_column is not None:
+        group_codes, group_labels = pd.factorize(df[group_column], sort=False)
+        row_mask &= group_codes >= 0
+
+    ranks, tie_term = rank_with_ties(values[row_mask])
+
+    dict_rank_data = {
+        'ranks': ranks,
+        'tie_term': tie_term,
+        'n': int(ranks.size),
+        'row_mask': row_mask,
+    }
+
+    if group_column is not None:
+        group_codes = group_codes[row_mask]
+        dict_rank_data['group_labels'] = list(group_labels)
+        dict_rank_data['group_codes'] = group_codes
+        dict_rank_data['group_sizes'] = np.bincount(group_codes, minlength=len(group_labels))
+        dict_rank_data['rank_sums'] = np.bincount(group_codes, weights=ranks, minlength=len(group_labels))
+
+    for value in dict_rank_data.values():
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+
+    return dict_rank_data
+
+#------------------------------------
+# <<< Cached signed ranks for paired or one-sample data >>>
+#------------------------------------
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=64))
+def get_signed_rank_data(df, column_1, column_2=None, hypothesized_median=0):
+    """
+    Returns the signed-rank summary used by the Wilcoxon signed-rank test, computed once per
+    (dataset, column pair, hypothesized median). The differences are column_1 - column_2 for paired
+    data, or column_1 - hypothesized_median for one sample. Rows with a missing value are excluded,
+    and zero differences are dropped before ranking the absolute differences.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    column_1 (str): The first column (or the only column for a one-sample test).
+    column_2 (str, optional): The second column of paired data. Defaults to None (one-sample test).
+    hypothesized_median (float, optional): The median the one-sample differences are taken from. Defaults to 0.
+
+    Returns:
+    dict: 'n' (non-zero differences), 'n_zeros', 't_plus' and 't_minus' (sums of ranks of the positive and
+          negative differences), 'tie_term' and 'differences' (the non-zero differences).
+    """
+    values_1 = df[column_1].to_numpy(dtype=float)
+    if column_2 is not None:
+        differences = values_1 - df[column_2].to_numpy(dtype=float)
+    else:
+        differences = values_1 - hypothesized_median
+    differences = differences[~np.isnan(differences)]
+
+    is_non_zero = differences != 0
+    n_zeros = int(differences.size - np.count_nonzero(is_non_zero))
+    differences = differences[is_non_zero]
+
+    ranks, tie_term = rank_with_ties(np.abs(differences))
+    t_plus = float(ranks[differences > 0].sum())
+
+    differences.flags.writeable = False
+
+    dict_signed_rank_data = {
+        'n': int(differences.size),
+        'n_zeros': n_zeros,
+        't_plus': t_plus,
+        't_minus': float(ranks.sum()) - t_plus,
+        'tie_term': tie_term,
+        'differences': differences,
+    }
+    return dict_signed_rank_data
+
+#------------------------------------
+# <<< Function to count inversions (discordant pairs) >>>
+#------------------------------------
+
+def count_inversions(codes):
+    """
+    Counts the pairs i < j with codes[i] > codes[j]. This replaces the merge-sort step of Knight's algorithm
+    for Kendall's Tau with a most-significant-bit-first radix pass: pairs are counted at the first bit where
+    they differ, and each pass stably partitions every block by that bit using cumulative sums. This takes
+    O(n log m) time for m distinct codes, so ordinal data with a handful of levels needs only a few passes.
+
+    Args:
+    codes (array_like): Non-negative integer codes (e.g. dense ranks).
+
+    Returns:
+    int: The number of inversions.
+
+    Example:
+    >>> count_inversions([2, 0, 1])
+    """
+    sequence = np.array(codes, dtype=np.int64)
+    n = sequence.size
+    if n < 2:
+        return 0
+
+    positions = np.arange(n)
+    # start position of the block each element currently sits in (elements sharing the same leading bits)
+    block_starts = np.zeros(n, dtype=np.int64)
+    inversions = 0
+
+    for bit_position in reversed(range(int(sequence.max()).bit_length())):
+        bits = (sequence >> bit_position) & 1
+
+        # ones strictly before each element, within its block
+        ones_before = np.cumsum(bits) - bits
+        ones_before_in_block = ones_before - ones_before[block_starts]
+
+        # every 1 that comes before a 0 in the same block is an inversion at this bit
+        inversions += int(ones_before_in_block[bits == 0].sum())
+
+        # stable partition of each block: zeros first, then ones
+        block_ids = np.cumsum(block_starts == positions) - 1
+        zeros_in_block = np.bincount(block_ids, weights=1 - bits).astype(np.int64)[block_ids]
+        zeros_before_in_block = positions - block_starts - ones_before_in_block
+        new_block_starts = np.where(bits == 0, block_starts, block_starts + zeros_in_block)
+        new_positions = np.where(bits == 0, block_starts + zeros_before_in_block, new_block_starts + ones_before_in_block)
+
+        sequence[new_positions] = sequence.copy()
+        block_starts[new_positions] = new_block_starts
+
+    return inversions
+
+#------------------------------------
+# <<< Cached ranks for many columns at once >>>
+#------------------------------------
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=8))
+def get_rank_matrix(df, columns):
+    """
+    Ranks each of the given columns over the rows that are complete for all of them, computed once per
+    (dataset, set of columns). Used by the Spearman correlation matrix, where the dataset is hashed once
+    for all columns rather than once per column.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    columns (tuple): The numeric columns to rank.
+
+    Returns:
+    ndarray: Read-only array of shape (complete rows, number of columns) holding the average ranks of each column.
+    """
+    values = df[list(columns)].to_numpy(dtype=float)
+    values = values[~np.isnan(values).any(axis=1)]
+
+    ranks = np.empty(values.shape)
+    for column_index in range(values.shape[1]):
+        ranks[:, column_index], _ = rank_with_ties(values[:, column_index])
+
+    ranks.flags.writeable = False
+    return ranks
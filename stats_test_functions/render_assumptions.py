@@ -8,13 +8,22 @@ from stats_test_functions import paired_t_test
 from stats_test_functions import independent_t_test
 from stats_test_functions import repeated_measures_anova_v1
 from stats_test_functions import anova_test
+from stats_test_functions import factorial_anova
 from stats_test_functions import one_sample_t_test
+from stats_test_functions import one_way_ancova
 from stats_test_functions import pearson_correlation
+from stats_test_functions import partial_correlation
 from stats_test_functions import chi_square_goodness_of_fit as chi_gof
+from stats_test_functions import goodness_of_fit as gof
 from stats_test_functions import chi_square_test_of_independence as chi_toi
 from stats_test_functions import fishers_exact_test as fishers_et
+from stats_test_functions import friedman_test as ft
 from stats_test_functions import mcnemars_test as mcnt
 from stats_test_functions import kruskal_wallis_test as kwt
+from stats_test_functions import log_linear_analysis as lla
+from stats_test_functions import mann_whitney_u_test as mwut
+from stats_test_functions import wilcoxon_signed_rank_test as wsrt
+from stats_test_functions import kendalls_tau_test as ktt
 from stats_test_functions import independent_samples_z_test as izt
 from stats_test_functions import one_sample_z_test as ozt
 from stats_test_functions import paired_z_test as pzt
@@ -48,19 +57,22 @@ def render_assumptions_for_selected_test(selected_recommended_test, df):
         st.write(placeholder_text)
     
     elif selected_recommended_test == 'Exact test of Goodness of Fit (multinomial model)': 
-        st.write(placeholder_text)
+        test_assumptions_met = gof.render_exact_test_of_goodness_of_fit_checks(df, multinomial=True)
     
     elif selected_recommended_test == 'Exact test of Goodness of Fit': 
-        st.write(placeholder_text)
+        test_assumptions_met = gof.render_exact_test_of_goodness_of_fit_checks(df)
     
     elif selected_recommended_test == 'Factorial ANOVA': 
-        st.write(placeholder_text)
+        test_assumptions_met = factorial_anova.render_assumption_checks_for_factorial_anova(df)
     
     elif selected_recommended_test == 'Fischers Exact test': 
         test_assumptions_met = fishers_et.render_assumption_checks_for_fishers_exact_test(df)
     
+    elif selected_recommended_test == 'Friedman test': 
+        test_assumptions_met = ft.render_assumption_checks_for_friedman_test(df)
+    
     elif selected_recommended_test == 'G-test of Goodness of Fit': 
-        st.write(placeholder_text)
+        test_assumptions_met = gof.render_g_test_of_goodness_of_fit_checks(df)
     
     elif selected_recommended_test == 'G-test': 
         st.write(placeholder_text)
@@ -72,16 +84,16 @@ def render_assumptions_for_selected_test(selected_recommended_test, df):
         test_assumptions_met = izt.render_assumption_checks_for_independent_z_test(df)
     
     elif selected_recommended_test == "Kendall's Tau": 
-        st.write(placeholder_text)
+        test_assumptions_met = ktt.render_assumption_checks_for_kendalls_tau(df)
     
     elif selected_recommended_test == 'Kruskal-Wallis': 
         test_assumptions_met = kwt.render_assumption_checks_for_kruskal_wallis_test(df)
     
     elif selected_recommended_test == 'Log-linear analysis': 
-        st.write(placeholder_text)
+        test_assumptions_met = lla.render_assumption_checks_for_log_linear_analysis(df)
     
     elif selected_recommended_test == 'Mann-Whitney U Test': 
-        st.write(placeholder_text)
+        test_assumptions_met = mwut.render_assumption_checks_for_mann_whitney_u_test(df)
     
     elif selected_recommended_test == 'McNemars test': 
         test_assumptions_met = mcnt.render_assumption_checks_for_mcnemars_test(df)
@@ -90,12 +102,15 @@ def render_assumptions_for_selected_test(selected_recommended_test, df):
         st.write(placeholder_text)
     
     elif selected_recommended_test == 'One-way ANCOVA': 
-        st.write(placeholder_text)
+        test_assumptions_met = one_way_ancova.render_assumption_checks_for_one_way_ancova(df)
     
     elif selected_recommended_test == 'One-way ANOVA': 
         group_column, value_column = anova_test.select_columns_for_anova_test(df)
         test_assumptions_met = anova_test.render_anova_checks(df, group_column, value_column)
     
+    elif selected_recommended_test == 'One-way Repeated Measures ANOVA': 
+        test_assumptions_met = repeated_measures_anova_v1.render_assumption_checks_for_repeated_measures_anova(df)
+    
     elif selected_recommended_test == 'Paired samples T-test': 
         test_assumptions_met = paired_t_test.render_assumption_checks_for_paired_t_test(df)
     
@@ -103,7 +118,7 @@ def render_assumptions_for_selected_test(selected_recommended_test, df):
         test_assumptions_met = pzt.render_assumption_checks_for_paired_z_test(df)
     
     elif selected_recommended_test == 'Partial correlation': 
-        st.write(placeholder_text)
+        test_assumptions_met = partial_correlation.render_assumption_checks_for_partial_correlation(df)
     
     elif selected_recommended_test == 'Pearson correlation': 
         test_assumptions_met = pearson_correlation.render_assumption_checks_for_pearson_correlation(df)
@@ -119,7 +134,7 @@ def render_assumptions_for_selected_test(selected_recommended_test, df):
         test_assumptions_met = one_sample_t_test.render_one_sample_t_test_checks(df, selected_column[0])
         
     elif selected_recommended_test == 'Single sample wilcoxon signed-rank test': 
-        st.write(placeholder_text)
+        test_assumptions_met = wsrt.render_assumption_checks_for_single_sample_wilcoxon_test(df)
     
     elif selected_recommended_test == 'Single sample Z-test': 
         test_assumptions_met = ozt.render_assumption_checks_for_independent_z_test(df)
@@ -131,7 +146,7 @@ def render_assumptions_for_selected_test(selected_recommended_test, df):
         st.write(placeholder_text)
     
     elif selected_recommended_test == 'Wilcoxon signed-rank test': 
-        st.write(placeholder_text)
+        test_assumptions_met = wsrt.render_assumption_checks_for_wilcoxon_signed_rank_test(df)
 
     return test_assumptions_met #need to update all assumptions functions to return a bool if the assumptions are met
 
@@ -150,6 +165,7 @@ def get_alternative_test(test_name):
     'Exact test of Goodness of Fit': placeholder_text,
     'Factorial ANOVA': placeholder_text,
     'Fischers Exact test': 'Chi-square test of independence',
+    'Friedman test': placeholder_text,
     'G-test of Goodness of Fit': placeholder_text,
     'G-test': placeholder_text,
     'Independent samples T-test': placeholder_text,
@@ -162,6 +178,7 @@ def get_alternative_test(test_name):
     'One-proportion z-test': placeholder_text,
     'One-way ANCOVA': placeholder_text,
     'One-way ANOVA': placeholder_text,
+    'One-way Repeated Measures ANOVA': 'Friedman test',
     'Paired samples T-test': 'Wilcoxon signed-rank test',
     'Paired samples Z-test': 'Please see error message above.',
     'Partial correlation': placeholder_text,
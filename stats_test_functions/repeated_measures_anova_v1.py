@@ -1,6 +1,10 @@
 import streamlit as st
 import pandas as pd
-import pingouin as pg
+import numpy as np
+from scipy import stats
+
+from functions import performance_tracking
+from stats_test_functions import subject_condition_matrix as scm
 
 # Import other necessary tools or references for user interactions
 # from utils import user_inputs  # Assuming some utilities for user interactions
@@ -18,7 +22,7 @@ def repeated_measures_anova_assumptions():
 
     with st.expander("Click for this test's assumptions"):
         for key, value in dict_assumptions_rm_anova.items():
-            st.write(f":red[**{key}**:]\n{value}")    
+            st.write(f":red[**{key}**:]\n{value}")
 
 #------------------------------------
 # <<< Function to select columns >>>
@@ -68,19 +72,287 @@ def select_columns_for_wide_format_anova(df):
     # selections = select_columns_for_wide_format_anova(df)
     # print(selections)
 
+#------------------------------------
+# <<< Condition means and covariance from one pass over the subjects >>>
+#------------------------------------
+
+def condition_moments(list_blocks, sample_size=5000, random_seed=42):
+    """
+    Accumulates the condition means and the condition covariance matrix over blocks of subjects (rows), so the
+    subject x condition matrix never has to be copied or centred in full. Sums are taken about the means of the
+    first block, which keeps the cross-products accurate for large values. Subjects with a missing value in any
+    condition are excluded (complete cases). A seeded random sample of the complete subjects is kept for the
+    residual normality check.
+
+    Args:
+    list_blocks (iterable): Blocks of the subject x condition matrix, each an ndarray with one column per condition.
+    sample_size (int, optional): Number of complete subjects to keep for the residual check. Defaults to 5000.
+    random_seed (int, optional): Seed for the subject sample. Defaults to 42.
+
+    Returns:
+    dict: 'n' (number of complete subjects), 'means' (condition means), 'covariance' (condition covariance
+          matrix) and 'sample' (the sampled complete subjects, one row per subject).
+    """
+    rng = np.random.default_rng(random_seed)
+    n = 0
+    shift = None
+    sums = cross_products = sample = None
+    sample_keys = np.empty(0)
+
+    for block in list_blocks:
+        block = block[~np.isnan(block).any(axis=1)]
+        if block.shape[0] == 0:
+            continue
+        if shift is None:
+            shift = block.mean(axis=0)
+            sums = np.zeros(block.shape[1])
+            cross_products = np.zeros((block.shape[1], block.shape[1]))
+            sample = np.empty((0, block.shape[1]))
+
+        centred = block - shift
+        n += block.shape[0]
+        sums += centred.sum(axis=0)
+        cross_products += centred.T @ centred
+
+        # keep the subjects with the smallest random keys, which is a uniform sample of all the blocks so far
+        keys = np.concatenate([sample_keys, rng.random(block.shape[0])])
+        rows = np.vstack([sample, block])
+        keep = np.argsort(keys)[:sample_size]
+        sample_keys, sample = keys[keep], rows[keep]
+
+    if n < 2:
+        raise ValueError("At least two subjects with a value in every selected condition are required.")
+
+    dict_moments = {
+        'n': n,
+        'means': shift + sums / n,
+        'covariance': (cross_products - np.outer(sums, sums) / n) / (n - 1),
+        'sample': sample,
+    }
+    for value in dict_moments.values():
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+    return dict_moments
+
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=16))
+def get_condition_moments(df, condition_columns, block_size=100000):
+    """
+    Cached condition_moments for wide-format data, one column per condition, read block_size rows at a time.
+    The returned arrays should not be modified.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    condition_columns (tuple): The columns holding the conditions (repeated measures).
+    block_size (int, optional): Number of rows per block. Defaults to 100000.
+
+    Returns:
+    dict: See condition_moments.
+    """
+    return condition_moments(scm.wide_format_blocks(df, condition_columns, block_size))
+
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=16))
+def get_condition_moments_from_long_format(df, subject_column, condition_column, value_column, missing_value_policy):
+    """
+    Cached condition_moments for long-format data, read from the cached subject x condition matrix with the
+    missing cell policy applied block by block. The returned arrays should not be modified.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    subject_column (str): The column identifying the subject.
+    condition_column (str): The column identifying the condition (time point).
+    value_column (str): The column containing the numerical values.
+    missing_value_policy (str): One of subject_condition_matrix.list_missing_value_policies.
+
+    Returns:
+    dict: See condition_moments.
+    """
+    dict_matrix = scm.get_subject_condition_matrix(df, subject_column, condition_column, value_column)
+    return condition_moments(scm.matrix_blocks(dict_matrix['matrix'], missing_value_policy))
+
+
+def select_repeated_measures_data(df):
+    """
+    Renders the choice of data format (wide, or long with one row per subject and condition) and the column
+    selections for it, and returns the cached condition moments of the selected data.
+
+    Args:
+    df (DataFrame): The dataframe from which columns will be selected.
+
+    Returns:
+    tuple: The condition moments (see condition_moments) and the list of condition labels, or (None, None) if the selection is incomplete.
+
+    Raises:
+    ValueError: If fewer than two subjects have a value in every condition.
+    """
+    data_format = st.radio(
+        "What format is your data in?",
+        options=['Wide (one column per condition)', 'Long (subject, condition and value columns)'],
+        horizontal=True
+    )
+
+    if data_format.startswith('Wide'):
+        col_labels_containing_measurements = select_columns_for_wide_format_anova(df)
+        if len(col_labels_containing_measurements) < 2:
+            return None, None
+        return get_condition_moments(df, tuple(col_labels_containing_measurements)), col_labels_containing_measurements
+
+    subject_column, condition_column, value_column, missing_value_policy = scm.select_long_format_columns(df)
+    if subject_column is None:
+        return None, None
+
+    dict_matrix = scm.get_subject_condition_matrix(df, subject_column, condition_column, value_column)
+    if len(dict_matrix['conditions']) < 2:
+        return None, None
+    st.write(f"{len(dict_matrix['subjects'])} subjects and {len(dict_matrix['conditions'])} conditions, with {dict_matrix['number_of_missing_cells']} missing subject/condition cells.")
+    if dict_matrix['number_of_repeated_cells'] > 0:
+        st.warning(f"{dict_matrix['number_of_repeated_cells']} subject/condition cells have more than one value; their mean is used.")
+
+    dict_moments = get_condition_moments_from_long_format(df, subject_column, condition_column, value_column, missing_value_policy)
+    return dict_moments, [str(condition) for condition in dict_matrix['conditions']]
+
+#------------------------------------
+# <<< Repeated measures ANOVA, Mauchly's test and epsilons from the condition covariance >>>
+#------------------------------------
+
+def orthonormal_contrasts(number_of_conditions):
+    """
+    Orthonormal (normalised Helmert) contrasts: each column sums to zero, the columns are orthogonal and of unit
+    length, so C^T S C is the covariance of the contrasts for any condition covariance S.
+
+    Args:
+    number_of_conditions (int): Number of conditions.
+
+    Returns:
+    ndarray: The (number_of_conditions, number_of_conditions - 1) contrast matrix.
+    """
+    contrasts = np.zeros((number_of_conditions, number_of_conditions - 1))
+    for j in range(1, number_of_conditions):
+        contrasts[:j, j - 1] = 1
+        contrasts[j, j - 1] = -j
+        contrasts[:, j - 1] /= np.sqrt(j * (j + 1))
+    return contrasts
+
+
+def repeated_measures_anova(dict_moments, condition_columns):
+    """
+    One-way repeated measures ANOVA with Mauchly's test of sphericity and the Greenhouse-Geisser and Huynh-Feldt
+    corrections, all derived from the condition means and covariance matrix (see condition_moments):
+    the condition SS is n times the squared deviations of the condition means, and the error (subject x condition)
+    SS is (n - 1) times the trace of the contrast covariance C^T S C, whose eigenvalues also give Mauchly's W
+    and the epsilons.
+
+    Args:
+    dict_moments (dict): Output of condition_moments.
+    condition_columns (list): The condition column names, in the order of the moments.
+
+    Returns:
+    dict: 'df_anova' (the ANOVA table), 'df_means' (condition means and standard deviations),
+          'sphericity' (dict with 'W', 'chi2', 'dof' and 'p-value'), 'eps_gg' and 'eps_hf'.
+    """
+    n = dict_moments['n']
+    means = dict_moments['means']
+    covariance = dict_moments['covariance']
+    k = len(means)
+    dof = k - 1
+
+    contrasts = orthonormal_contrasts(k)
+    eigenvalues = np.clip(np.linalg.eigvalsh(contrasts.T @ covariance @ contrasts), 0.0, None)
+    trace = eigenvalues.sum()
+
+    ss_conditions = n * np.sum((means - means.mean()) ** 2)
+    ss_error = (n - 1) * trace
+    ss_subjects = (n - 1) * covariance.sum() / k
+    df_error = dof * (n - 1)
+    f_value = (ss_conditions / dof) / (ss_error / df_error) if ss_error > 0 else np.inf
+
+    # sphericity always holds with two conditions (a single contrast)
+    if dof == 1:
+        eps_gg = eps_hf = 1.0
+        dict_sphericity = {'W': 1.0, 'chi2': 0.0, 'dof': 0, 'p-value': 1.0}
+    else:
+        eps_gg = trace ** 2 / (dof * np.sum(eigenvalues ** 2)) if trace > 0 else 1.0
+        eps_hf = min((n * dof * eps_gg - 2) / (dof * (n - 1 - dof * eps_gg)), 1.0) if n - 1 > dof * eps_gg else 1.0
+
+        # log W, so the determinant does not underflow with many conditions; W is 0 with fewer subjects than contrasts
+        log_w = np.sum(np.log(eigenvalues)) - dof * np.log(trace / dof) if eigenvalues.min() > 0 else -np.inf
+        correction = 1 - (2 * dof ** 2 + dof + 2) / (6 * dof * (n - 1))
+        mauchly_dof = dof * (dof + 1) / 2 - 1
+        chi2 = -(n - 1) * correction * log_w
+
+        # second-order term of the chi-square approximation, as in R's mauchly.test
+        w2 = (dof + 2) * (dof - 1) * (dof - 2) * (2 * dof ** 3 + 6 * dof ** 2 + 3 * dof + 2) / (288 * ((n - 1) * dof * correction) ** 2)
+        p1 = stats.chi2.sf(chi2, mauchly_dof)
+        p2 = stats.chi2.sf(chi2, mauchly_dof + 4)
+        dict_sphericity = {
+            'W': float(np.exp(log_w)),
+            'chi2': float(chi2),
+            'dof': int(mauchly_dof),
+            'p-value': float(p1 + w2 * (p2 - p1)) if np.isfinite(chi2) and n > k else np.nan,
+        }
+
+    df_anova = pd.DataFrame({
+        'Source': ['Condition', 'Error'],
+        'SS': [ss_conditions, ss_error],
+        'DF': [dof, df_error],
+        'MS': [ss_conditions / dof, ss_error / df_error],
+        'F': [f_value, np.nan],
+        'p-unc': [stats.f.sf(f_value, dof, df_error), np.nan],
+        'p-GG-corr': [stats.f.sf(f_value, dof * eps_gg, df_error * eps_gg), np.nan],
+        'p-HF-corr': [stats.f.sf(f_value, dof * eps_hf, df_error * eps_hf), np.nan],
+        'np2': [ss_conditions / (ss_conditions + ss_error), np.nan],
+        'ng2': [ss_conditions / (ss_conditions + ss_subjects + ss_error), np.nan],
+    })
+
+    df_means = pd.DataFrame({
+        'Mean': means,
+        'SD': np.sqrt(np.diag(covariance)),
+    }, index=pd.Index(condition_columns, name='Condition'))
+
+    dict_rm_anova = {
+        'df_anova': df_anova,
+        'df_means': df_means,
+        'sphericity': dict_sphericity,
+        'eps_gg': float(eps_gg),
+        'eps_hf': float(eps_hf),
+    }
+    return dict_rm_anova
+
+
+def sample_residuals(dict_moments, sample_size=5000, random_seed=42):
+    """
+    Model residuals (value - subject mean - condition mean + grand mean) of the sampled subjects, with a seeded
+    random sample of at most sample_size of them kept, as the Shapiro-Wilk test is not accurate beyond 5000 values.
+
+    Args:
+    dict_moments (dict): Output of condition_moments.
+    sample_size (int, optional): Maximum number of residuals returned. Defaults to 5000.
+    random_seed (int, optional): Seed for the sample. Defaults to 42.
+
+    Returns:
+    ndarray: The sampled residuals.
+    """
+    sample = dict_moments['sample']
+    means = dict_moments['means']
+    residuals = (sample - sample.mean(axis=1, keepdims=True) - means + means.mean()).ravel()
+    if residuals.size > sample_size:
+        rng = np.random.default_rng(random_seed)
+        residuals = residuals[rng.choice(residuals.size, size=sample_size, replace=False)]
+    return residuals
 
 #------------------------------------
 # <<< Function to check sphericity assumption >>>
 #------------------------------------
 
-def check_sphericity(df_wide):
+@performance_tracking.timed
+def check_sphericity(dict_rm_anova):
     """
-    Performs the sphericity test using Pingouin on the wide-format data.
-    
+    Displays Mauchly's test of sphericity and the Greenhouse-Geisser and Huynh-Feldt epsilons.
+
     Args:
-    df_wide (DataFrame): DataFrame in wide format where each column represents a different condition 
-                         and each row represents a subject.
-                         
+    dict_rm_anova (dict): Output of repeated_measures_anova.
+
     Returns:
     bool: True if sphericity is assumed (p > 0.05), False otherwise.
     """
@@ -89,7 +361,7 @@ def check_sphericity(df_wide):
         st.write("""
         **Sphericity** is an assumption underlying certain statistical tests, including Repeated Measures ANOVA. It requires that the variances of the differences between all combinations of related group (condition) means are equal. This assumption is crucial because violations can inflate Type I error rates, leading to incorrect conclusions about the effects being tested.
         """)
-    
+
     # Guidance on how to interpret the results from the sphericity test
     with st.expander("How to Interpret Sphericity Test Results"):
         st.write("""
@@ -98,43 +370,45 @@ def check_sphericity(df_wide):
         - **P-value ≤ 0.05**: This indicates a violation of the sphericity assumption. Corrections like Greenhouse-Geisser or Huynh-Feldt should be considered to adjust the degrees of freedom for the F-tests, which can help control Type I error rates.
         """)
 
-    try:
-        # Calculate the sphericity test
-        spher, W, chisq, dof, p_value = pg.sphericity(df_wide)
-        
-        # Display results in Streamlit
-        with st.expander("Sphericity Test Results"):
-            st.write(f"Sphericity test result (Mauchly's W): {W:.4f}, Chi-square: {chisq:.4f}, Degrees of freedom: {dof}, P-value: {p_value:.4f}")
-            if p_value > 0.05:
-                st.write("Sphericity is assumed (p > 0.05). No corrections needed.")
-                return True
-            else:
-                st.write("Sphericity is not assumed (p ≤ 0.05). Consider using corrections such as Greenhouse-Geisser or Huynh-Feldt.")
-                return False
-    except Exception as e:
-        st.error(f"Error in calculating sphericity: {str(e)}")
-        return False
+    dict_sphericity = dict_rm_anova['sphericity']
+    p_value = dict_sphericity['p-value']
+
+    # Display results in Streamlit
+    with st.expander("Sphericity Test Results"):
+        st.write(f"Sphericity test result (Mauchly's W): {dict_sphericity['W']:.4f}, Chi-square: {dict_sphericity['chi2']:.4f}, Degrees of freedom: {dict_sphericity['dof']}, P-value: {p_value:.4f}")
+        st.write(f"Greenhouse-Geisser epsilon: {dict_rm_anova['eps_gg']:.4f}, Huynh-Feldt epsilon: {dict_rm_anova['eps_hf']:.4f}")
+        if np.isnan(p_value):
+            st.write("Mauchly's test needs more subjects than conditions. Use the Greenhouse-Geisser or Huynh-Feldt corrected p-values.")
+            return False
+        elif p_value > 0.05:
+            st.write("Sphericity is assumed (p > 0.05). No corrections needed.")
+            return True
+        else:
+            st.write("Sphericity is not assumed (p ≤ 0.05). Use the Greenhouse-Geisser (epsilon < 0.75) or Huynh-Feldt (epsilon ≥ 0.75) corrected p-value in the results table.")
+            return False
 
 #------------------------------------
 # <<< Function to check normality of residuals assumption >>>
 #------------------------------------
 
-def check_normality_of_residuals(df_wide):
+@performance_tracking.timed
+def check_normality_of_residuals(dict_moments):
     """
-    Checks the normality of residuals for each condition in a repeated measures setup using the Shapiro-Wilk test.
+    Checks the normality of the repeated measures ANOVA residuals with the Shapiro-Wilk test, on a sample of at
+    most 5000 residuals.
 
     Args:
-    df_wide (DataFrame): DataFrame in wide format where each column represents a different condition and each row represents a subject.
+    dict_moments (dict): Output of condition_moments.
 
     Returns:
-    dict: A dictionary with condition names as keys and a tuple of (Shapiro-Wilk statistic, p-value, normality assumption boolean) as values.
+    tuple: (Shapiro-Wilk statistic, p-value, normality assumption boolean).
     """
     # Explanation of what the test is and why it's important
     with st.expander("What is the Normality of Residuals?"):
         st.write("""
-        **Normality of Residuals** refers to the assumption that the residuals (differences between observed values and group means) 
-        from an analysis should be normally distributed. This assumption is crucial for the validity of parametric tests, 
-        including Repeated Measures ANOVA, because these tests assume the data follow a normal distribution to correctly 
+        **Normality of Residuals** refers to the assumption that the residuals (differences between observed values and group means)
+        from an analysis should be normally distributed. This assumption is crucial for the validity of parametric tests,
+        including Repeated Measures ANOVA, because these tests assume the data follow a normal distribution to correctly
         calculate significance and confidence intervals.
         """)
 
@@ -148,31 +422,38 @@ def check_normality_of_residuals(df_wide):
           - A **p-value less than or equal to 0.05** suggests that the residuals are not normally distributed, which might invalidate some conclusions drawn from parametric tests that assume normality.
         """)
 
-    normality_results = {}
+    residuals = sample_residuals(dict_moments)
+
     with st.expander("Normality Check for Residuals"):
-        for condition in df_wide.columns:
-            st.subheader(f"***{condition}***")
-            # Calculate the residuals for each condition
-            residuals = df_wide[condition] - df_wide[condition].mean()
-            # Perform the Shapiro-Wilk test on the residuals
-            shapiro_results = pg.normality(residuals)
-            W = shapiro_results['W'][0]
-            p_value = shapiro_results['pval'][0]
-            normality_assumed = p_value > 0.05
+        if residuals.size < 3 or np.ptp(residuals) == 0:
+            st.write("Not enough variation in the residuals to test their normality.")
+            return np.nan, np.nan, False
+
+        W, p_value = stats.shapiro(residuals)
+        normality_assumed = p_value > 0.05
 
-            # Store the results
-            normality_results[condition] = (W, p_value, normality_assumed)
+        st.write(f"Shapiro-Wilk Test on {residuals.size} residuals: W = {W:.4f}, p-value = {p_value:.4f}")
+        if normality_assumed:
+            st.write("The residuals are normally distributed (p > 0.05).")
+        else:
+            st.write("The residuals are not normally distributed (p ≤ 0.05). Consider using non-parametric methods or transforming the data.")
 
-            # Output the results to Streamlit
-            st.write(f"**{condition}** - Shapiro-Wilk Test: W = {W:.4f}, p-value = {p_value:.4f}")
-            if normality_assumed:
-                st.write(f"The residuals for **{condition}** are normally distributed (p > 0.05).")
-            else:
-                st.write(f"The residuals for **{condition}** are not normally distributed (p ≤ 0.05). Consider using non-parametric methods or transforming the data.")
+    return W, p_value, normality_assumed
 
-    return normality_results
+#------------------------------------
+# <<< Function to display the test results >>>
+#------------------------------------
 
+def display_repeated_measures_anova_results(dict_rm_anova):
+    """
+    Displays the repeated measures ANOVA table, with the uncorrected and sphericity-corrected p-values, and the condition means.
 
+    Args:
+    dict_rm_anova (dict): Output of repeated_measures_anova.
+    """
+    with st.expander("Repeated Measures ANOVA Table"):
+        performance_tracking.dataframe(dict_rm_anova['df_anova'], hide_index=True)
+        performance_tracking.dataframe(dict_rm_anova['df_means'])
 
 #------------------------------------
 # <<< Main function to render all assumption checks >>>
@@ -187,37 +468,39 @@ def render_assumption_checks_for_repeated_measures_anova(df):
     #render assumptions to user:
     repeated_measures_anova_assumptions()
 
-    #select the measurement columns
-    col_labels_containing_measurements = select_columns_for_wide_format_anova(df)
+    #select the measurement columns (wide format) or subject, condition and value columns (long format),
+    #and make one cached pass over them, shared by the checks and the test
+    try:
+        dict_moments, list_conditions = select_repeated_measures_data(df)
+    except ValueError as error:
+        st.error(str(error))
+        return False
+    if dict_moments is None:
+        return None
+    dict_rm_anova = repeated_measures_anova(dict_moments, list_conditions)
 
     #render the assumptions in separate tabs
     tab1, tab2 = st.tabs(['Sphericity check', 'Normality of residuals check'])
-    
+
     with tab1:
-        assumption_check_sphericity = check_sphericity(df)
+        assumption_check_sphericity = check_sphericity(dict_rm_anova)
 
     with tab2:
-        normality_results = check_normality_of_residuals(df)
+        W, p_value, residuals_normal = check_normality_of_residuals(dict_moments)
 
-    #interpret_test_results(normality_check_p_values[0], normality_check_p_values[1], equality_of_variances_check_p_value[0], alpha=0.05)
+    display_repeated_measures_anova_results(dict_rm_anova)
 
-    #return assumption_check_sphericity, normality_results
     # Interpret results and provide recommendations
-    if assumption_check_sphericity and all(normality_results.values()):
+    if assumption_check_sphericity and residuals_normal:
         st.success("All assumptions for Repeated Measures ANOVA are met. You can proceed with the analysis using Repeated Measures ANOVA.")
         return True
 
-    else:
-        issues = []
-        if not assumption_check_sphericity:
-            issues.append("sphericity is not assumed; consider using Greenhouse-Geisser or Huynh-Feldt corrections (**not current included in this tool**).")
-        if not all(normality_results.values()):
-            issues.append("not all residuals are normally distributed; consider transforming the data **(not current included in this tool)** or using non-parametric methods.")
+    elif residuals_normal:
+        st.warning("Sphericity is not assumed; use the Greenhouse-Geisser or Huynh-Feldt corrected p-value from the Repeated Measures ANOVA table.")
+        return True
 
-        st.error("One or more assumptions are not met: " + " and ".join(issues))
+    else:
+        st.error("One or more assumptions are not met: not all residuals are normally distributed; consider transforming the data **(not current included in this tool)** or using non-parametric methods.")
         st.write("It is recommended to address these issues or consider alternative methods such as the non-parametric **:red[Friedman test]** if appropriate corrections cannot be applied.")
 
         return False
-
-    
-
@@ -0,0 +1,746 @@
+import functools
+import inspect
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import special, stats
+
+from functions import performance_tracking
+from functions import stat_test_decision_tree
+from stats_test_functions import batch_normality
+from stats_test_functions import friedman_test
+from stats_test_functions import power_analysis
+
+#------------------------------------
+# <<< Data generators >>>
+#------------------------------------
+#every generator draws all the replicates of a design at once as a 3-D array of shape
+#(replicates, groups or variables, observations), using the effect size conventions of power_analysis,
+#so the simulated power can be compared with the analytic power of the same design
+
+list_distributions = ['Normal', 'Skewed (log-normal)', 'Heavy-tailed (t, 3 df)']
+
+
+def standardized_noise(rng, shape, distribution='Normal'):
+    """
+    Draws noise with mean 0 and standard deviation 1 from one of list_distributions.
+
+    Args:
+    rng (Generator): The random number generator.
+    shape (tuple): Shape of the array to draw.
+    distribution (str, optional): One of list_distributions. Defaults to 'Normal'.
+
+    Returns:
+    ndarray: The noise.
+    """
+    if distribution == 'Normal':
+        return rng.standard_normal(shape)
+    if distribution == 'Skewed (log-normal)':
+        return (np.exp(rng.standard_normal(shape)) - np.exp(0.5)) / np.sqrt((np.e - 1) * np.e)
+    if distribution == 'Heavy-tailed (t, 3 df)':
+        return rng.standard_t(3, shape) / np.sqrt(3)
+    raise ValueError(f"Unknown distribution: {distribution}")
+
+
+def _group_means(effect_size, number_of_groups, effect_size_label):
+    """
+    Group means for an effect size: a shift of the last group by Cohen's d, or equally spaced means whose
+    standard deviation is Cohen's f.
+    """
+    if effect_size_label == "Cohen's d":
+        means = np.zeros(number_of_groups)
+        means[-1] = effect_size
+        return means
+    return power_analysis._condition_means(effect_size, number_of_groups)
+
+
+def _unit_contrast(k):
+    """
+    Equally spaced weights over k categories that sum to 0 and have unit length.
+    """
+    spacing = np.arange(k) - (k - 1) / 2
+    return spacing / np.sqrt(np.sum(spacing ** 2))
+
+
+def _draw_categories(rng, probabilities, shape):
+    """
+    Draws category codes 0, 1, ... with the given probabilities, by searching uniform draws in their cumulative sum.
+    """
+    probabilities = np.clip(probabilities, 0, None)
+    cumulative = np.cumsum(probabilities / probabilities.sum())
+    return np.minimum(np.searchsorted(cumulative, rng.random(shape), side='right'), probabilities.size - 1).astype(float)
+
+
+def generate_one_sample(rng, number_of_replicates, sample_size, effect_size, distribution='Normal'):
+    return standardized_noise(rng, (number_of_replicates, 1, sample_size), distribution) + effect_size
+
+
+def generate_symmetric_one_sample(rng, number_of_replicates, sample_size, effect_size, distribution='Normal'):
+    # the signed-rank test's null is a distribution symmetric about 0, which a skewed shape with mean 0 is not,
+    # so the noise gets random signs: the same spread and tails, symmetric about 0 (unchanged for symmetric shapes)
+    noise = standardized_noise(rng, (number_of_replicates, 1, sample_size), distribution)
+    return noise * rng.choice([-1.0, 1.0], noise.shape) + effect_size
+
+
+def generate_independent_groups(rng, number_of_replicates, sample_size, effect_size, distribution='Normal', number_of_groups=2, effect_size_label="Cohen's d"):
+    values = standardized_noise(rng, (number_of_replicates, number_of_groups, sample_size), distribution)
+    return values + _group_means(effect_size, number_of_groups, effect_size_label)[:, None]
+
+
+def generate_repeated_measures(rng, number_of_replicates, sample_size, effect_size, distribution='Normal', number_of_conditions=2, correlation=0.5, effect_size_label="Cohen's d"):
+    # a shared subject effect gives every pair of conditions the same correlation; Cohen's d is of the differences
+    subject_effects = np.sqrt(correlation) * standardized_noise(rng, (number_of_replicates, 1, sample_size), distribution)
+    values = subject_effects + np.sqrt(1 - correlation) * standardized_noise(rng, (number_of_replicates, number_of_conditions, sample_size), distribution)
+    if effect_size_label == "Cohen's d":
+        effect_size = effect_size * np.sqrt(2 * (1 - correlation))
+    return values + _group_means(effect_size, number_of_conditions, effect_size_label)[:, None]
+
+
+def generate_factorial_cells(rng, number_of_replicates, sample_size, effect_size, distribution='Normal', number_of_groups=4):
+    # cells are ordered (A1 B1, A1 B2, ..., A2 B1, ...), and the first factor (two levels) has Cohen's f = effect size
+    values = standardized_noise(rng, (number_of_replicates, number_of_groups, sample_size), distribution)
+    return values + np.repeat([-effect_size, effect_size], number_of_groups // 2)[:, None]
+
+
+def generate_groups_with_covariate(rng, number_of_replicates, sample_size, effect_size, distribution='Normal', number_of_groups=3, covariate_slope=0.5):
+    # the outcomes fill the first number_of_groups rows of axis 1 and their covariate values the rest;
+    # Cohen's f is relative to the covariate-adjusted (residual) standard deviation
+    covariates = standardized_noise(rng, (number_of_replicates, number_of_groups, sample_size), distribution)
+    errors = np.sqrt(1 - covariate_slope ** 2) * standardized_noise(rng, (number_of_replicates, number_of_groups, sample_size), distribution)
+    outcomes = covariate_slope * covariates + errors
+    outcomes += np.sqrt(1 - covariate_slope ** 2) * power_analysis._condition_means(effect_size, number_of_groups)[:, None]
+    return np.concatenate([outcomes, covariates], axis=1)
+
+
+def generate_correlated_variables(rng, number_of_replicates, sample_size, effect_size, distribution='Normal', method='pearson', number_of_covariates=0, covariate_loading=0.5):
+    # two variables with (partial) correlation equal to the effect size, given the covariates in the rows after them
+    correlation = np.sin(np.pi * effect_size / 2) if method == 'kendall' else effect_size
+    shape = (number_of_replicates, sample_size)
+    covariates = standardized_noise(rng, (number_of_replicates, number_of_covariates, sample_size), distribution)
+    shared = covariates.sum(axis=1) / np.sqrt(max(number_of_covariates, 1))
+    loading = covariate_loading if number_of_covariates > 0 else 0.0
+    first, second = standardized_noise(rng, shape, distribution), standardized_noise(rng, shape, distribution)
+    x = loading * shared + np.sqrt(1 - loading ** 2) * first
+    y = loading * shared + np.sqrt(1 - loading ** 2) * (correlation * first + np.sqrt(1 - correlation ** 2) * second)
+    return np.concatenate([x[:, None], y[:, None], covariates], axis=1)
+
+
+def generate_categories(rng, number_of_replicates, sample_size, effect_size, df=2):
+    # k = df + 1 categories, equally likely under the null, tilted to Cohen's w = effect size
+    k = df + 1
+    probabilities = 1 / k + effect_size * _unit_contrast(k) / np.sqrt(k)
+    return _draw_categories(rng, probabilities, (number_of_replicates, 1, sample_size))
+
+
+def generate_binary(rng, number_of_replicates, sample_size, effect_size, null_proportion=0.5):
+    proportion = power_analysis._shifted_proportion(null_proportion, effect_size)
+    return (rng.random((number_of_replicates, 1, sample_size)) < proportion).astype(float)
+
+
+def generate_two_proportions(rng, number_of_replicates, sample_size, effect_size, baseline_proportion=0.5):
+    proportions = np.array([baseline_proportion, power_analysis._shifted_proportion(baseline_proportion, effect_size)])
+    return (rng.random((number_of_replicates, 2, sample_size)) < proportions[:, None]).astype(float)
+
+
+def generate_contingency(rng, number_of_replicates, sample_size, effect_size, df=1):
+    # an (df + 1) x 2 table with uniform margins and Cohen's w = effect size; rows 0 and 1 of axis 1 are the two variables
+    number_of_rows = df + 1
+    cell_probabilities = (1 + effect_size * np.sqrt(number_of_rows) * np.outer(_unit_contrast(number_of_rows), [1, -1])) / (2 * number_of_rows)
+    cells = _draw_categories(rng, cell_probabilities.ravel(), (number_of_replicates, sample_size)).astype(int)
+    return np.stack([cells // 2, cells % 2], axis=1).astype(float)
+
+
+def generate_paired_binary(rng, number_of_replicates, sample_size, effect_size, discordant_proportion=0.3):
+    # cells (0, 0), (0, 1), (1, 0), (1, 1) of the before/after table; Cohen's w = (p01 - p10) / sqrt(p01 + p10)
+    shift = min(effect_size * np.sqrt(discordant_proportion), discordant_proportion)
+    cell_probabilities = np.array([1 - discordant_proportion, discordant_proportion + shift, discordant_proportion - shift, 1 - discordant_proportion]) / 2
+    cells = _draw_categories(rng, cell_probabilities, (number_of_replicates, sample_size)).astype(int)
+    return np.stack([cells // 2, cells % 2], axis=1).astype(float)
+
+
+def generate_three_way_table(rng, number_of_replicates, sample_size, effect_size):
+    # three binary variables, independent under the null, with a three-way interaction of Cohen's w = effect size
+    signs = np.array([1, -1])
+    pattern = np.einsum('i,j,k->ijk', signs, signs, signs).ravel()
+    cells = _draw_categories(rng, (1 + effect_size * pattern) / 8, (number_of_replicates, sample_size)).astype(int)
+    return np.stack([cells // 4, cells // 2 % 2, cells % 2], axis=1).astype(float)
+
+#------------------------------------
+# <<< Vectorized test kernels >>>
+#------------------------------------
+#every kernel takes the 3-D replicate array and returns one p-value per replicate
+
+def _t_p_values(t_statistic, degrees_of_freedom):
+    return 2 * stats.t.sf(np.abs(t_statistic), degrees_of_freedom)
+
+
+def _z_p_values(z_statistic):
+    return 2 * stats.norm.sf(np.abs(z_statistic))
+
+
+def one_sample_t_test_kernel(data):
+    x = data[:, 0]
+    n = x.shape[1]
+    return _t_p_values(x.mean(axis=1) / (x.std(axis=1, ddof=1) / np.sqrt(n)), n - 1)
+
+
+def one_sample_z_test_kernel(data, population_sd=1.0):
+    x = data[:, 0]
+    return _z_p_values(x.mean(axis=1) / (population_sd / np.sqrt(x.shape[1])))
+
+
+def signed_rank_kernel(differences):
+    """
+    Wilcoxon signed-rank test of each row (normal approximation with the tie correction; zero differences are dropped).
+    """
+    absolute = np.abs(differences)
+    ranks, tie_terms = friedman_test.rank_within_rows(absolute)
+    number_of_zeros = np.sum(absolute == 0, axis=1)
+    ranks = ranks - number_of_zeros[:, None]
+    tie_terms = tie_terms - (number_of_zeros ** 3 - number_of_zeros)
+    n = differences.shape[1] - number_of_zeros
+
+    positive_rank_sum = np.sum(ranks * (differences > 0), axis=1)
+    variance = n * (n + 1) * (2 * n + 1) / 24 - tie_terms / 48
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p_values = _z_p_values((positive_rank_sum - n * (n + 1) / 4) / np.sqrt(variance))
+    return np.where(variance > 0, p_values, 1.0)
+
+
+def single_sample_wilcoxon_kernel(data):
+    return signed_rank_kernel(data[:, 0])
+
+
+def paired_t_test_kernel(data):
+    return one_sample_t_test_kernel((data[:, 1] - data[:, 0])[:, None])
+
+
+def paired_z_test_kernel(data, population_sd=1.0, correlation=0.5):
+    return one_sample_z_test_kernel((data[:, 1] - data[:, 0])[:, None], population_sd * np.sqrt(2 * (1 - correlation)))
+
+
+def wilcoxon_signed_rank_kernel(data):
+    return signed_rank_kernel(data[:, 1] - data[:, 0])
+
+
+def independent_t_test_kernel(data):
+    return stats.ttest_ind(data[:, 0], data[:, 1], axis=1).pvalue
+
+
+def independent_z_test_kernel(data, population_sd=1.0):
+    n = data.shape[2]
+    return _z_p_values((data[:, 1].mean(axis=1) - data[:, 0].mean(axis=1)) / (population_sd * np.sqrt(2 / n)))
+
+
+def mann_whitney_u_kernel(data):
+    n1, n2 = data.shape[2], data.shape[2]
+    total = n1 + n2
+    ranks, tie_terms = friedman_test.rank_within_rows(data[:, :2].reshape(data.shape[0], total))
+    u_statistic = ranks[:, :n1].sum(axis=1) - n1 * (n1 + 1) / 2
+    variance = n1 * n2 / 12 * ((total + 1) - tie_terms / (total * (total - 1)))
+    return _z_p_values((u_statistic - n1 * n2 / 2) / np.sqrt(variance))
+
+
+def one_way_anova_kernel(data):
+    replicates, k, n = data.shape
+    means = data.mean(axis=2)
+    between = n * np.sum((means - means.mean(axis=1, keepdims=True)) ** 2, axis=1) / (k - 1)
+    within = np.sum(data.var(axis=2, ddof=1), axis=1) / k
+    return stats.f.sf(between / within, k - 1, k * (n - 1))
+
+
+def kruskal_wallis_kernel(data):
+    replicates, k, n = data.shape
+    total = k * n
+    ranks, tie_terms = friedman_test.rank_within_rows(data.reshape(replicates, total))
+    rank_sums = ranks.reshape(data.shape).sum(axis=2)
+    h_statistic = 12 / (total * (total + 1)) * np.sum(rank_sums ** 2, axis=1) / n - 3 * (total + 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        h_statistic = h_statistic / (1 - tie_terms / (total ** 3 - total))
+    return stats.chi2.sf(h_statistic, k - 1)
+
+
+def repeated_measures_anova_kernel(data):
+    replicates, k, n = data.shape
+    grand_mean = data.mean(axis=(1, 2), keepdims=True)
+    ss_conditions = n * np.sum((data.mean(axis=2, keepdims=True) - grand_mean) ** 2, axis=(1, 2))
+    ss_subjects = k * np.sum((data.mean(axis=1, keepdims=True) - grand_mean) ** 2, axis=(1, 2))
+    ss_error = np.sum((data - grand_mean) ** 2, axis=(1, 2)) - ss_conditions - ss_subjects
+    error_df = (k - 1) * (n - 1)
+    return stats.f.sf((ss_conditions / (k - 1)) / (ss_error / error_df), k - 1, error_df)
+
+
+def friedman_test_kernel(data):
+    replicates, k, n = data.shape
+    ranks, tie_terms = friedman_test.rank_within_rows(data.transpose(0, 2, 1).reshape(replicates * n, k))
+    rank_sums = ranks.reshape(replicates, n, k).sum(axis=1)
+    tie_terms = tie_terms.reshape(replicates, n).sum(axis=1)
+    q_statistic = 12 / (n * k * (k + 1)) * np.sum(rank_sums ** 2, axis=1) - 3 * n * (k + 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        q_statistic = q_statistic / (1 - tie_terms / (n * k * (k ** 2 - 1)))
+    return stats.chi2.sf(q_statistic, k - 1)
+
+
+def factorial_anova_kernel(data):
+    # tests the main effect of the first factor (two levels) against the within-cell error
+    replicates, number_of_cells, n = data.shape
+    cell_means = data.mean(axis=2)
+    level_means = cell_means.reshape(replicates, 2, number_of_cells // 2).mean(axis=2)
+    ss_effect = number_of_cells // 2 * n * np.sum((level_means - cell_means.mean(axis=1, keepdims=True)) ** 2, axis=1)
+    error_df = number_of_cells * (n - 1)
+    ms_error = np.sum(data.var(axis=2, ddof=1), axis=1) * (n - 1) / error_df
+    return stats.f.sf(ss_effect / ms_error, 1, error_df)
+
+
+def ancova_kernel(data):
+    # compares the model with separate group intercepts and a common slope to the model with one intercept
+    replicates, rows, n = data.shape
+    k = rows // 2
+    outcomes, covariates = data[:, :k], data[:, k:]
+
+    def residual_sum_of_squares(y, c, axis):
+        y_centred = y - y.mean(axis=axis, keepdims=True)
+        c_centred = c - c.mean(axis=axis, keepdims=True)
+        sxy = np.sum(c_centred * y_centred, axis=(1, 2))
+        sxx = np.sum(c_centred ** 2, axis=(1, 2))
+        return np.sum(y_centred ** 2, axis=(1, 2)) - sxy ** 2 / sxx
+
+    sse_full = residual_sum_of_squares(outcomes, covariates, axis=2)
+    sse_reduced = residual_sum_of_squares(outcomes, covariates, axis=(1, 2))
+    error_df = k * n - k - 1
+    return stats.f.sf(((sse_reduced - sse_full) / (k - 1)) / (sse_full / error_df), k - 1, error_df)
+
+
+def _row_correlations(x, y):
+    x = x - x.mean(axis=1, keepdims=True)
+    y = y - y.mean(axis=1, keepdims=True)
+    return np.sum(x * y, axis=1) / np.sqrt(np.sum(x ** 2, axis=1) * np.sum(y ** 2, axis=1))
+
+
+def pearson_correlation_kernel(data):
+    n = data.shape[2]
+    r = np.clip(_row_correlations(data[:, 0], data[:, 1]), -1 + 1e-12, 1 - 1e-12)
+    return _t_p_values(r * np.sqrt((n - 2) / (1 - r ** 2)), n - 2)
+
+
+def partial_correlation_kernel(data):
+    # residualizes both variables on the covariates (with an intercept) by least squares, one replicate at a time in a batched solve
+    replicates, rows, n = data.shape
+    design = np.concatenate([np.ones((replicates, 1, n)), data[:, 2:]], axis=1).transpose(0, 2, 1)
+    targets = data[:, :2].transpose(0, 2, 1)
+    coefficients = np.linalg.solve(design.transpose(0, 2, 1) @ design, design.transpose(0, 2, 1) @ targets)
+    residuals = targets - design @ coefficients
+    r = np.clip(_row_correlations(residuals[:, :, 0], residuals[:, :, 1]), -1 + 1e-12, 1 - 1e-12)
+    degrees_of_freedom = n - 2 - (rows - 2)
+    return _t_p_values(r * np.sqrt(degrees_of_freedom / (1 - r ** 2)), degrees_of_freedom)
+
+
+def kendalls_tau_kernel(data, max_cells_per_batch=4_000_000):
+    # S = sum of sign products over all pairs (continuous data, no ties), tested with its normal approximation
+    replicates, rows, n = data.shape
+    upper = np.triu_indices(n, k=1)
+    batch_size = max(1, max_cells_per_batch // (n * n))
+    s_statistic = np.empty(replicates)
+    for start in range(0, replicates, batch_size):
+        x, y = data[start:start + batch_size, 0], data[start:start + batch_size, 1]
+        signs = np.sign(x[:, :, None] - x[:, None, :]) * np.sign(y[:, :, None] - y[:, None, :])
+        s_statistic[start:start + batch_size] = signs[:, upper[0], upper[1]].sum(axis=1)
+    return _z_p_values(s_statistic / np.sqrt(n * (n - 1) * (2 * n + 5) / 18))
+
+
+def _category_counts(codes, number_of_categories):
+    """
+    Counts the category codes of each replicate with one bincount, offsetting each replicate's codes.
+    """
+    replicates = codes.shape[0]
+    offsets = number_of_categories * np.arange(replicates)[:, None]
+    return np.bincount((codes.astype(np.int64) + offsets).ravel(), minlength=replicates * number_of_categories).reshape(replicates, number_of_categories)
+
+
+def chi_square_goodness_of_fit_kernel(data, df=2):
+    counts = _category_counts(data[:, 0], df + 1)
+    expected = data.shape[2] / (df + 1)
+    return stats.chi2.sf(np.sum((counts - expected) ** 2 / expected, axis=1), df)
+
+
+def g_test_goodness_of_fit_kernel(data, df=2):
+    counts = _category_counts(data[:, 0], df + 1)
+    expected = data.shape[2] / (df + 1)
+    g_statistic = 2 * np.sum(special.xlogy(counts, counts / expected), axis=1)
+    return stats.chi2.sf(g_statistic, df)
+
+
+def exact_multinomial_kernel(data, df=2, max_states=2_000_000):
+    # exact p-values of every possible vector of counts, looked up by the counts of the first k - 1 categories;
+    # beyond max_states the G-test is used instead
+    k, n = df + 1, data.shape[2]
+    if (n + 1) ** (k - 1) > max_states:
+        return g_test_goodness_of_fit_kernel(data, df)
+
+    leading_counts = np.indices((n + 1,) * (k - 1)).reshape(k - 1, -1)
+    last_count = n - leading_counts.sum(axis=0)
+    valid = last_count >= 0
+    all_counts = np.vstack([leading_counts, last_count])[:, valid]
+    pmf = np.exp(special.gammaln(n + 1) - special.gammaln(all_counts + 1).sum(axis=0) - n * np.log(k))
+
+    p_value_table = np.ones((n + 1) ** (k - 1))
+    p_value_table[np.flatnonzero(valid)] = power_analysis._two_sided_exact_p_values(pmf)
+
+    counts = _category_counts(data[:, 0], k)
+    codes = counts[:, :-1] @ ((n + 1) ** np.arange(k - 1))
+    return p_value_table[codes]
+
+
+def exact_binomial_kernel(data, null_proportion=0.5):
+    n = data.shape[2]
+    p_value_table = power_analysis._two_sided_exact_p_values(stats.binom.pmf(np.arange(n + 1), n, null_proportion))
+    return p_value_table[data[:, 0].sum(axis=1).astype(int)]
+
+
+def chi_square_independence_kernel(data, df=1):
+    number_of_rows = df + 1
+    counts = _category_counts(data[:, 0] * 2 + data[:, 1], 2 * number_of_rows).reshape(-1, number_of_rows, 2)
+    expected = counts.sum(axis=2, keepdims=True) * counts.sum(axis=1, keepdims=True) / data.shape[2]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        chi_square = np.sum(np.where(expected > 0, (counts - expected) ** 2 / expected, 0.0), axis=(1, 2))
+    return stats.chi2.sf(chi_square, df)
+
+
+@functools.lru_cache(maxsize=4)
+def _fishers_exact_p_value_table(n):
+    # kept per worker process, as every chunk of a simulation has the same group size
+    return power_analysis.fishers_exact_p_value_table(n)
+
+
+def fishers_exact_kernel(data, max_exact_sample_size=500):
+    # beyond max_exact_sample_size per group the (n + 1)^2 table is too large, and the normal approximation for
+    # Cohen's h is used instead, as in power_analysis.fishers_exact_test_power
+    n = data.shape[2]
+    successes_1, successes_2 = data[:, 0].sum(axis=1).astype(int), data[:, 1].sum(axis=1).astype(int)
+    if n > max_exact_sample_size:
+        h = 2 * np.arcsin(np.sqrt(successes_2 / n)) - 2 * np.arcsin(np.sqrt(successes_1 / n))
+        return _z_p_values(h / np.sqrt(2 / n))
+    return _fishers_exact_p_value_table(n)[successes_1 * (n + 1) + successes_2]
+
+
+def mcnemars_test_kernel(data, continuity_correction=False):
+    # chi-square on the discordant pairs
+    before_only = np.sum((data[:, 0] == 1) & (data[:, 1] == 0), axis=1)
+    after_only = np.sum((data[:, 0] == 0) & (data[:, 1] == 1), axis=1)
+    discordant = before_only + after_only
+    with np.errstate(invalid='ignore', divide='ignore'):
+        chi_square = np.maximum(np.abs(before_only - after_only) - continuity_correction, 0) ** 2 / discordant
+    return np.where(discordant > 0, stats.chi2.sf(chi_square, 1), 1.0)
+
+
+def log_linear_kernel(data):
+    # G-test of the mutual independence model [A][B][C] against the saturated model
+    n = data.shape[2]
+    counts = _category_counts(data[:, 0] * 4 + data[:, 1] * 2 + data[:, 2], 8).reshape(-1, 2, 2, 2)
+    expected = counts.sum(axis=(2, 3), keepdims=True) * counts.sum(axis=(1, 3), keepdims=True) * counts.sum(axis=(1, 2), keepdims=True) / n ** 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        g_statistic = 2 * np.sum(special.xlogy(counts, counts / expected), axis=(1, 2, 3))
+    return stats.chi2.sf(g_statistic, 4)
+
+#------------------------------------
+# <<< Simulation designs of the built tests >>>
+#------------------------------------
+#each test maps to the generator of its data and its kernel; the design parameters and effect size are those of
+#power_analysis.dict_power_models. Tests with the same generator and parameters share the simulated data.
+
+dict_simulation_designs = {
+    'Chi-square goodness of fit': (generate_categories, chi_square_goodness_of_fit_kernel),
+    'Chi-square test of independence': (generate_contingency, chi_square_independence_kernel),
+    'Exact test of Goodness of Fit (multinomial model)': (generate_categories, exact_multinomial_kernel),
+    'Exact test of Goodness of Fit': (generate_binary, exact_binomial_kernel),
+    'Factorial ANOVA': (generate_factorial_cells, factorial_anova_kernel),
+    'Fischers Exact test': (generate_two_proportions, fishers_exact_kernel),
+    'Friedman test': (generate_repeated_measures, friedman_test_kernel),
+    'G-test of Goodness of Fit': (generate_categories, g_test_goodness_of_fit_kernel),
+    'Independent samples T-test': (generate_independent_groups, independent_t_test_kernel),
+    'Independent samples Z-test': (generate_independent_groups, independent_z_test_kernel),
+    "Kendall's Tau": (generate_correlated_variables, kendalls_tau_kernel),
+    'Kruskal-Wallis': (generate_independent_groups, kruskal_wallis_kernel),
+    'Log-linear analysis': (generate_three_way_table, log_linear_kernel),
+    'Mann-Whitney U Test': (generate_independent_groups, mann_whitney_u_kernel),
+    'McNemars test': (generate_paired_binary, mcnemars_test_kernel),
+    'One-way ANCOVA': (generate_groups_with_covariate, ancova_kernel),
+    'One-way ANOVA': (generate_independent_groups, one_way_anova_kernel),
+    'One-way Repeated Measures ANOVA': (generate_repeated_measures, repeated_measures_anova_kernel),
+    'Paired samples T-test': (generate_repeated_measures, paired_t_test_kernel),
+    'Paired samples Z-test': (generate_repeated_measures, paired_z_test_kernel),
+    'Partial correlation': (generate_correlated_variables, partial_correlation_kernel),
+    'Pearson correlation': (generate_correlated_variables, pearson_correlation_kernel),
+    'Single sample T-test': (generate_one_sample, one_sample_t_test_kernel),
+    'Single sample wilcoxon signed-rank test': (generate_symmetric_one_sample, single_sample_wilcoxon_kernel),
+    'Single sample Z-test': (generate_one_sample, one_sample_z_test_kernel),
+    'Wilcoxon signed-rank test': (generate_repeated_measures, wilcoxon_signed_rank_kernel),
+}
+
+
+def _accepted_params(function, dict_params, include_defaults=False):
+    """
+    The entries of dict_params that function takes as keyword arguments, optionally filled in with the function's
+    defaults for the rest (so two calls with the same effective parameters give the same dict).
+    """
+    parameters = inspect.signature(function).parameters
+    dict_accepted = {key: value for key, value in dict_params.items() if key in parameters}
+    if include_defaults:
+        dict_defaults = {key: parameter.default for key, parameter in parameters.items()
+                         if parameter.default is not inspect.Parameter.empty and key != 'distribution'}
+        dict_accepted = {**dict_defaults, **dict_accepted}
+    return dict_accepted
+
+
+def get_design_params(test_name, tuple_params=()):
+    """
+    The parameters of a test's simulation design: the power analysis defaults, the effect size label and any overrides.
+
+    Args:
+    test_name (str): A key of dict_simulation_designs.
+    tuple_params (tuple, optional): (name, value) pairs overriding the defaults. Defaults to ().
+
+    Returns:
+    dict: The design parameters.
+    """
+    dict_model = power_analysis.dict_power_models[test_name]
+    return {**dict_model['params'], 'effect_size_label': dict_model['effect_size'], **dict(tuple_params)}
+
+
+def medium_effect_size(test_name):
+    """
+    The medium effect size of a test, on the same data as the other tests with its effect size measure. Kendall's tau
+    is smaller than Pearson's r for the same data, so its medium effect is the tau of normal data with the medium r,
+    tau = (2 / pi) arcsin(r), and the powers of the two tests can be compared.
+
+    Args:
+    test_name (str): A key of dict_simulation_designs.
+
+    Returns:
+    float: The effect size, in the test's power analysis effect size.
+    """
+    dict_model = power_analysis.dict_power_models[test_name]
+    medium = power_analysis.dict_effect_sizes[dict_model['effect_size']][1]
+    if dict_model['params'].get('method') == 'kendall':
+        return float(np.round(2 / np.pi * np.arcsin(medium), 4))
+    return medium
+
+#------------------------------------
+# <<< Running the simulation across worker processes >>>
+#------------------------------------
+
+def _simulate_chunk(generator_name, tuple_generator_params, list_kernels, effect_size, sample_size, number_of_replicates, seed_sequence, distribution):
+    """
+    Runs in a worker process: draws one chunk of replicates for a design and runs every kernel that shares it.
+
+    Returns:
+    list: One array of p-values per (kernel name, kernel params) pair in list_kernels.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    generator = dict_generators[generator_name]
+    dict_generator_params = dict(tuple_generator_params)
+    if 'distribution' in inspect.signature(generator).parameters:
+        dict_generator_params['distribution'] = distribution
+    data = generator(rng, number_of_replicates, sample_size, effect_size, **dict_generator_params)
+    return [dict_kernels[kernel_name](data, **dict(tuple_kernel_params)) for kernel_name, tuple_kernel_params in list_kernels]
+
+
+dict_generators = {function.__name__: function for function, _ in dict_simulation_designs.values()}
+dict_kernels = {kernel.__name__: kernel for _, kernel in dict_simulation_designs.values()}
+list_generator_names = sorted(dict_generators)
+
+
+def run_simulation(list_test_names, sample_size, effect_sizes=(0.0,), distribution='Normal', number_of_replicates=2000,
+                   alpha=0.05, random_seed=42, chunk_size=500, tuple_params=(), min_chunks_for_pool=4):
+    """
+    Estimates the type I error rate (effect size 0) and power of each test by Monte Carlo simulation. The replicates
+    of each design are drawn in chunks of chunk_size as 3-D arrays, and the tests sharing a design are run on the
+    same data. The chunks are sent to the shared process pool when there are enough of them. Each chunk draws from
+    the stream SeedSequence(random_seed, spawn_key=(design, effect size, chunk)), so the results do not depend on
+    the number of workers or on which other tests are simulated.
+
+    Args:
+    list_test_names (list): Tests to simulate (keys of dict_simulation_designs; others are left out).
+    sample_size (int): Sample size, as counted by the test's power model (e.g. per group, pairs or total).
+    effect_sizes (tuple, optional): Effect sizes in each test's power analysis effect size. Defaults to (0.0,).
+    distribution (str, optional): One of list_distributions, for the continuous tests. Defaults to 'Normal'.
+    number_of_replicates (int, optional): Simulated datasets per test and effect size. Defaults to 2000.
+    alpha (float, optional): Significance level. Defaults to 0.05.
+    random_seed (int, optional): Seed of the SeedSequence. Defaults to 42.
+    chunk_size (int, optional): Replicates per chunk. Defaults to 500.
+    tuple_params (tuple, optional): (name, value) pairs overriding the design parameters of every test. Defaults to ().
+    min_chunks_for_pool (int, optional): Smallest number of chunks sent to the process pool. Defaults to 4.
+
+    Returns:
+    DataFrame: One row per test and effect size with the rejection rate, its Monte Carlo standard error and, where
+               available, the analytic power; rows with effect size 0 estimate the type I error rate.
+
+    Example:
+    >>> run_simulation(['Independent samples T-test', 'Mann-Whitney U Test'], 30, (0.0, 0.5), 'Skewed (log-normal)')
+    """
+    list_test_names = [test_name for test_name in list_test_names if test_name in dict_simulation_designs]
+
+    #group the tests by design, so tests sharing a generator and its parameters share the simulated data
+    dict_designs = {}
+    for test_name in list_test_names:
+        generator, kernel = dict_simulation_designs[test_name]
+        dict_params = get_design_params(test_name, tuple_params)
+        design_key = (generator.__name__, tuple(sorted(_accepted_params(generator, dict_params, include_defaults=True).items())))
+        dict_designs.setdefault(design_key, []).append((test_name, (kernel.__name__, tuple(sorted(_accepted_params(kernel, dict_params).items())))))
+
+    list_tasks = []
+    for (generator_name, tuple_generator_params), list_design_tests in dict_designs.items():
+        list_kernels = [kernel for _, kernel in list_design_tests]
+        for effect_size in effect_sizes:
+            for chunk, start in enumerate(range(0, number_of_replicates, chunk_size)):
+                spawn_key = (list_generator_names.index(generator_name), int(round(effect_size * 10 ** 6)), chunk)
+                seed_sequence = np.random.SeedSequence(random_seed, spawn_key=spawn_key)
+                list_tasks.append(((generator_name, tuple_generator_params, effect_size),
+                                   (generator_name, tuple_generator_params, list_kernels, effect_size, sample_size,
+                                    min(chunk_size, number_of_replicates - start), seed_sequence, distribution)))
+
+    if len(list_tasks) >= min_chunks_for_pool:
+        pool = batch_normality.get_process_pool()
+        list_futures = [pool.submit(_simulate_chunk, *args) for _, args in list_tasks]
+        list_chunk_results = [future.result() for future in list_futures]
+    else:
+        list_chunk_results = [_simulate_chunk(*args) for _, args in list_tasks]
+
+    #collect the p-values of each (design, effect size) and each of its tests
+    dict_p_values = {}
+    for (task_key, _), chunk_results in zip(list_tasks, list_chunk_results):
+        dict_p_values.setdefault(task_key, []).append(chunk_results)
+
+    list_rows = []
+    for (generator_name, tuple_generator_params), list_design_tests in dict_designs.items():
+        for effect_size in effect_sizes:
+            list_chunks = dict_p_values[(generator_name, tuple_generator_params, effect_size)]
+            for i, (test_name, _) in enumerate(list_design_tests):
+                p_values = np.concatenate([chunk_results[i] for chunk_results in list_chunks])
+                rejection_rate = float(np.mean(p_values <= alpha))
+                dict_model = power_analysis.dict_power_models[test_name]
+                if 'function' in dict_model:
+                    dict_params = {**dict_model['params'], **_accepted_params(dict_model['function'], dict(tuple_params))}
+                    analytic_power = float(dict_model['function'](effect_size, sample_size, alpha, **dict_params))
+                else:
+                    analytic_power = np.nan
+                list_rows.append({
+                    'Test': test_name,
+                    'Distribution': distribution if 'distribution' in inspect.signature(dict_generators[generator_name]).parameters else 'Not applicable',
+                    'Effect size': f"{dict_model['effect_size']} = {effect_size}",
+                    'Sample size': sample_size,
+                    'Replicates': p_values.size,
+                    'Estimate': 'Type I error rate' if effect_size == 0 else 'Power',
+                    'Rejection rate': rejection_rate,
+                    'Monte Carlo SE': np.sqrt(rejection_rate * (1 - rejection_rate) / p_values.size),
+                    'Analytic power': analytic_power,
+                })
+
+    df_results = pd.DataFrame(list_rows)
+    #a test holds its level if the estimated type I error rate is within 3 Monte Carlo standard errors of alpha
+    se_alpha = np.sqrt(alpha * (1 - alpha) / df_results['Replicates'])
+    df_results['Holds alpha'] = np.where(df_results['Estimate'] == 'Type I error rate',
+                                         (df_results['Rejection rate'] - alpha <= 3 * se_alpha).map({True: 'Yes', False: 'No'}), '')
+    return df_results
+
+#------------------------------------
+# <<< Validating the decision tree recommendations >>>
+#------------------------------------
+#each scenario is the user's answers to the decision tree and the kind of data those answers describe;
+#the recommended tests should hold their level on that data and be at least as powerful as the alternatives
+
+list_decision_tree_scenarios = [
+    ({'hypothesis_type': 'Differences or Goodness of fit', 'data_type': 'Ratio', 'number_of_samples': 'One', 'normal_dist': 'Yes', 'population_variance_known': 'No'}, 'Normal', ['Single sample wilcoxon signed-rank test']),
+    ({'hypothesis_type': 'Differences or Goodness of fit', 'data_type': 'Ratio', 'number_of_samples': 'One', 'normal_dist': 'No'}, 'Skewed (log-normal)', ['Single sample T-test']),
+    ({'hypothesis_type': 'Differences or Goodness of fit', 'data_type': 'Ratio', 'number_of_samples': 'Two', 'sample_relationship': 'Independent', 'normal_dist': 'Yes', 'population_variance_known': 'No'}, 'Normal', ['Mann-Whitney U Test']),
+    ({'hypothesis_type': 'Differences or Goodness of fit', 'data_type': 'Ratio', 'number_of_samples': 'Two', 'sample_relationship': 'Independent', 'normal_dist': 'No'}, 'Heavy-tailed (t, 3 df)', ['Independent samples T-test']),
+    ({'hypothesis_type': 'Differences or Goodness of fit', 'data_type': 'Ratio', 'number_of_samples': 'Two', 'sample_relationship': 'Paired', 'normal_dist': 'Yes', 'population_variance_known': 'No'}, 'Normal', ['Wilcoxon signed-rank test']),
+    ({'hypothesis_type': 'Differences or Goodness of fit', 'data_type': 'Ratio', 'number_of_samples': 'Two', 'sample_relationship': 'Paired', 'normal_dist': 'No'}, 'Heavy-tailed (t, 3 df)', ['Paired samples T-test']),
+    ({'hypothesis_type': 'Differences or Goodness of fit', 'data_type': 'Ratio', 'number_of_samples': 'More than two', 'sample_relationship': 'Independent', 'normal_dist': 'Yes', 'numer_group_variables': 'One'}, 'Normal', ['Kruskal-Wallis']),
+    ({'hypothesis_type': 'Differences or Goodness of fit', 'data_type': 'Ratio', 'number_of_samples': 'More than two', 'sample_relationship': 'Independent', 'normal_dist': 'No'}, 'Heavy-tailed (t, 3 df)', []),
+    ({'hypothesis_type': 'Differences or Goodness of fit', 'data_type': 'Ratio', 'number_of_samples': 'More than two', 'sample_relationship': 'Paired', 'normal_dist': 'Yes', 'numer_group_variables': 'One'}, 'Normal', ['Friedman test']),
+    ({'hypothesis_type': 'Differences or Goodness of fit', 'data_type': 'Ratio', 'number_of_samples': 'More than two', 'sample_relationship': 'Paired', 'normal_dist': 'No'}, 'Heavy-tailed (t, 3 df)', ['One-way Repeated Measures ANOVA']),
+    ({'hypothesis_type': 'Relationship', 'nature_of_variables_of_interest': 'Two continuous variables', 'covariates_present': 'No'}, 'Normal', ["Kendall's Tau"]),
+    ({'hypothesis_type': 'Relationship', 'nature_of_variables_of_interest': 'At least one ordinal variable'}, 'Skewed (log-normal)', ['Pearson correlation']),
+]
+
+
+def validate_decision_tree(list_scenarios=None, sample_size=30, number_of_replicates=2000, alpha=0.05, random_seed=42):
+    """
+    Runs each decision tree scenario through recommend_test, and simulates the type I error rate and power (at the
+    test's medium effect size) of the recommended tests and their comparison tests on the data the scenario describes.
+
+    Args:
+    list_scenarios (list, optional): (dict_inputs, distribution, list of comparison tests) triples. Defaults to list_decision_tree_scenarios.
+    sample_size (int, optional): Sample size of every simulation. Defaults to 30.
+    number_of_replicates (int, optional): Simulated datasets per test and effect size. Defaults to 2000.
+    alpha (float, optional): Significance level. Defaults to 0.05.
+    random_seed (int, optional): Seed of the simulation. Defaults to 42.
+
+    Returns:
+    DataFrame: One row per scenario, test and estimate, flagging the recommended tests.
+    """
+    list_scenarios = list_decision_tree_scenarios if list_scenarios is None else list_scenarios
+    dict_input_keys = dict.fromkeys(['data_type', 'normal_dist', 'number_of_samples', 'sample_relationship', 'hypothesis_type',
+                                     'population_variance_known', 'nature_of_variables_of_interest', 'numer_group_variables',
+                                     'number_of_levels', 'covariates_present', 'sample_size_per_cell', 'num_group_variables'])
+
+    list_results = []
+    for i, (dict_inputs, distribution, list_comparison_tests) in enumerate(list_scenarios, 1):
+        list_recommendations = stat_test_decision_tree.recommend_test({**dict_input_keys, **dict_inputs})
+        list_test_names = list(dict.fromkeys(list_recommendations + list_comparison_tests))
+        #the medium effect size depends on each test's effect size measure, so the tests are simulated one at a time
+        for test_name in [test_name for test_name in list_test_names if test_name in dict_simulation_designs]:
+            df_test = run_simulation([test_name], sample_size, (0.0, medium_effect_size(test_name)), distribution, number_of_replicates, alpha, random_seed)
+            df_test.insert(0, 'Scenario', i)
+            df_test.insert(2, 'Recommended', 'Yes' if test_name in list_recommendations else 'No')
+            list_results.append(df_test)
+
+    return pd.concat(list_results, ignore_index=True)
+
+#------------------------------------
+# <<< Simulation check of the recommended tests >>>
+#------------------------------------
+
+def render_simulation_check(list_test_names, key='simulation_check'):
+    """
+    Renders the simulation check of the recommended tests: the user describes their data and sees the simulated
+    type I error rate and power of each recommended test and its alternative test.
+
+    Args:
+    list_test_names (list): The recommended tests; tests without a simulation design are left out.
+    key (str, optional): Prefix for the widget keys. Defaults to 'simulation_check'.
+    """
+    #import here, as render_assumptions imports every test module
+    from stats_test_functions import render_assumptions
+
+    list_test_names = [test_name for test_name in list_test_names if test_name in dict_simulation_designs]
+    list_alternatives = [render_assumptions.get_alternative_test(test_name) for test_name in list_test_names]
+    list_test_names = list(dict.fromkeys(list_test_names + [test_name for test_name in list_alternatives if test_name in dict_simulation_designs]))
+    if len(list_test_names) == 0:
+        st.write('A simulation check is not available for these tests yet.')
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        distribution = st.selectbox('Shape of the data', options=list_distributions, key=f'{key}_distribution',
+                                    help='The continuous tests are simulated from this distribution; the categorical tests ignore it.')
+    with col2:
+        sample_size = int(st.number_input('Sample size', min_value=5, max_value=5000, value=30, step=5, key=f'{key}_sample_size',
+                                          help='Counted as in the power analysis, e.g. per group, pairs or in total.'))
+    with col3:
+        number_of_replicates = st.selectbox('Simulated datasets', options=[1000, 2000, 5000, 10000], index=1, key=f'{key}_replicates')
+
+    if not st.button('Run simulation', key=f'{key}_run'):
+        return
+
+    list_results = []
+    with st.spinner('Simulating...'):
+        for test_name in list_test_names:
+            list_results.append(run_simulation([test_name], sample_size, (0.0, medium_effect_size(test_name)), distribution, number_of_replicates))
+    df_results = pd.concat(list_results, ignore_index=True)
+
+    performance_tracking.dataframe(df_results, hide_index=True)
+    st.write(":grey[Power is at each test's medium effect size (for Kendall's tau, the tau of data with a medium Pearson correlation). "
+             "The single sample signed-rank test is simulated from a symmetric version of the shape, as that is its null hypothesis. A test holds its level when its type I error rate is within 3 Monte Carlo standard errors of 0.05 (or below it).]")
@@ -19,9 +19,6 @@ import scipy.stats as stats
 #--------------------------
 #<< Non-Parametric Test >>
 #--------------------------
-#one sample wilcoxon
-from scipy.stats import wilcoxon
-
 #chi square test for homogeneity
 from scipy.stats import chi2_contingency
 
@@ -38,6 +35,9 @@ import streamlit as st
 # Import modules
 #--------------------------
 from stats_test_functions import dummy_data_creator as dummy_data
+from stats_test_functions import rank_cache
+from stats_test_functions import exact_distributions
+from stats_test_functions import multiple_testing
 
 #--------------------------
 #List of tests in scope
@@ -388,12 +388,8 @@ def one_sample_wilcoxon(data, hypothesized_median=0, p_value_threshold=0.05):
     Example:
     >>> one_sample_wilcoxon([120, 130, 140, 145, 150, 132, 136, 144], 135)
     """
-    # Calculate differences from the hypothesized median
-    differences = np.array(data) - hypothesized_median
-    # Remove zero differences as Wilcoxon test cannot handle zero differences
-    differences = differences[differences != 0]
-    # Perform the Wilcoxon signed-rank test
-    stat, p_value = wilcoxon(differences)
+    # Differences from the hypothesized median are ranked by the shared Wilcoxon signed-rank engine (zero differences are dropped)
+    stat, p_value = wilcoxon_signed_rank_statistic(pd.DataFrame({'data': np.asarray(data, dtype=float)}), 'data', hypothesized_median=hypothesized_median)
     # Interpret the result
     if p_value < p_value_threshold:
         result = "There is significant evidence to reject the null hypothesis. This suggests the median of the sample is different from the hypothesized median."
@@ -420,11 +416,146 @@ def one_sample_wilcoxon(data, hypothesized_median=0, p_value_threshold=0.05):
 
 #--------------------------
 #Wilcoxon Signed-Rank
+def wilcoxon_signed_rank_statistic(df, column_1, column_2=None, hypothesized_median=0, exact_max_n=exact_distributions.WILCOXON_EXACT_MAX_N):
+    """
+    Calculate the Wilcoxon signed-rank statistic and two-sided p-value for paired data (column_1 - column_2) or one sample
+    (column_1 - hypothesized_median). Zero differences are dropped. Without ties the exact null distribution is used up to
+    exact_max_n non-zero differences (read from a precomputed table), and a tie-corrected normal approximation beyond that.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    column_1 (str): The first column (or the only column for a one-sample test).
+    column_2 (str, optional): The second column of paired data. Defaults to None (one-sample test).
+    hypothesized_median (float, optional): The hypothesized median for a one-sample test. Defaults to 0.
+    exact_max_n (int, optional): Largest number of non-zero differences for which the exact distribution is used. Defaults to 50.
+
+    Returns:
+    tuple: The test statistic (the smaller of the positive and negative rank sums) and the two-sided p-value.
+    """
+    dict_signed_rank_data = rank_cache.get_signed_rank_data(df, column_1, column_2, hypothesized_median)
+    return _signed_rank_statistic_and_p_value(dict_signed_rank_data, exact_max_n)
+
+
+def _signed_rank_statistic_and_p_value(dict_signed_rank_data, exact_max_n=exact_distributions.WILCOXON_EXACT_MAX_N):
+    """
+    The Wilcoxon signed-rank statistic and two-sided p-value from the cached signed-rank data (see wilcoxon_signed_rank_statistic).
+    """
+    n = dict_signed_rank_data['n']
+    tie_term = dict_signed_rank_data['tie_term']
+    t_stat = min(dict_signed_rank_data['t_plus'], dict_signed_rank_data['t_minus'])
+
+    if n == 0:
+        return t_stat, np.nan
+
+    if tie_term == 0 and dict_signed_rank_data['n_zeros'] == 0 and n <= exact_max_n:
+        p_value = exact_distributions.wilcoxon_signed_rank_exact_p_value(t_stat, n, exact_max_n)
+    else:
+        # normal approximation with tie correction
+        mean_t = n * (n + 1) / 4
+        sd_t = np.sqrt(n * (n + 1) * (2 * n + 1) / 24 - tie_term / 48)
+        p_value = float(2 * stats.norm.sf(abs(t_stat - mean_t) / sd_t))
+    return t_stat, p_value
+
+
+def wilcoxon_signed_rank(df, column_1, column_2, p_value_threshold=0.05):
+    """
+    Perform a Wilcoxon signed-rank test to determine if there is a significant difference between two related samples.
+
+    Args:
+    df (DataFrame): The dataframe containing the paired data, one column per measurement.
+    column_1 (str): The first set of paired measurements (e.g., pre-treatment scores).
+    column_2 (str): The second set of paired measurements (e.g., post-treatment scores).
+    p_value_threshold (float, optional): The threshold for determining statistical significance. Defaults to 0.05.
+
+    Returns:
+    tuple: The test statistic, the p-value of the test, and a plain English interpretation of the result.
+
+    Example:
+    >>> wilcoxon_signed_rank(pd.DataFrame({'before': [1.2, 1.5, 1.8, 2.0, 1.9], 'after': [1.1, 1.3, 1.4, 1.8, 1.6]}), 'before', 'after')
+    """
+    stat, p_value = wilcoxon_signed_rank_statistic(df, column_1, column_2)
+    # Interpret the result
+    if p_value < p_value_threshold:
+        result = "There is significant evidence to reject the null hypothesis. This suggests a statistically significant difference between the paired measurements."
+    else:
+        result = "There is not enough evidence to reject the null hypothesis. This suggests no statistically significant difference between the paired measurements."
+    return stat, p_value, result
+
+
+def wilcoxon_signed_rank_batch(df, list_column_pairs, p_value_threshold=0.05, correction='holm'):
+    """
+    Perform the Wilcoxon signed-rank test for many sets of paired columns and adjust the p-values for the number of tests.
+
+    Args:
+    df (DataFrame): The dataframe containing the paired data.
+    list_column_pairs (list): List of (column_1, column_2) tuples to test.
+    p_value_threshold (float, optional): The threshold for determining statistical significance. Defaults to 0.05.
+    correction (str, optional): Multiple testing correction passed to multiple_testing.adjust_p_values. Defaults to 'holm'.
+
+    Returns:
+    DataFrame: One row per column pair with the number of non-zero differences, test statistic, p-value, adjusted p-value and decision.
+
+    Example:
+    >>> wilcoxon_signed_rank_batch(df, [('week_0', 'week_4'), ('week_0', 'week_8')])
+    """
+    #one lookup of the cached signed-rank data per pair, for both the statistic and its number of non-zero differences
+    list_signed_rank_data = [rank_cache.get_signed_rank_data(df, column_1, column_2) for column_1, column_2 in list_column_pairs]
+    list_results = [_signed_rank_statistic_and_p_value(dict_signed_rank_data) for dict_signed_rank_data in list_signed_rank_data]
+
+    df_results = pd.DataFrame({
+        'Column 1': [column_1 for column_1, _ in list_column_pairs],
+        'Column 2': [column_2 for _, column_2 in list_column_pairs],
+        'n': [dict_signed_rank_data['n'] for dict_signed_rank_data in list_signed_rank_data],
+        'T statistic': [stat for stat, _ in list_results],
+        'p-value': [p_value for _, p_value in list_results],
+    })
+    return multiple_testing.add_adjusted_p_values(df_results, method=correction, alpha=p_value_threshold)
 
 
 
 #--------------------------
 #Kruskal Wallis
+def kruskal_wallis(df, group_column, value_column, p_value_threshold=0.05):
+    """
+    Perform a Kruskal-Wallis H-test to determine if there is a significant difference between the distributions of two or more independent groups.
+    The ranks are taken from the shared rank cache, so they are only computed once per dataset and column.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    group_column (str): The column in df that denotes the group.
+    value_column (str): The column in df that contains the values to be ranked.
+    p_value_threshold (float, optional): The threshold for determining statistical significance. Defaults to 0.05.
+
+    Returns:
+    tuple: The H statistic (corrected for ties), the p-value of the test, and a plain English interpretation of the result.
+
+    Raises:
+    ValueError: If there are fewer than two values or fewer than two groups with a value.
+
+    Example:
+    >>> kruskal_wallis(pd.DataFrame({'group': ['A', 'A', 'B', 'B', 'C', 'C'], 'value': [1, 2, 3, 4, 5, 6]}), 'group', 'value')
+    """
+    dict_rank_data = rank_cache.get_rank_data(df, value_column, group_column)
+    n = dict_rank_data['n']
+    group_sizes = dict_rank_data['group_sizes']
+    rank_sums = dict_rank_data['rank_sums']
+
+    present = group_sizes > 0
+    if n < 2 or np.count_nonzero(present) < 2:
+        raise ValueError(f"The Kruskal-Wallis test needs values in at least two groups, but '{value_column}' has {n} value(s) in {np.count_nonzero(present)} group(s) of '{group_column}'.")
+    tie_correction = 1 - dict_rank_data['tie_term'] / (n ** 3 - n)
+    if tie_correction <= 0:
+        #every value is tied, so all the groups have the same mean rank: there is no difference to detect
+        return 0.0, 1.0, "All the values are identical, so there is no difference between the groups to test."
+    h_stat = 12.0 / (n * (n + 1)) * np.sum(rank_sums[present] ** 2 / group_sizes[present]) - 3 * (n + 1)
+    h_stat /= tie_correction
+    p_value = stats.chi2.sf(h_stat, np.count_nonzero(present) - 1)
+    # Interpret the result
+    if p_value < p_value_threshold:
+        result = "There is significant evidence to reject the null hypothesis. This suggests at least one group comes from a different distribution than the others."
+    else:
+        result = "There is not enough evidence to reject the null hypothesis. This suggests the groups may come from the same distribution."
+    return h_stat, p_value, result
 
 
 
@@ -436,18 +567,176 @@ def one_sample_wilcoxon(data, hypothesized_median=0, p_value_threshold=0.05):
 
 #--------------------------
 #Mann-Whitney U Test
+def mann_whitney_u(df, group_column, value_column, p_value_threshold=0.05, exact_max_cells=10000):
+    """
+    Perform a Mann-Whitney U test to determine if there is a significant difference between the distributions of two independent groups.
+    Small samples without ties use the exact null distribution of U (memoized per pair of sample sizes). Otherwise a
+    tie-corrected normal approximation is used, computed from the shared rank cache, so very large samples only cost one sort.
+
+    Args:
+    df (DataFrame): The dataframe containing the data, in long format.
+    group_column (str): The column in df that denotes the group. Must contain exactly two groups.
+    value_column (str): The column in df that contains the values to be ranked.
+    p_value_threshold (float, optional): The threshold for determining statistical significance. Defaults to 0.05.
+    exact_max_cells (int, optional): Largest n1 * n2 for which the exact distribution is used. Defaults to 10000.
+
+    Returns:
+    tuple: The U statistic of the first group, the two-sided p-value of the test, and a plain English interpretation of the result.
+
+    Example:
+    >>> mann_whitney_u(pd.DataFrame({'group': ['A'] * 5 + ['B'] * 5, 'value': [1, 3, 5, 7, 9, 2, 4, 6, 8, 10]}), 'group', 'value')
+    """
+    dict_rank_data = rank_cache.get_rank_data(df, value_column, group_column)
+    if len(dict_rank_data['group_labels']) != 2:
+        raise ValueError(f"The Mann-Whitney U test needs exactly two groups, but '{group_column}' has {len(dict_rank_data['group_labels'])}.")
+
+    n = dict_rank_data['n']
+    n1, n2 = (int(size) for size in dict_rank_data['group_sizes'])
+    tie_term = dict_rank_data['tie_term']
+    u_stat = dict_rank_data['rank_sums'][0] - n1 * (n1 + 1) / 2
+
+    if tie_term == 0 and exact_distributions.mann_whitney_u_exact_is_feasible(n1, n2, exact_max_cells):
+        p_value = exact_distributions.mann_whitney_u_exact_p_value(u_stat, n1, n2)
+    else:
+        # normal approximation with tie correction and continuity correction
+        mean_u = n1 * n2 / 2
+        sd_u = np.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+        z_stat = (max(u_stat, n1 * n2 - u_stat) - mean_u - 0.5) / sd_u
+        p_value = float(min(1.0, 2 * stats.norm.sf(z_stat)))
+    # Interpret the result
+    if p_value < p_value_threshold:
+        result = "There is significant evidence to reject the null hypothesis. This suggests the distributions of the two groups are different."
+    else:
+        result = "There is not enough evidence to reject the null hypothesis. This suggests the distributions of the two groups may be the same."
+    return u_stat, p_value, result
 
 
 
 
 #--------------------------
 #Spearman Rank Correlation
+def spearman_rank_correlation(df, column_1, column_2, p_value_threshold=0.05):
+    """
+    Calculate Spearman's rank correlation coefficient between two columns, using ranks from the shared rank cache.
+    Rows with a missing value in either column are excluded.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    column_1 (str): The first column.
+    column_2 (str): The second column.
+    p_value_threshold (float, optional): The threshold for determining statistical significance. Defaults to 0.05.
+
+    Returns:
+    tuple: Spearman's rho, the two-sided p-value of the test, and a plain English interpretation of the result.
+
+    Example:
+    >>> spearman_rank_correlation(pd.DataFrame({'x': [1, 2, 3, 4, 5], 'y': [5, 6, 7, 8, 7]}), 'x', 'y')
+    """
+    df_complete = df[[column_1, column_2]].dropna()
+    ranks_1 = rank_cache.get_rank_data(df_complete, column_1)['ranks']
+    ranks_2 = rank_cache.get_rank_data(df_complete, column_2)['ranks']
+    n = ranks_1.size
+
+    rho = np.corrcoef(ranks_1, ranks_2)[0, 1]
+    # t-distribution approximation, as used by scipy.stats.spearmanr
+    with np.errstate(divide='ignore'):
+        t_stat = rho * np.sqrt((n - 2) / ((1.0 - rho) * (1.0 + rho)))
+    p_value = 2 * stats.t.sf(np.abs(t_stat), n - 2)
+    # Interpret the result
+    if p_value < p_value_threshold:
+        result = "There is significant evidence to reject the null hypothesis. This suggests a statistically significant monotonic relationship between the two variables."
+    else:
+        result = "There is not enough evidence to reject the null hypothesis. This suggests no statistically significant monotonic relationship between the two variables."
+    return rho, p_value, result
 
 
 
 
 #--------------------------
 #Kendall’s Tau
+def _tie_counts(codes):
+    """
+    Sums over groups of tied values (of size t) the terms used by Kendall's Tau: t(t-1)/2, t(t-1)(t-2) and t(t-1)(2t+5).
+    """
+    counts = np.bincount(codes).astype(float)
+    counts = counts[counts > 1]
+    return (counts * (counts - 1) / 2).sum(), (counts * (counts - 1) * (counts - 2)).sum(), (counts * (counts - 1) * (2 * counts + 5)).sum()
+
+
+def _ordinal_codes(series):
+    """
+    Returns dense integer codes for an ordinal column, in the order of its values: the category order of an ordered
+    Categorical, otherwise the numeric order. Text labels (e.g. 'Agree', 'Disagree', 'Neutral') would sort
+    alphabetically rather than in their meaningful order, so they are refused.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        if not series.cat.ordered:
+            raise ValueError(f"'{series.name}' is an unordered categorical, so its levels cannot be ranked. Make it an ordered Categorical or code the levels as numbers.")
+        _, codes = np.unique(series.cat.codes.to_numpy(), return_inverse=True)
+        return codes
+    if not pd.api.types.is_numeric_dtype(series.dtype):
+        raise ValueError(f"'{series.name}' holds text, which would be ranked alphabetically rather than in its meaningful order. Code the levels as numbers (e.g. 1 = Disagree, 2 = Neutral, 3 = Agree) or make it an ordered Categorical.")
+    _, codes = np.unique(series.to_numpy(), return_inverse=True)
+    return codes
+
+
+def kendall_tau(df, column_1, column_2, p_value_threshold=0.05):
+    """
+    Calculate Kendall's Tau-b between two columns, with a tie-corrected normal approximation for the p-value.
+    Follows Knight's algorithm: sort the pairs by the first column (then the second) and count the discordant pairs
+    as the inversions left in the second column, so the cost is O(n log n) rather than comparing every pair.
+    Rows with a missing value in either column are excluded. Ordinal columns must be numeric codes or ordered
+    Categoricals, as text labels would be ranked alphabetically.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    column_1 (str): The first column (ordinal or continuous).
+    column_2 (str): The second column (ordinal or continuous).
+    p_value_threshold (float, optional): The threshold for determining statistical significance. Defaults to 0.05.
+
+    Returns:
+    tuple: Kendall's Tau-b, the two-sided p-value of the test, and a plain English interpretation of the result.
+
+    Example:
+    >>> kendall_tau(pd.DataFrame({'x': [1, 2, 2, 3, 4], 'y': [1, 3, 2, 2, 4]}), 'x', 'y')
+    """
+    df_complete = df[[column_1, column_2]].dropna()
+    # dense integer codes: equal values share a code, and the order of the values is kept
+    x_codes = _ordinal_codes(df_complete[column_1])
+    y_codes = _ordinal_codes(df_complete[column_2])
+    n = x_codes.size
+
+    order = np.lexsort((y_codes, x_codes))
+    x_codes = x_codes[order]
+    y_codes = y_codes[order]
+
+    # pairs tied on both columns
+    is_new_pair = np.r_[True, (x_codes[1:] != x_codes[:-1]) | (y_codes[1:] != y_codes[:-1]), True]
+    joint_counts = np.diff(np.flatnonzero(is_new_pair)).astype(float)
+    joint_ties = (joint_counts * (joint_counts - 1) / 2).sum()
+
+    x_ties, x_ties_0, x_ties_1 = _tie_counts(x_codes)
+    y_ties, y_ties_0, y_ties_1 = _tie_counts(y_codes)
+
+    discordant = rank_cache.count_inversions(y_codes)
+    total_pairs = n * (n - 1) / 2
+    concordant_minus_discordant = total_pairs - x_ties - y_ties + joint_ties - 2 * discordant
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tau = concordant_minus_discordant / np.sqrt(total_pairs - x_ties) / np.sqrt(total_pairs - y_ties)
+
+        # variance of (concordant - discordant) under the null hypothesis, corrected for ties
+        m = n * (n - 1.0)
+        variance = ((m * (2 * n + 5) - x_ties_1 - y_ties_1) / 18
+                    + (2 * x_ties * y_ties) / m
+                    + x_ties_0 * y_ties_0 / (9 * m * (n - 2)))
+        p_value = float(2 * stats.norm.sf(np.abs(concordant_minus_discordant) / np.sqrt(variance)))
+    # Interpret the result
+    if p_value < p_value_threshold:
+        result = "There is significant evidence to reject the null hypothesis. This suggests a statistically significant association between the rankings of the two variables."
+    else:
+        result = "There is not enough evidence to reject the null hypothesis. This suggests no statistically significant association between the rankings of the two variables."
+    return float(tau), p_value, result
 
 
 
@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from functions import performance_tracking
+
+#------------------------------------
+# <<< Cached subject x condition matrix from long-format data >>>
+#------------------------------------
+
+def _mean_of_present(values, axis, keepdims=False):
+    """
+    Mean of the values that are not NaN along axis, and NaN where there are none. Unlike np.nanmean, a subject or
+    condition with no values does not emit a 'Mean of empty slice' warning (which np.errstate does not silence).
+    """
+    present = ~np.isnan(values)
+    totals = np.where(present, values, 0.0).sum(axis=axis, keepdims=keepdims)
+    counts = present.sum(axis=axis, keepdims=keepdims)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return totals / counts
+
+
+@performance_tracking.tracked_cache(st.cache_resource(show_spinner=False, max_entries=16))
+def get_subject_condition_matrix(df, subject_column, condition_column, value_column):
+    """
+    Pivots long-format repeated measures data (one row per subject and condition) into a subject x condition
+    matrix, computed once per (dataset, subject, condition, value) column triple. Subjects and conditions are
+    integer-coded, each row maps to one flat cell index, and np.bincount accumulates the sums and counts, so no
+    pandas pivot_table is built. Cells with no value are NaN; cells with repeated values hold their mean.
+    Rows with a missing subject, condition or value are excluded. The returned arrays should not be modified.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    subject_column (str): The column identifying the subject.
+    condition_column (str): The column identifying the condition (time point).
+    value_column (str): The column containing the numerical values.
+
+    Returns:
+    dict: 'matrix' (one row per subject, one column per condition), 'subjects' and 'conditions' (the labels
+          of the rows and columns), 'number_of_missing_cells' and 'number_of_repeated_cells'.
+    """
+    subject_codes, subjects = pd.factorize(df[subject_column], sort=True)
+    condition_codes, conditions = pd.factorize(df[condition_column], sort=True)
+    values = pd.to_numeric(df[value_column], errors='coerce').to_numpy(dtype=float)
+
+    complete = (subject_codes >= 0) & (condition_codes >= 0) & ~np.isnan(values)
+    shape = (len(subjects), len(conditions))
+    cell_codes = subject_codes[complete].astype(np.int64) * shape[1] + condition_codes[complete]
+
+    counts = np.bincount(cell_codes, minlength=shape[0] * shape[1])
+    sums = np.bincount(cell_codes, weights=values[complete], minlength=shape[0] * shape[1])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        matrix = (sums / counts).reshape(shape)
+
+    dict_matrix = {
+        'matrix': matrix,
+        'subjects': subjects,
+        'conditions': conditions,
+        'number_of_missing_cells': int(np.sum(counts == 0)),
+        'number_of_repeated_cells': int(np.sum(counts > 1)),
+    }
+    matrix.flags.writeable = False
+    return dict_matrix
+
+def wide_format_blocks(df, condition_columns, block_size=100000):
+    """
+    Yields the subject x condition matrix of wide-format data (one row per subject, one column per condition)
+    block by block, so the selected columns are never converted to one large array. Non-numeric values become NaN.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    condition_columns (tuple): The columns holding the conditions.
+    block_size (int, optional): Number of subjects per block. Defaults to 100000.
+
+    Yields:
+    ndarray: Consecutive blocks of rows of the matrix.
+    """
+    for start in range(0, len(df), block_size):
+        yield df.iloc[start:start + block_size][list(condition_columns)].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+
+#------------------------------------
+# <<< Missing cell policies >>>
+#------------------------------------
+
+list_missing_value_policies = ['Complete cases only', 'Impute from subject and condition means']
+
+
+def matrix_blocks(matrix, missing_value_policy='Complete cases only', block_size=100000):
+    """
+    Yields the subject x condition matrix block by block, applying the missing cell policy to each block:
+    - 'Complete cases only': blocks are returned as they are, and subjects with a missing cell are dropped by the consumer.
+    - 'Impute from subject and condition means': a missing cell is filled with its condition mean plus the subject's
+      average deviation from the condition means over the conditions it has (an additive subject + condition fit).
+      Subjects with no values at all stay missing.
+
+    Args:
+    matrix (ndarray): The subject x condition matrix, NaN where a cell is missing.
+    missing_value_policy (str, optional): One of list_missing_value_policies. Defaults to 'Complete cases only'.
+    block_size (int, optional): Number of subjects per block. Defaults to 100000.
+
+    Yields:
+    ndarray: Consecutive blocks of rows of the (imputed) matrix.
+    """
+    if missing_value_policy == 'Complete cases only':
+        for start in range(0, matrix.shape[0], block_size):
+            yield matrix[start:start + block_size]
+        return
+
+    condition_means = _mean_of_present(matrix, axis=0)
+    for start in range(0, matrix.shape[0], block_size):
+        block = matrix[start:start + block_size]
+        missing = np.isnan(block)
+        if not missing.any():
+            yield block
+            continue
+        subject_effects = _mean_of_present(block - condition_means, axis=1, keepdims=True)
+        yield np.where(missing, condition_means + subject_effects, block)
+
+#------------------------------------
+# <<< Data format selection >>>
+#------------------------------------
+
+def select_long_format_columns(df, allow_imputation=True):
+    """
+    Renders select boxes for the subject, condition and value columns of long-format data, and a radio for the
+    missing cell policy.
+
+    Args:
+    df (DataFrame): The dataframe from which columns will be selected.
+    allow_imputation (bool, optional): Whether to offer imputation; if False, only complete cases are used. Defaults to True.
+
+    Returns:
+    tuple: (subject_column, condition_column, value_column, missing_value_policy), with None for the columns if the selection is incomplete.
+    """
+    default_option = "---"
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        subject_column = st.selectbox(
+            "Select the Subject Column",
+            options=[default_option] + list(df.columns),
+            help="This should be the column that uniquely identifies each subject or participant in the study."
+        )
+
+    with col2:
+        condition_column = st.selectbox(
+            "Select the Condition Column",
+            options=[default_option] + list(df.columns),
+            help="The column holding the condition or time point of each measurement."
+        )
+
+    with col3:
+        value_column = st.selectbox(
+            "Select the Value Column",
+            options=[default_option] + list(df.columns),
+            help="The column holding the measurements."
+        )
+
+    if allow_imputation:
+        missing_value_policy = st.radio(
+            "How should subjects with a missing condition be handled?",
+            options=list_missing_value_policies,
+            horizontal=True,
+            help="Imputing keeps every subject, but the imputed values carry no error of their own, so the test can be slightly liberal."
+        )
+    else:
+        missing_value_policy = 'Complete cases only'
+
+    if default_option in (subject_column, condition_column, value_column):
+        return None, None, None, missing_value_policy
+    return subject_column, condition_column, value_column, missing_value_policy
@@ -0,0 +1,320 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+#------------------------------------
+# <<< Shared helpers >>>
+#------------------------------------
+#the synthetic datasets have the same structure (and column names) as the dummy data of each test, but any number
+#of rows. Each chunk of rows is drawn with its own Generator, so only one chunk is ever held in memory.
+
+def _labels(prefix, number_of_labels):
+    """
+    Labels prefix + A, B, ... (or prefix + 1, 2, ... beyond 26 labels).
+    """
+    if number_of_labels <= 26:
+        return [f'{prefix}{chr(65 + i)}' for i in range(number_of_labels)]
+    return [f'{prefix}{i + 1}' for i in range(number_of_labels)]
+
+
+def _noise(rng, shape, skew=0.0, outlier_fraction=0.0, outlier_scale=6.0):
+    """
+    Draws noise with mean 0 and standard deviation 1: normal when skew is 0, otherwise a standardized log-normal
+    with log-scale standard deviation |skew| (mirrored for negative skew). A fraction of the values is then moved
+    outlier_scale standard deviations up or down.
+    """
+    noise = rng.standard_normal(shape)
+    if skew != 0:
+        sigma = abs(skew)
+        noise = np.sign(skew) * (np.exp(sigma * noise) - np.exp(sigma ** 2 / 2)) / np.sqrt((np.exp(sigma ** 2) - 1) * np.exp(sigma ** 2))
+    if outlier_fraction > 0:
+        is_outlier = rng.random(shape) < outlier_fraction
+        noise[is_outlier] += outlier_scale * rng.choice([-1.0, 1.0], size=int(is_outlier.sum()))
+    return noise
+
+
+def _round(values, decimals):
+    """
+    Rounds the values when decimals is set, which creates ties (decimals=0 gives integer scores).
+    """
+    return values if decimals is None else np.round(values, decimals)
+
+#------------------------------------
+# <<< Chunk layouts >>>
+#------------------------------------
+#every layout draws number_of_rows rows starting at row number start, and returns them as a DataFrame
+
+def _chunk_continuous_columns(rng, start, number_of_rows, dict_controls, column_names=None, column_prefix=None, number_of_columns=None,
+                              subject_column=None, mean=50.0, sd=10.0, correlation=0.0, decimals=None):
+    """
+    Continuous columns (one row per subject) with a shared subject component giving them the given correlation;
+    column j is shifted by j * effect_size standard deviations. The number of columns is set by number_of_groups
+    when the columns are named from a prefix.
+    """
+    if column_names is None:
+        column_names = _labels(column_prefix, dict_controls['number_of_groups'] or number_of_columns)
+    shape = (number_of_rows, len(column_names))
+    subject_effects = _noise(rng, (number_of_rows, 1), dict_controls['skew'])
+    values = np.sqrt(correlation) * subject_effects + np.sqrt(1 - correlation) * _noise(rng, shape, dict_controls['skew'], dict_controls['outlier_fraction'])
+    values = mean + sd * (values + dict_controls['effect_size'] * np.arange(len(column_names)))
+
+    df = pd.DataFrame(_round(values, dict_controls['decimals'] if dict_controls['decimals'] is not None else decimals), columns=column_names)
+    if subject_column is not None:
+        df.insert(0, subject_column, np.arange(start + 1, start + number_of_rows + 1))
+    return df
+
+
+def _chunk_group_value(rng, start, number_of_rows, dict_controls, group_columns, value_column, covariate_column=None,
+                       mean=50.0, sd=10.0, decimals=None):
+    """
+    Long format: one or more group columns (each {name: number of levels}, the first set by number_of_groups) and a
+    value column, shifted by effect_size standard deviations per level of the first group column (and half that
+    per level of the others). An optional covariate explains a quarter of the value's variance.
+    """
+    dict_columns = {}
+    shift = np.zeros(number_of_rows)
+    for i, (group_column, number_of_levels) in enumerate(group_columns.items()):
+        if i == 0 and dict_controls['number_of_groups']:
+            number_of_levels = dict_controls['number_of_groups']
+        codes = rng.integers(0, number_of_levels, size=number_of_rows)
+        dict_columns[group_column] = pd.Categorical.from_codes(codes, categories=_labels(f'{group_column}_', number_of_levels))
+        shift += dict_controls['effect_size'] * codes * (1.0 if i == 0 else 0.5)
+
+    noise = _noise(rng, number_of_rows, dict_controls['skew'], dict_controls['outlier_fraction'])
+    if covariate_column is not None:
+        covariate = _noise(rng, number_of_rows, dict_controls['skew'])
+        dict_columns[covariate_column] = _round(mean + sd * covariate, dict_controls['decimals'] if dict_controls['decimals'] is not None else decimals)
+        noise = 0.5 * covariate + np.sqrt(0.75) * noise
+    dict_columns[value_column] = _round(mean + sd * (noise + shift), dict_controls['decimals'] if dict_controls['decimals'] is not None else decimals)
+    return pd.DataFrame(dict_columns)
+
+
+def _chunk_categorical(rng, start, number_of_rows, dict_controls, dict_levels, subject_column=None):
+    """
+    Categorical columns ({name: list of labels, or number of levels set by number_of_groups}). The first column is
+    uniform; in each later column a fraction effect_size / 2 of the rows copy the previous column's level and the
+    rest are uniform, which makes the columns associated.
+    """
+    dict_columns = {}
+    previous_codes = None
+    association = min(max(dict_controls['effect_size'], 0.0), 1.0) / 2
+    for column, levels in dict_levels.items():
+        labels = list(levels) if isinstance(levels, (list, tuple)) else _labels(f'{column}_', dict_controls['number_of_groups'] or levels)
+        codes = rng.integers(0, len(labels), size=number_of_rows)
+        if previous_codes is not None:
+            copy = rng.random(number_of_rows) < association
+            codes[copy] = previous_codes[copy] % len(labels)
+        dict_columns[column] = pd.Categorical.from_codes(codes, categories=labels)
+        previous_codes = codes
+
+    df = pd.DataFrame(dict_columns)
+    if subject_column is not None:
+        df.insert(0, subject_column, np.arange(start + 1, start + number_of_rows + 1))
+    return df
+
+
+def _count_table(rng, total, dict_controls, category_column='Category', count_column='Observed', labels=None, number_of_categories=5):
+    """
+    Goodness of fit count table: one row per category with counts summing to total, so for these tests the number
+    of rows requested is the total count. The category probabilities are proportional to exp(effect_size * t) for
+    t evenly spaced from -1 to 1.
+    """
+    if labels is None:
+        labels = _labels('Category_', dict_controls['number_of_groups'] or number_of_categories)
+    probabilities = np.exp(dict_controls['effect_size'] * np.linspace(-1, 1, len(labels)))
+    counts = rng.multinomial(total, probabilities / probabilities.sum())
+    return pd.DataFrame({category_column: labels, count_column: counts})
+
+#------------------------------------
+# <<< Layouts of every test >>>
+#------------------------------------
+
+dict_synthetic_layouts = {
+    'Chi-square goodness of fit': (_count_table, {}),
+    'Chi-square test of independence': (_chunk_categorical, {'dict_levels': {'Gender': ['Male', 'Female'], 'Preference': 2}}),
+    "Cramer's V": (_chunk_categorical, {'dict_levels': {'Variable_1': 3, 'Variable_2': 3}}),
+    'Exact test of Goodness of Fit (multinomial model)': (_count_table, {'number_of_categories': 4}),
+    'Exact test of Goodness of Fit': (_count_table, {'labels': ['Heads', 'Tails']}),
+    'Factorial ANOVA': (_chunk_group_value, {'group_columns': {'Fertilizer': 3, 'Irrigation': 2}, 'value_column': 'Yield', 'decimals': 1}),
+    'Fischers Exact test': (_chunk_categorical, {'dict_levels': {'Group': ['Treatment', 'Control'], 'Outcome': ['Success', 'Failure']}}),
+    'Friedman test': (_chunk_continuous_columns, {'column_prefix': 'Product_', 'number_of_columns': 4, 'subject_column': 'SubjectID', 'correlation': 0.5, 'mean': 5.0, 'sd': 2.0, 'decimals': 0}),
+    'G-test of Goodness of Fit': (_count_table, {}),
+    'G-test': (_chunk_categorical, {'dict_levels': {'Variable_1': 2, 'Variable_2': 2}}),
+    'Independent samples T-test': (_chunk_continuous_columns, {'column_names': ['sample1', 'sample2']}),
+    'Independent samples Z-test': (_chunk_continuous_columns, {'column_names': ['sample_1', 'sample_2']}),
+    "Kendall's Tau": (_chunk_continuous_columns, {'column_names': ['Satisfaction', 'Likelihood_To_Recommend'], 'correlation': 0.5, 'mean': 5.0, 'sd': 2.0, 'decimals': 0}),
+    'Kruskal-Wallis': (_chunk_group_value, {'group_columns': {'Group': 3}, 'value_column': 'Score'}),
+    'Log-linear analysis': (_chunk_categorical, {'dict_levels': {'Smoker': ['Yes', 'No'], 'Exercise': ['Yes', 'No'], 'Heart_Disease': ['Yes', 'No']}}),
+    'Mann-Whitney U Test': (_chunk_group_value, {'group_columns': {'Therapy': 2}, 'value_column': 'Pain_Relief_Score'}),
+    'McNemars test': (_chunk_categorical, {'dict_levels': {'Before': ['Pass', 'Fail'], 'After': ['Pass', 'Fail']}, 'subject_column': 'Participant'}),
+    'One-proportion z-test': (_chunk_categorical, {'dict_levels': {'Outcome': ['Success', 'Failure']}}),
+    'One-way ANCOVA': (_chunk_group_value, {'group_columns': {'Teaching_Method': 3}, 'value_column': 'Post_Test', 'covariate_column': 'Pre_Test', 'decimals': 0}),
+    'One-way ANOVA': (_chunk_group_value, {'group_columns': {'Group': 3}, 'value_column': 'Value'}),
+    'One-way Repeated Measures ANOVA': (_chunk_continuous_columns, {'column_names': ['Baseline', 'Time1', 'Time2'], 'subject_column': 'SubjectID', 'correlation': 0.5}),
+    'Paired samples T-test': (_chunk_continuous_columns, {'column_names': ['sample1_time_point_A', 'sample1_time_point_B'], 'correlation': 0.5}),
+    'Paired samples Z-test': (_chunk_continuous_columns, {'column_names': ['before', 'after'], 'correlation': 0.5}),
+    'Partial correlation': (_chunk_continuous_columns, {'column_names': ['Age', 'Exercise_Hours', 'BMI', 'Blood_Pressure'], 'correlation': 0.3, 'decimals': 1}),
+    'Pearson correlation': (_chunk_continuous_columns, {'column_names': ['Variable1', 'Variable2'], 'correlation': 0.5}),
+    'Phi co-efficient': (_chunk_categorical, {'dict_levels': {'Variable_1': ['Yes', 'No'], 'Variable_2': ['Yes', 'No']}}),
+    "Point biserial correlation": (_chunk_group_value, {'group_columns': {'Group': 2}, 'value_column': 'Value'}),
+    'Single sample T-test': (_chunk_continuous_columns, {'column_names': ['Values']}),
+    'Single sample wilcoxon signed-rank test': (_chunk_continuous_columns, {'column_names': ['sample1']}),
+    'Single sample Z-test': (_chunk_continuous_columns, {'column_names': ['Values']}),
+    "Spearman's Rho": (_chunk_continuous_columns, {'column_names': ['Variable1', 'Variable2'], 'correlation': 0.5, 'decimals': 0}),
+    'Two proportion z-test': (_chunk_categorical, {'dict_levels': {'Group': ['A', 'B'], 'Outcome': ['Success', 'Failure']}}),
+    'Wilcoxon signed-rank test': (_chunk_continuous_columns, {'column_names': ['sample1_time_point_A', 'sample1_time_point_B'], 'correlation': 0.5}),
+}
+
+#------------------------------------
+# <<< Generating and writing the datasets >>>
+#------------------------------------
+
+def generate_synthetic_chunks(test_name, number_of_rows, chunk_size=1_000_000, random_seed=42, skew=0.0, outlier_fraction=0.0,
+                              missing_fraction=0.0, number_of_groups=None, decimals=None, effect_size=0.5):
+    """
+    Yields a synthetic dataset for a test chunk by chunk. Chunk i is drawn from SeedSequence(random_seed,
+    spawn_key=(i,)), so the same arguments always give the same data, and only one chunk is held in memory.
+    For the goodness of fit tests the data is a count table and number_of_rows is the total count.
+
+    Args:
+    test_name (str): A key of dict_synthetic_layouts (every test in the app's list).
+    number_of_rows (int): Number of rows (observations or subjects).
+    chunk_size (int, optional): Rows per chunk. Defaults to 1000000.
+    random_seed (int, optional): Seed of the SeedSequence. Defaults to 42.
+    skew (float, optional): 0 for normal data; otherwise the log-scale standard deviation of log-normal data (negative for left skew). Defaults to 0.
+    outlier_fraction (float, optional): Fraction of values moved 6 standard deviations up or down. Defaults to 0.
+    missing_fraction (float, optional): Fraction of values (other than subject IDs) set to missing. Defaults to 0.
+    number_of_groups (int, optional): Number of groups, levels, conditions or categories; the test's default if None. Defaults to None.
+    decimals (int, optional): Decimals the continuous values are rounded to (fewer decimals give more ties); the test's default if None. Defaults to None.
+    effect_size (float, optional): Size of the group differences, correlation or association built into the data. Defaults to 0.5.
+
+    Yields:
+    DataFrame: Consecutive chunks of the dataset.
+
+    Example:
+    >>> for df_chunk in generate_synthetic_chunks('One-way ANOVA', 10**7, skew=1.0, missing_fraction=0.01): ...
+    """
+    layout, dict_layout_kwargs = dict_synthetic_layouts[test_name]
+    dict_controls = {'skew': skew, 'outlier_fraction': outlier_fraction, 'number_of_groups': number_of_groups,
+                     'decimals': decimals, 'effect_size': effect_size}
+
+    if layout is _count_table:
+        rng = np.random.default_rng(np.random.SeedSequence(random_seed, spawn_key=(0,)))
+        list_chunks = [(0, layout(rng, number_of_rows, dict_controls, **dict_layout_kwargs))]
+    else:
+        list_chunks = ((start, None) for start in range(0, number_of_rows, chunk_size))
+
+    for chunk, (start, df_chunk) in enumerate(list_chunks):
+        rng = np.random.default_rng(np.random.SeedSequence(random_seed, spawn_key=(chunk,)))
+        if df_chunk is None:
+            df_chunk = layout(rng, start, min(chunk_size, number_of_rows - start), dict_controls, **dict_layout_kwargs)
+
+        if missing_fraction > 0:
+            for column in df_chunk.columns:
+                if column != dict_layout_kwargs.get('subject_column'):
+                    df_chunk[column] = df_chunk[column].mask(rng.random(len(df_chunk)) < missing_fraction)
+        yield df_chunk
+
+
+def create_synthetic_data(test_name, number_of_rows, **kwargs):
+    """
+    Returns a synthetic dataset for a test as one DataFrame (for datasets that fit in memory).
+
+    Args:
+    test_name (str): A key of dict_synthetic_layouts.
+    number_of_rows (int): Number of rows.
+    **kwargs: Passed to generate_synthetic_chunks.
+
+    Returns:
+    DataFrame: The dataset.
+    """
+    return pd.concat(generate_synthetic_chunks(test_name, number_of_rows, **kwargs), ignore_index=True)
+
+
+def write_synthetic_dataset(test_name, path, number_of_rows, chunk_size=1_000_000, **kwargs):
+    """
+    Streams a synthetic dataset for a test to a Parquet (.parquet) or CSV (.csv) file chunk by chunk, so memory use
+    is bounded by the chunk size whatever the number of rows. Parquet chunks are written as row groups with the
+    schema of the first chunk; CSV chunks are appended.
+
+    Args:
+    test_name (str): A key of dict_synthetic_layouts.
+    path (str): The file to write, ending in .parquet or .csv.
+    number_of_rows (int): Number of rows.
+    chunk_size (int, optional): Rows per chunk. Defaults to 1000000.
+    **kwargs: Passed to generate_synthetic_chunks (seed, skew, outliers, missingness, groups, ties, effect size).
+
+    Returns:
+    dict: 'path', 'rows', 'chunks', 'bytes' (file size) and 'seconds' (time taken).
+    """
+    file_format = os.path.splitext(path)[1].lower()
+    if file_format not in ('.parquet', '.csv'):
+        raise ValueError("The path should end in .parquet or .csv.")
+
+    start_time = time.perf_counter()
+    number_of_rows_written, number_of_chunks = 0, 0
+
+    if file_format == '.parquet':
+        #pyarrow is only needed to write parquet files, so it is imported here
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for df_chunk in generate_synthetic_chunks(test_name, number_of_rows, chunk_size=chunk_size, **kwargs):
+                if writer is None:
+                    table = pa.Table.from_pandas(df_chunk, preserve_index=False)
+                    writer = pq.ParquetWriter(path, table.schema)
+                else:
+                    table = pa.Table.from_pandas(df_chunk, schema=writer.schema, preserve_index=False)
+                writer.write_table(table)
+                number_of_rows_written += len(df_chunk)
+                number_of_chunks += 1
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        for df_chunk in generate_synthetic_chunks(test_name, number_of_rows, chunk_size=chunk_size, **kwargs):
+            df_chunk.to_csv(path, mode='w' if number_of_chunks == 0 else 'a', header=number_of_chunks == 0, index=False)
+            number_of_rows_written += len(df_chunk)
+            number_of_chunks += 1
+
+    dict_summary = {
+        'path': path,
+        'rows': number_of_rows_written,
+        'chunks': number_of_chunks,
+        'bytes': os.path.getsize(path),
+        'seconds': time.perf_counter() - start_time,
+    }
+    return dict_summary
+
+#------------------------------------
+# <<< Command line >>>
+#------------------------------------
+#e.g. python -m stats_test_functions.synthetic_data_generator "One-way ANOVA" anova.parquet --rows 100000000 --skew 1
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a synthetic dataset for a stats test to a Parquet or CSV file.')
+    parser.add_argument('test_name', choices=list(dict_synthetic_layouts), metavar='test_name', help='The test, as named in the app.')
+    parser.add_argument('path', help='The file to write, ending in .parquet or .csv.')
+    parser.add_argument('--rows', type=float, default=10**6, help='Number of rows (e.g. 1e8).')
+    parser.add_argument('--chunk-size', type=int, default=10**6, help='Rows per chunk held in memory.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skew', type=float, default=0.0)
+    parser.add_argument('--outliers', type=float, default=0.0, help='Fraction of outlying values.')
+    parser.add_argument('--missing', type=float, default=0.0, help='Fraction of missing values.')
+    parser.add_argument('--groups', type=int, default=None, help='Number of groups, levels, conditions or categories.')
+    parser.add_argument('--decimals', type=int, default=None, help='Decimals to round to (fewer give more ties).')
+    parser.add_argument('--effect-size', type=float, default=0.5)
+    args = parser.parse_args()
+
+    dict_summary = write_synthetic_dataset(
+        args.test_name, args.path, int(args.rows), chunk_size=args.chunk_size, random_seed=args.seed, skew=args.skew,
+        outlier_fraction=args.outliers, missing_fraction=args.missing, number_of_groups=args.groups,
+        decimals=args.decimals, effect_size=args.effect_size
+    )
+    print(f"Wrote {dict_summary['rows']:,} rows in {dict_summary['chunks']} chunks to {dict_summary['path']} "
+          f"({dict_summary['bytes'] / 10**6:,.1f} MB, {dict_summary['seconds']:.1f}s)")
@@ -0,0 +1,276 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+import altair as alt
+
+from functions import performance_tracking
+from functions import user_inputs
+from stats_test_functions import rank_cache
+from stats_test_functions import exact_distributions
+
+
+#------------------------------------
+# <<< Function to render assumptions >>>
+#------------------------------------
+#non-parametric alternative to the paired t-test (two related samples) and the
+# one-sample t-test (one sample against a hypothesized median)
+
+def display_wilcoxon_signed_rank_test_assumptions(one_sample=False):
+    """
+    Displays the assumptions required for conducting the Wilcoxon signed-rank test.
+
+    Args:
+    one_sample (bool, optional): True for the single sample version of the test. Defaults to False.
+    """
+    if one_sample:
+        differences_text = "the differences between each value and the hypothesized median"
+        dependence_text = "The observations must be independent of each other."
+    else:
+        differences_text = "the differences between each pair of measurements"
+        dependence_text = "The two measurements must be paired (e.g. before and after on the same subject), and the pairs must be independent of each other."
+
+    dict_assumptions = {
+        "Paired or Single Sample Data": dependence_text,
+        "Scale of Measurement": "The data should be at least ordinal, so that the differences can be ranked by size.",
+        "Symmetry": f"The distribution of {differences_text} should be roughly symmetric around its median.",
+        "Zero Differences and Ties": "Zero differences are dropped before ranking, and tied differences share the average rank. With ties or zeros the p-value uses a tie-corrected normal approximation instead of the exact distribution."
+    }
+
+    with st.expander("Click for Wilcoxon signed-rank test Assumptions"):
+        for key, value in dict_assumptions.items():
+            st.write(f":red[**{key}**:]\n{value}")
+
+#------------------------------------
+# <<< Function to select the column and hypothesized median (single sample) >>>
+#------------------------------------
+
+def select_column_and_median_for_single_sample_wilcoxon(df):
+    """
+    Renders a select box for the data column and a number input for the hypothesized median.
+
+    Args:
+    df (DataFrame): The dataframe from which a column will be selected.
+
+    Returns:
+    tuple: The selected column name (or None if "---" is selected) and the hypothesized median.
+    """
+    st.write("Please select the column for your analysis:")
+
+    default_option = "---"
+    options = [default_option] + list(df.columns)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_column = st.selectbox(
+            "Select the Data Column",
+            options=options,
+            help="Select the column that contains the data to compare against the hypothesized median."
+        )
+    with col2:
+        hypothesized_median = st.number_input(
+            "Enter the hypothesized median",
+            value=0.0,
+            help="The value the median of the data is compared against."
+        )
+
+    if selected_column == default_option:
+        return None, hypothesized_median
+    return selected_column, hypothesized_median
+
+#----------------------------
+#Confirm paired data and scale of measurement assumptions
+#----------------------------
+
+def explain_paired_data_requirement(one_sample=False):
+    """
+    Provides information about the paired (or single sample) data requirement for the Wilcoxon signed-rank test.
+
+    Args:
+    one_sample (bool, optional): True for the single sample version of the test. Defaults to False.
+    """
+    with st.expander("Click for explanation"):
+        if one_sample:
+            st.write("""
+            **Single Sample Data:**
+            \nThe single sample Wilcoxon signed-rank test compares each value with a hypothesized median. The observations must be independent of each other.
+            """)
+        else:
+            st.write("""
+            **Paired Data Requirement:**
+            \nThe Wilcoxon signed-rank test compares two related measurements on the same subjects, such as before and after a treatment. Each row must hold both measurements for one subject, and different subjects must be independent.
+            """)
+
+    with st.expander("Click for interpretation"):
+        st.write("""
+        **Interpreting the Requirement:**
+        - **Data Meet the Requirement:** Suitable for the Wilcoxon signed-rank test.
+        - **The Two Samples Are Independent Groups:** Use the Mann-Whitney U test instead.
+        """)
+
+
+def explain_scale_of_measurement():
+    """
+    Provides information about the scale of measurement assumption for the Wilcoxon signed-rank test.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Scale of Measurement Assumption:**
+        The test ranks the absolute differences by size, so the data must be at least ordinal and the differences must be meaningful to compare.
+        """)
+
+    with st.expander("Click for interpretation"):
+        st.write("""
+        **Interpreting Scale of Measurement:**
+        - **Data Are Interval or Ratio (or ordinal with meaningful differences):** Suitable for the Wilcoxon signed-rank test.
+        - **Data Are Nominal:** Not suitable. For paired binary data, consider McNemar's test instead.
+        """)
+
+#----------------------------
+#Check symmetry of the differences, zeros and ties
+#----------------------------
+
+@performance_tracking.timed
+def check_symmetry_of_differences(df, column_1, column_2=None, hypothesized_median=0):
+    """
+    Displays a histogram of the non-zero differences so the user can judge whether they are symmetric,
+    and reports the number of zero differences and ties, which decide whether the exact distribution can be used.
+
+    Args:
+    df (DataFrame): The dataframe containing the data.
+    column_1 (str): The first column (or the only column for a one-sample test).
+    column_2 (str, optional): The second column of paired data. Defaults to None (one-sample test).
+    hypothesized_median (float, optional): The hypothesized median for a one-sample test. Defaults to 0.
+
+    Returns:
+    None: Displays the histogram and summary in Streamlit.
+    """
+    with st.expander("Click for explanation"):
+        st.write("""
+        **Symmetry of the Differences:**
+        \nThe test assumes the differences are symmetrically distributed around their median. A histogram of the differences shows whether one tail is much longer than the other.
+        """)
+
+    with st.expander("Click for interpretation"):
+        st.write("""
+        **Interpreting the Histogram:**
+        - **Roughly Mirror Image Around the Centre:** The symmetry assumption is reasonable.
+        - **Strongly Skewed:** The test may not be appropriate. Consider the sign test, which does not assume symmetry.
+        """)
+
+    dict_signed_rank_data = rank_cache.get_signed_rank_data(df, column_1, column_2, hypothesized_median)
+    df_differences = pd.DataFrame({'Difference': dict_signed_rank_data['differences']})
+
+    with st.expander("Symmetry Check Results"):
+        histogram = alt.Chart(df_differences).mark_bar().encode(
+            x=alt.X('Difference:Q', bin=alt.Bin(maxbins=30)),
+            y='count()'
+        ).properties(
+            title='Distribution of the non-zero differences'
+        )
+        performance_tracking.altair_chart(histogram, use_container_width=True)
+
+        n = dict_signed_rank_data['n']
+        uses_exact = dict_signed_rank_data['tie_term'] == 0 and dict_signed_rank_data['n_zeros'] == 0 and n <= exact_distributions.WILCOXON_EXACT_MAX_N
+        st.write(f"""Non-zero differences: {n}. Zero differences dropped: {dict_signed_rank_data['n_zeros']}. Ties present: {'Yes' if dict_signed_rank_data['tie_term'] > 0 else 'No'}.
+        \nThe p-value will be calculated using the {'exact distribution' if uses_exact else 'tie-corrected normal approximation'}.""")
+        if n:
+            st.write(f"Median of the non-zero differences: {np.median(df_differences['Difference']):.3f}")
+
+#----------------------------
+#User inputs to confirm the assumptions that cannot be checked are true
+#----------------------------
+
+def confirm_wilcoxon_signed_rank_assumptions(one_sample=False):
+    """
+    Renders select boxes for the user to manually confirm the assumptions required for the Wilcoxon signed-rank test.
+
+    Args:
+    one_sample (bool, optional): True for the single sample version of the test. Defaults to False.
+
+    Returns:
+    bool: True if all manually checked assumptions are confirmed, False otherwise, None if no selection has been made.
+    """
+    st.subheader("Confirming remaining assumptions for the Wilcoxon signed-rank test")
+
+    default_option = "---"
+    options = [default_option, "Yes", "No"]
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        dependence_confirmation = st.selectbox(
+            "Confirm if the observations are independent:" if one_sample else "Confirm if the measurements are paired:",
+            options=options,
+            help="Each row should hold the measurements for one subject, and subjects should be independent of each other."
+        )
+
+    with col2:
+        scale_of_measurement_confirmation = st.selectbox(
+            "Confirm if the data are at least ordinal:",
+            options=options,
+            help="The differences must be meaningful to rank by size."
+        )
+
+    with col3:
+        symmetry_confirmation = st.selectbox(
+            "Confirm if the differences look roughly symmetric:",
+            options=options,
+            help="Based on the histogram of the differences."
+        )
+
+    if default_option in (dependence_confirmation, scale_of_measurement_confirmation, symmetry_confirmation):
+        return None
+    elif dependence_confirmation == "Yes" and scale_of_measurement_confirmation == "Yes" and symmetry_confirmation == "Yes":
+        st.success("All necessary assumptions for the Wilcoxon signed-rank test are confirmed.")
+        return True
+    else:
+        return False
+
+#----------------------------
+#Main functions to render the checks
+#----------------------------
+
+def render_assumption_checks_for_wilcoxon_signed_rank_test(df):
+    #display assumptions for this test
+    display_wilcoxon_signed_rank_test_assumptions()
+
+    #function for user to select the two paired samples
+    sample_1_col, sample_2_col = user_inputs.select_sample_columns(df)
+
+    tab1, tab2, tab3 = st.tabs(['Paired Data', 'Scale of Measurement', 'Symmetry of Differences'])
+
+    with tab1:
+        explain_paired_data_requirement()
+
+    with tab2:
+        explain_scale_of_measurement()
+
+    with tab3:
+        check_symmetry_of_differences(df, sample_1_col, sample_2_col)
+
+    bool_manual_check_assumptions = confirm_wilcoxon_signed_rank_assumptions()
+
+    return bool_manual_check_assumptions
+
+
+def render_assumption_checks_for_single_sample_wilcoxon_test(df):
+    #display assumptions for this test
+    display_wilcoxon_signed_rank_test_assumptions(one_sample=True)
+
+    #user selection for the data column and hypothesized median
+    selected_column, hypothesized_median = select_column_and_median_for_single_sample_wilcoxon(df)
+
+    tab1, tab2, tab3 = st.tabs(['Single Sample Data', 'Scale of Measurement', 'Symmetry of Differences'])
+
+    with tab1:
+        explain_paired_data_requirement(one_sample=True)
+
+    with tab2:
+        explain_scale_of_measurement()
+
+    with tab3:
+        check_symmetry_of_differences(df, selected_column, hypothesized_median=hypothesized_median)
+
+    bool_manual_check_assumptions = confirm_wilcoxon_signed_rank_assumptions(one_sample=True)
+
+    return bool_manual_check_assumptions